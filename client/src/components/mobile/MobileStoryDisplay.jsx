@@ -268,9 +268,9 @@ const MobileStoryDisplay = ({
                                         {/* Event Image */}
                                         {event.image_status && (
                                             <div className="mb-4 rounded-lg overflow-hidden">
-                                                {event.image_status === 'completed' && event.image_base64 ? (
+                                                {event.image_status === 'completed' && (event.image_url || event.image_base64) ? (
                                                     <img
-                                                        src={`data:image/png;base64,${event.image_base64}`}
+                                                        src={event.image_url || `data:image/png;base64,${event.image_base64}`}
                                                         alt={event.title || `Chapter ${index + 1}`}
                                                         className="w-full h-48 object-cover rounded-lg"
                                                     />
@@ -273,9 +273,9 @@ function StoryViewer() {
                     >
                         {story.has_images && (
                             <div className="w-full md:w-1/2 bg-slate-100 relative overflow-hidden flex items-center justify-center border-b md:border-b-0 md:border-r border-slate-200">
-                                {currentEvent.image_status === 'completed' && currentEvent.image_base64 ? (
+                                {currentEvent.image_status === 'completed' && (currentEvent.image_url || currentEvent.image_base64) ? (
                                     <img
-                                        src={`data:image/jpeg;base64,${currentEvent.image_base64}`}
+                                        src={currentEvent.image_url || `data:image/jpeg;base64,${currentEvent.image_base64}`}
                                         alt={`Scene ${currentEvent.event_number}`}
                                         className="w-full h-full object-cover"
                                     />
@@ -205,12 +205,25 @@ function VocabList() {
         setEmbeddingProgress('Generating embeddings...');
 
         try {
-            const res = await api.post('vocab/generate-embeddings/', {
+            let { data: job } = await api.post('vocab/generate-embeddings/', {
                 api_key: apiKey
             });
 
+            // The backfill runs in the background; poll until it finishes
+            while (job.status === 'queued' || job.status === 'running') {
+                setEmbeddingProgress(`Generating embeddings... ${job.progress}%`);
+                await new Promise(resolve => setTimeout(resolve, 2000));
+                ({ data: job } = await api.get(`vocab/generate-embeddings/${job.id}/`));
+            }
+
             setEmbeddingProgress(null);
-            alert(res.data.message || 'Embeddings generated successfully!');
+            if (job.status === 'failed') {
+                alert('Failed to generate embeddings: ' + (job.error || 'Unknown error'));
+            } else if (job.failed) {
+                alert(`Generated embeddings for ${job.processed} words; ${job.failed} failed and will be retried next time.`);
+            } else {
+                alert(`Embeddings are up to date (${job.processed} generated, ${job.unchanged} unchanged).`);
+            }
         } catch (err) {
             console.error('Failed to generate embeddings:', err);
             alert('Failed to generate embeddings: ' + (err.response?.data?.error || err.message));
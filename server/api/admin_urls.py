@@ -7,7 +7,7 @@ from .bulk_user_views import (
 from .analytics_views import (
     CohortAnalysisView, EngagementMetricsView, ChurnPredictionView, GrowthMetricsView
 )
-from .system_metrics_views import system_metrics
+from .system_metrics_views import system_metrics, job_queue_metrics, usage_log_metrics
 
 urlpatterns = [
     # Authentication
@@ -48,6 +48,8 @@ urlpatterns = [
     
     # Monitoring - Real System Metrics
     path('monitoring/health/', system_metrics, name='system-metrics'),
+    path('monitoring/jobs/', job_queue_metrics, name='job-queue-metrics'),
+    path('monitoring/usage-log/', usage_log_metrics, name='usage-log-metrics'),
     path('audit-logs/', admin_views.AdminAuditLogView.as_view(), name='admin-audit-logs'),
     path('error-logs/', admin_views.AdminErrorLogListView.as_view(), name='admin-error-logs'),
     
@@ -157,6 +157,7 @@ class AdminUserDetailView(views.APIView):
 
 from .models import Vocabulary, GrammarTopic
 from .advanced_text_models import GeneratedContent
+from .services.generated_images import with_image_urls
 from .serializers import VocabularySerializer, GrammarTopicSerializer
 
 class AdminVocabularyListView(views.APIView):
@@ -186,7 +187,9 @@ class AdminGeneratedContentListView(views.APIView):
     pagination_class = StandardResultsSetPagination
 
     def get(self, request):
-        queryset = GeneratedContent.objects.all().order_by('-created_at')
+        queryset = GeneratedContent.objects.select_related('user').only(
+            'id', 'title', 'content_type', 'created_at', 'user__username'
+        ).order_by('-created_at')
         paginator = self.pagination_class()
         page = paginator.paginate_queryset(queryset, request)
         # Simple serialization for list
@@ -199,7 +202,7 @@ class AdminGeneratedContentDetailView(views.APIView):
     def get(self, request, pk):
         try:
             content = GeneratedContent.objects.get(pk=pk)
-            return Response({'id': content.id, 'title': content.title, 'content': content.content_data})
+            return Response({'id': content.id, 'title': content.title, 'content': with_image_urls(content.content_data)})
         except GeneratedContent.DoesNotExist:
             return Response({'error': 'Content not found'}, status=status.HTTP_404_NOT_FOUND)
 
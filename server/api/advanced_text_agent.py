@@ -72,29 +72,7 @@ class AdvancedTextAgent:
         """
         prompt = self._build_story_prompt(params)
         response = self._call_gemini(prompt)
-        structured_data = self._parse_json_response(response)
-        
-        # Highlight vocabulary in content
-        structured_data = self._highlight_vocabulary_in_story(
-            structured_data,
-            params.get('selected_words', [])
-        )
-        
-        # Enforce character consistency if images are requested
-        if params.get('generate_images', False) and 'events' in structured_data:
-            logger.info("Enforcing character consistency for generated story")
-            structured_data['events'] = self.consistency_enforcer.enforce_consistency(
-                structured_data['events']
-            )
-            
-            # Add metadata about image generation
-            structured_data['image_generation_metadata'] = {
-                'total_images': len(structured_data['events']),
-                'art_style': 'digital_illustration_professional', # Default
-                'generated_for_level': params.get('level', 'B1')
-            }
-        
-        return structured_data
+        return self.finish('story', response, params)
     
     def generate_article(self, params: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -108,15 +86,7 @@ class AdvancedTextAgent:
         """
         prompt = self._build_article_prompt(params)
         response = self._call_gemini(prompt)
-        structured_data = self._parse_json_response(response)
-        
-        # Highlight vocabulary in content
-        structured_data = self._highlight_vocabulary_in_article(
-            structured_data,
-            params.get('selected_words', [])
-        )
-        
-        return structured_data
+        return self.finish('article', response, params)
     
     def generate_dialogue(self, params: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -130,13 +100,47 @@ class AdvancedTextAgent:
         """
         prompt = self._build_dialogue_prompt(params)
         response = self._call_gemini(prompt)
+        return self.finish('dialogue', response, params)
+    
+    def build_prompt(self, content_type: str, params: Dict[str, Any]) -> str:
+        """Prompt for a story, article or dialogue (for callers that stream the AI call)"""
+        builders = {
+            'story': self._build_story_prompt,
+            'article': self._build_article_prompt,
+            'dialogue': self._build_dialogue_prompt,
+        }
+        return builders[content_type](params)
+    
+    def finish(self, content_type: str, response: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Turn the raw AI response into structured content: parse the JSON,
+        highlight vocabulary and, for illustrated stories, enforce character
+        consistency.
+        """
         structured_data = self._parse_json_response(response)
+        selected_words = params.get('selected_words', [])
+        
+        if content_type == 'article':
+            return self._highlight_vocabulary_in_article(structured_data, selected_words)
+        if content_type == 'dialogue':
+            return self._highlight_vocabulary_in_dialogue(structured_data, selected_words)
         
         # Highlight vocabulary in content
-        structured_data = self._highlight_vocabulary_in_dialogue(
-            structured_data,
-            params.get('selected_words', [])
-        )
+        structured_data = self._highlight_vocabulary_in_story(structured_data, selected_words)
+        
+        # Enforce character consistency if images are requested
+        if params.get('generate_images', False) and 'events' in structured_data:
+            logger.info("Enforcing character consistency for generated story")
+            structured_data['events'] = self.consistency_enforcer.enforce_consistency(
+                structured_data['events']
+            )
+            
+            # Add metadata about image generation
+            structured_data['image_generation_metadata'] = {
+                'total_images': len(structured_data['events']),
+                'art_style': 'digital_illustration_professional', # Default
+                'generated_for_level': params.get('level', 'B1')
+            }
         
         return structured_data
     
@@ -13,8 +13,13 @@ from django.shortcuts import get_object_or_404
 from .advanced_text_models import GeneratedContent
 from .advanced_text_agent import AdvancedTextAgent
 from .image_generation_agent import ImageGenerationAgent
+from .services.generated_images import (
+    IMAGE_PROGRESS_FIELDS, apply_image_result, offload_content_images, with_image_urls,
+)
 from .models import Vocabulary
 from .hlr import HLRScheduler
+from .unified_ai import stream_ai_content
+from .sse import generation_events, sse_response
 from django.utils import timezone
 import random
 import json
@@ -63,6 +68,171 @@ def _get_hlr_words(user, limit=10):
     return selected
 
 
+def _build_generation_params(request):
+    """
+    Validate a generate_advanced_text request and build the agent parameters.
+    Returns (params, None), or (None, error_response).
+    """
+    # Validate request data
+    content_type = request.data.get('content_type')
+    if content_type not in ['story', 'article', 'dialogue']:
+        return None, Response(
+            {'error': 'Invalid content_type. Must be story, article, or dialogue'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    topic = request.data.get('topic')
+    if not topic:
+        return None, Response(
+            {'error': 'Topic is required'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    level = request.data.get('student_level', 'B1')
+    if level not in ['A1', 'A2', 'B1', 'B2', 'C1', 'C2']:
+        return None, Response(
+            {'error': 'Invalid student_level'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    # Check if user has any AI capability (gateway keys OR legacy key)
+    from .unified_ai import get_ai_status
+    ai_status = get_ai_status(request.user)
+    
+    if not ai_status['has_gateway_keys'] and not ai_status['has_legacy_key']:
+        return None, Response(
+            {'error': 'No API keys available. Add a key in Settings or AI Gateway.'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    # Handle vocabulary selection
+    vocab_selection = request.data.get('vocabulary_selection', 'random')
+    selected_words = []
+    
+    if vocab_selection == 'manual':
+        word_ids = request.data.get('selected_words', [])
+        if word_ids:
+            vocab_objects = Vocabulary.objects.filter(
+                id__in=word_ids,
+                user=request.user
+            )
+            selected_words = [v.word for v in vocab_objects]
+    elif vocab_selection == 'hlr':
+        selected_words = _get_hlr_words(request.user, limit=10)
+    
+    # Prepare parameters for agent
+    generate_images = request.data.get('generate_images', False)
+    
+    # Common parameters
+    params = {
+        'content_type': content_type,
+        'topic': topic,
+        'level': level,
+        'target_language': request.data.get('target_language', 'de'),
+        'vocabulary_selection': vocab_selection,
+        'selected_words': selected_words,
+        'grammar_selection': request.data.get('grammar_selection', 'random'),
+        'selected_grammar': request.data.get('selected_grammar', []),
+        'grammar_focus': request.data.get('grammar_focus', ''),
+        'instructor_notes': request.data.get('instructor_notes', ''),
+        'word_count': request.data.get('word_count', 300),
+        'generate_images': generate_images,
+    }
+
+    # Story specific parameters
+    if content_type == 'story':
+        params.update({
+            'genre': request.data.get('genre', 'General'),
+            'plot_type': request.data.get('plot_type', 'Standard'),
+            'setting': request.data.get('setting', ''),
+            'characters': request.data.get('characters', []), # List of {name, role, traits}
+        })
+
+    # Dialogue specific parameters
+    elif content_type == 'dialogue':
+        params.update({
+            'scenario': request.data.get('scenario', ''),
+            'tone': request.data.get('tone', 'Neutral'),
+            'speakers': request.data.get('speakers', []), # List of {name, personality}
+        })
+
+    # Article specific parameters
+    elif content_type == 'article':
+        params.update({
+            'article_style': request.data.get('article_style', 'Informative'), # News, Blog, etc.
+            'structure_type': request.data.get('structure_type', 'Standard'),
+        })
+    
+    # Get native language from user profile for translations
+    native_language = 'en'
+    try:
+        native_language = request.user.profile.native_language
+    except:
+        pass
+    
+    params['native_language'] = native_language
+    return params, None
+
+
+def _save_generated_content(user, params, result):
+    """Save generated content and return the response body (with its id)."""
+    content_type = params['content_type']
+    native_language = params['native_language']
+    
+    # Calculate total words
+    total_words = _count_words_in_content(result, content_type)
+    
+    # Extract vocabulary and grammar used
+    vocab_used = _extract_vocabulary_used(result, content_type)
+    grammar_used = _extract_grammar_used(result, content_type)
+    
+    # Prepare image generation fields
+    has_images = False
+    image_status = 'none'
+    total_images = 0
+    
+    if params['generate_images'] and content_type == 'story' and 'events' in result:
+        has_images = True
+        image_status = 'pending'
+        total_images = len(result['events'])
+        
+        # Initialize image fields in events
+        for event in result['events']:
+            event['image_status'] = 'pending'
+            event['image_url'] = None
+            event['image_base64'] = None
+            event['image_provider'] = None
+    
+    # Save to database with language pair
+    generated_content = GeneratedContent.objects.create(
+        user=user,
+        content_type=content_type,
+        title=result.get('title', params['topic']),
+        topic=params['topic'],
+        level=params['level'],
+        target_language=params['target_language'],
+        native_language=native_language,
+        content_data=result,
+        total_words=total_words,
+        vocabulary_used=vocab_used,
+        grammar_used=grammar_used,
+        has_images=has_images,
+        image_generation_status=image_status,
+        total_images_count=total_images
+    )
+    
+    # Return result with ID
+    return {
+        'id': generated_content.id,
+        'content': result,
+        'total_words': total_words,
+        'vocabulary_used': vocab_used,
+        'grammar_used': grammar_used,
+        'has_images': has_images,
+        'image_generation_status': image_status
+    }
+
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 @ratelimit(key='user', rate='10/h', block=True)
@@ -71,107 +241,15 @@ def generate_advanced_text(request):
     Generate educational content (story/article/dialogue) using AI
     """
     try:
-        # Validate request data
-        content_type = request.data.get('content_type')
-        if content_type not in ['story', 'article', 'dialogue']:
-            return Response(
-                {'error': 'Invalid content_type. Must be story, article, or dialogue'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        
-        topic = request.data.get('topic')
-        if not topic:
-            return Response(
-                {'error': 'Topic is required'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        
-        level = request.data.get('student_level', 'B1')
-        if level not in ['A1', 'A2', 'B1', 'B2', 'C1', 'C2']:
-            return Response(
-                {'error': 'Invalid student_level'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        
-        # Check if user has any AI capability (gateway keys OR legacy key)
-        from .unified_ai import get_ai_status
-        ai_status = get_ai_status(request.user)
-        
-        if not ai_status['has_gateway_keys'] and not ai_status['has_legacy_key']:
-            return Response(
-                {'error': 'No API keys available. Add a key in Settings or AI Gateway.'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        
-        # Handle vocabulary selection
-        vocab_selection = request.data.get('vocabulary_selection', 'random')
-        selected_words = []
-        
-        if vocab_selection == 'manual':
-            word_ids = request.data.get('selected_words', [])
-            if word_ids:
-                vocab_objects = Vocabulary.objects.filter(
-                    id__in=word_ids,
-                    user=request.user
-                )
-                selected_words = [v.word for v in vocab_objects]
-        elif vocab_selection == 'hlr':
-            selected_words = _get_hlr_words(request.user, limit=10)
-        
-        # Prepare parameters for agent
-        generate_images = request.data.get('generate_images', False)
-        
-        # Common parameters
-        params = {
-            'content_type': content_type,
-            'topic': topic,
-            'level': level,
-            'target_language': request.data.get('target_language', 'de'),
-            'vocabulary_selection': vocab_selection,
-            'selected_words': selected_words,
-            'grammar_selection': request.data.get('grammar_selection', 'random'),
-            'selected_grammar': request.data.get('selected_grammar', []),
-            'grammar_focus': request.data.get('grammar_focus', ''),
-            'instructor_notes': request.data.get('instructor_notes', ''),
-            'word_count': request.data.get('word_count', 300),
-            'generate_images': generate_images,
-        }
-
-        # Story specific parameters
-        if content_type == 'story':
-            params.update({
-                'genre': request.data.get('genre', 'General'),
-                'plot_type': request.data.get('plot_type', 'Standard'),
-                'setting': request.data.get('setting', ''),
-                'characters': request.data.get('characters', []), # List of {name, role, traits}
-            })
-
-        # Dialogue specific parameters
-        elif content_type == 'dialogue':
-            params.update({
-                'scenario': request.data.get('scenario', ''),
-                'tone': request.data.get('tone', 'Neutral'),
-                'speakers': request.data.get('speakers', []), # List of {name, personality}
-            })
-
-        # Article specific parameters
-        elif content_type == 'article':
-            params.update({
-                'article_style': request.data.get('article_style', 'Informative'), # News, Blog, etc.
-                'structure_type': request.data.get('structure_type', 'Standard'),
-            })
+        params, error_response = _build_generation_params(request)
+        if error_response:
+            return error_response
         
         # Initialize agent with user for Gateway multi-key fallback
-        # Get native language from user profile for translations
-        native_language = 'en'
-        try:
-            native_language = request.user.profile.native_language
-        except:
-            pass
-        
-        agent = AdvancedTextAgent(request.user, native_language=native_language)
+        agent = AdvancedTextAgent(request.user, native_language=params['native_language'])
         
         # Generate content based on type
+        content_type = params['content_type']
         if content_type == 'story':
             result = agent.generate_story(params)
         elif content_type == 'article':
@@ -179,58 +257,10 @@ def generate_advanced_text(request):
         elif content_type == 'dialogue':
             result = agent.generate_dialogue(params)
         
-        # Calculate total words
-        total_words = _count_words_in_content(result, content_type)
-        
-        # Extract vocabulary and grammar used
-        vocab_used = _extract_vocabulary_used(result, content_type)
-        grammar_used = _extract_grammar_used(result, content_type)
-        
-        # Prepare image generation fields
-        has_images = False
-        image_status = 'none'
-        total_images = 0
-        
-        if generate_images and content_type == 'story' and 'events' in result:
-            has_images = True
-            image_status = 'pending'
-            total_images = len(result['events'])
-            
-            # Initialize image fields in events
-            for event in result['events']:
-                event['image_status'] = 'pending'
-                event['image_url'] = None
-                event['image_base64'] = None
-                event['image_provider'] = None
-        
-        # Save to database with language pair
-        generated_content = GeneratedContent.objects.create(
-            user=request.user,
-            content_type=content_type,
-            title=result.get('title', topic),
-            topic=topic,
-            level=level,
-            target_language=params['target_language'],
-            native_language=native_language,
-            content_data=result,
-            total_words=total_words,
-            vocabulary_used=vocab_used,
-            grammar_used=grammar_used,
-            has_images=has_images,
-            image_generation_status=image_status,
-            total_images_count=total_images
+        return Response(
+            _save_generated_content(request.user, params, result),
+            status=status.HTTP_201_CREATED
         )
-        
-        # Return result with ID
-        return Response({
-            'id': generated_content.id,
-            'content': result,
-            'total_words': total_words,
-            'vocabulary_used': vocab_used,
-            'grammar_used': grammar_used,
-            'has_images': has_images,
-            'image_generation_status': image_status
-        }, status=status.HTTP_201_CREATED)
     
     except Exception as e:
         logger.error(f"Generation failed: {str(e)}")
@@ -240,6 +270,43 @@ def generate_advanced_text(request):
         )
 
 
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+@ratelimit(key='user', rate='10/h', group='api.advanced_text_views.generate_advanced_text', block=True)  # Shares generate_advanced_text's budget
+def generate_advanced_text_stream(request):
+    """
+    Streaming variant of generate_advanced_text (Server-Sent Events).
+    Token events carry the raw JSON as it is written; the done event has the
+    same body as generate_advanced_text's 201 response, after the content
+    is parsed and saved.
+    """
+    try:
+        params, error_response = _build_generation_params(request)
+    except Exception as e:
+        logger.error(f"Generation failed: {str(e)}")
+        return Response(
+            {'error': f'Generation failed: {str(e)}'},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+    if error_response:
+        return error_response
+    
+    agent = AdvancedTextAgent(request.user, native_language=params['native_language'])
+    content_type = params['content_type']
+    stream = stream_ai_content(
+        request.user,
+        agent.build_prompt(content_type, params),
+        max_tokens=agent.generation_config['max_output_tokens'],
+        temperature=agent.generation_config['temperature'],
+    )
+    
+    def on_done(text):
+        result = agent.finish(content_type, text, params)
+        return _save_generated_content(request.user, params, result)
+    
+    return sse_response(generation_events(stream, on_done))
+
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def list_generated_content(request):
@@ -270,7 +337,11 @@ def list_generated_content(request):
     if favorites_only == 'true':
         queryset = queryset.filter(is_favorite=True)
     
-    # Serialize data
+    # Serialize data (content_data can hold whole stories; never load it here)
+    queryset = queryset.only(
+        'id', 'content_type', 'title', 'topic', 'level', 'total_words', 'is_favorite',
+        'view_count', 'created_at', 'has_images', 'image_generation_status',
+    )
     data = []
     for content in queryset:
         data.append({
@@ -310,7 +381,7 @@ def get_generated_content(request, pk):
         'topic': content.topic,
         'level': content.level,
         'target_language': content.target_language,
-        'content_data': content.content_data,
+        'content_data': with_image_urls(content.content_data),
         'total_words': content.total_words,
         'vocabulary_used': content.vocabulary_used,
         'grammar_used': content.grammar_used,
@@ -349,6 +420,7 @@ def update_generated_content(request, pk):
     if 'content_data' in request.data:
         # Validate structure if needed, or just trust the teacher/frontend
         content.content_data = request.data['content_data']
+        offload_content_images(content.content_data)  # Clients may echo back inline images
         
         # Recalculate meta-data
         content.total_words = _count_words_in_content(content.content_data, content.content_type)
@@ -421,14 +493,12 @@ def get_image_generation_status(request, pk):
         # Update status to generating
         event_to_process['image_status'] = 'generating'
         content.image_generation_status = 'generating'
-        content.save()
+        content.save(update_fields=IMAGE_PROGRESS_FIELDS)
         
         # Trigger generation (Synchronous for this request)
         try:
-            agent = ImageGenerationAgent(
-                horde_api_key=request.user.profile.stable_horde_api_key,
-                hf_api_token=request.user.profile.huggingface_api_token
-            )
+            # UserProfile.huggingface_api_token was removed; the agent reads HUGGINGFACE_API_TOKEN
+            agent = ImageGenerationAgent(horde_api_key=request.user.profile.stable_horde_api_key)
             prompt = event_to_process.get('image_prompt', {}).get('positive_prompt')
             negative_prompt = event_to_process.get('image_prompt', {}).get('negative_prompt', '')
             
@@ -436,10 +506,7 @@ def get_image_generation_status(request, pk):
                 result = agent.generate_image(prompt, negative_prompt)
                 
                 if result['success']:
-                    event_to_process['image_status'] = 'completed'
-                    event_to_process['image_base64'] = result.get('image_base64')
-                    event_to_process['image_url'] = result.get('image_url')
-                    event_to_process['image_provider'] = result.get('provider')
+                    apply_image_result(event_to_process, result)
                     
                     content.images_generated_count += 1
                     
@@ -485,14 +552,14 @@ def get_image_generation_status(request, pk):
                 content.image_generation_status = 'partial'
                 logger.info(f"Partial success for content {content.id}: {len(completed)}/{len(events)} completed")
         
-        content.save()
+        content.save(update_fields=IMAGE_PROGRESS_FIELDS)
         logger.info(f"Image status update: {content.image_generation_status}, Generated: {content.images_generated_count}/{content.total_images_count}")
         
     return Response({
         'status': content.image_generation_status,
         'images_generated': content.images_generated_count,
         'total_images': content.total_images_count,
-        'events': content.content_data.get('events', [])
+        'events': with_image_urls(content.content_data).get('events', [])
     })
 
 
@@ -515,7 +582,7 @@ def retry_image_generation(request, pk, event_number):
     # Reset status to pending so next poll picks it up
     target_event['image_status'] = 'pending'
     content.image_generation_status = 'generating' # Ensure polling continues
-    content.save()
+    content.save(update_fields=IMAGE_PROGRESS_FIELDS)
     
     return Response({
         'status': 'queued',
@@ -562,6 +629,8 @@ def delete_generated_content(request, pk):
 def save_material(request):
     """Save content from Reader or other sources to Studio library"""
     data = request.data
+    content_data = data.get('content_data', {})
+    offload_content_images(content_data)  # Imported stories may carry inline images
     
     content = GeneratedContent.objects.create(
         user=request.user,
@@ -570,7 +639,7 @@ def save_material(request):
         topic=data.get('topic', 'Imported'),
         level=data.get('level', 'B1'),
         target_language=request.user.studentprofile.target_language if hasattr(request.user, 'studentprofile') else 'en',
-        content_data=data.get('content_data', {}),
+        content_data=content_data,
         total_words=0 # Will be calculated if needed
     )
     
@@ -1,13 +1,17 @@
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from typing import TypedDict, List, Optional, Dict, Any
 import json
 try:
     import json_repair
 except ImportError:
     json_repair = None
+from django.db import connection
 from langgraph.graph import StateGraph, END
 from pydantic import BaseModel, Field
 from .language_service import LanguageService
+from .graph_checkpoint import get_agent_graph_config, get_checkpointer, reuse_node_output
 
 # Define the state of the exam generation
 class ExamState(TypedDict):
@@ -28,6 +32,10 @@ class ExamState(TypedDict):
     critique_passed: bool
     revision_count: int
     
+    # Section fan-out mode: sections awaiting critique, and failing ones
+    pending_sections: Optional[List[int]]
+    section_critiques: Optional[List[Dict[str, Any]]]
+    
     # Final output
     final_exam: Optional[Dict[str, Any]]
     logs: List[str]
@@ -36,11 +44,12 @@ class ExamState(TypedDict):
 def call_ai(user, prompt: str) -> str:
     """Call AI through unified_ai Gateway with full logging and failover."""
     from .unified_ai import generate_ai_content
-    response = generate_ai_content(user, prompt, max_tokens=4096, temperature=0.7)
+    response = generate_ai_content(user, prompt, max_tokens=4096, temperature=0.7, hedge=True)
     return response.text
 
 # --- Nodes ---
 
+@reuse_node_output('exam_analyzer', ['topic', 'level', 'target_language'], required='topic_analysis')
 def analyzer_node(state: ExamState, config):
     """
     Analyzer Node: Deeply analyzes the topic to identify key concepts and misconceptions.
@@ -69,6 +78,11 @@ def analyzer_node(state: ExamState, config):
         "logs": state.get("logs", []) + ["Topic analyzed."]
     }
 
+@reuse_node_output(
+    'exam_planner',
+    ['topic', 'level', 'topic_analysis', 'question_types', 'vocab_list', 'grammar_list', 'notes'],
+    required='exam_plan',
+)
 def planner_node(state: ExamState, config):
     """
     Planning Node: Decides the structure of the exam based on inputs and analysis.
@@ -334,16 +348,282 @@ def refiner_node(state: ExamState, config):
         }
     except Exception as e:
         return {"logs": state.get("logs", []) + [f"Refinement failed: {str(e)}"]}
+# --- Section fan-out nodes ---
+# One LLM call per planned section, run concurrently. The critic reviews
+# sections independently and the refiner only rewrites the failing ones.
+
+SECTION_EXAMPLES = {
+    "reading": {
+        "type": "reading",
+        "instruction": "Read the text below and answer the multiple-choice questions that follow.",
+        "text": "Last summer, Maria and her family went to Italy for vacation. They visited Rome, Florence, and Venice...",
+        "questions": [{
+            "question": "Where did Maria's family go on vacation?",
+            "options": ["Spain", "France", "Italy", "Greece"],
+            "correct_index": 2,
+            "explanation": "The text states 'Maria and her family went to Italy for vacation.'"
+        }]
+    },
+    "cloze": {
+        "type": "cloze",
+        "instruction": "Complete the text with the most appropriate word from the options provided for each blank.",
+        "text": "I [blank] to the airport yesterday. The flight [blank] at 3 PM.",
+        "blanks": [
+            {"id": 1, "answer": "went", "options": ["go", "went", "going", "goes"]},
+            {"id": 2, "answer": "was", "options": ["is", "was", "were", "be"]}
+        ]
+    },
+    "multiple_choice": {
+        "type": "multiple_choice",
+        "instruction": "Choose the correct option to complete each sentence.",
+        "questions": [{
+            "question": "I _____ to Paris last year.",
+            "options": ["go", "went", "going", "goes"],
+            "correct_index": 1,
+            "explanation": "Past simple tense is used for completed actions in the past."
+        }]
+    },
+    "matching": {
+        "type": "matching",
+        "instruction": "Match each word on the left with its corresponding definition on the right.",
+        "pairs": [
+            {"left": "Airport", "right": "A place where planes take off and land"},
+            {"left": "Passport", "right": "A document for international travel"}
+        ]
+    },
+}
+
+SECTION_RULES = {
+    "reading": "Include a {lang} passage of 80-150 words and {count} questions with 4 options each.",
+    "cloze": "Use [blank] in the text and provide {count} blanks with 3-4 {lang} options each.",
+    "multiple_choice": "Write {count} questions with 4 {lang} options each.",
+    "matching": "Include {count} pairs (between 4 and 6) in {lang}.",
+}
+
+
+def _language_name(state: ExamState) -> str:
+    target_lang = state.get('target_language', 'German')
+    return {'de': 'German', 'en': 'English', 'ar': 'Arabic', 'ru': 'Russian'}.get(target_lang, target_lang)
+
+
+def _parse_json(response_text: str) -> Any:
+    """Parse an LLM JSON reply, tolerating code fences and surrounding prose."""
+    if json_repair:
+        return json_repair.loads(response_text)
+    text = response_text.replace('```json', '').replace('```', '').strip()
+    start_idx = text.find('{')
+    end_idx = text.rfind('}') + 1
+    if start_idx >= 0 and end_idx > start_idx:
+        text = text[start_idx:end_idx]
+    return json.loads(text)
+
+
+def _run_sections(func, items: List[Any]) -> List[Any]:
+    """
+    Map ``func`` over ``items`` on a bounded thread pool, keeping order.
+    At most EXAM_SECTION_CONCURRENCY gateway calls are in flight per exam.
+    A failing item yields its exception instead of a result.
+    """
+    def run_one(item):
+        try:
+            return func(item)
+        except Exception as e:
+            return e
+        finally:
+            connection.close()  # Pool threads end with the node; don't strand their connections
+
+    workers = max(1, min(get_agent_graph_config()['EXAM_SECTION_CONCURRENCY'], len(items)))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='exam-section') as pool:
+        return list(pool.map(run_one, items))
+
+
+def section_generator_node(state: ExamState, config):
+    """
+    Generator Node (fan-out): Creates each planned section with its own call.
+    Falls back to the single-call generator when the plan has no sections.
+    """
+    user = config['configurable'].get('user')
+    
+    plan = state.get('exam_plan') or {}
+    sections = plan.get('sections') if isinstance(plan, dict) else None
+    if not sections:
+        return generator_node(state, config)
+    
+    lang_name = _language_name(state)
+    
+    def generate(section):
+        section_type = section.get('type', 'multiple_choice')
+        if section_type not in SECTION_EXAMPLES:
+            section_type = 'multiple_choice'
+        count = section.get('count', 5)
+        prompt = f"""
+    You are a Senior Cambridge/Goethe Examiner. Write ONE section of a {lang_name} language exam.
+    
+    Topic: {state['topic']}
+    Level: {state['level']}
+    Section type: {section_type}
+    Section focus: {section.get('focus', state['topic'])}
+    Vocab: {state.get('vocab_list')}
+    Grammar: {state.get('grammar_list')}
+    
+    Return a JSON object with this EXACT structure (example content shortened):
+    {json.dumps(SECTION_EXAMPLES[section_type])}
+    
+    RULES:
+    1. {SECTION_RULES[section_type].format(lang=lang_name, count=count)}
+    2. Generate REAL content in {lang_name} - not placeholders or "..."
+    3. Questions must be appropriate for {state['level']} level {lang_name} learners
+    4. Return ONLY valid JSON - no markdown, no code blocks, no explanations
+    """
+        data = _parse_json(call_ai(user, prompt))
+        if not isinstance(data, dict):
+            raise ValueError(f"{section_type} section is not a JSON object")
+        data.setdefault('type', section_type)
+        return data
+    
+    results = _run_sections(generate, sections)
+    generated = [r for r in results if isinstance(r, dict)]
+    errors = [r for r in results if isinstance(r, Exception)]
+    
+    if not generated:
+        return generator_node(state, config)
+    
+    types = ', '.join(dict.fromkeys(s['type'] for s in generated))
+    exam_data = {
+        "title": f"{state['topic']} ({state['level']})",
+        "description": f"{lang_name} exam on {state['topic']}: {types}",
+        "sections": generated,
+    }
+    logs = [f"Drafted {len(generated)}/{len(sections)} sections in parallel."]
+    if errors:
+        logs.append(f"Skipped {len(errors)} sections: {str(errors[0])[:50]}")
+    return {
+        "draft_questions": generated,
+        "final_exam": exam_data,
+        "pending_sections": list(range(len(generated))),
+        "section_critiques": [],
+        "logs": state.get("logs", []) + logs
+    }
+
+
+def section_critic_node(state: ExamState, config):
+    """
+    Critic Node (fan-out): Reviews each new or refined section on its own.
+    """
+    user = config['configurable'].get('user')
+    
+    exam = state['final_exam']
+    sections = exam.get('sections', [])
+    pending = state.get('pending_sections')
+    if pending is None:
+        pending = list(range(len(sections)))
+    
+    def critique(index):
+        prompt = f"""
+    You are a Quality Assurance Specialist for Language Exams.
+    Critique this exam section for a {state['level']} student. The exam topic is "{state['topic']}".
+    
+    Section:
+    {json.dumps(sections[index])}
+    
+    Check for:
+    1. Is the difficulty appropriate for {state['level']}?
+    2. Are the instructions clear?
+    3. Are the distractors reasonable and not obvious?
+    4. Does it cover the requested topic?
+    5. Is the JSON structure valid and complete?
+    
+    If it's good, output "PASSED".
+    If it needs changes, output "FAILED: <reason>" and suggest specific fixes.
+    """
+        return call_ai(user, prompt)
+    
+    results = _run_sections(critique, pending)
+    # A critic call that errored counts as passed; the section itself is intact
+    failing = [
+        {"index": index, "critique": result}
+        for index, result in zip(pending, results)
+        if isinstance(result, str) and "PASSED" not in result
+    ]
+    summary = "PASSED" if not failing else "\n".join(
+        f"Section {f['index'] + 1}: {f['critique']}" for f in failing
+    )
+    
+    return {
+        "critique": summary,
+        "critique_passed": not failing,
+        "section_critiques": failing,
+        "logs": state.get("logs", []) + [
+            f"Critique: {len(pending) - len(failing)}/{len(pending)} sections passed."
+        ]
+    }
+
+
+def section_refiner_node(state: ExamState, config):
+    """
+    Refiner Node (fan-out): Rewrites only the sections that failed critique.
+    """
+    user = config['configurable'].get('user')
+    
+    exam = dict(state['final_exam'])
+    sections = list(exam.get('sections', []))
+    failing = state.get('section_critiques') or []
+    
+    def refine(item):
+        prompt = f"""
+    You are a Senior Editor. Fix the following exam section based on the critique.
+    
+    Critique: {item['critique']}
+    
+    Current Section:
+    {json.dumps(sections[item['index']])}
+    
+    Output the corrected JSON object for this section only. Return valid JSON only.
+    """
+        data = _parse_json(call_ai(user, prompt))
+        if not isinstance(data, dict):
+            raise ValueError("Refined section is not a JSON object")
+        return data
+    
+    results = _run_sections(refine, failing)
+    refined = []
+    for item, result in zip(failing, results):
+        if isinstance(result, dict):
+            sections[item['index']] = result
+            refined.append(item['index'])
+    exam['sections'] = sections
+    
+    return {
+        "final_exam": exam,
+        # Sections whose refine failed stay pending so the critic reviews them again
+        "pending_sections": [item['index'] for item in failing],
+        "revision_count": state.get("revision_count", 0) + 1,
+        "logs": state.get("logs", []) + [f"Refined {len(refined)}/{len(failing)} sections."]
+    }
+
 # --- Graph Construction ---
 
-def build_exam_graph():
+def build_exam_graph(checkpointer=None, fan_out=None):
+    """
+    fan_out generates, critiques and refines sections independently
+    (defaults to AGENT_GRAPHS['EXAM_SECTION_FAN_OUT']). Node names are the
+    same in both modes, so checkpoints resume either way.
+    """
+    if fan_out is None:
+        fan_out = get_agent_graph_config()['EXAM_SECTION_FAN_OUT']
+    
     workflow = StateGraph(ExamState)
     
     workflow.add_node("analyzer", analyzer_node)
     workflow.add_node("planner", planner_node)
-    workflow.add_node("generator", generator_node)
-    workflow.add_node("critic", critic_node)
-    workflow.add_node("refiner", refiner_node)
+    if fan_out:
+        workflow.add_node("generator", section_generator_node)
+        workflow.add_node("critic", section_critic_node)
+        workflow.add_node("refiner", section_refiner_node)
+    else:
+        workflow.add_node("generator", generator_node)
+        workflow.add_node("critic", critic_node)
+        workflow.add_node("refiner", refiner_node)
     
     workflow.set_entry_point("analyzer")
     
@@ -364,4 +644,17 @@ def build_exam_graph():
     
     workflow.add_edge("refiner", "critic")
     
-    return workflow.compile()
+    return workflow.compile(checkpointer=checkpointer)
+
+
+_exam_graph = None
+_exam_graph_lock = threading.Lock()
+
+
+def get_exam_graph():
+    """Compiled exam graph with the database checkpointer, built once per process."""
+    global _exam_graph
+    with _exam_graph_lock:
+        if _exam_graph is None:
+            _exam_graph = build_exam_graph(checkpointer=get_checkpointer())
+        return _exam_graph
@@ -1,4 +1,5 @@
 import os
+import threading
 from typing import TypedDict, List, Optional, Dict, Any
 import json
 try:
@@ -8,6 +9,7 @@ except ImportError:
 from langgraph.graph import StateGraph, END
 from .unified_ai import generate_ai_content
 from .models import PodcastCategory
+from .graph_checkpoint import get_checkpointer
 
 # --- Imports ---
 from .services.podcast.showrunner_agent import ShowrunnerAgent
@@ -61,7 +63,8 @@ def call_ai(user_id, prompt: str, max_tokens=2048, json_mode=False, tools=None)
             max_tokens=max_tokens, 
             temperature=0.7, 
             json_mode=json_mode,
-            tools=tools
+            tools=tools,
+            hedge=True
         )
         if json_mode:
             text = response.text.strip()
@@ -327,7 +330,7 @@ def structure_repair_node(state: PodcastState):
     }
 
 # --- Graph ---
-def build_podcast_graph():
+def build_podcast_graph(checkpointer=None):
     workflow = StateGraph(PodcastState)
     
     workflow.add_node("setup", setup_node)
@@ -368,4 +371,17 @@ def build_podcast_graph():
     workflow.add_conditional_edges("critic", check_critique, {END: END, "refiner": "refiner"})
     workflow.add_edge("refiner", "critic")
     
-    return workflow.compile()
+    return workflow.compile(checkpointer=checkpointer)
+
+
+_podcast_graph = None
+_podcast_graph_lock = threading.Lock()
+
+
+def get_podcast_graph():
+    """Compiled podcast graph with the database checkpointer, built once per process."""
+    global _podcast_graph
+    with _podcast_graph_lock:
+        if _podcast_graph is None:
+            _podcast_graph = build_podcast_graph(checkpointer=get_checkpointer())
+        return _podcast_graph
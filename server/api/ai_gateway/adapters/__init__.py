@@ -1,6 +1,6 @@
 """Adapters package for AI Gateway."""
 
-from .base import BaseAdapter, AdapterResponse
+from .base import BaseAdapter, AdapterResponse, StreamEvent
 from .gemini import GeminiAdapter
 from .groq import GroqAdapter
 from .huggingface import HuggingFaceAdapter
@@ -26,4 +26,4 @@ def get_adapter(provider: str, api_key: str, model: str = None) -> BaseAdapter:
     return adapter_class(api_key=api_key, model=model)
 
 
-__all__ = ['BaseAdapter', 'AdapterResponse', 'GeminiAdapter', 'GroqAdapter', 'HuggingFaceAdapter', 'OpenRouterAdapter', 'CohereAdapter', 'DeepInfraAdapter', 'ADAPTERS', 'get_adapter']
+__all__ = ['BaseAdapter', 'AdapterResponse', 'StreamEvent', 'GeminiAdapter', 'GroqAdapter', 'HuggingFaceAdapter', 'OpenRouterAdapter', 'CohereAdapter', 'DeepInfraAdapter', 'ADAPTERS', 'get_adapter']
@@ -3,12 +3,15 @@ Base Adapter for AI Providers.
 Defines the interface that all provider adapters must implement.
 """
 
+import json
 import logging
 import time
 from abc import ABC, abstractmethod
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, AsyncIterator, Callable, Iterable, Tuple
 from dataclasses import dataclass
 
+from ..utils.http_pool import pooled_client
+
 logger = logging.getLogger(__name__)
 
 
@@ -27,6 +30,19 @@ class AdapterResponse:
     retry_after_seconds: Optional[int] = None  # From Retry-After header on 429
 
 
+@dataclass
+class StreamEvent:
+    """
+    One item yielded by BaseAdapter.stream().
+    
+    Every event but the last carries a text delta; the last one carries the
+    full AdapterResponse (content is the whole text, success=False with the
+    partial text if the stream broke).
+    """
+    delta: str = ""
+    response: Optional[AdapterResponse] = None
+
+
 class BaseAdapter(ABC):
     """
     Abstract base class for AI provider adapters.
@@ -34,12 +50,19 @@ class BaseAdapter(ABC):
     All adapters must implement:
     - complete(): Buffered completion
     - validate_key(): Test if the API key is valid
+    
+    Adapters whose API can stream override stream(); the default yields
+    the buffered completion as a single delta.
+    
+    HTTP calls go through self._http(), which leases the shared keep-alive
+    client for PROVIDER_NAME instead of opening a new connection per call.
     """
     
     # Override in subclasses
     PROVIDER_NAME: str = "base"
     DEFAULT_MODEL: str = ""
     BASE_URL: str = ""
+    FALLBACK_MODELS: List[str] = []
     
     # Rate limits (for reference)
     RATE_LIMIT_MINUTE: int = 10
@@ -70,6 +93,24 @@ class BaseAdapter(ABC):
         """
         pass
     
+    async def stream(
+        self,
+        messages: List[Dict[str, str]],
+        max_tokens: int = 1024,
+        temperature: float = 0.7,
+        **kwargs
+    ) -> AsyncIterator[StreamEvent]:
+        """
+        Stream a chat completion as text deltas followed by a final response.
+        
+        Model fallback only happens before the first delta; once text has
+        been yielded the stream either finishes or ends with success=False.
+        """
+        response = await self.complete(messages, max_tokens=max_tokens, temperature=temperature, **kwargs)
+        if response.success and response.content:
+            yield StreamEvent(delta=response.content)
+        yield StreamEvent(response=response)
+    
     @abstractmethod
     async def validate_key(self) -> tuple[bool, str]:
         """
@@ -80,6 +121,130 @@ class BaseAdapter(ABC):
         """
         pass
     
+    def _http(self):
+        """
+        Lease the pooled HTTP client for this provider.
+        
+        Usage:
+            async with self._http() as client:
+                response = await client.post(url, json=payload, timeout=60)
+        """
+        return pooled_client(self.PROVIDER_NAME)
+    
+    def _models_to_try(self) -> List[str]:
+        """Current model first, then the rest of the fallback chain."""
+        models = [self.model]
+        for m in self.FALLBACK_MODELS:
+            if m not in models:
+                models.append(m)
+        return models
+    
+    async def _stream_sse(
+        self,
+        requests: Iterable[Tuple[str, str, Dict[str, Any]]],
+        retry_statuses: Tuple[int, ...],
+        parse_event: Callable[[Dict[str, Any]], Tuple[str, Optional[int], Optional[int]]],
+    ) -> AsyncIterator[StreamEvent]:
+        """
+        POST each (model, url, payload) until one streams, relaying SSE deltas.
+        
+        parse_event maps one decoded ``data:`` payload to
+        (delta, tokens_input, tokens_output); token counts may be None
+        until the provider reports usage.
+        """
+        start_time = time.time()
+        last_error = None
+        
+        for model, url, payload in requests:
+            parts = []
+            tokens_input = tokens_output = 0
+            try:
+                async with self._http() as client:
+                    async with client.stream("POST", url, headers=self._get_headers(), json=payload, timeout=60) as response:
+                        if response.status_code in retry_statuses:
+                            logger.info(f"{self.PROVIDER_NAME} model {model} returned {response.status_code}, trying next...")
+                            last_error = f"Model {model}: {response.status_code}"
+                            continue
+                        
+                        if response.status_code != 200:
+                            await response.aread()
+                            yield StreamEvent(response=self._stream_error_response(
+                                response, model, int((time.time() - start_time) * 1000)
+                            ))
+                            return
+                        
+                        async for line in response.aiter_lines():
+                            if not line.startswith("data:"):
+                                continue
+                            data = line[5:].strip()
+                            if not data or data == "[DONE]":
+                                continue
+                            delta, usage_input, usage_output = parse_event(json.loads(data))
+                            tokens_input = usage_input or tokens_input
+                            tokens_output = usage_output or tokens_output
+                            if delta:
+                                parts.append(delta)
+                                yield StreamEvent(delta=delta)
+            except Exception as e:
+                if not parts:
+                    logger.warning(f"Error on model {model}: {e}, trying next...")
+                    last_error = str(e)
+                    continue
+                # Text already went out, so no fallback: report the broken stream
+                yield StreamEvent(response=AdapterResponse(
+                    success=False, content="".join(parts), model=model, provider=self.PROVIDER_NAME,
+                    tokens_input=tokens_input, tokens_output=tokens_output,
+                    latency_ms=int((time.time() - start_time) * 1000),
+                    error=f"Stream interrupted: {e}"
+                ))
+                return
+            
+            content = "".join(parts)
+            yield StreamEvent(response=AdapterResponse(
+                success=True, content=content, model=model, provider=self.PROVIDER_NAME,
+                tokens_input=tokens_input,
+                tokens_output=tokens_output or int(len(content.split()) * 1.3),
+                latency_ms=int((time.time() - start_time) * 1000)
+            ))
+            return
+        
+        yield StreamEvent(response=AdapterResponse(
+            success=False, content="", model=self.model, provider=self.PROVIDER_NAME,
+            tokens_input=0, tokens_output=0, latency_ms=int((time.time() - start_time) * 1000),
+            error=f"All models failed. Last error: {last_error}"
+        ))
+    
+    def _stream_error_response(self, response, model: str, latency_ms: int) -> AdapterResponse:
+        """Build the failed AdapterResponse for a non-retryable stream status."""
+        return AdapterResponse(
+            success=False, content="", model=model, provider=self.PROVIDER_NAME,
+            tokens_input=0, tokens_output=0, latency_ms=latency_ms,
+            error=f"API error {response.status_code}: {response.text[:200]}"
+        )
+    
+    async def _stream_openai(
+        self,
+        messages: List[Dict[str, str]],
+        max_tokens: int,
+        temperature: float,
+        retry_statuses: Tuple[int, ...],
+    ) -> AsyncIterator[StreamEvent]:
+        """Stream from an OpenAI-compatible /chat/completions endpoint."""
+        url = f"{self.BASE_URL}/chat/completions"
+        requests = [
+            (model, url, {
+                "model": model,
+                "messages": self._format_messages_openai(messages),
+                "max_tokens": max_tokens,
+                "temperature": temperature,
+                "stream": True,
+                "stream_options": {"include_usage": True},
+            })
+            for model in self._models_to_try()
+        ]
+        async for event in self._stream_sse(requests, retry_statuses, _parse_openai_chunk):
+            yield event
+    
     def _format_messages_openai(
         self, 
         messages: List[Dict[str, str]]
@@ -96,3 +261,12 @@ class BaseAdapter(ABC):
             "Authorization": f"Bearer {self.api_key}",
             "Content-Type": "application/json",
         }
+
+
+def _parse_openai_chunk(data: Dict[str, Any]) -> Tuple[str, Optional[int], Optional[int]]:
+    """Delta text and usage from one OpenAI-style chat.completion.chunk."""
+    choices = data.get("choices") or []
+    delta = ((choices[0].get("delta") or {}).get("content") or "") if choices else ""
+    # Groq reports usage under x_groq on the final chunk
+    usage = data.get("usage") or (data.get("x_groq") or {}).get("usage") or {}
+    return delta, usage.get("prompt_tokens"), usage.get("completion_tokens")
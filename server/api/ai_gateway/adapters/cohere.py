@@ -1,7 +1,6 @@
 import logging
 import time
 from typing import Optional, Dict, Any, List
-import httpx
 from .base import BaseAdapter, AdapterResponse
 
 logger = logging.getLogger(__name__)
@@ -71,8 +70,8 @@ class CohereAdapter(BaseAdapter):
             if chat_history: payload["chat_history"] = chat_history
             
             try:
-                async with httpx.AsyncClient(timeout=60) as client:
-                    response = await client.post(url, headers=self._get_headers(), json=payload)
+                async with self._http() as client:
+                    response = await client.post(url, headers=self._get_headers(), json=payload, timeout=60)
                     latency_ms = int((time.time() - start_time) * 1000)
                     
                     # 429 = Rate limit
@@ -114,11 +113,12 @@ class CohereAdapter(BaseAdapter):
     async def validate_key(self) -> bool:
         """Validate key (200 OK or 429 Exceeded = Valid)"""
         try:
-            async with httpx.AsyncClient(timeout=15) as client:
+            async with self._http() as client:
                 response = await client.post(
                     f"{self.BASE_URL}/chat",
                     headers=self._get_headers(),
-                    json={"model": self.DEFAULT_MODEL, "message": "hi", "max_tokens": 5}
+                    json={"model": self.DEFAULT_MODEL, "message": "hi", "max_tokens": 5},
+                    timeout=15,
                 )
                 return response.status_code in (200, 429)
         except:
@@ -4,11 +4,11 @@ Gemini Adapter for Google's Generative AI API.
 
 import logging
 import time
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, AsyncIterator
 
 import httpx
 
-from .base import BaseAdapter, AdapterResponse
+from .base import BaseAdapter, AdapterResponse, StreamEvent
 
 logger = logging.getLogger(__name__)
 
@@ -114,41 +114,19 @@ class GeminiAdapter(BaseAdapter):
 
             
             try:
-                async with httpx.AsyncClient(timeout=60) as client:
+                async with self._http() as client:
                     response = await client.post(
                         url,
                         headers=self._get_headers(),
-                        json=payload
+                        json=payload,
+                        timeout=60,
                     )
                     
                     latency_ms = int((time.time() - start_time) * 1000)
                     
                     # If 429 (quota exceeded), extract Retry-After and return immediately
                     if response.status_code == 429:
-                        retry_after = None
-                        
-                        # Method 1: Check Retry-After header
-                        if 'Retry-After' in response.headers:
-                            try:
-                                retry_after = int(response.headers['Retry-After'])
-                            except ValueError:
-                                pass
-                        
-                        # Method 2: Check JSON body for retryDelay (common in Google APIs)
-                        if not retry_after:
-                            try:
-                                error_data = response.json()
-                                # Google errors often look like:
-                                # {"error": {"details": [{"@type": "...", "retryDelay": "9.13s"}]}}
-                                if "error" in error_data and "details" in error_data["error"]:
-                                    for detail in error_data["error"]["details"]:
-                                        if "retryDelay" in detail:
-                                            # Format like "10.5s" or just "10s"
-                                            delay_str = detail["retryDelay"].rstrip('s')
-                                            retry_after = int(float(delay_str)) + 1 # Round up
-                                            break
-                            except Exception:
-                                pass
+                        retry_after = self._parse_retry_after(response)
                         
                         logger.info(
                             f"Gemini model {model} quota exceeded (429). "
@@ -229,6 +207,82 @@ class GeminiAdapter(BaseAdapter):
             latency_ms=latency_ms, error=f"All models failed. Last error: {last_error}"
         )
     
+    async def stream(
+        self,
+        messages: List[Dict[str, str]],
+        max_tokens: int = 1024,
+        temperature: float = 0.7,
+        **kwargs
+    ) -> AsyncIterator[StreamEvent]:
+        """Stream via streamGenerateContent (SSE); 404 falls through to the next model."""
+        gen_config = {
+            "maxOutputTokens": max_tokens,
+            "temperature": temperature,
+        }
+        if kwargs.get("json_mode"):
+            gen_config["responseMimeType"] = "application/json"
+        
+        payload = {
+            "contents": self._format_messages_gemini(messages),
+            "generationConfig": gen_config
+        }
+        if kwargs.get("tools"):
+            payload["tools"] = kwargs["tools"]
+        
+        requests = [
+            (model, f"{self.BASE_URL}/models/{model}:streamGenerateContent?alt=sse", payload)
+            for model in self._models_to_try()
+        ]
+        async for event in self._stream_sse(requests, (404,), self._parse_stream_chunk):
+            yield event
+    
+    @staticmethod
+    def _parse_stream_chunk(data: Dict[str, Any]):
+        text = ""
+        candidates = data.get("candidates") or []
+        if candidates:
+            parts = (candidates[0].get("content") or {}).get("parts") or []
+            text = "".join(p.get("text", "") for p in parts)
+        usage = data.get("usageMetadata") or {}
+        return text, usage.get("promptTokenCount"), usage.get("candidatesTokenCount")
+    
+    def _stream_error_response(self, response, model: str, latency_ms: int) -> AdapterResponse:
+        if response.status_code != 429:
+            return super()._stream_error_response(response, model, latency_ms)
+        # All models share the key's quota, so a 429 ends the stream like complete()
+        return AdapterResponse(
+            success=False, content="", model=model, provider=self.PROVIDER_NAME,
+            tokens_input=0, tokens_output=0, latency_ms=latency_ms,
+            error="Quota exceeded (429)",
+            retry_after_seconds=self._parse_retry_after(response),
+        )
+    
+    def _parse_retry_after(self, response) -> Optional[int]:
+        """Seconds to back off after a 429, from the header or the error body."""
+        # Method 1: Check Retry-After header
+        if 'Retry-After' in response.headers:
+            try:
+                retry_after = int(response.headers['Retry-After'])
+                if retry_after:
+                    return retry_after
+            except ValueError:
+                pass
+        
+        # Method 2: Check JSON body for retryDelay (common in Google APIs)
+        try:
+            error_data = response.json()
+            # Google errors often look like:
+            # {"error": {"details": [{"@type": "...", "retryDelay": "9.13s"}]}}
+            if "error" in error_data and "details" in error_data["error"]:
+                for detail in error_data["error"]["details"]:
+                    if "retryDelay" in detail:
+                        # Format like "10.5s" or just "10s"
+                        delay_str = detail["retryDelay"].rstrip('s')
+                        return int(float(delay_str)) + 1 # Round up
+        except Exception:
+            pass
+        return None
+    
     async def validate_key(self) -> tuple[bool, str]:
         """Validate Gemini API key with a minimal request."""
         try:
@@ -240,8 +294,8 @@ class GeminiAdapter(BaseAdapter):
                 "generationConfig": {"maxOutputTokens": 5}
             }
             
-            async with httpx.AsyncClient(timeout=15) as client:
-                response = await client.post(url, headers=self._get_headers(), json=payload)
+            async with self._http() as client:
+                response = await client.post(url, headers=self._get_headers(), json=payload, timeout=15)
                 
                 # 200 = Success
                 if response.status_code == 200:
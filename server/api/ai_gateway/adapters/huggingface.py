@@ -1,7 +1,6 @@
 import logging
 import time
 from typing import Optional, Dict, Any, List
-import httpx
 from .base import BaseAdapter, AdapterResponse
 
 logger = logging.getLogger(__name__)
@@ -70,8 +69,8 @@ class HuggingFaceAdapter(BaseAdapter):
             }
             
             try:
-                async with httpx.AsyncClient(timeout=60) as client:
-                    response = await client.post(url, headers=self._get_headers(), json=payload)
+                async with self._http() as client:
+                    response = await client.post(url, headers=self._get_headers(), json=payload, timeout=60)
                     latency_ms = int((time.time() - start_time) * 1000)
                     
                     # 503 = Model loading (common on free tier), 429 = Rate limit
@@ -112,11 +111,12 @@ class HuggingFaceAdapter(BaseAdapter):
     async def validate_key(self) -> bool:
         """Validate key (200 OK or 503 Loading = Valid)"""
         try:
-            async with httpx.AsyncClient(timeout=10) as client:
+            async with self._http() as client:
                 response = await client.post(
                     f"{self.BASE_URL}/{self.DEFAULT_MODEL}",
                     headers=self._get_headers(),
-                    json={"inputs": "Hello", "parameters": {"max_new_tokens": 5}}
+                    json={"inputs": "Hello", "parameters": {"max_new_tokens": 5}},
+                    timeout=10,
                 )
                 return response.status_code in [200, 503, 429]
         except:
@@ -3,11 +3,12 @@ Gemini Image Generation Adapter
 Uses Google's Gemini image generation model for creating images.
 Free tier: 500 requests/day
 """
-import httpx
 import base64
 import logging
 from typing import Optional, Dict, Any
 
+from ..utils.http_pool import pooled_client
+
 logger = logging.getLogger(__name__)
 
 # Image generation models - Use the production model
@@ -64,13 +65,13 @@ async def generate_image(
         }
     }
     
-    async with httpx.AsyncClient(timeout=120.0) as client:
+    async with pooled_client('gemini') as client:
         for model in FALLBACK_MODELS:
             try:
                 model_url = f"https://generativelanguage.googleapis.com/v1beta/models/{model}:generateContent?key={api_key}"
                 
                 logger.info(f"[GeminiImage] Trying model: {model}")
-                response = await client.post(model_url, headers=headers, json=payload)
+                response = await client.post(model_url, headers=headers, json=payload, timeout=120)
                 
                 if response.status_code == 200:
                     data = response.json()
@@ -119,8 +120,8 @@ async def validate_key(api_key: str) -> bool:
     try:
         # Just check if key can list models
         url = f"https://generativelanguage.googleapis.com/v1beta/models?key={api_key}"
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            response = await client.get(url)
+        async with pooled_client('gemini') as client:
+            response = await client.get(url, timeout=10)
             return response.status_code == 200
     except:
         return False
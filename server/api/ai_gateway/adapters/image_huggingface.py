@@ -3,11 +3,12 @@ HuggingFace Image Generation Adapter
 Uses HuggingFace Inference API for image generation.
 Free tier: ~1000 requests/day (rate limited)
 """
-import httpx
 import base64
 import logging
 from typing import Optional, Dict, Any
 
+from ..utils.http_pool import pooled_client
+
 logger = logging.getLogger(__name__)
 
 # Free image models on HuggingFace
@@ -71,13 +72,13 @@ async def generate_image(
         }
     }
     
-    async with httpx.AsyncClient(timeout=120.0) as client:
+    async with pooled_client('huggingface') as client:
         for model in IMAGE_MODELS:
             try:
                 url = f"{HF_API_URL}/{model}"
                 logger.info(f"[HFImage] Trying model: {model}")
                 
-                response = await client.post(url, headers=headers, json=payload)
+                response = await client.post(url, headers=headers, json=payload, timeout=120)
                 
                 if response.status_code == 200:
                     # Response is raw image bytes
@@ -129,8 +130,8 @@ async def validate_key(api_key: str) -> bool:
     try:
         url = "https://huggingface.co/api/whoami-v2"
         headers = {"Authorization": f"Bearer {api_key}"}
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            response = await client.get(url, headers=headers)
+        async with pooled_client('huggingface') as client:
+            response = await client.get(url, headers=headers, timeout=10)
             return response.status_code == 200
     except:
         return False
@@ -3,11 +3,12 @@ OpenRouter Image Generation Adapter
 Uses OpenRouter to access various image generation models.
 Fallback when Gemini and HuggingFace quotas are exhausted.
 """
-import httpx
 import base64
 import logging
 from typing import Optional, Dict, Any
 
+from ..utils.http_pool import pooled_client
+
 logger = logging.getLogger(__name__)
 
 # OpenRouter image models (check availability)
@@ -51,7 +52,7 @@ async def generate_image(
         "X-Title": "VocabMaster Image Generation",
     }
     
-    async with httpx.AsyncClient(timeout=120.0) as client:
+    async with pooled_client('openrouter') as client:
         for model in IMAGE_MODELS:
             try:
                 url = f"{OPENROUTER_API_URL}/images/generations"
@@ -65,7 +66,7 @@ async def generate_image(
                 }
                 
                 logger.info(f"[OpenRouterImage] Trying model: {model}")
-                response = await client.post(url, headers=headers, json=payload)
+                response = await client.post(url, headers=headers, json=payload, timeout=120)
                 
                 if response.status_code == 200:
                     data = response.json()
@@ -85,7 +86,7 @@ async def generate_image(
                             }
                         elif "url" in image_data:
                             # Fetch the image and convert to base64
-                            img_response = await client.get(image_data["url"])
+                            img_response = await client.get(image_data["url"], timeout=120)
                             if img_response.status_code == 200:
                                 image_base64 = base64.b64encode(img_response.content).decode("utf-8")
                                 return {
@@ -135,8 +136,8 @@ async def validate_key(api_key: str) -> bool:
     try:
         url = f"{OPENROUTER_API_URL}/auth/key"
         headers = {"Authorization": f"Bearer {api_key}"}
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            response = await client.get(url, headers=headers)
+        async with pooled_client('openrouter') as client:
+            response = await client.get(url, headers=headers, timeout=10)
             return response.status_code == 200
     except:
         return False
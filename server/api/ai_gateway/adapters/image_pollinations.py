@@ -3,12 +3,13 @@ Pollinations Image Generation Adapter
 Pollinations.AI is completely FREE with NO API key required!
 Uses Stable Diffusion models for image generation.
 """
-import httpx
 import base64
 import logging
 from typing import Optional, Dict, Any
 from urllib.parse import quote
 
+from ..utils.http_pool import pooled_client
+
 logger = logging.getLogger(__name__)
 
 # Pollinations API - No auth required!
@@ -54,9 +55,9 @@ async def generate_image(
     
     logger.info(f"[Pollinations] Generating image: {prompt[:50]}...")
     
-    async with httpx.AsyncClient(timeout=120.0, follow_redirects=True) as client:
+    async with pooled_client('pollinations') as client:
         try:
-            response = await client.get(url)
+            response = await client.get(url, timeout=120)
             
             if response.status_code == 200:
                 # Response is raw image bytes
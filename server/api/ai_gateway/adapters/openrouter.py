@@ -1,8 +1,7 @@
 import logging
 import time
-from typing import Optional, Dict, Any, List
-import httpx
-from .base import BaseAdapter, AdapterResponse
+from typing import Optional, Dict, Any, List, AsyncIterator
+from .base import BaseAdapter, AdapterResponse, StreamEvent
 
 logger = logging.getLogger(__name__)
 
@@ -63,8 +62,8 @@ class OpenRouterAdapter(BaseAdapter):
             }
             
             try:
-                async with httpx.AsyncClient(timeout=60) as client:
-                    response = await client.post(url, headers=self._get_headers(), json=payload)
+                async with self._http() as client:
+                    response = await client.post(url, headers=self._get_headers(), json=payload, timeout=60)
                     latency_ms = int((time.time() - start_time) * 1000)
                     
                     # 429 = Rate limit, 503 = Overloaded, 404 = Model pulled
@@ -104,14 +103,20 @@ class OpenRouterAdapter(BaseAdapter):
             error=f"All models failed. Last error: {last_error}"
         )
     
+    async def stream(self, messages: List[Dict[str, str]], max_tokens: int = 1024, temperature: float = 0.7, **kwargs) -> AsyncIterator[StreamEvent]:
+        """Stream tokens from OpenRouter (OpenAI-compatible SSE) with the same model fallback."""
+        async for event in self._stream_openai(messages, max_tokens, temperature, retry_statuses=(429, 503, 404, 402, 401, 403)):
+            yield event
+    
     async def validate_key(self) -> tuple[bool, str]:
         """Validate key (200 OK or 429 Exceeded = Valid)"""
         try:
-            async with httpx.AsyncClient(timeout=15) as client:
+            async with self._http() as client:
                 response = await client.post(
                     f"{self.BASE_URL}/chat/completions",
                     headers=self._get_headers(),
-                    json={"model": self.DEFAULT_MODEL, "messages": [{"role": "user", "content": "hi"}], "max_tokens": 5}
+                    json={"model": self.DEFAULT_MODEL, "messages": [{"role": "user", "content": "hi"}], "max_tokens": 5},
+                    timeout=15,
                 )
                 
                 if response.status_code in (200, 429):
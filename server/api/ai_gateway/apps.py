@@ -14,3 +14,4 @@ class AiGatewayConfig(AppConfig):
         """Called when Django starts up."""
         # Import models to register them
         from . import models  # noqa
+        from . import signals  # noqa
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-17 00:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ai_gateway', '0006_add_key_blocking'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='usagelog',
+            name='time_to_first_token_ms',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+    ]
@@ -121,6 +121,7 @@ class UsageLog(models.Model):
     tokens_input = models.IntegerField(default=0)
     tokens_output = models.IntegerField(default=0)
     latency_ms = models.IntegerField(default=0)
+    time_to_first_token_ms = models.IntegerField(null=True, blank=True)  # Streamed requests only
     
     # Response
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, db_index=True)
@@ -2,7 +2,7 @@
 
 from .keys import KeysListCreateView, KeyDetailView, KeyTestView
 from .chat import ChatCompletionsView
-from .stats import StatsView, ProviderStatsView, ProvidersView
+from .stats import StatsView, ProviderStatsView, ProvidersView, PoolStatsView
 from .dashboard import DashboardView
 
 __all__ = [
@@ -13,5 +13,6 @@ __all__ = [
     'StatsView',
     'ProviderStatsView',
     'ProvidersView',
+    'PoolStatsView',
     'DashboardView',
 ]
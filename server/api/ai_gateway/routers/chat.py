@@ -22,22 +22,13 @@ from ..models import UserAPIKey, UsageLog, KeyModelUsage
 from ..services import get_key_selector, get_quota_tracker, get_circuit_breaker, get_cache_manager
 from ..adapters import get_adapter, AdapterResponse
 from ..utils.encryption import decrypt_api_key
+from ..utils.async_runner import run_sync
 
 logger = logging.getLogger(__name__)
 
 
-def run_async(coro):
-    """Run async coroutine from sync context."""
-    try:
-        loop = asyncio.get_event_loop()
-        if loop.is_running():
-            import concurrent.futures
-            with concurrent.futures.ThreadPoolExecutor() as executor:
-                future = executor.submit(asyncio.run, coro)
-                return future.result()
-        return loop.run_until_complete(coro)
-    except RuntimeError:
-        return asyncio.run(coro)
+class GatewayExhaustedError(Exception):
+    """No key/provider could serve the request (message is returned to the client)."""
 
 
 class ChatCompletionsView(APIView):
@@ -276,74 +267,78 @@ class ChatCompletionsView(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Check cache (only for non-streaming)
-        if not stream:
-            cache_manager = get_cache_manager()
-            cached_response = run_async(cache_manager.get(msg_list, model, provider))
-            
-            if cached_response:
-                self._log_usage(
-                    user_id=request.user.id,
-                    key_id=0,
-                    provider=cached_response.get('provider', 'cached'),
-                    model=cached_response.get('model', 'cached'),
-                    tokens_input=0,
-                    tokens_output=0,
-                    latency_ms=0,
-                    status_str='success',
-                    cached=True
-                )
-                
-                cached_response['cached'] = True
-                return Response(cached_response)
+        # Leader details, filled in by compute() when this request actually calls a provider
+        outcome = {}
         
-        # Try with fallback (run async in sync context)
-        response, key, error = run_async(self._try_with_fallback_async(
-            user_id=request.user.id,
-            messages=msg_list,
-            max_tokens=max_tokens,
-            temperature=temperature,
-            preferred_provider=provider
-        ))
+        def compute():
+            # Try with fallback (run async in sync context)
+            response, key, error = run_sync(self._try_with_fallback_async(
+                user_id=request.user.id,
+                messages=msg_list,
+                max_tokens=max_tokens,
+                temperature=temperature,
+                preferred_provider=provider
+            ))
+            if error:
+                raise GatewayExhaustedError(error)
+            outcome.update(response=response, key=key)
+            
+            # Build response
+            return {
+                'id': f"chatcmpl-{uuid.uuid4().hex[:8]}",
+                'object': 'chat.completion',
+                'created': int(time.time()),
+                'model': response.model,
+                'provider': response.provider,
+                'choices': [{
+                    'index': 0,
+                    'message': {
+                        'role': 'assistant',
+                        'content': response.content
+                    },
+                    'finish_reason': 'stop'
+                }],
+                'usage': {
+                    'prompt_tokens': response.tokens_input,
+                    'completion_tokens': response.tokens_output,
+                    'total_tokens': response.tokens_input + response.tokens_output
+                },
+                'cached': False
+            }
         
-        if error:
+        try:
+            if stream:
+                result, source = compute(), 'miss'
+            else:
+                # Cache + single-flight: identical concurrent requests share one provider call
+                result, source = get_cache_manager().get_or_compute_sync(msg_list, compute, model, provider)
+        except GatewayExhaustedError as e:
+            error = str(e)
             return Response(
                 {'error': error},
                 status=status.HTTP_429_TOO_MANY_REQUESTS if 'exhausted' in error else status.HTTP_500_INTERNAL_SERVER_ERROR
             )
         
+        if source != 'miss':
+            self._log_usage(
+                user_id=request.user.id,
+                key_id=0,
+                provider=result.get('provider', 'cached'),
+                model=result.get('model', 'cached'),
+                tokens_input=0,
+                tokens_output=0,
+                latency_ms=0,
+                status_str='success',
+                cached=True
+            )
+            return Response({**result, 'cached': True})
+        
         # Streaming is not supported in sync context - return buffered
         if stream:
             # For streaming, we still return the buffered response but mark it
             logger.info("Streaming requested but using buffered mode in sync context")
         
-        # Build response
-        result = {
-            'id': f"chatcmpl-{uuid.uuid4().hex[:8]}",
-            'object': 'chat.completion',
-            'created': int(time.time()),
-            'model': response.model,
-            'provider': response.provider,
-            'choices': [{
-                'index': 0,
-                'message': {
-                    'role': 'assistant',
-                    'content': response.content
-                },
-                'finish_reason': 'stop'
-            }],
-            'usage': {
-                'prompt_tokens': response.tokens_input,
-                'completion_tokens': response.tokens_output,
-                'total_tokens': response.tokens_input + response.tokens_output
-            },
-            'cached': False
-        }
-        
-        # Cache the response
-        if not stream:
-            cache_manager = get_cache_manager()
-            run_async(cache_manager.set(msg_list, result, model, provider))
+        response, key = outcome['response'], outcome['key']
         
         # Log usage
         self._log_usage(
@@ -3,7 +3,6 @@ API Keys Router for AI Gateway.
 Handles CRUD operations for user API keys.
 """
 
-import asyncio
 import logging
 import time
 from datetime import timezone as tz
@@ -16,24 +15,11 @@ from rest_framework import status
 from ..models import UserAPIKey
 from ..utils.encryption import encrypt_api_key, decrypt_api_key, mask_api_key
 from ..adapters import get_adapter
+from ..utils.async_runner import run_sync
 
 logger = logging.getLogger(__name__)
 
 
-def run_async(coro):
-    """Run async coroutine from sync context."""
-    try:
-        loop = asyncio.get_event_loop()
-        if loop.is_running():
-            import concurrent.futures
-            with concurrent.futures.ThreadPoolExecutor() as executor:
-                future = executor.submit(asyncio.run, coro)
-                return future.result()
-        return loop.run_until_complete(coro)
-    except RuntimeError:
-        return asyncio.run(coro)
-
-
 class KeysListCreateView(APIView):
     """
     GET: List all user's API keys (with stats, but masked)
@@ -109,7 +95,7 @@ class KeysListCreateView(APIView):
         if not skip_validation:
             try:
                 adapter = get_adapter(provider, api_key)
-                is_valid, error_msg = run_async(adapter.validate_key())
+                is_valid, error_msg = run_sync(adapter.validate_key())
                 
                 if not is_valid:
                     logger.warning(f"Key validation failed for {provider}. Msg: {error_msg}")
@@ -276,7 +262,7 @@ class KeyTestView(APIView):
             adapter = get_adapter(key.provider, decrypted)
             
             start = time.time()
-            is_valid, error_msg = run_async(adapter.validate_key())
+            is_valid, error_msg = run_sync(adapter.validate_key())
             latency = int((time.time() - start) * 1000)
             
             # Update key stats
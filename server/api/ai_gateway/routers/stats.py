@@ -9,10 +9,15 @@ from django.db.models.functions import TruncDate
 from django.utils import timezone
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAuthenticated, IsAdminUser
 
 from ..models import UserAPIKey, UsageLog, DailyAnalytics
 from ..providers import get_all_providers, get_provider_info, get_available_models
+from ..utils.http_pool import get_http_pool
+from ..utils.async_runner import get_loop_runner
+from ..services.model_selector import model_selector
+from ..services.accounting import get_accounting_buffer
+from ..services.cache_manager import get_cache_manager
 
 logger = logging.getLogger(__name__)
 
@@ -92,6 +97,7 @@ class StatsView(APIView):
                 'requests_today': requests_today,
                 'requests_week': total_requests_week,
                 'cache_hit_rate': round(cache_hit_rate, 1),
+                'cache_hits': cache_hits,
             },
             'providers': list(providers.values()),
             'model_usage': list(model_usage),
@@ -131,6 +137,26 @@ class ProvidersView(APIView):
         return Response({'providers': result})
 
 
+class PoolStatsView(APIView):
+    """GET /api/ai-gateway/stats/pools - HTTP pool, event loop, cache and accounting stats (this process)."""
+    permission_classes = [IsAdminUser]
+    
+    def get(self, request):
+        pools = get_http_pool().get_stats()
+        return Response({
+            'pools': [
+                {'provider': provider, **values}
+                for provider, values in sorted(pools.items())
+            ],
+            'total_requests': sum(p['requests'] for p in pools.values()),
+            'total_in_flight': sum(p['in_flight'] for p in pools.values()),
+            'event_loop': get_loop_runner().get_stats(),
+            'selector_cache': model_selector.get_cache_stats(),
+            'accounting': get_accounting_buffer().get_stats(),
+            'response_cache': get_cache_manager().get_counters(),
+        })
+
+
 class ProviderStatsView(APIView):
     """GET /api/ai-gateway/stats/provider/{provider} - Detailed provider stats."""
     permission_classes = [IsAuthenticated]
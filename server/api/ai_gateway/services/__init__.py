@@ -4,6 +4,7 @@ from .quota_tracker import QuotaTracker, get_quota_tracker
 from .circuit_breaker import CircuitBreaker, CircuitState, get_circuit_breaker
 from .key_selector import KeySelector, ScoredKey, get_key_selector
 from .cache_manager import CacheManager, get_cache_manager
+from .accounting import AccountingBuffer, get_accounting_buffer
 
 __all__ = [
     'QuotaTracker',
@@ -16,4 +17,6 @@ __all__ = [
     'get_key_selector',
     'CacheManager',
     'get_cache_manager',
+    'AccountingBuffer',
+    'get_accounting_buffer',
 ]
@@ -0,0 +1,397 @@
+"""
+Write-Behind Accounting for AI Gateway.
+
+Takes per-request bookkeeping (ModelInstance counters, UserAPIKey usage,
+UsageLog rows) off the response path. Deltas are aggregated in memory and
+flushed in bulk with F() expressions and bulk_create on an interval, so
+concurrent requests on the same key no longer serialize on row locks.
+
+Failures are NOT buffered: LearningEngine.record_failure blocks models and
+keys, and the selector must see that immediately. Only their UsageLog rows
+go through the buffer.
+
+Usage:
+    from api.ai_gateway.services.accounting import get_accounting_buffer
+
+    buffer = get_accounting_buffer()
+    buffer.record_success(instance, latency_ms=150, tokens_used=500)
+    buffer.log_usage(user=user, key=instance.api_key, provider='groq', status='success')
+"""
+
+import atexit
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional, Dict, Any, List
+
+from django.conf import settings
+from django.db import transaction, close_old_connections
+from django.db.models import F, IntegerField
+from django.db.models.functions import Cast, Greatest, Least
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_ACCOUNTING_CONFIG = {
+    'WRITE_BEHIND': True,
+    'FLUSH_INTERVAL': 2.0,  # Seconds between background flushes
+    'MAX_PENDING': 500,     # Wake the flusher early past this many buffered items
+}
+
+# Same EWMA weight LearningEngine uses for avg_latency_ms
+LATENCY_ALPHA = 0.1
+
+
+def get_accounting_config() -> Dict[str, Any]:
+    """Effective accounting settings (settings.AI_GATEWAY_ACCOUNTING over defaults)."""
+    config = dict(DEFAULT_ACCOUNTING_CONFIG)
+    config.update(getattr(settings, 'AI_GATEWAY_ACCOUNTING', {}))
+    return config
+
+
+@dataclass
+class _InstanceDelta:
+    """Aggregated ModelInstance changes since the last flush."""
+    requests: int = 0
+    successes: int = 0
+    tokens: int = 0
+    # EWMA over n samples folds into avg' = avg * decay + term
+    latency_decay: float = 1.0
+    latency_term: float = 0.0
+    last_success_at: Optional[datetime] = None
+
+    def add_latency(self, latency_ms: int) -> None:
+        self.latency_decay *= (1 - LATENCY_ALPHA)
+        self.latency_term = (1 - LATENCY_ALPHA) * self.latency_term + LATENCY_ALPHA * latency_ms
+
+    def merge(self, newer: '_InstanceDelta') -> None:
+        """Fold a later delta into this one (used to re-queue after a failed flush)."""
+        self.requests += newer.requests
+        self.successes += newer.successes
+        self.tokens += newer.tokens
+        self.latency_term = self.latency_term * newer.latency_decay + newer.latency_term
+        self.latency_decay *= newer.latency_decay
+        if newer.last_success_at and (not self.last_success_at or newer.last_success_at > self.last_success_at):
+            self.last_success_at = newer.last_success_at
+
+
+@dataclass
+class _KeyDelta:
+    """Aggregated UserAPIKey usage since the last flush."""
+    requests: int = 0
+    successes: int = 0
+    last_used_at: Optional[datetime] = None
+
+    def merge(self, newer: '_KeyDelta') -> None:
+        self.requests += newer.requests
+        self.successes += newer.successes
+        if newer.last_used_at and (not self.last_used_at or newer.last_used_at > self.last_used_at):
+            self.last_used_at = newer.last_used_at
+
+
+class AccountingBuffer:
+    """
+    In-process write-behind buffer for gateway accounting.
+
+    record_success/record_hedge_loss apply the change to the passed
+    instance in memory (so ModelSelector's cache sees it immediately via
+    model_outcome_recorded) and queue the DB write. flush() writes
+    everything queued in one transaction:
+    - one UPDATE per touched ModelInstance / UserAPIKey (F() expressions)
+    - one bulk_create for UsageLog rows
+    - one bulk_update for recalculated confidence scores (rows locked
+      with SELECT ... FOR UPDATE; block fields are never written here)
+
+    A daemon thread flushes every FLUSH_INTERVAL seconds; atexit flushes
+    whatever is left. With WRITE_BEHIND disabled (or flush_interval=0)
+    callers flush explicitly, and record_* writes through immediately when
+    WRITE_BEHIND is off.
+
+    UsageLog.timestamp is auto_now_add, so buffered rows are stamped at
+    flush time (at most FLUSH_INTERVAL late).
+    """
+
+    _instance: Optional['AccountingBuffer'] = None
+
+    def __init__(self, flush_interval: float = None, max_pending: int = None, write_behind: bool = None):
+        config = get_accounting_config()
+        self.write_behind = config['WRITE_BEHIND'] if write_behind is None else write_behind
+        self.flush_interval = config['FLUSH_INTERVAL'] if flush_interval is None else flush_interval
+        self.max_pending = config['MAX_PENDING'] if max_pending is None else max_pending
+
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._instances: Dict[int, _InstanceDelta] = {}
+        self._keys: Dict[int, _KeyDelta] = {}
+        self._logs: List[Any] = []
+
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._pid: Optional[int] = None
+        self._stats = {
+            'recorded': 0,
+            'flushes': 0,
+            'flush_errors': 0,
+            'rows_written': 0,
+            'last_flush_ms': 0.0,
+            'dropped_logs': 0,
+        }
+
+    @classmethod
+    def get_instance(cls) -> 'AccountingBuffer':
+        """Get singleton instance."""
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+    # =========================================================================
+    # RECORDING
+    # =========================================================================
+
+    def record_success(self, instance, latency_ms: int = 0, tokens_used: int = 0) -> None:
+        """Buffer the LearningEngine.record_success + key usage updates."""
+        from .learning_engine import learning_engine
+        from ..signals import model_outcome_recorded
+
+        now = timezone.now()
+        with self._lock:
+            delta = self._instances.setdefault(instance.pk, _InstanceDelta())
+            delta.requests += 1
+            delta.successes += 1
+            delta.tokens += max(tokens_used, 0)
+            if latency_ms > 0:
+                delta.add_latency(latency_ms)
+            delta.last_success_at = now
+
+            key_delta = self._keys.setdefault(instance.api_key_id, _KeyDelta())
+            key_delta.requests += 1
+            key_delta.successes += 1
+            key_delta.last_used_at = now
+            self._stats['recorded'] += 1
+
+        # Mirror the change in memory so cached selector snapshots stay current
+        instance.remaining_daily = max(0, instance.remaining_daily - 1)
+        instance.remaining_minute = max(0, instance.remaining_minute - 1)
+        if tokens_used > 0:
+            instance.remaining_tokens_minute = max(0, instance.remaining_tokens_minute - tokens_used)
+        instance.total_requests += 1
+        instance.total_successes += 1
+        instance.last_success_at = now
+        instance.consecutive_failures = 0
+        instance.health_score = min(100, instance.health_score + 2)
+        if latency_ms > 0:
+            instance.avg_latency_ms = int((1 - LATENCY_ALPHA) * instance.avg_latency_ms + LATENCY_ALPHA * latency_ms)
+        instance.confidence_score = learning_engine._calculate_confidence(instance)
+
+        model_outcome_recorded.send(sender=self.__class__, instance=instance, success=True)
+        self._after_record()
+
+    def record_hedge_loss(self, instance, latency_ms: int = 0) -> None:
+        """Buffer the LearningEngine.record_hedge_loss updates."""
+        from .learning_engine import learning_engine
+        from ..signals import model_outcome_recorded
+
+        with self._lock:
+            delta = self._instances.setdefault(instance.pk, _InstanceDelta())
+            delta.requests += 1
+            # Elapsed time is a lower bound, so it only counts when it raises the average
+            if latency_ms > instance.avg_latency_ms:
+                delta.add_latency(latency_ms)
+            self._stats['recorded'] += 1
+
+        instance.remaining_daily = max(0, instance.remaining_daily - 1)
+        instance.remaining_minute = max(0, instance.remaining_minute - 1)
+        instance.total_requests += 1
+        if latency_ms > instance.avg_latency_ms:
+            instance.avg_latency_ms = int((1 - LATENCY_ALPHA) * instance.avg_latency_ms + LATENCY_ALPHA * latency_ms)
+        instance.confidence_score = learning_engine._calculate_confidence(instance)
+
+        model_outcome_recorded.send(sender=self.__class__, instance=instance, success=True)
+        self._after_record()
+
+    def log_usage(self, user, **fields) -> None:
+        """Buffer a UsageLog row (same kwargs as UsageLog.objects.create)."""
+        from ..models import UsageLog
+
+        if user is None:
+            # UsageLog.user is required; anonymous calls are not logged
+            return
+        with self._lock:
+            self._logs.append(UsageLog(user=user, **fields))
+            self._stats['recorded'] += 1
+        self._after_record()
+
+    def pending_count(self) -> int:
+        """Buffered items not yet written."""
+        with self._lock:
+            return len(self._instances) + len(self._keys) + len(self._logs)
+
+    def _after_record(self) -> None:
+        if not self.write_behind:
+            self.flush()
+            return
+        self._ensure_flusher()
+        if self.pending_count() >= self.max_pending:
+            self._wake.set()
+
+    # =========================================================================
+    # FLUSHING
+    # =========================================================================
+
+    def _ensure_flusher(self) -> None:
+        if self.flush_interval <= 0:
+            return
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name="ai-gateway-accounting", daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            close_old_connections()
+            try:
+                self.flush()
+            finally:
+                close_old_connections()
+
+    def _swap(self):
+        with self._lock:
+            instances, keys, logs = self._instances, self._keys, self._logs
+            self._instances, self._keys, self._logs = {}, {}, []
+        return instances, keys, logs
+
+    def _requeue(self, instances, keys, logs) -> None:
+        """Put back a batch whose flush failed, ahead of anything recorded since."""
+        with self._lock:
+            for pk, newer in self._instances.items():
+                instances.setdefault(pk, _InstanceDelta()).merge(newer)
+            for pk, newer in self._keys.items():
+                keys.setdefault(pk, _KeyDelta()).merge(newer)
+            logs = logs + self._logs
+            overflow = len(logs) - self.max_pending * 10
+            if overflow > 0:
+                logs = logs[overflow:]
+                self._stats['dropped_logs'] += overflow
+            self._instances, self._keys, self._logs = instances, keys, logs
+
+    def flush(self) -> int:
+        """
+        Write everything buffered so far. Safe to call from any thread.
+
+        Returns:
+            Number of rows written (updates + inserts)
+        """
+        from ..models import ModelInstance, UserAPIKey, UsageLog
+        from .learning_engine import learning_engine
+
+        with self._flush_lock:
+            instances, keys, logs = self._swap()
+            if not (instances or keys or logs):
+                return 0
+
+            started = time.perf_counter()
+            rows = 0
+            try:
+                with transaction.atomic():
+                    for pk, delta in instances.items():
+                        rows += ModelInstance.objects.filter(pk=pk).update(**self._instance_updates(delta))
+
+                    if instances:
+                        # Same soft-unblock as LearningEngine.record_success. The
+                        # condition is re-checked by the UPDATE itself, so a block
+                        # record_failure committed meanwhile (block_until in the
+                        # future) is never lifted.
+                        succeeded = [pk for pk, delta in instances.items() if delta.successes]
+                        if succeeded:
+                            ModelInstance.objects.filter(
+                                pk__in=succeeded, is_blocked=True, block_until__lt=timezone.now(),
+                            ).update(is_blocked=False, block_until=None, block_reason='')
+
+                        # Lock the rows so the score is computed from committed state;
+                        # block fields stay owned by the failure path.
+                        touched = list(
+                            ModelInstance.objects.select_for_update().filter(pk__in=list(instances)).order_by('pk')
+                        )
+                        for instance in touched:
+                            instance.confidence_score = learning_engine._calculate_confidence(instance)
+                        ModelInstance.objects.bulk_update(touched, ['confidence_score'])
+
+                    for pk, delta in keys.items():
+                        updates = {
+                            'requests_today': F('requests_today') + delta.requests,
+                            'requests_this_month': F('requests_this_month') + delta.requests,
+                            'last_used_at': delta.last_used_at,
+                        }
+                        if delta.successes:
+                            updates['consecutive_failures'] = 0
+                        rows += UserAPIKey.objects.filter(pk=pk).update(**updates)
+
+                    if logs:
+                        rows += len(UsageLog.objects.bulk_create(logs))
+            except Exception as e:
+                logger.error(f"Accounting flush failed, re-queued {len(instances)} instances / {len(logs)} logs: {e}")
+                self._requeue(instances, keys, logs)
+                with self._lock:
+                    self._stats['flush_errors'] += 1
+                return 0
+
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            with self._lock:
+                self._stats['flushes'] += 1
+                self._stats['rows_written'] += rows
+                self._stats['last_flush_ms'] = round(elapsed_ms, 2)
+            logger.debug(f"Accounting flush: {rows} rows in {elapsed_ms:.1f}ms")
+            return rows
+
+    @staticmethod
+    def _instance_updates(delta: _InstanceDelta) -> Dict[str, Any]:
+        updates = {
+            'remaining_daily': Greatest(F('remaining_daily') - delta.requests, 0),
+            'remaining_minute': Greatest(F('remaining_minute') - delta.requests, 0),
+            'total_requests': F('total_requests') + delta.requests,
+        }
+        if delta.tokens:
+            updates['remaining_tokens_minute'] = Greatest(F('remaining_tokens_minute') - delta.tokens, 0)
+        if delta.latency_decay < 1.0:
+            updates['avg_latency_ms'] = Cast(
+                F('avg_latency_ms') * delta.latency_decay + delta.latency_term,
+                output_field=IntegerField(),
+            )
+        if delta.successes:
+            updates.update({
+                'total_successes': F('total_successes') + delta.successes,
+                'last_success_at': delta.last_success_at,
+                'consecutive_failures': 0,
+                'health_score': Least(F('health_score') + 2 * delta.successes, 100),
+            })
+        return updates
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Buffer depth and flush metrics for monitoring."""
+        with self._lock:
+            return {
+                **self._stats,
+                'write_behind': self.write_behind,
+                'pending_instances': len(self._instances),
+                'pending_keys': len(self._keys),
+                'pending_logs': len(self._logs),
+            }
+
+
+def get_accounting_buffer() -> AccountingBuffer:
+    """Get the accounting buffer singleton."""
+    return AccountingBuffer.get_instance()
+
+
+@atexit.register
+def _flush_accounting_on_exit():
+    if AccountingBuffer._instance is not None:
+        AccountingBuffer._instance.flush()
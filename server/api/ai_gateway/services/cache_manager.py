@@ -1,18 +1,102 @@
 """
 Cache Manager Service for AI Gateway.
 Provides response caching to reduce API calls and latency.
+
+Tiers (get_or_compute / get_or_compute_sync):
+1. Exact match: SHA256 of the normalized request, stored in Redis.
+2. Single-flight: identical requests already in flight in this process
+   wait for the leader instead of calling a provider again. If the leader
+   fails, each follower computes for itself rather than sharing the error.
+3. Semantic (opt-in per feature): prompts whose embedding is within the
+   feature's cosine threshold of a cached prompt reuse its response.
 """
 
+import asyncio
+import concurrent.futures
 import json
 import hashlib
 import logging
-from typing import Optional, Any, Dict, List
+import threading
+import time
+from typing import Optional, Any, Dict, List, Callable, Awaitable, Tuple
+
+import numpy as np
+from django.conf import settings
 
 from ..utils.redis_client import get_redis_client
 
 logger = logging.getLogger(__name__)
 
 
+DEFAULT_CACHE_CONFIG = {
+    'TTL': 3600,
+    'COALESCE_TIMEOUT': 180,          # Seconds a follower waits for the leader
+    'SEMANTIC_THRESHOLD': 0.95,       # Default cosine similarity for a semantic hit
+    'SEMANTIC_FEATURES': [],          # Features opted in to the semantic tier
+    'SEMANTIC_FEATURE_THRESHOLDS': {},  # Per-feature overrides, e.g. {'exam': 0.97}
+    'SEMANTIC_MAX_ENTRIES': 1000,     # Per (feature, model, provider) index
+}
+
+
+def get_cache_config() -> Dict[str, Any]:
+    """Effective cache settings (settings.AI_GATEWAY_CACHE over defaults)."""
+    config = dict(DEFAULT_CACHE_CONFIG)
+    config.update(getattr(settings, 'AI_GATEWAY_CACHE', {}))
+    return config
+
+
+class SemanticIndex:
+    """
+    Fixed-size ring of normalized prompt embeddings -> exact cache keys.
+
+    Lookup is one matrix-vector product; the oldest entry is overwritten
+    once the ring is full.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._vectors: Optional[np.ndarray] = None
+        self._keys: List[Optional[str]] = [None] * max_entries
+        self._expires = np.zeros(max_entries)
+        self._count = 0
+        self._pos = 0
+
+    @staticmethod
+    def _normalize(vector) -> Optional[np.ndarray]:
+        vec = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(vec)
+        return vec / norm if norm > 0 else None
+
+    def add(self, vector, cache_key: str, ttl: int) -> None:
+        vec = self._normalize(vector)
+        if vec is None:
+            return
+        if self._vectors is None:
+            self._vectors = np.zeros((self.max_entries, vec.shape[0]), dtype=np.float32)
+        elif vec.shape[0] != self._vectors.shape[1]:
+            return
+        self._vectors[self._pos] = vec
+        self._keys[self._pos] = cache_key
+        self._expires[self._pos] = time.time() + ttl
+        self._pos = (self._pos + 1) % self.max_entries
+        self._count = min(self._count + 1, self.max_entries)
+
+    def search(self, vector, threshold: float) -> Optional[Tuple[str, float]]:
+        """Best live entry with similarity >= threshold, as (cache_key, similarity)."""
+        vec = self._normalize(vector)
+        if vec is None or self._vectors is None or self._count == 0 or vec.shape[0] != self._vectors.shape[1]:
+            return None
+        similarities = self._vectors[:self._count] @ vec
+        similarities[self._expires[:self._count] < time.time()] = -1.0
+        best = int(np.argmax(similarities))
+        if similarities[best] < threshold:
+            return None
+        return self._keys[best], float(similarities[best])
+
+    def __len__(self) -> int:
+        return self._count
+
+
 class CacheManager:
     """
     Response cache using Redis.
@@ -20,6 +104,9 @@ class CacheManager:
     Key format: ai_cache:{sha256_hash}
     Value: JSON-serialized response
     TTL: 3600 seconds (1 hour)
+    
+    In-flight requests and the semantic index are per process. Counters
+    (hits, semantic_hits, coalesced, misses) are exposed via get_counters().
     """
     
     DEFAULT_TTL = 3600  # 1 hour
@@ -27,6 +114,16 @@ class CacheManager:
     
     def __init__(self):
         self.redis = get_redis_client()
+        self._lock = threading.Lock()
+        self._inflight: Dict[str, concurrent.futures.Future] = {}
+        self._semantic: Dict[Tuple[str, str, str], SemanticIndex] = {}
+        self._counters = {
+            'hits': 0,
+            'semantic_hits': 0,
+            'coalesced': 0,
+            'misses': 0,
+            'errors': 0,
+        }
     
     def _generate_cache_key(
         self, 
@@ -70,8 +167,9 @@ class CacheManager:
         Returns:
             Cached response dict, or None if not found
         """
-        cache_key = self._generate_cache_key(messages, model, provider)
-        
+        return await self._get_key(self._generate_cache_key(messages, model, provider))
+    
+    async def _get_key(self, cache_key: str) -> Optional[Dict[str, Any]]:
         try:
             cached = await self.redis.get(cache_key)
             if cached:
@@ -105,8 +203,9 @@ class CacheManager:
         Returns:
             True if cached successfully
         """
-        cache_key = self._generate_cache_key(messages, model, provider)
-        
+        return await self._set_key(self._generate_cache_key(messages, model, provider), response, ttl)
+    
+    async def _set_key(self, cache_key: str, response: Dict[str, Any], ttl: int = DEFAULT_TTL) -> bool:
         try:
             serialized = json.dumps(response, ensure_ascii=False)
             await self.redis.set(cache_key, serialized, ex=ttl)
@@ -132,15 +231,239 @@ class CacheManager:
             logger.warning(f"Cache invalidation error: {e}")
             return False
     
+    # =========================================================================
+    # SINGLE-FLIGHT + SEMANTIC TIER
+    # =========================================================================
+    
+    def _count(self, counter: str) -> None:
+        with self._lock:
+            self._counters[counter] += 1
+    
+    def _claim(self, cache_key: str) -> Tuple[bool, concurrent.futures.Future]:
+        """Become the leader for cache_key, or get the leader's future."""
+        with self._lock:
+            future = self._inflight.get(cache_key)
+            if future is not None:
+                return False, future
+            future = concurrent.futures.Future()
+            self._inflight[cache_key] = future
+            return True, future
+    
+    def _release(self, cache_key: str, future: concurrent.futures.Future) -> None:
+        with self._lock:
+            if self._inflight.get(cache_key) is future:
+                del self._inflight[cache_key]
+        if not future.done():
+            future.cancel()
+    
+    def semantic_threshold(self, feature: Optional[str]) -> Optional[float]:
+        """Similarity threshold for a feature, or None if it has not opted in."""
+        config = get_cache_config()
+        if not feature or feature not in config['SEMANTIC_FEATURES']:
+            return None
+        return config['SEMANTIC_FEATURE_THRESHOLDS'].get(feature, config['SEMANTIC_THRESHOLD'])
+    
+    @staticmethod
+    def _semantic_text(messages: List[Dict[str, str]]) -> str:
+        return "\n".join(m.get("content", "") for m in messages)
+    
+    def _semantic_index(self, feature: str, model: Optional[str], provider: Optional[str]) -> SemanticIndex:
+        partition = (feature, model or '', provider or '')
+        with self._lock:
+            index = self._semantic.get(partition)
+            if index is None:
+                index = SemanticIndex(get_cache_config()['SEMANTIC_MAX_ENTRIES'])
+                self._semantic[partition] = index
+            return index
+    
+    def _semantic_search(self, feature, model, provider, vector) -> Optional[str]:
+        threshold = self.semantic_threshold(feature)
+        if vector is None or threshold is None:
+            return None
+        index = self._semantic_index(feature, model, provider)
+        with self._lock:
+            match = index.search(vector, threshold)
+        if match:
+            logger.debug(f"Semantic cache match for {feature} (similarity {match[1]:.3f})")
+            return match[0]
+        return None
+    
+    def _semantic_add(self, feature, model, provider, vector, cache_key: str, ttl: int) -> None:
+        if vector is None or self.semantic_threshold(feature) is None:
+            return
+        index = self._semantic_index(feature, model, provider)
+        with self._lock:
+            index.add(vector, cache_key, ttl)
+    
+    async def get_or_compute(
+        self,
+        messages: List[Dict[str, str]],
+        compute: Callable[[], Awaitable[Optional[Dict[str, Any]]]],
+        model: Optional[str] = None,
+        provider: Optional[str] = None,
+        feature: Optional[str] = None,
+        embed: Optional[Callable[[str], Awaitable[List[float]]]] = None,
+        ttl: Optional[int] = None,
+    ) -> Tuple[Optional[Dict[str, Any]], str]:
+        """
+        Return a cached response or compute it once for all concurrent callers.
+        
+        Args:
+            compute: Coroutine function producing the response dict
+                     (None results are passed through but not cached)
+            feature: Feature name for the semantic tier opt-in
+            embed: Coroutine function text -> embedding (semantic tier only)
+            
+        Returns:
+            (response, source) where source is 'hit', 'semantic', 'coalesced' or 'miss'
+        """
+        ttl = ttl or get_cache_config()['TTL']
+        cache_key = self._generate_cache_key(messages, model, provider)
+        
+        cached = await self._get_key(cache_key)
+        if cached is not None:
+            self._count('hits')
+            return cached, 'hit'
+        
+        leader, future = self._claim(cache_key)
+        if not leader:
+            try:
+                # shield: cancelling this follower must not cancel the leader's future
+                result = await asyncio.shield(asyncio.wrap_future(future))
+                self._count('coalesced')
+                return result, 'coalesced'
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    raise
+            except Exception as e:
+                logger.info(f"Leader for {cache_key[:20]}... failed ({e}), computing directly")
+            self._count('misses')
+            return await compute(), 'miss'
+        
+        try:
+            vector = None
+            if embed is not None and self.semantic_threshold(feature) is not None:
+                try:
+                    vector = await embed(self._semantic_text(messages))
+                except Exception as e:
+                    self._count('errors')
+                    logger.warning(f"Semantic cache embedding failed: {e}")
+                match_key = self._semantic_search(feature, model, provider, vector)
+                if match_key:
+                    cached = await self._get_key(match_key)
+                    if cached is not None:
+                        self._count('semantic_hits')
+                        future.set_result(cached)
+                        return cached, 'semantic'
+            
+            self._count('misses')
+            result = await compute()
+            if result is not None:
+                await self._set_key(cache_key, result, ttl)
+                self._semantic_add(feature, model, provider, vector, cache_key, ttl)
+            future.set_result(result)
+            return result, 'miss'
+        except BaseException as e:
+            if not future.done():
+                future.set_exception(e)
+            raise
+        finally:
+            self._release(cache_key, future)
+    
+    def get_or_compute_sync(
+        self,
+        messages: List[Dict[str, str]],
+        compute: Callable[[], Optional[Dict[str, Any]]],
+        model: Optional[str] = None,
+        provider: Optional[str] = None,
+        feature: Optional[str] = None,
+        embed: Optional[Callable[[str], List[float]]] = None,
+        ttl: Optional[int] = None,
+    ) -> Tuple[Optional[Dict[str, Any]], str]:
+        """
+        Sync counterpart of get_or_compute for callers outside the event loop
+        (unified_ai, Celery tasks). Shares in-flight requests with async callers.
+        
+        A follower that waits longer than COALESCE_TIMEOUT, or whose leader
+        fails, computes on its own.
+        """
+        from ..utils.async_runner import run_sync
+        
+        config = get_cache_config()
+        ttl = ttl or config['TTL']
+        cache_key = self._generate_cache_key(messages, model, provider)
+        
+        cached = run_sync(self._get_key(cache_key), timeout=10)
+        if cached is not None:
+            self._count('hits')
+            return cached, 'hit'
+        
+        leader, future = self._claim(cache_key)
+        if not leader:
+            try:
+                result = future.result(timeout=config['COALESCE_TIMEOUT'])
+                self._count('coalesced')
+                return result, 'coalesced'
+            except concurrent.futures.TimeoutError:
+                logger.warning(f"Coalesced request timed out waiting for {cache_key[:20]}..., computing directly")
+            except Exception as e:
+                logger.info(f"Leader for {cache_key[:20]}... failed ({e}), computing directly")
+            self._count('misses')
+            return compute(), 'miss'
+        
+        try:
+            vector = None
+            if embed is not None and self.semantic_threshold(feature) is not None:
+                try:
+                    vector = embed(self._semantic_text(messages))
+                except Exception as e:
+                    self._count('errors')
+                    logger.warning(f"Semantic cache embedding failed: {e}")
+                match_key = self._semantic_search(feature, model, provider, vector)
+                if match_key:
+                    cached = run_sync(self._get_key(match_key), timeout=10)
+                    if cached is not None:
+                        self._count('semantic_hits')
+                        future.set_result(cached)
+                        return cached, 'semantic'
+            
+            self._count('misses')
+            result = compute()
+            if result is not None:
+                run_sync(self._set_key(cache_key, result, ttl), timeout=10)
+                self._semantic_add(feature, model, provider, vector, cache_key, ttl)
+            future.set_result(result)
+            return result, 'miss'
+        except BaseException as e:
+            if not future.done():
+                future.set_exception(e)
+            raise
+        finally:
+            self._release(cache_key, future)
+    
+    def get_counters(self) -> Dict[str, Any]:
+        """Hit/miss/coalesce counters for this process."""
+        with self._lock:
+            counters = dict(self._counters)
+            counters['in_flight'] = len(self._inflight)
+            counters['semantic_entries'] = sum(len(index) for index in self._semantic.values())
+        served = counters['hits'] + counters['semantic_hits'] + counters['coalesced']
+        total = served + counters['misses']
+        counters['hit_rate'] = round(served / total * 100, 1) if total else 0.0
+        return counters
+    
     async def get_stats(self) -> Dict[str, Any]:
         """
         Get cache statistics.
         Note: Limited stats without full Redis SCAN.
         """
+        config = get_cache_config()
         return {
             "enabled": True,
             "ttl_seconds": self.DEFAULT_TTL,
             "key_prefix": self.KEY_PREFIX,
+            "semantic_features": list(config['SEMANTIC_FEATURES']),
+            **self.get_counters(),
         }
 
 
@@ -29,6 +29,7 @@ from django.db import transaction, models
 from django.db.models import F, Case, When, Value
 
 from api.ai_gateway.models import ModelInstance, FailureLog, UserAPIKey
+from api.ai_gateway.signals import model_outcome_recorded
 
 logger = logging.getLogger(__name__)
 
@@ -115,12 +116,20 @@ class LearningEngine:
                 instance.api_key.consecutive_failures = 0
                 instance.api_key.save(update_fields=['consecutive_failures'])
             
-            instance.save()
+            # Counters only, so the signal patches cached snapshots instead of evicting them
+            instance.save(update_fields=[
+                'remaining_daily', 'remaining_minute', 'remaining_tokens_minute',
+                'total_requests', 'total_successes', 'last_success_at', 'consecutive_failures',
+                'health_score', 'avg_latency_ms', 'confidence_score',
+                'is_blocked', 'block_until', 'block_reason', 'updated_at',
+            ])
             
             logger.debug(
                 f"Recorded success for {instance.model.model_id}: "
                 f"latency={latency_ms}ms, remaining_daily={instance.remaining_daily}"
             )
+        
+        model_outcome_recorded.send(sender=self.__class__, instance=instance, success=True)
     
     def record_failure(
         self,
@@ -206,6 +215,44 @@ class LearningEngine:
                 f"type={error_type}, blocked={instance.is_blocked}, "
                 f"health={instance.health_score}"
             )
+        
+        model_outcome_recorded.send(sender=self.__class__, instance=instance, success=False)
+
+    def record_hedge_loss(
+        self,
+        instance: ModelInstance,
+        latency_ms: int = 0,
+    ) -> None:
+        """
+        Record a call cancelled because a hedged backup answered first.
+
+        Not a failure (health and failure counters are untouched), but the
+        request was sent, so quota is decremented. The elapsed time is a
+        lower bound on the real latency, so it only ever raises the average.
+        """
+        with transaction.atomic():
+            instance = ModelInstance.objects.select_for_update().get(pk=instance.pk)
+
+            instance.remaining_daily = max(0, instance.remaining_daily - 1)
+            instance.remaining_minute = max(0, instance.remaining_minute - 1)
+            instance.total_requests += 1
+
+            if latency_ms > instance.avg_latency_ms:
+                instance.avg_latency_ms = int(0.9 * instance.avg_latency_ms + 0.1 * latency_ms)
+
+            instance.confidence_score = self._calculate_confidence(instance)
+            instance.save(update_fields=[
+                'remaining_daily', 'remaining_minute', 'total_requests',
+                'avg_latency_ms', 'confidence_score',
+            ])
+
+            logger.debug(
+                f"Recorded hedge loss for {instance.model.model_id}: "
+                f"cancelled after {latency_ms}ms"
+            )
+        
+        # Counters only (never blocks), so cached snapshots can be patched
+        model_outcome_recorded.send(sender=self.__class__, instance=instance, success=True)
 
     def _classify_error(self, error_message: str, error_code: str = '') -> str:
         """Auto-classify error based on message patterns."""
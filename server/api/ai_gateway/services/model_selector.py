@@ -19,8 +19,10 @@ Usage:
 """
 
 import logging
+import threading
+import time
 from dataclasses import dataclass
-from typing import List, Optional
+from typing import List, Optional, Dict, Tuple
 from datetime import timedelta
 
 from django.utils import timezone
@@ -59,6 +61,11 @@ class ModelSelector:
     3. Recency score (penalize recent failures)
     4. Success rate (historical performance)
     5. Failure penalty (consecutive failures)
+    
+    Eligible instances are cached per process for ELIGIBILITY_CACHE_TTL
+    seconds, keyed by (user, request_type, filters). LearningEngine outcomes
+    patch or evict cached entries (see api.ai_gateway.signals), so repeat
+    selections are a memory lookup plus in-memory scoring.
     """
     
     # Minimum confidence to avoid warning
@@ -71,6 +78,29 @@ class ModelSelector:
     SUCCESS_RATE_WEIGHT = 0.15
     FAILURE_PENALTY_WEIGHT = 0.15
     
+    # Eligibility cache
+    ELIGIBILITY_CACHE_TTL = 10  # seconds
+    ELIGIBILITY_CACHE_MAX_ENTRIES = 1000
+    
+    # Expired blocks are cleared at most this often per process
+    # (Celery Beat also runs refresh_blocked_instances every 30s)
+    BLOCK_REFRESH_INTERVAL = 30  # seconds
+    
+    # Fields LearningEngine changes that affect scoring
+    SCORING_FIELDS = (
+        'remaining_daily', 'remaining_minute', 'remaining_tokens_minute',
+        'total_requests', 'total_successes', 'total_failures',
+        'consecutive_failures', 'health_score', 'avg_latency_ms',
+        'confidence_score', 'is_blocked', 'block_until', 'block_reason',
+        'last_success_at', 'last_failure_at',
+    )
+    
+    def __init__(self):
+        self._cache: Dict[Tuple, Tuple[float, List[ModelInstance]]] = {}
+        self._cache_lock = threading.Lock()
+        self._last_block_refresh = 0.0
+        self._cache_stats = {'hits': 0, 'misses': 0, 'evictions': 0}
+    
     def find_best_model(
         self,
         user,
@@ -97,17 +127,19 @@ class ModelSelector:
         required_capabilities = required_capabilities or []
         exclude_providers = exclude_providers or []
         
-        # SELF-HEALING: Refresh blocked instances on every selection
+        # SELF-HEALING: Refresh blocked instances (throttled)
         # This ensures expired blocks are cleared even without Celery Beat
-        try:
-            from .learning_engine import learning_engine
-            unblocked = learning_engine.refresh_blocked_instances()
-            if unblocked > 0:
-                logger.info(f"Self-healed: unblocked {unblocked} expired instances")
-        except Exception as e:
-            logger.warning(f"Failed to refresh blocked instances: {e}")
+        self._maybe_refresh_blocked()
+        
+        # Step 1: Get eligible model instances (cached snapshot)
+        cache_key = self._cache_key(
+            user, request_type, required_capabilities,
+            quality_tier, exclude_providers, min_context_window,
+        )
+        eligible = self._cache_get(cache_key)
+        if eligible is not None:
+            return self._select(user, request_type, eligible)
         
-        # Step 1: Get eligible model instances
         eligible = self._get_eligible_instances(
             user=user,
             request_type=request_type,
@@ -130,6 +162,11 @@ class ModelSelector:
                 min_context_window=min_context_window,
             )
         
+        self._cache_set(cache_key, eligible)
+        return self._select(user, request_type, eligible)
+    
+    def _select(self, user, request_type: str, eligible: List[ModelInstance]) -> ModelSelectionResult:
+        """Score eligible instances and pick the best one."""
         if not eligible:
             logger.warning(f"No eligible models for user {user.id}, type={request_type}")
             return ModelSelectionResult(
@@ -244,6 +281,119 @@ class ModelSelector:
         # Clamp to 0-1
         return max(0.0, min(1.0, score))
     
+    # =========================================================================
+    # ELIGIBILITY CACHE
+    # =========================================================================
+    
+    def _cache_key(
+        self,
+        user,
+        request_type: str,
+        required_capabilities: List[str],
+        quality_tier: Optional[str],
+        exclude_providers: List[str],
+        min_context_window: int,
+    ) -> Tuple:
+        return (
+            user.id,
+            request_type,
+            tuple(sorted(required_capabilities)),
+            quality_tier,
+            tuple(sorted(exclude_providers)),
+            min_context_window,
+        )
+    
+    def _cache_get(self, cache_key: Tuple) -> Optional[List[ModelInstance]]:
+        now = time.monotonic()
+        with self._cache_lock:
+            entry = self._cache.get(cache_key)
+            if entry is None or entry[0] <= now:
+                if entry is not None:
+                    del self._cache[cache_key]
+                self._cache_stats['misses'] += 1
+                return None
+            self._cache_stats['hits'] += 1
+            return list(entry[1])
+    
+    def _cache_set(self, cache_key: Tuple, eligible: List[ModelInstance]) -> None:
+        expires_at = time.monotonic() + self.ELIGIBILITY_CACHE_TTL
+        with self._cache_lock:
+            if len(self._cache) >= self.ELIGIBILITY_CACHE_MAX_ENTRIES:
+                # Drop the entry closest to expiry
+                oldest = min(self._cache, key=lambda k: self._cache[k][0])
+                del self._cache[oldest]
+                self._cache_stats['evictions'] += 1
+            self._cache[cache_key] = (expires_at, list(eligible))
+    
+    def invalidate_cache(self, user_id: Optional[int] = None, api_key_id: Optional[int] = None) -> int:
+        """
+        Drop cached eligibility snapshots.
+        
+        Args:
+            user_id: Only entries for this user
+            api_key_id: Only entries containing an instance of this key
+                        (covers users falling back to system keys)
+            
+        With no arguments the whole cache is cleared.
+        
+        Returns:
+            Number of entries dropped
+        """
+        with self._cache_lock:
+            if user_id is None and api_key_id is None:
+                dropped = len(self._cache)
+                self._cache.clear()
+                return dropped
+            
+            stale = [
+                key for key, (_, instances) in self._cache.items()
+                if (user_id is not None and key[0] == user_id)
+                or (api_key_id is not None and any(i.api_key_id == api_key_id for i in instances))
+            ]
+            for key in stale:
+                del self._cache[key]
+            return len(stale)
+    
+    def apply_outcome(self, instance: ModelInstance, success: bool) -> None:
+        """
+        Update cached snapshots after LearningEngine records an outcome.
+        
+        Successes copy the fresh counters onto cached copies of the instance.
+        Failures can block the whole key (quota, invalid key), so every
+        entry containing that key is evicted instead.
+        """
+        if not success:
+            self.invalidate_cache(api_key_id=instance.api_key_id)
+            return
+        
+        with self._cache_lock:
+            for _, instances in self._cache.values():
+                for cached in instances:
+                    if cached.pk == instance.pk and cached is not instance:
+                        for field in self.SCORING_FIELDS:
+                            setattr(cached, field, getattr(instance, field))
+    
+    def get_cache_stats(self) -> Dict[str, int]:
+        """Eligibility cache counters for monitoring."""
+        with self._cache_lock:
+            return {**self._cache_stats, 'entries': len(self._cache)}
+    
+    def _maybe_refresh_blocked(self) -> None:
+        """Run learning_engine.refresh_blocked_instances at most every BLOCK_REFRESH_INTERVAL."""
+        now = time.monotonic()
+        if now - self._last_block_refresh < self.BLOCK_REFRESH_INTERVAL:
+            return
+        self._last_block_refresh = now
+        
+        try:
+            from .learning_engine import learning_engine
+            unblocked = learning_engine.refresh_blocked_instances()
+            if unblocked > 0:
+                logger.info(f"Self-healed: unblocked {unblocked} expired instances")
+                self.invalidate_cache()
+        except Exception as e:
+            logger.warning(f"Failed to refresh blocked instances: {e}")
+    
     def _get_eligible_instances(
         self,
         user,
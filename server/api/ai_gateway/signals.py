@@ -0,0 +1,51 @@
+"""
+Signals for AI Gateway.
+
+model_outcome_recorded is sent by LearningEngine after every recorded
+success/failure (and hedge loss) so in-process caches (ModelSelector eligibility) stay fresh.
+"""
+
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import Signal, receiver
+
+from .models import UserAPIKey, ModelInstance
+
+# kwargs: instance (ModelInstance, already saved), success (bool)
+model_outcome_recorded = Signal()
+
+# UserAPIKey fields that change model eligibility (usage counters don't)
+ELIGIBILITY_KEY_FIELDS = {'is_active', 'is_blocked', 'block_until', 'user', 'provider'}
+
+
+@receiver(model_outcome_recorded)
+def update_selector_cache(sender, instance, success, **kwargs):
+    """Patch or evict cached eligibility snapshots for this instance."""
+    from .services.model_selector import model_selector
+    model_selector.apply_outcome(instance, success)
+
+
+@receiver(post_save, sender=UserAPIKey)
+@receiver(post_delete, sender=UserAPIKey)
+def invalidate_selector_cache_for_key(sender, instance, update_fields=None, **kwargs):
+    """Keys added, edited or removed change which models are eligible."""
+    if update_fields and not ELIGIBILITY_KEY_FIELDS.intersection(update_fields):
+        return
+    
+    from .services.model_selector import model_selector
+    model_selector.invalidate_cache(user_id=instance.user_id)
+    model_selector.invalidate_cache(api_key_id=instance.pk)
+
+
+@receiver(post_save, sender=ModelInstance)
+@receiver(post_delete, sender=ModelInstance)
+def invalidate_selector_cache_for_instance(sender, instance, update_fields=None, **kwargs):
+    """
+    Instances added (auto-seeding), edited or removed change which models
+    are eligible. Counter-only saves from LearningEngine are skipped: they
+    reach cached snapshots through model_outcome_recorded instead.
+    """
+    from .services.model_selector import ModelSelector, model_selector
+    
+    if update_fields and set(update_fields) <= {*ModelSelector.SCORING_FIELDS, 'updated_at'}:
+        return
+    model_selector.invalidate_cache()
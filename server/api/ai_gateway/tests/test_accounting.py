@@ -0,0 +1,134 @@
+"""
+Unit Tests for AI Gateway write-behind accounting.
+
+Run with:
+    python manage.py test api.ai_gateway.tests.test_accounting
+"""
+
+from datetime import timedelta
+
+from django.test import TestCase
+from django.utils import timezone
+from django.contrib.auth.models import User
+
+from api.ai_gateway.models import UserAPIKey, ModelDefinition, ModelInstance, UsageLog
+from api.ai_gateway.services.accounting import AccountingBuffer
+
+
+class AccountingBufferTestCase(TestCase):
+    """Tests for AccountingBuffer (manual flush, no background thread)."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='accounting', password='testpass123')
+        self.api_key = UserAPIKey.objects.create(
+            user=self.user,
+            provider='groq',
+            api_key_encrypted='test_key',
+            is_active=True,
+            consecutive_failures=2,
+        )
+        self.model_def = ModelDefinition.objects.create(
+            provider='groq',
+            model_id='groq-test',
+            display_name='Test Model',
+            is_text=True,
+            is_active=True,
+        )
+        self.instance = ModelInstance.objects.create(
+            api_key=self.api_key,
+            model=self.model_def,
+            daily_quota=1000,
+            remaining_daily=1000,
+            minute_quota=15,
+            remaining_minute=15,
+            health_score=90,
+            avg_latency_ms=1000,
+            consecutive_failures=1,
+        )
+        self.buffer = AccountingBuffer(flush_interval=0, write_behind=True)
+
+    def test_nothing_written_until_flush(self):
+        """Recorded successes stay in memory until flush()."""
+        self.buffer.record_success(self.instance, latency_ms=500, tokens_used=100)
+        self.buffer.log_usage(user=self.user, key=self.api_key, provider='groq', status='success')
+
+        self.assertEqual(ModelInstance.objects.get(pk=self.instance.pk).total_requests, 0)
+        self.assertEqual(UsageLog.objects.count(), 0)
+        self.assertGreater(self.buffer.pending_count(), 0)
+
+    def test_flush_aggregates_successes(self):
+        """Several successes collapse into one set of F() updates."""
+        for _ in range(3):
+            self.buffer.record_success(ModelInstance.objects.get(pk=self.instance.pk), latency_ms=500, tokens_used=10)
+        self.buffer.flush()
+
+        instance = ModelInstance.objects.get(pk=self.instance.pk)
+        self.assertEqual(instance.total_requests, 3)
+        self.assertEqual(instance.total_successes, 3)
+        self.assertEqual(instance.remaining_daily, 997)
+        self.assertEqual(instance.remaining_minute, 12)
+        self.assertEqual(instance.consecutive_failures, 0)
+        self.assertEqual(instance.health_score, 96)
+        # Three EWMA steps from 1000 toward 500: 1000*0.9^3 + 500*(1-0.9^3) = 864.5
+        self.assertIn(instance.avg_latency_ms, (864, 865))
+        self.assertGreater(instance.confidence_score, 0)
+
+        key = UserAPIKey.objects.get(pk=self.api_key.pk)
+        self.assertEqual(key.requests_today, 3)
+        self.assertEqual(key.requests_this_month, 3)
+        self.assertEqual(key.consecutive_failures, 0)
+        self.assertIsNotNone(key.last_used_at)
+        self.assertEqual(self.buffer.pending_count(), 0)
+
+    def test_flush_keeps_blocks_recorded_meanwhile(self):
+        """A block committed between record_success and flush survives; expired ones are lifted."""
+        other = ModelInstance.objects.create(
+            api_key=self.api_key, model=ModelDefinition.objects.create(provider='groq', model_id='groq-other'),
+        )
+        self.buffer.record_success(self.instance, latency_ms=500)
+        self.buffer.record_success(other, latency_ms=500)
+        ModelInstance.objects.filter(pk=self.instance.pk).update(
+            is_blocked=True, block_until=timezone.now() + timedelta(hours=1), block_reason='quota',
+        )
+        ModelInstance.objects.filter(pk=other.pk).update(
+            is_blocked=True, block_until=timezone.now() - timedelta(minutes=1), block_reason='cooldown',
+        )
+        self.buffer.flush()
+
+        blocked = ModelInstance.objects.get(pk=self.instance.pk)
+        self.assertEqual((blocked.is_blocked, blocked.block_reason), (True, 'quota'))
+        self.assertEqual(blocked.total_successes, 1)
+        self.assertFalse(ModelInstance.objects.get(pk=other.pk).is_blocked)
+
+    def test_record_success_updates_instance_in_memory(self):
+        """The passed instance reflects the change before the flush."""
+        self.buffer.record_success(self.instance, latency_ms=500)
+        self.assertEqual(self.instance.remaining_daily, 999)
+        self.assertEqual(self.instance.total_successes, 1)
+        self.assertEqual(self.instance.avg_latency_ms, 950)
+
+    def test_logs_bulk_created(self):
+        """UsageLog rows are written in bulk; rows without a user are skipped."""
+        for status in ('success', 'error', 'timeout'):
+            self.buffer.log_usage(user=self.user, key=self.api_key, provider='groq', status=status)
+        self.buffer.log_usage(user=None, key=self.api_key, provider='groq', status='error')
+        self.buffer.flush()
+
+        self.assertEqual(UsageLog.objects.filter(user=self.user).count(), 3)
+
+    def test_hedge_loss_spends_quota_only(self):
+        """Hedge losses decrement quota without touching health or successes."""
+        self.buffer.record_hedge_loss(self.instance, latency_ms=200)
+        self.buffer.flush()
+
+        instance = ModelInstance.objects.get(pk=self.instance.pk)
+        self.assertEqual(instance.remaining_daily, 999)
+        self.assertEqual(instance.total_successes, 0)
+        self.assertEqual(instance.health_score, 90)
+        self.assertEqual(instance.avg_latency_ms, 1000)
+
+    def test_write_through_when_disabled(self):
+        """With WRITE_BEHIND off every record is flushed immediately."""
+        buffer = AccountingBuffer(flush_interval=0, write_behind=False)
+        buffer.record_success(self.instance, latency_ms=500)
+        self.assertEqual(ModelInstance.objects.get(pk=self.instance.pk).total_successes, 1)
@@ -0,0 +1,243 @@
+"""
+Unit Tests for AI Gateway CacheManager coalescing and semantic tier.
+
+Run with:
+    python manage.py test api.ai_gateway.tests.test_cache_manager
+"""
+
+import asyncio
+import threading
+import time
+import uuid
+from unittest.mock import patch
+
+from django.test import SimpleTestCase, override_settings
+
+from api.ai_gateway.services.cache_manager import CacheManager, SemanticIndex
+
+
+def unique_messages(text="Explain the dative case"):
+    """Messages that won't collide with entries from other tests in the shared fallback store."""
+    return [{"role": "user", "content": f"{text} [{uuid.uuid4().hex}]"}]
+
+
+class CacheManagerCoalescingTestCase(SimpleTestCase):
+    """Tests for exact-match caching and single-flight coalescing."""
+
+    def setUp(self):
+        self.cache = CacheManager()
+
+    def test_second_call_is_a_hit(self):
+        """A computed response is served from the cache afterwards."""
+        messages = unique_messages()
+        first, source = self.cache.get_or_compute_sync(messages, lambda: {'text': 'answer'})
+        second, second_source = self.cache.get_or_compute_sync(messages, lambda: {'text': 'other'})
+
+        self.assertEqual((source, second_source), ('miss', 'hit'))
+        self.assertEqual(second, {'text': 'answer'})
+
+    def test_concurrent_identical_requests_coalesce(self):
+        """Identical in-flight requests share one compute call."""
+        messages = unique_messages()
+        release = threading.Event()
+        calls = []
+        results = []
+
+        def compute():
+            calls.append(1)
+            release.wait(5)
+            return {'text': 'shared'}
+
+        def worker():
+            results.append(self.cache.get_or_compute_sync(messages, compute))
+
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        threads[0].start()
+        while not self.cache.get_counters()['in_flight']:
+            pass
+        for thread in threads[1:]:
+            thread.start()
+        while self.cache.get_counters()['coalesced'] < 3:
+            pass
+        release.set()
+        for thread in threads:
+            thread.join(5)
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(sorted(source for _, source in results), ['coalesced'] * 3 + ['miss'])
+        self.assertTrue(all(result == {'text': 'shared'} for result, _ in results))
+
+    def test_async_callers_coalesce(self):
+        """The async API coalesces concurrent coroutines too."""
+        messages = unique_messages()
+        calls = []
+
+        async def compute():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return {'text': 'async'}
+
+        async def run_three():
+            return await asyncio.gather(*[self.cache.get_or_compute(messages, compute) for _ in range(3)])
+
+        results = asyncio.run(run_three())
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(sorted(source for _, source in results), ['coalesced', 'coalesced', 'miss'])
+
+    def test_none_is_not_cached(self):
+        """Empty results pass through without being cached."""
+        messages = unique_messages()
+        self.cache.get_or_compute_sync(messages, lambda: None)
+        result, source = self.cache.get_or_compute_sync(messages, lambda: {'text': 'later'})
+        self.assertEqual(source, 'miss')
+        self.assertEqual(result, {'text': 'later'})
+
+    def test_leader_exception_propagates(self):
+        """Errors are raised to the caller and the key is released."""
+        messages = unique_messages()
+
+        def boom():
+            raise ValueError("provider down")
+
+        with self.assertRaises(ValueError):
+            self.cache.get_or_compute_sync(messages, boom)
+        self.assertEqual(self.cache.get_counters()['in_flight'], 0)
+
+    def test_followers_compute_when_leader_fails(self):
+        """A leader's error is not shared; each waiting follower computes itself."""
+        messages = unique_messages()
+        release = threading.Event()
+        results = []
+        errors = []
+
+        def failing():
+            release.wait(5)
+            raise ValueError("provider down")
+
+        def leader():
+            try:
+                self.cache.get_or_compute_sync(messages, failing)
+            except ValueError as e:
+                errors.append(e)
+
+        def follower():
+            results.append(self.cache.get_or_compute_sync(messages, lambda: {'text': 'own'}))
+
+        threads = [threading.Thread(target=leader)] + [threading.Thread(target=follower) for _ in range(2)]
+        threads[0].start()
+        while not self.cache.get_counters()['in_flight']:
+            pass
+        for thread in threads[1:]:
+            thread.start()
+        time.sleep(0.2)  # let the followers reach the leader's future
+        release.set()
+        for thread in threads:
+            thread.join(5)
+
+        self.assertEqual(len(errors), 1)
+        self.assertEqual(results, [({'text': 'own'}, 'miss')] * 2)
+
+    def test_async_followers_compute_when_leader_fails(self):
+        """The async API falls back to computing too."""
+        messages = unique_messages()
+        calls = []
+
+        async def compute():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            if len(calls) == 1:
+                raise ValueError("provider down")
+            return {'text': 'own'}
+
+        async def run_three():
+            return await asyncio.gather(
+                *[self.cache.get_or_compute(messages, compute) for _ in range(3)], return_exceptions=True,
+            )
+
+        results = asyncio.run(run_three())
+        self.assertIsInstance(results[0], ValueError)
+        self.assertEqual(results[1:], [({'text': 'own'}, 'miss')] * 2)
+
+
+@override_settings(AI_GATEWAY_CACHE={
+    'SEMANTIC_FEATURES': ['exam'],
+    'SEMANTIC_THRESHOLD': 0.9,
+    'SEMANTIC_MAX_ENTRIES': 10,
+})
+class CacheManagerSemanticTestCase(SimpleTestCase):
+    """Tests for the opt-in embedding-similarity tier."""
+
+    def setUp(self):
+        self.cache = CacheManager()
+        self.vectors = {}
+
+    def embed(self, text):
+        return self.vectors[text.split(' [')[0]]
+
+    def test_similar_prompt_is_semantic_hit(self):
+        """A near-duplicate prompt in an opted-in feature reuses the response."""
+        self.vectors = {'Exam on travel': [1.0, 0.0, 0.1], 'Exam about travel': [1.0, 0.0, 0.12]}
+        self.cache.get_or_compute_sync(
+            unique_messages('Exam on travel'), lambda: {'text': 'exam'}, feature='exam', embed=self.embed
+        )
+        result, source = self.cache.get_or_compute_sync(
+            unique_messages('Exam about travel'), lambda: {'text': 'new'}, feature='exam', embed=self.embed
+        )
+        self.assertEqual(source, 'semantic')
+        self.assertEqual(result, {'text': 'exam'})
+
+    def test_dissimilar_prompt_misses(self):
+        """Prompts below the threshold are computed."""
+        self.vectors = {'Exam on travel': [1.0, 0.0, 0.0], 'Exam on food': [0.0, 1.0, 0.0]}
+        self.cache.get_or_compute_sync(
+            unique_messages('Exam on travel'), lambda: {'text': 'exam'}, feature='exam', embed=self.embed
+        )
+        _, source = self.cache.get_or_compute_sync(
+            unique_messages('Exam on food'), lambda: {'text': 'food'}, feature='exam', embed=self.embed
+        )
+        self.assertEqual(source, 'miss')
+
+    def test_feature_must_opt_in(self):
+        """Features not listed in SEMANTIC_FEATURES never embed."""
+        def embed(text):
+            raise AssertionError("should not embed")
+
+        _, source = self.cache.get_or_compute_sync(
+            unique_messages(), lambda: {'text': 'x'}, feature='podcast', embed=embed
+        )
+        self.assertEqual(source, 'miss')
+        self.assertIsNone(self.cache.semantic_threshold('podcast'))
+
+
+class SemanticIndexTestCase(SimpleTestCase):
+    """Tests for the SemanticIndex ring buffer."""
+
+    def test_ring_overwrites_oldest(self):
+        """Entries beyond max_entries replace the oldest ones."""
+        index = SemanticIndex(max_entries=2)
+        index.add([1.0, 0.0], 'a', ttl=60)
+        index.add([0.0, 1.0], 'b', ttl=60)
+        index.add([0.7, 0.7], 'c', ttl=60)
+
+        self.assertEqual(len(index), 2)
+        self.assertIsNone(index.search([1.0, 0.0], threshold=0.99))
+        self.assertEqual(index.search([0.7, 0.7], threshold=0.99)[0], 'c')
+
+    def test_expired_entries_ignored(self):
+        """Entries past their TTL never match."""
+        index = SemanticIndex(max_entries=4)
+        index.add([1.0, 0.0], 'a', ttl=-1)
+        self.assertIsNone(index.search([1.0, 0.0], threshold=0.5))
+
+
+class GenerateAIContentCacheTestCase(SimpleTestCase):
+    """generate_ai_content only caches deterministic calls."""
+
+    @patch('api.unified_ai._try_gateway', return_value='fresh')
+    @patch('api.unified_ai._try_gateway_cached', return_value='cached')
+    def test_sampled_calls_bypass_the_cache(self, cached, fresh):
+        from api.unified_ai import generate_ai_content
+
+        self.assertEqual(generate_ai_content(None, 'prompt', temperature=0.7, cache_feature='exam'), 'fresh')
+        self.assertEqual(generate_ai_content(None, 'prompt', temperature=0, cache_feature='exam'), 'cached')
+        self.assertEqual((cached.call_count, fresh.call_count), (1, 1))
@@ -0,0 +1,83 @@
+"""
+Unit Tests for hedged gateway requests in unified_ai.
+
+Run with:
+    python manage.py test api.ai_gateway.tests.test_hedging
+"""
+
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from django.test import SimpleTestCase
+
+from api import unified_ai
+from api.unified_ai import _GatewayAttempt, _hedge_delay_ms, _hedged_complete
+
+
+CONFIG = {'ENABLED': True, 'PERCENTILE': 0.95, 'MIN_DELAY_MS': 10, 'MAX_DELAY_MS': 1000}
+
+
+def make_instance(name, avg_latency_ms=100):
+    return SimpleNamespace(name=name, avg_latency_ms=avg_latency_ms)
+
+
+def fake_attempts(behaviour):
+    """Build an _attempt_complete replacement from {name: (sleep_s, success)}."""
+    async def _attempt(instance, messages, call_kwargs):
+        sleep_s, success = behaviour[instance.name]
+        await asyncio.sleep(sleep_s)
+        if success:
+            response = SimpleNamespace(success=True, content=instance.name)
+            return _GatewayAttempt(instance, response=response, latency_ms=int(sleep_s * 1000))
+        return _GatewayAttempt(instance, error="boom", latency_ms=int(sleep_s * 1000))
+    return _attempt
+
+
+class HedgeDelayTestCase(SimpleTestCase):
+    """Tests for _hedge_delay_ms."""
+
+    def test_percentile_of_average(self):
+        """p95 of an exponential with mean 100ms is ~300ms."""
+        self.assertEqual(_hedge_delay_ms(make_instance('a', 100), CONFIG), 299)
+
+    def test_clamped(self):
+        """Delay stays within MIN/MAX; unknown latency waits the maximum."""
+        self.assertEqual(_hedge_delay_ms(make_instance('a', 1), CONFIG), 10)
+        self.assertEqual(_hedge_delay_ms(make_instance('a', 10_000), CONFIG), 1000)
+        self.assertEqual(_hedge_delay_ms(make_instance('a', 0), CONFIG), 1000)
+
+
+class HedgedCompleteTestCase(SimpleTestCase):
+    """Tests for _hedged_complete race logic."""
+
+    def run_hedge(self, behaviour, delay_ms=50):
+        primary, partner = make_instance('primary'), make_instance('partner')
+        with patch.object(unified_ai, '_attempt_complete', fake_attempts(behaviour)):
+            return asyncio.run(_hedged_complete(primary, partner, delay_ms, [], {}))
+
+    def test_fast_primary_does_not_hedge(self):
+        """A primary that answers before the delay is the only attempt."""
+        attempts = self.run_hedge({'primary': (0.01, True), 'partner': (0.01, True)})
+        self.assertEqual([a.instance.name for a in attempts], ['primary'])
+
+    def test_slow_primary_loses_to_partner(self):
+        """The backup wins and the slow primary is cancelled."""
+        attempts = self.run_hedge({'primary': (1.0, True), 'partner': (0.01, True)})
+        self.assertEqual(attempts[0].instance.name, 'partner')
+        self.assertTrue(attempts[0].succeeded)
+        self.assertTrue(attempts[1].cancelled)
+        self.assertEqual(attempts[1].instance.name, 'primary')
+
+    def test_failed_primary_falls_through_to_partner(self):
+        """A fast failure runs the partner immediately."""
+        attempts = self.run_hedge({'primary': (0.01, False), 'partner': (0.01, True)})
+        self.assertFalse(attempts[0].succeeded)
+        self.assertTrue(attempts[1].succeeded)
+
+    def test_hedged_partner_failure_waits_for_primary(self):
+        """If the backup fails, the race keeps waiting for the primary."""
+        attempts = self.run_hedge({'primary': (0.2, True), 'partner': (0.01, False)})
+        self.assertEqual(attempts[0].instance.name, 'primary')
+        self.assertTrue(attempts[0].succeeded)
+        self.assertFalse(any(a.cancelled for a in attempts))
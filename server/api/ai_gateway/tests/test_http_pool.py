@@ -0,0 +1,111 @@
+"""
+Unit Tests for AI Gateway pooled HTTP clients and the background loop runner.
+
+Run with:
+    python manage.py test api.ai_gateway.tests.test_http_pool
+"""
+
+import asyncio
+import concurrent.futures
+
+from django.test import SimpleTestCase
+
+from api.ai_gateway.utils.http_pool import HttpClientPool, get_pool_config
+from api.ai_gateway.utils.async_runner import BackgroundLoopRunner
+
+
+class HttpClientPoolTestCase(SimpleTestCase):
+    """Tests for HttpClientPool."""
+
+    def setUp(self):
+        self.pool = HttpClientPool()
+
+    def test_client_reused_within_loop(self):
+        """Repeated leases on one loop share a single client."""
+        async def lease_twice():
+            async with self.pool.lease('groq') as first:
+                pass
+            async with self.pool.lease('groq') as second:
+                pass
+            await self.pool.aclose_loop()
+            return first, second
+
+        first, second = asyncio.run(lease_twice())
+        self.assertIs(first, second)
+        stats = self.pool.get_stats()['groq']
+        self.assertEqual(stats['requests'], 2)
+        self.assertEqual(stats['clients_created'], 1)
+        self.assertEqual(stats['in_flight'], 0)
+
+    def test_clients_are_per_provider(self):
+        """Each provider gets its own client."""
+        async def lease_two_providers():
+            async with self.pool.lease('groq') as groq_client:
+                pass
+            async with self.pool.lease('cohere') as cohere_client:
+                pass
+            closed = await self.pool.aclose_loop()
+            return groq_client, cohere_client, closed
+
+        groq_client, cohere_client, closed = asyncio.run(lease_two_providers())
+        self.assertIsNot(groq_client, cohere_client)
+        self.assertEqual(closed, 2)
+        self.assertTrue(groq_client.is_closed)
+
+    def test_lease_counts_errors(self):
+        """Exceptions inside a lease are counted and re-raised."""
+        async def failing_lease():
+            async with self.pool.lease('gemini'):
+                raise ValueError("boom")
+
+        with self.assertRaises(ValueError):
+            asyncio.run(failing_lease())
+        stats = self.pool.get_stats()['gemini']
+        self.assertEqual(stats['errors'], 1)
+        self.assertEqual(stats['in_flight'], 0)
+
+    def test_provider_config_overrides(self):
+        """Provider overrides are merged over defaults."""
+        config = get_pool_config('pollinations')
+        self.assertTrue(config['follow_redirects'])
+        self.assertEqual(config['timeout'], 120.0)
+        self.assertFalse(get_pool_config('unknown')['follow_redirects'])
+
+
+class BackgroundLoopRunnerTestCase(SimpleTestCase):
+    """Tests for BackgroundLoopRunner sync bridge."""
+
+    def setUp(self):
+        self.runner = BackgroundLoopRunner(name="test-loop")
+
+    def tearDown(self):
+        self.runner.shutdown()
+
+    def test_runs_on_single_loop(self):
+        """Every call runs on the same long-lived loop."""
+        async def current_loop():
+            return asyncio.get_running_loop()
+
+        first = self.runner.run(current_loop(), timeout=5)
+        second = self.runner.run(current_loop(), timeout=5)
+        self.assertIs(first, second)
+        stats = self.runner.get_stats()
+        self.assertTrue(stats['running'])
+        self.assertEqual(stats['submitted'], 2)
+
+    def test_exception_propagates(self):
+        """Coroutine exceptions are raised in the caller."""
+        async def boom():
+            raise ValueError("boom")
+
+        with self.assertRaises(ValueError):
+            self.runner.run(boom(), timeout=5)
+
+    def test_timeout_cancels(self):
+        """Slow coroutines time out and are counted."""
+        async def slow():
+            await asyncio.sleep(5)
+
+        with self.assertRaises(concurrent.futures.TimeoutError):
+            self.runner.run(slow(), timeout=0.05)
+        self.assertEqual(self.runner.get_stats()['timed_out'], 1)
@@ -336,3 +336,86 @@ class LearningEngineTestCase(TestCase):
         for message, expected_type in test_cases:
             result = self.engine._classify_error(message, '')
             self.assertEqual(result, expected_type, f"Failed for message: {message}")
+
+
+class ModelSelectorCacheTestCase(TestCase):
+    """Tests for the ModelSelector eligibility cache."""
+    
+    def setUp(self):
+        self.user = User.objects.create_user(username='cacheuser', password='testpass123')
+        self.api_key = UserAPIKey.objects.create(
+            user=self.user,
+            provider='groq',
+            api_key_encrypted='test_key',
+            is_active=True,
+        )
+        self.model_def = ModelDefinition.objects.create(
+            provider='groq',
+            model_id='llama-test',
+            display_name='Llama Test',
+            is_text=True,
+            is_active=True,
+        )
+        self.model_instance = ModelInstance.objects.create(
+            api_key=self.api_key,
+            model=self.model_def,
+            daily_quota=1000,
+            remaining_daily=1000,
+            health_score=100,
+        )
+        
+        self.selector = ModelSelector()
+        self.engine = LearningEngine()
+        # Route LearningEngine signals to this selector instead of the singleton
+        patcher = patch('api.ai_gateway.services.model_selector.model_selector', self.selector)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+    
+    def test_second_selection_hits_cache(self):
+        """Repeat selections are served without querying the database."""
+        first = self.selector.find_best_model(user=self.user, request_type='text')
+        
+        with self.assertNumQueries(0):
+            second = self.selector.find_best_model(user=self.user, request_type='text')
+        
+        self.assertEqual(first.model.pk, second.model.pk)
+        self.assertEqual(self.selector.get_cache_stats()['hits'], 1)
+    
+    def test_success_patches_cached_instance(self):
+        """record_success updates counters on the cached copy."""
+        first = self.selector.find_best_model(user=self.user, request_type='text')
+        
+        self.engine.record_success(instance=first.model, latency_ms=100)
+        
+        with self.assertNumQueries(0):
+            second = self.selector.find_best_model(user=self.user, request_type='text')
+        self.assertEqual(second.model.remaining_daily, 999)
+        self.assertEqual(second.model.total_successes, 1)
+    
+    def test_instance_edits_and_deletes_evict_cache(self):
+        """Saving or deleting a ModelInstance outside LearningEngine drops cached entries."""
+        self.selector.find_best_model(user=self.user, request_type='text')
+        
+        self.model_instance.is_blocked = True
+        self.model_instance.save()
+        self.assertEqual(self.selector.get_cache_stats()['entries'], 0)
+        
+        self.model_instance.is_blocked = False
+        self.model_instance.save()
+        self.selector.find_best_model(user=self.user, request_type='text')
+        self.model_instance.delete()
+        self.assertEqual(self.selector.get_cache_stats()['entries'], 0)
+    
+    def test_failure_evicts_cached_key(self):
+        """record_failure drops cached entries containing the key."""
+        self.selector.find_best_model(user=self.user, request_type='text')
+        
+        self.engine.record_failure(
+            instance=self.model_instance,
+            error_type='INVALID_KEY',
+            error_message='Invalid API key',
+        )
+        
+        self.assertEqual(self.selector.get_cache_stats()['entries'], 0)
+        result = self.selector.find_best_model(user=self.user, request_type='text')
+        self.assertFalse(result.success)
@@ -0,0 +1,225 @@
+"""
+Unit Tests for streamed generation: adapter SSE parsing, GatewayStream
+failover and the SSE endpoints.
+
+Run with:
+    python manage.py test api.ai_gateway.tests.test_streaming
+"""
+
+import asyncio
+import json
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import httpx
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase
+from rest_framework.test import APITestCase
+
+from api import unified_ai
+from api.ai_gateway.adapters import StreamEvent
+from api.ai_gateway.adapters.base import AdapterResponse
+from api.ai_gateway.adapters.groq import GroqAdapter
+from api.unified_ai import _GatewayAttempt, _record_gateway_attempt, stream_ai_content
+
+
+def sse_body(*chunks):
+    return "".join(f"data: {json.dumps(c)}\n\n" for c in chunks) + "data: [DONE]\n\n"
+
+
+def openai_chunk(text=None, usage=None):
+    chunk = {"choices": [{"delta": {"content": text}}] if text is not None else []}
+    if usage:
+        chunk["usage"] = usage
+    return chunk
+
+
+def collect(adapter):
+    async def _collect():
+        return [e async for e in adapter.stream([{"role": "user", "content": "hi"}])]
+    return asyncio.run(_collect())
+
+
+class AdapterStreamTestCase(SimpleTestCase):
+    """Tests for BaseAdapter._stream_sse via the Groq adapter."""
+
+    def stream_with(self, handler):
+        adapter = GroqAdapter("key", model="llama-3.3-70b-versatile")
+
+        @asynccontextmanager
+        async def _http():
+            async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+                yield client
+
+        with patch.object(adapter, '_http', _http):
+            return collect(adapter)
+
+    def test_deltas_then_response(self):
+        """Each chunk becomes a delta; usage comes from the final chunk."""
+        body = sse_body(
+            openai_chunk("Hallo"), openai_chunk(" Welt"),
+            openai_chunk(usage={"prompt_tokens": 5, "completion_tokens": 2}),
+        )
+        events = self.stream_with(lambda request: httpx.Response(200, text=body))
+
+        self.assertEqual([e.delta for e in events[:-1]], ["Hallo", " Welt"])
+        final = events[-1].response
+        self.assertTrue(final.success)
+        self.assertEqual(final.content, "Hallo Welt")
+        self.assertEqual((final.tokens_input, final.tokens_output), (5, 2))
+
+    def test_retry_status_falls_back_before_first_token(self):
+        """A rate-limited model is skipped and the next one streams."""
+        seen = []
+
+        def handler(request):
+            model = json.loads(request.content)["model"]
+            seen.append(model)
+            if len(seen) == 1:
+                return httpx.Response(429, text="slow down")
+            return httpx.Response(200, text=sse_body(openai_chunk("ok")))
+
+        events = self.stream_with(handler)
+        self.assertEqual(len(seen), 2)
+        self.assertEqual(events[-1].response.model, seen[1])
+        self.assertEqual(events[-1].response.content, "ok")
+
+    def test_other_error_status_is_not_retried(self):
+        """Non-retryable errors end the stream with a failed response."""
+        events = self.stream_with(lambda request: httpx.Response(400, text="bad request"))
+        self.assertEqual(len(events), 1)
+        self.assertFalse(events[0].response.success)
+        self.assertIn("400", events[0].response.error)
+
+
+class FakeStreamAdapter:
+    """Adapter whose stream() yields scripted deltas, then fails or finishes."""
+
+    def __init__(self, deltas, fail=False):
+        self.deltas = deltas
+        self.fail = fail
+
+    async def stream(self, messages, **kwargs):
+        for delta in self.deltas:
+            yield StreamEvent(delta=delta)
+        content = "".join(self.deltas)
+        yield StreamEvent(response=AdapterResponse(
+            success=not self.fail, content=content, model="m", provider="p",
+            tokens_input=3, tokens_output=len(self.deltas), latency_ms=1,
+            error="boom" if self.fail else None,
+        ))
+
+
+def make_instance(model_id):
+    return SimpleNamespace(
+        model=SimpleNamespace(provider=f"provider-{model_id}", model_id=model_id),
+        api_key=SimpleNamespace(api_key_encrypted=model_id),
+        confidence_score=0.5,
+    )
+
+
+class GatewayStreamTestCase(SimpleTestCase):
+    """Tests for GatewayStream failover."""
+
+    def run_stream(self, adapters):
+        attempts = []
+
+        def record(user, attempt, quota_blocked, failed):
+            attempts.append(attempt)
+            return None if attempt.succeeded else attempt.response.error
+
+        with patch.object(unified_ai, '_candidate_models', return_value=[make_instance(m) for m in adapters]), \
+             patch.object(unified_ai, '_record_gateway_attempt', record), \
+             patch.object(unified_ai, '_try_legacy', return_value=None), \
+             patch('api.ai_gateway.utils.encryption.decrypt_api_key', lambda key: key), \
+             patch('api.ai_gateway.adapters.get_adapter', lambda provider, key, model: adapters[model]):
+            stream = stream_ai_content(None, "prompt")
+            deltas = []
+            try:
+                for delta in stream:
+                    deltas.append(delta)
+            except Exception as e:
+                return stream, deltas, attempts, e
+            return stream, deltas, attempts, None
+
+    def test_failover_before_first_token(self):
+        """A model that fails without output is replaced silently."""
+        stream, deltas, attempts, error = self.run_stream({
+            'a': FakeStreamAdapter([], fail=True),
+            'b': FakeStreamAdapter(["Guten", " Tag"]),
+        })
+        self.assertIsNone(error)
+        self.assertEqual(deltas, ["Guten", " Tag"])
+        self.assertEqual(stream.text, "Guten Tag")
+        self.assertEqual(stream.usage['model'], 'b')
+        self.assertEqual([a.instance.model.model_id for a in attempts], ['a', 'b'])
+        self.assertIsNone(attempts[0].ttft_ms)
+        self.assertIsNotNone(attempts[1].ttft_ms)
+        self.assertEqual(stream.time_to_first_token_ms, attempts[1].ttft_ms)
+
+    def test_no_failover_after_first_token(self):
+        """Once text has been sent, a broken stream raises instead of retrying."""
+        stream, deltas, attempts, error = self.run_stream({
+            'a': FakeStreamAdapter(["Hal"], fail=True),
+            'b': FakeStreamAdapter(["never"]),
+        })
+        self.assertEqual(deltas, ["Hal"])
+        self.assertIn("interrupted", str(error))
+        self.assertEqual(len(attempts), 1)
+
+    def test_ttft_is_logged(self):
+        """The attempt's time to first token reaches the UsageLog row."""
+        accounting = MagicMock()
+        response = SimpleNamespace(success=True, content="text", tokens_input=1, tokens_output=1)
+        attempt = _GatewayAttempt(make_instance('a'), response=response, latency_ms=40, ttft_ms=12)
+
+        with patch('api.ai_gateway.services.accounting.get_accounting_buffer', return_value=accounting):
+            _record_gateway_attempt(None, attempt, set(), set())
+
+        self.assertEqual(accounting.log_usage.call_args.kwargs['time_to_first_token_ms'], 12)
+
+
+class SSEEndpointTestCase(APITestCase):
+    """Tests for the streaming assistant endpoint."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='streamer', password='TestPass123!')
+        self.client.force_authenticate(self.user)
+
+    def post(self, data):
+        with patch('api.ai_views.get_ai_status', return_value={'has_gateway_keys': True}), \
+             patch('api.ai_views.stream_ai_content') as stream_ai_content:
+            stream_ai_content.return_value = FakeGatewayStream(["Hallo", " Welt"])
+            response = self.client.post('/api/ai/chat/stream/', data, format='json')
+            body = b"".join(response.streaming_content).decode() if response.streaming else None
+        return response, body
+
+    def test_streams_tokens_then_done(self):
+        """Token events arrive in order, followed by the buffered-endpoint body."""
+        response, body = self.post({'prompt': 'hi'})
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        events = [json.loads(line[len("data: "):]) for line in body.split("\n\n") if line]
+        self.assertEqual(events, [
+            {'type': 'token', 'text': 'Hallo'},
+            {'type': 'token', 'text': ' Welt'},
+            {'type': 'done', 'response': 'Hallo Welt'},
+        ])
+
+    def test_validation_errors_are_plain_json(self):
+        """Bad requests fail before streaming starts."""
+        response, _ = self.post({})
+        self.assertEqual(response.status_code, 400)
+
+
+class FakeGatewayStream:
+    """Stands in for GatewayStream: yields deltas and exposes .text."""
+
+    def __init__(self, deltas):
+        self.deltas = deltas
+        self.text = ""
+
+    def __iter__(self):
+        for delta in self.deltas:
+            self.text += delta
+            yield delta
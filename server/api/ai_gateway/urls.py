@@ -11,6 +11,7 @@ from .routers import (
     StatsView,
     ProviderStatsView,
     ProvidersView,
+    PoolStatsView,
     DashboardView,
 )
 
@@ -34,4 +35,5 @@ urlpatterns = [
     # Stats and analytics
     path('stats/', StatsView.as_view(), name='stats'),
     path('stats/provider/<str:provider>/', ProviderStatsView.as_view(), name='provider_stats'),
+    path('stats/pools/', PoolStatsView.as_view(), name='pool_stats'),
 ]
@@ -2,6 +2,8 @@
 
 from .encryption import encrypt_api_key, decrypt_api_key, mask_api_key
 from .redis_client import get_redis_client, RedisClient
+from .http_pool import get_http_pool, pooled_client, HttpClientPool
+from .async_runner import get_loop_runner, run_sync, BackgroundLoopRunner
 
 __all__ = [
     'encrypt_api_key',
@@ -9,4 +11,10 @@ __all__ = [
     'mask_api_key',
     'get_redis_client',
     'RedisClient',
+    'get_http_pool',
+    'pooled_client',
+    'HttpClientPool',
+    'get_loop_runner',
+    'run_sync',
+    'BackgroundLoopRunner',
 ]
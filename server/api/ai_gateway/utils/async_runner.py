@@ -0,0 +1,234 @@
+"""
+Background event loop runner for AI Gateway.
+Lets sync code (Django views, Celery tasks, worker threads) run adapter
+coroutines on one long-lived loop instead of creating a thread pool and a
+fresh event loop for every call.
+"""
+
+import asyncio
+import atexit
+import concurrent.futures
+import logging
+import os
+import threading
+import time
+from typing import Optional, Dict, Any, Coroutine, AsyncIterator, Iterator
+
+logger = logging.getLogger(__name__)
+
+
+class BackgroundLoopRunner:
+    """
+    One dedicated daemon thread running one asyncio event loop.
+
+    Usage:
+        runner = get_loop_runner()
+        response = runner.run(adapter.complete(messages), timeout=120)
+
+    The loop is started lazily and restarted after a fork (gunicorn
+    preload), so it is safe to import at module level.
+
+    Stats:
+    - pending: coroutines submitted but not finished (queue depth)
+    - avg_schedule_ms: submit -> coroutine start (bridge latency)
+    - avg_run_ms: submit -> result available
+    """
+
+    _instance: Optional['BackgroundLoopRunner'] = None
+
+    def __init__(self, name: str = "ai-gateway-loop"):
+        self.name = name
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._pid: Optional[int] = None
+        self._lock = threading.Lock()
+        self._reset_stats()
+
+    @classmethod
+    def get_instance(cls) -> 'BackgroundLoopRunner':
+        """Get singleton instance."""
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+    def _reset_stats(self):
+        self._stats = {
+            'submitted': 0,
+            'started': 0,
+            'completed': 0,
+            'failed': 0,
+            'timed_out': 0,
+            'pending': 0,
+            'max_pending': 0,
+            'schedule_ms_total': 0.0,
+            'run_ms_total': 0.0,
+            'max_schedule_ms': 0.0,
+        }
+
+    def _ensure_started(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is not None and self._pid == os.getpid() and self._thread.is_alive():
+                return self._loop
+
+            if self._pid is not None and self._pid != os.getpid():
+                logger.info(f"Restarting {self.name} after fork")
+                self._reset_stats()
+
+            loop = asyncio.new_event_loop()
+            ready = threading.Event()
+
+            def _run():
+                asyncio.set_event_loop(loop)
+                loop.call_soon(ready.set)
+                loop.run_forever()
+
+            thread = threading.Thread(target=_run, name=self.name, daemon=True)
+            thread.start()
+            ready.wait()
+
+            self._loop = loop
+            self._thread = thread
+            self._pid = os.getpid()
+            logger.info(f"Started background event loop {self.name}")
+            return loop
+
+    def in_runner_thread(self) -> bool:
+        """True when called from the runner's own loop thread."""
+        return self._thread is not None and threading.current_thread() is self._thread
+
+    def submit(self, coro: Coroutine) -> concurrent.futures.Future:
+        """Schedule a coroutine on the background loop and return a thread-safe future."""
+        loop = self._ensure_started()
+        submitted_at = time.perf_counter()
+
+        with self._lock:
+            self._stats['submitted'] += 1
+            self._stats['pending'] += 1
+            self._stats['max_pending'] = max(self._stats['max_pending'], self._stats['pending'])
+
+        async def _timed():
+            schedule_ms = (time.perf_counter() - submitted_at) * 1000
+            with self._lock:
+                self._stats['started'] += 1
+                self._stats['schedule_ms_total'] += schedule_ms
+                self._stats['max_schedule_ms'] = max(self._stats['max_schedule_ms'], schedule_ms)
+            return await coro
+
+        future = asyncio.run_coroutine_threadsafe(_timed(), loop)
+
+        def _done(f: concurrent.futures.Future):
+            with self._lock:
+                self._stats['pending'] -= 1
+                self._stats['run_ms_total'] += (time.perf_counter() - submitted_at) * 1000
+                if f.cancelled() or f.exception() is not None:
+                    self._stats['failed'] += 1
+                else:
+                    self._stats['completed'] += 1
+
+        future.add_done_callback(_done)
+        return future
+
+    def run(self, coro: Coroutine, timeout: Optional[float] = None) -> Any:
+        """
+        Run a coroutine on the background loop and block for its result.
+
+        Raises:
+            concurrent.futures.TimeoutError if it does not finish in time
+            (the coroutine is cancelled).
+            RuntimeError if called from the runner thread itself (would deadlock).
+        """
+        if self.in_runner_thread():
+            coro.close()
+            raise RuntimeError("run() called from the background loop thread; await the coroutine instead")
+
+        future = self.submit(coro)
+        try:
+            return future.result(timeout=timeout)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            with self._lock:
+                self._stats['timed_out'] += 1
+            raise
+
+    def shutdown(self, timeout: float = 5.0):
+        """Close pooled HTTP clients on the loop, then stop the loop thread."""
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            if loop is None or self._pid != os.getpid():
+                return
+            self._loop = None
+            self._thread = None
+
+        from .http_pool import get_http_pool
+
+        try:
+            asyncio.run_coroutine_threadsafe(get_http_pool().aclose_loop(), loop).result(timeout=timeout)
+        except Exception as e:
+            logger.warning(f"Error closing HTTP clients on {self.name}: {e}")
+
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(timeout=timeout)
+        if not thread.is_alive():
+            loop.close()
+        logger.info(f"Stopped background event loop {self.name}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Queue depth and bridge latency metrics."""
+        with self._lock:
+            stats = dict(self._stats)
+            running = self._loop is not None and self._thread is not None and self._thread.is_alive()
+
+        finished = stats['completed'] + stats['failed']
+        return {
+            'running': running,
+            'submitted': stats['submitted'],
+            'completed': stats['completed'],
+            'failed': stats['failed'],
+            'timed_out': stats['timed_out'],
+            'pending': stats['pending'],
+            'max_pending': stats['max_pending'],
+            'avg_schedule_ms': round(stats['schedule_ms_total'] / max(stats['started'], 1), 2),
+            'max_schedule_ms': round(stats['max_schedule_ms'], 2),
+            'avg_run_ms': round(stats['run_ms_total'] / max(finished, 1), 2),
+        }
+
+
+def get_loop_runner() -> BackgroundLoopRunner:
+    """Get the background loop runner singleton."""
+    return BackgroundLoopRunner.get_instance()
+
+
+def run_sync(coro: Coroutine, timeout: Optional[float] = None) -> Any:
+    """Run a coroutine from sync code on the shared background loop."""
+    return get_loop_runner().run(coro, timeout=timeout)
+
+
+def iterate_sync(aiterator: AsyncIterator, timeout: Optional[float] = None) -> Iterator:
+    """
+    Consume an async iterator from sync code on the shared background loop.
+    
+    Each item is one hop onto the loop; ``timeout`` bounds the wait for each
+    item, not the whole iteration. Stopping early closes the async iterator
+    (e.g. an adapter stream whose client disconnected).
+    """
+    runner = get_loop_runner()
+    iterator = aiterator.__aiter__()
+    try:
+        while True:
+            try:
+                yield runner.run(iterator.__anext__(), timeout=timeout)
+            except StopAsyncIteration:
+                return
+    finally:
+        aclose = getattr(iterator, 'aclose', None)
+        if aclose is not None:
+            try:
+                runner.run(aclose(), timeout=5)
+            except Exception as e:
+                logger.debug(f"Error closing async iterator: {e}")
+
+
+@atexit.register
+def _stop_runner_on_exit():
+    if BackgroundLoopRunner._instance is not None:
+        BackgroundLoopRunner._instance.shutdown()
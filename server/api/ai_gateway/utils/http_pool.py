@@ -0,0 +1,258 @@
+"""
+Pooled HTTP client utilities for AI Gateway.
+Keeps one keep-alive httpx.AsyncClient per provider so chained LLM calls
+reuse open connections instead of paying DNS + TCP + TLS on every request.
+"""
+
+import asyncio
+import atexit
+import logging
+import threading
+import time
+import weakref
+from contextlib import asynccontextmanager
+from typing import Optional, Dict, Any, AsyncIterator
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# HTTP/2 needs the optional 'h2' package
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+    logger.warning("h2 not installed, AI Gateway HTTP pools will use HTTP/1.1")
+
+
+DEFAULT_POOL_CONFIG = {
+    'http2': False,
+    'max_connections': 20,
+    'max_keepalive_connections': 10,
+    'keepalive_expiry': 30.0,  # Seconds an idle connection is kept open
+    'timeout': 60.0,
+    'follow_redirects': False,
+}
+
+# Per-provider overrides (image adapters share the pool of their provider)
+PROVIDER_POOL_CONFIG = {
+    'gemini': {'http2': True, 'max_connections': 40, 'max_keepalive_connections': 20},
+    'groq': {'http2': True},
+    'openrouter': {'http2': True},
+    'cohere': {},
+    'deepinfra': {},
+    'huggingface': {'timeout': 120.0},
+    'pollinations': {'timeout': 120.0, 'follow_redirects': True},
+}
+
+
+def get_pool_config(provider: str) -> Dict[str, Any]:
+    """Get the effective pool configuration for a provider."""
+    config = dict(DEFAULT_POOL_CONFIG)
+    config.update(PROVIDER_POOL_CONFIG.get(provider, {}))
+    config['http2'] = config['http2'] and HTTP2_AVAILABLE
+    return config
+
+
+class HttpClientPool:
+    """
+    Registry of shared httpx.AsyncClient instances.
+
+    httpx connections are bound to the event loop that opened them, so
+    clients are kept per (event loop, provider). Entries disappear with
+    their loop; use close_all() on shutdown to close sockets gracefully.
+
+    Stats (per provider):
+    - requests / errors: leases handed out and leases that raised
+    - in_flight: leases currently open
+    - clients_created: how many clients were built (ideally 1 per loop)
+    """
+
+    _instance: Optional['HttpClientPool'] = None
+
+    def __init__(self):
+        self._clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, httpx.AsyncClient]]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, Any]] = {}
+
+    @classmethod
+    def get_instance(cls) -> 'HttpClientPool':
+        """Get singleton instance."""
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+    def _provider_stats(self, provider: str) -> Dict[str, Any]:
+        if provider not in self._stats:
+            self._stats[provider] = {
+                'requests': 0,
+                'errors': 0,
+                'in_flight': 0,
+                'clients_created': 0,
+                'last_used_at': None,
+            }
+        return self._stats[provider]
+
+    def _build_client(self, provider: str) -> httpx.AsyncClient:
+        config = get_pool_config(provider)
+        limits = httpx.Limits(
+            max_connections=config['max_connections'],
+            max_keepalive_connections=config['max_keepalive_connections'],
+            keepalive_expiry=config['keepalive_expiry'],
+        )
+        logger.debug(f"Opening pooled HTTP client for {provider} (http2={config['http2']})")
+        return httpx.AsyncClient(
+            http2=config['http2'],
+            limits=limits,
+            timeout=config['timeout'],
+            follow_redirects=config['follow_redirects'],
+        )
+
+    def get_client(self, provider: str) -> httpx.AsyncClient:
+        """
+        Get the shared client for a provider on the running event loop.
+
+        Must be called from inside a coroutine. Never close the returned client.
+        """
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            loop_clients = self._clients.get(loop)
+            if loop_clients is None:
+                loop_clients = {}
+                self._clients[loop] = loop_clients
+
+            client = loop_clients.get(provider)
+            if client is None or client.is_closed:
+                client = self._build_client(provider)
+                loop_clients[provider] = client
+                self._provider_stats(provider)['clients_created'] += 1
+            return client
+
+    @asynccontextmanager
+    async def lease(self, provider: str) -> AsyncIterator[httpx.AsyncClient]:
+        """
+        Borrow the shared client for one request.
+
+        Usage:
+            async with pool.lease('groq') as client:
+                response = await client.post(url, json=payload, timeout=60)
+        """
+        client = self.get_client(provider)
+        with self._lock:
+            stats = self._provider_stats(provider)
+            stats['requests'] += 1
+            stats['in_flight'] += 1
+            stats['last_used_at'] = time.time()
+        try:
+            yield client
+        except Exception:
+            with self._lock:
+                stats['errors'] += 1
+            raise
+        finally:
+            with self._lock:
+                stats['in_flight'] -= 1
+
+    async def aclose_loop(self) -> int:
+        """Close all clients opened on the running event loop."""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            loop_clients = self._clients.pop(loop, {})
+
+        for provider, client in loop_clients.items():
+            try:
+                await client.aclose()
+            except Exception as e:
+                logger.warning(f"Error closing HTTP client for {provider}: {e}")
+        return len(loop_clients)
+
+    def close_all(self, timeout: float = 5.0) -> int:
+        """
+        Close every pooled client (shutdown hook).
+
+        Loops that are still running get the close scheduled on them;
+        idle loops are driven to completion here. Closed loops are skipped
+        since their sockets are already gone.
+        """
+        with self._lock:
+            entries = list(self._clients.items())
+
+        closed = 0
+        for loop, loop_clients in entries:
+            if loop.is_closed() or not loop_clients:
+                continue
+
+            async def _close(clients=tuple(loop_clients.values())):
+                for client in clients:
+                    await client.aclose()
+
+            try:
+                if loop.is_running():
+                    future = asyncio.run_coroutine_threadsafe(_close(), loop)
+                    future.result(timeout=timeout)
+                else:
+                    loop.run_until_complete(_close())
+                closed += len(loop_clients)
+            except Exception as e:
+                logger.warning(f"Error closing pooled HTTP clients: {e}")
+
+        with self._lock:
+            self._clients.clear()
+        return closed
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Per-provider pool statistics for monitoring."""
+        with self._lock:
+            entries = [dict(clients) for clients in self._clients.values()]
+            stats = {provider: dict(values) for provider, values in self._stats.items()}
+
+        for provider, values in stats.items():
+            config = get_pool_config(provider)
+            open_clients = 0
+            connections = 0
+            idle_connections = 0
+
+            for loop_clients in entries:
+                client = loop_clients.get(provider)
+                if client is None or client.is_closed:
+                    continue
+                open_clients += 1
+                # httpcore exposes live connections on the transport's pool
+                pool = getattr(getattr(client, '_transport', None), '_pool', None)
+                for conn in getattr(pool, 'connections', []) or []:
+                    connections += 1
+                    try:
+                        if conn.is_idle():
+                            idle_connections += 1
+                    except Exception:
+                        pass
+
+            values.update({
+                'http2': config['http2'],
+                'max_connections': config['max_connections'],
+                'max_keepalive_connections': config['max_keepalive_connections'],
+                'open_clients': open_clients,
+                'connections': connections,
+                'idle_connections': idle_connections,
+            })
+
+        return stats
+
+
+def get_http_pool() -> HttpClientPool:
+    """Get the HTTP client pool singleton."""
+    return HttpClientPool.get_instance()
+
+
+def pooled_client(provider: str):
+    """Shortcut for get_http_pool().lease(provider)."""
+    return get_http_pool().lease(provider)
+
+
+@atexit.register
+def _close_pools_on_exit():
+    if HttpClientPool._instance is not None:
+        HttpClientPool._instance.close_all()
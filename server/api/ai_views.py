@@ -6,13 +6,76 @@ import json
 from .models import UserProfile
 from .prompts import ContextEngineer
 from .agent_exam import build_exam_graph
-from .unified_ai import generate_ai_content, get_ai_status
+from .unified_ai import generate_ai_content, get_ai_status, stream_ai_content
+from .sse import generation_events, sse_response
 from .gemini_helper import generate_content as generate_with_fallback  # Legacy for validate
 
 from django_ratelimit.decorators import ratelimit
 
 
 
+def _build_assistant_prompt(user, prompt, context):
+    """Wrap the user's prompt for the requested assistant context."""
+    # Get user languages
+    try:
+        profile = user.profile
+        native_lang_code = profile.native_language
+        target_lang_code = profile.target_language
+    except UserProfile.DoesNotExist:
+        native_lang_code = 'en'
+        target_lang_code = 'de'
+    except AttributeError:
+         # Handle AnonymousUser if needed, though permission_classes should prevent this
+         native_lang_code = 'en'
+         target_lang_code = 'de'
+
+    context_engineer = ContextEngineer(native_lang_code, target_lang_code)
+
+    # Construct a more specific prompt based on context
+    final_prompt = prompt
+    if context == 'translation':
+        final_prompt = context_engineer.get_translation_prompt(prompt)
+    elif context == 'chat':
+        system_instruction = context_engineer.get_chat_system_instruction()
+        final_prompt = f"{system_instruction}\n\nUser says: {prompt}"
+    return final_prompt
+
+
+def _parse_translation(text):
+    """Parse the translation JSON out of a completion, with a plain-text fallback."""
+    raw_text = text
+    try:
+        # Clean up markdown code blocks if present
+        text = text.strip()
+        import re
+        import ast
+
+        # Try to find JSON object within the text using regex
+        # This handles ```json ... ```, ``` ... ```, or just text with JSON inside
+        json_match = re.search(r'\{.*\}', text, re.DOTALL)
+        if json_match:
+            text = json_match.group(0)
+        
+        try:
+            data = json.loads(text)
+        except json.JSONDecodeError:
+            try:
+                # Try ast.literal_eval for single-quoted Python dicts (common in some LLM outputs)
+                data = ast.literal_eval(text)
+                if not isinstance(data, dict):
+                    raise ValueError("Parsed content is not a dictionary")
+            except (ValueError, SyntaxError):
+                # Try one more clean up - sometimes newlines break JSON
+                text_clean = text.replace('\n', ' ')
+                data = json.loads(text_clean)
+            
+        return data
+    except Exception as e:
+        print(f"JSON Parse Error: {e} - Text: {raw_text}")
+        # Fallback if JSON parsing fails
+        return {'translation': raw_text, 'type': 'unknown', 'example': ''}
+
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 @ratelimit(key='user', rate='10/m', block=True)
@@ -34,65 +97,14 @@ def ai_assistant(request):
         return Response({'error': 'Prompt is required'}, status=status.HTTP_400_BAD_REQUEST)
 
     try:
-        # Get user languages
-        try:
-            profile = request.user.profile
-            native_lang_code = profile.native_language
-            target_lang_code = profile.target_language
-        except UserProfile.DoesNotExist:
-            native_lang_code = 'en'
-            target_lang_code = 'de'
-        except AttributeError:
-             # Handle AnonymousUser if needed, though permission_classes should prevent this
-             native_lang_code = 'en'
-             target_lang_code = 'de'
-
-        context_engineer = ContextEngineer(native_lang_code, target_lang_code)
-
-        # Construct a more specific prompt based on context
-        final_prompt = prompt
-        if context == 'translation':
-            final_prompt = context_engineer.get_translation_prompt(prompt)
-        elif context == 'chat':
-            system_instruction = context_engineer.get_chat_system_instruction()
-            final_prompt = f"{system_instruction}\n\nUser says: {prompt}"
+        final_prompt = _build_assistant_prompt(request.user, prompt, context)
 
         # Use unified AI helper (tries gateway keys first, then profile key)
         response = generate_ai_content(request.user, final_prompt)
         
-        # Handle JSON parsing for translation context
         # Handle JSON parsing for translation context
         if context == 'translation':
-            try:
-                # Clean up markdown code blocks if present
-                text = response.text.strip()
-                import re
-                import ast
-
-                # Try to find JSON object within the text using regex
-                # This handles ```json ... ```, ``` ... ```, or just text with JSON inside
-                json_match = re.search(r'\{.*\}', text, re.DOTALL)
-                if json_match:
-                    text = json_match.group(0)
-                
-                try:
-                    data = json.loads(text)
-                except json.JSONDecodeError:
-                    try:
-                        # Try ast.literal_eval for single-quoted Python dicts (common in some LLM outputs)
-                        data = ast.literal_eval(text)
-                        if not isinstance(data, dict):
-                            raise ValueError("Parsed content is not a dictionary")
-                    except (ValueError, SyntaxError):
-                        # Try one more clean up - sometimes newlines break JSON
-                        text_clean = text.replace('\n', ' ')
-                        data = json.loads(text_clean)
-                    
-                return Response(data)
-            except Exception as e:
-                print(f"JSON Parse Error: {e} - Text: {response.text}")
-                # Fallback if JSON parsing fails
-                return Response({'translation': response.text, 'type': 'unknown', 'example': ''})
+            return Response(_parse_translation(response.text))
 
         return Response({'response': response.text})
 
@@ -102,6 +114,34 @@ def ai_assistant(request):
              return Response({'error': 'AI Quota Exceeded. Please try again later.'}, status=status.HTTP_429_TOO_MANY_REQUESTS)
         return Response({'error': error_msg}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+@ratelimit(key='user', rate='10/m', group='api.ai_views.ai_assistant', block=True)  # Shares ai_assistant's budget
+def ai_assistant_stream(request):
+    """
+    Streaming variant of ai_assistant (Server-Sent Events).
+    Sends token events as text arrives, then a done event with the same
+    body ai_assistant returns.
+    """
+    prompt = request.data.get('prompt')
+    context = request.data.get('context', '')
+
+    ai_status = get_ai_status(request.user)
+    if not ai_status['has_gateway_keys']:
+        return Response({'error': 'No API keys available. Add a Gemini key in Settings or configure AI Gateway.'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    if not prompt:
+        return Response({'error': 'Prompt is required'}, status=status.HTTP_400_BAD_REQUEST)
+
+    stream = stream_ai_content(request.user, _build_assistant_prompt(request.user, prompt, context))
+
+    def on_done(text):
+        if context == 'translation':
+            return _parse_translation(text)
+        return {'response': text}
+
+    return sse_response(generation_events(stream, on_done))
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def ai_gateway_status(request):
@@ -185,14 +225,14 @@ def generate_exam(request):
             "target_language": target_language
         }
         
-        # 3. Start Background Thread
+        # 3. Queue Background Job (bounded pool, resumable from the Exam row)
         from .services.background_exam import start_exam_generation
-        # We need to bridge the gap: `background_exam.py` currently uses `generate_ai_content` direct prompt.
-        # But `generate_exam` view used `LangGraph`. 
-        # I should have checked this discrepancy.
-        # FIX: I will update `background_exam.py` to use `build_exam_graph` in next step.
-        # For now, we setup the call.
-        start_exam_generation(exam.id, request.user, prompt_data)
+        from .services.job_queue import JobQueueFull
+        try:
+            start_exam_generation(exam, prompt_data)
+        except JobQueueFull as e:
+            exam.delete()
+            return Response({'error': str(e), 'code': 'QUEUE_FULL'}, status=status.HTTP_429_TOO_MANY_REQUESTS)
         
         # 4. Return Pending Status
         return Response({
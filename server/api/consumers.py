@@ -1,8 +1,11 @@
 import json
 import psutil
 import asyncio
-from channels.generic.websocket import AsyncWebsocketConsumer
+from urllib.parse import parse_qs
+from channels.db import database_sync_to_async
+from channels.generic.websocket import AsyncJsonWebsocketConsumer, AsyncWebsocketConsumer
 from django.contrib.auth.models import User
+from .game_rooms import GameRoomError, get_game_engine_config, get_game_rooms
 
 class SystemHealthConsumer(AsyncWebsocketConsumer):
     async def connect(self):
@@ -35,3 +38,115 @@ class SystemHealthConsumer(AsyncWebsocketConsumer):
             except Exception as e:
                 print(f"Error sending health update: {e}")
                 await asyncio.sleep(5)
+
+
+class GameSessionConsumer(AsyncJsonWebsocketConsumer):
+    """
+    Live game channel for one GameSession (ws/game/<session_id>/).
+
+    Authenticates with the session cookie or ?token=<auth token>. On connect
+    the client receives a full snapshot, then diffs broadcast to the session
+    group. Client messages: heartbeat, sync, ready, answer
+    {is_correct, response_time}, and for the host update {state,
+    current_stage, status}. State lives in api/game_rooms.py.
+    """
+
+    async def connect(self):
+        self.room = None
+        self.user = await self._authenticate()
+        if self.user is None:
+            await self.close(code=4401)
+            return
+
+        session_id = int(self.scope['url_route']['kwargs']['session_id'])
+        try:
+            self.room, participant = await database_sync_to_async(get_game_rooms().open)(session_id, self.user)
+        except GameRoomError as e:
+            await self.close(code=e.code)
+            return
+
+        if participant is not None:
+            self.room.join(participant, self.user.username)
+        await self.channel_layer.group_add(self.room.group_name, self.channel_name)
+        await self.accept()
+        # The join also reaches this client in the next diff; applying it again is harmless
+        await self.send_json(self.room.snapshot())
+        self._schedule_diff()
+
+    async def disconnect(self, close_code):
+        if self.room is None:
+            return
+        await self.channel_layer.group_discard(self.room.group_name, self.channel_name)
+        get_game_rooms().close(self.room)
+        if self.room.leave(self.user.id):
+            self._schedule_diff()
+
+    async def receive_json(self, content, **kwargs):
+        if self.room is None:
+            return
+        kind = content.get('type')
+        self.room.heartbeat(self.user.id)
+
+        if kind == 'sync':
+            await self.send_json(self.room.snapshot())
+        elif kind == 'ready':
+            self.room.set_ready(self.user.id, bool(content.get('is_ready', True)))
+        elif kind == 'answer':
+            try:
+                result = self.room.answer(
+                    self.user.id, bool(content.get('is_correct', False)), float(content.get('response_time') or 0),
+                )
+            except (GameRoomError, TypeError, ValueError) as e:
+                await self.send_json({'type': 'error', 'error': str(e)})
+                return
+            await self.send_json({'type': 'answer_result', **result})
+        elif kind == 'update':
+            if self.user.id != self.room.host_id:
+                await self.send_json({'type': 'error', 'error': 'Only host can update state'})
+                return
+            self.room.update(
+                state=content.get('state'), current_stage=content.get('current_stage'), status=content.get('status'),
+            )
+        elif kind != 'heartbeat':
+            await self.send_json({'type': 'error', 'error': f'Unknown message type: {kind}'})
+            return
+        self._schedule_diff()
+
+    async def game_diff(self, event):
+        await self.send_json(event['diff'])
+
+    def _schedule_diff(self):
+        """Send the room's collected changes after BROADCAST_INTERVAL (once per window per room)."""
+        if self.room.claim_broadcast():
+            task = asyncio.create_task(_send_diff(self.channel_layer, self.room))
+            _diff_tasks.add(task)
+            task.add_done_callback(_diff_tasks.discard)
+
+    async def _authenticate(self):
+        user = self.scope.get('user')
+        if user is not None and user.is_authenticated:
+            return user
+        token = parse_qs(self.scope.get('query_string', b'').decode()).get('token', [None])[0]
+        if not token:
+            return None
+        return await database_sync_to_async(_user_for_token)(token)
+
+
+_diff_tasks = set()
+
+
+async def _send_diff(channel_layer, room):
+    await asyncio.sleep(get_game_engine_config()['BROADCAST_INTERVAL'])
+    diff = room.take_diff()
+    if diff:
+        await channel_layer.group_send(room.group_name, {'type': 'game.diff', 'diff': diff})
+
+
+def _user_for_token(key):
+    from rest_framework.exceptions import AuthenticationFailed
+    from .authentication import ExpiringTokenAuthentication
+    try:
+        user, _ = ExpiringTokenAuthentication().authenticate_credentials(key)
+    except AuthenticationFailed:
+        return None
+    return user
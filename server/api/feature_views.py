@@ -8,7 +8,8 @@ from django_ratelimit.decorators import ratelimit
 from django.utils.decorators import method_decorator
 from django.db.models import Q
 from .gemini_helper import generate_content as gemini_generate
-from .unified_ai import generate_ai_content, get_ai_status
+from .unified_ai import generate_ai_content, get_ai_status, stream_ai_content
+from .sse import generation_events, sse_response
 from .models import GrammarTopic, Podcast, Vocabulary, UserProfile
 from .serializers import GrammarTopicSerializer, PodcastSerializer
 import os
@@ -231,71 +232,68 @@ class PodcastViewSet(viewsets.ModelViewSet):
 
 from django_ratelimit.decorators import ratelimit
 
-@api_view(['POST'])
-@permission_classes([permissions.IsAuthenticated])
-@ratelimit(key='user', rate='10/h', block=True)
-def generate_text(request):
+def _build_text_prompt(request):
     """
-    Generate German text using only user's vocabulary
+    Prompt for generate_text from the request and the user's vocabulary.
+    Returns (prompt, vocabulary_words, None), or (None, None, error_response).
     """
+    level = request.data.get('level', 'A1')
+    length = request.data.get('length', 'medium')  # short, medium, long
+    filters = request.data.get('filters', [])  # verb, noun, adjective, etc.
+    grammar_topic_ids = request.data.get('grammar_topics', [])
+    clarification_prompt = request.data.get('clarification_prompt', '')
+    
+    # Get user's target language
     try:
-        level = request.data.get('level', 'A1')
-        length = request.data.get('length', 'medium')  # short, medium, long
-        filters = request.data.get('filters', [])  # verb, noun, adjective, etc.
-        grammar_topic_ids = request.data.get('grammar_topics', [])
-        clarification_prompt = request.data.get('clarification_prompt', '')
-        
-        # Get user's target language
-        try:
-            target_lang = request.user.profile.target_language
-        except UserProfile.DoesNotExist:
-            target_lang = 'de'
-        
-        # Get user's vocabulary for the target language
-        vocab_query = Vocabulary.objects.filter(created_by=request.user, language=target_lang)
-        
-        # Apply filters
-        if filters:
-            vocab_query = vocab_query.filter(type__in=filters)
-        
-        vocabulary_words = list(vocab_query.values_list('word', flat=True))
-        
-        if not vocabulary_words:
-            return Response({
-                'error': 'You need to add some vocabulary words first!'
-            }, status=status.HTTP_400_BAD_REQUEST)
-        
-        # Determine word count based on length
-        word_count_map = {
-            'short': '50-100',
-            'medium': '100-200',
-            'long': '200-300'
-        }
-        word_count = word_count_map.get(length, '100-200')
-        
-        # Check for API keys (gateway only)
-        ai_status = get_ai_status(request.user)
-        if not ai_status['has_gateway_keys']:
-            return Response({
-                'error': 'No API keys available. Add keys in Settings or AI Gateway.'
-            }, status=status.HTTP_400_BAD_REQUEST)
-        
-        # Get Grammar Topics
-        grammar_instructions = ""
-        if grammar_topic_ids:
-            topics = GrammarTopic.objects.filter(id__in=grammar_topic_ids)
-            topic_titles = [t.title for t in topics]
-            if topic_titles:
-                grammar_instructions = f"7. Focus on these grammar topics: {', '.join(topic_titles)}"
+        target_lang = request.user.profile.target_language
+    except UserProfile.DoesNotExist:
+        target_lang = 'de'
+    
+    # Get user's vocabulary for the target language
+    vocab_query = Vocabulary.objects.filter(created_by=request.user, language=target_lang)
+    
+    # Apply filters
+    if filters:
+        vocab_query = vocab_query.filter(type__in=filters)
+    
+    vocabulary_words = list(vocab_query.values_list('word', flat=True))
+    
+    if not vocabulary_words:
+        return None, None, Response({
+            'error': 'You need to add some vocabulary words first!'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    # Determine word count based on length
+    word_count_map = {
+        'short': '50-100',
+        'medium': '100-200',
+        'long': '200-300'
+    }
+    word_count = word_count_map.get(length, '100-200')
+    
+    # Check for API keys (gateway only)
+    ai_status = get_ai_status(request.user)
+    if not ai_status['has_gateway_keys']:
+        return None, None, Response({
+            'error': 'No API keys available. Add keys in Settings or AI Gateway.'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    # Get Grammar Topics
+    grammar_instructions = ""
+    if grammar_topic_ids:
+        topics = GrammarTopic.objects.filter(id__in=grammar_topic_ids)
+        topic_titles = [t.title for t in topics]
+        if topic_titles:
+            grammar_instructions = f"7. Focus on these grammar topics: {', '.join(topic_titles)}"
 
-        # Clarification Prompt
-        custom_instructions = ""
-        if clarification_prompt:
-            custom_instructions = f"8. Additional instructions: {clarification_prompt}"
+    # Clarification Prompt
+    custom_instructions = ""
+    if clarification_prompt:
+        custom_instructions = f"8. Additional instructions: {clarification_prompt}"
 
-        # Create prompt
-        vocab_list = ', '.join(vocabulary_words[:100])  # Limit to avoid token issues
-        prompt = f"""You are a language teacher for {target_lang}. Create an educational text for {level} level students.
+    # Create prompt
+    vocab_list = ', '.join(vocabulary_words[:100])  # Limit to avoid token issues
+    prompt = f"""You are a language teacher for {target_lang}. Create an educational text for {level} level students.
 
 STRICT REQUIREMENTS:
 1. Use ONLY these vocabulary words: {vocab_list}
@@ -309,27 +307,63 @@ STRICT REQUIREMENTS:
 
 Create a short story, dialogue, or informative text that naturally uses these words.
 """
+    return prompt, vocabulary_words, None
+
+
+def _text_result(generated_text, vocabulary_words):
+    """Response body for generated text with vocabulary usage stats."""
+    # Count words used from vocabulary
+    words_used = [word for word in vocabulary_words if word.lower() in generated_text.lower()]
+    
+    return {
+        'text': generated_text,
+        'word_count': len(generated_text.split()),
+        'vocabulary_used': words_used,
+        'vocabulary_used_count': len(words_used)
+    }
+
+
+@api_view(['POST'])
+@permission_classes([permissions.IsAuthenticated])
+@ratelimit(key='user', rate='10/h', block=True)
+def generate_text(request):
+    """
+    Generate German text using only user's vocabulary
+    """
+    try:
+        prompt, vocabulary_words, error_response = _build_text_prompt(request)
+        if error_response:
+            return error_response
         
         # Generate text using unified AI (gateway + legacy fallback)
         response = generate_ai_content(request.user, prompt)
         
-        generated_text = response.text
-        
-        # Count words used from vocabulary
-        words_used = [word for word in vocabulary_words if word.lower() in generated_text.lower()]
-        
-        return Response({
-            'text': generated_text,
-            'word_count': len(generated_text.split()),
-            'vocabulary_used': words_used,
-            'vocabulary_used_count': len(words_used)
-        })
+        return Response(_text_result(response.text, vocabulary_words))
         
     except Exception as e:
         return Response({
             'error': str(e)
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+@api_view(['POST'])
+@permission_classes([permissions.IsAuthenticated])
+@ratelimit(key='user', rate='10/h', group='api.feature_views.generate_text', block=True)  # Shares generate_text's budget
+def generate_text_stream(request):
+    """
+    Streaming variant of generate_text (Server-Sent Events).
+    Sends token events as text arrives, then a done event with the same
+    body generate_text returns.
+    """
+    try:
+        prompt, vocabulary_words, error_response = _build_text_prompt(request)
+    except Exception as e:
+        return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    if error_response:
+        return error_response
+    
+    stream = stream_ai_content(request.user, prompt)
+    return sse_response(generation_events(stream, lambda text: _text_result(text, vocabulary_words)))
+
 @api_view(['POST'])
 @permission_classes([permissions.IsAuthenticated])
 @ratelimit(key='user', rate='5/h', block=True)
@@ -0,0 +1,116 @@
+"""
+Custom model fields.
+
+PackedVectorField stores embedding vectors as packed little-endian binary
+instead of JSON float lists: a 1536-dim float32 vector is ~6KB of bytea
+rather than ~30KB of text, and float32 rows decode with ``np.frombuffer``
+without copying or parsing.
+
+Wire format: a 4-byte header ``b'V' + <code> + b'\\x00\\x00'`` followed by
+the payload. Codes:
+
+- ``f``: float32 values
+- ``h``: float16 values (half the size, ~3 significant digits)
+- ``b``: a float32 scale, then int8 values (``value = int8 * scale``)
+"""
+
+from base64 import b64decode
+
+import numpy as np
+from django.conf import settings
+from django.db import models
+
+
+HEADER_SIZE = 4
+DTYPE_CODES = {'float32': b'f', 'float16': b'h', 'int8': b'b'}
+
+
+def pack_vector(vector, dtype='float32') -> bytes:
+    """Pack a sequence of floats into the PackedVectorField wire format."""
+    values = np.asarray(vector, dtype=np.float32).ravel()
+    code = DTYPE_CODES.get(dtype)
+    if code is None:
+        raise ValueError(f"Unsupported vector dtype '{dtype}'. Choose from: {', '.join(DTYPE_CODES)}")
+
+    header = b'V' + code + b'\x00\x00'
+    if dtype == 'float32':
+        return header + values.astype('<f4', copy=False).tobytes()
+    if dtype == 'float16':
+        return header + values.astype('<f2').tobytes()
+
+    peak = float(np.abs(values).max()) if values.size else 0.0
+    scale = peak / 127.0 if peak > 0 else 1.0
+    quantized = np.clip(np.rint(values / scale), -127, 127).astype(np.int8)
+    return header + np.float32(scale).astype('<f4').tobytes() + quantized.tobytes()
+
+
+def unpack_vector(data) -> np.ndarray:
+    """
+    Decode the wire format to a float32 array.
+
+    float32 payloads are a read-only view over ``data`` (zero-copy); the
+    compact formats are widened to a new float32 array.
+    """
+    buffer = memoryview(data).cast('B')  # psycopg2 hands bytea back as format 'c'
+    header = bytes(buffer[:HEADER_SIZE])
+    if len(header) < HEADER_SIZE or header[:1] != b'V':
+        raise ValueError("Not a packed vector")
+
+    code = header[1:2]
+    if code == b'f':
+        return np.frombuffer(buffer, dtype='<f4', offset=HEADER_SIZE)
+    if code == b'h':
+        return np.frombuffer(buffer, dtype='<f2', offset=HEADER_SIZE).astype(np.float32)
+    if code == b'b':
+        scale = np.frombuffer(buffer, dtype='<f4', count=1, offset=HEADER_SIZE)[0]
+        return np.frombuffer(buffer, dtype=np.int8, offset=HEADER_SIZE + 4).astype(np.float32) * scale
+    raise ValueError(f"Unknown packed vector code {code!r}")
+
+
+class PackedVectorField(models.BinaryField):
+    """
+    Binary column holding one embedding vector.
+
+    Reads return float32 NumPy arrays; writes accept lists, arrays or
+    already-packed bytes. ``dtype`` defaults to ``settings.EMBEDDING_STORAGE_DTYPE``
+    at write time; any stored format can always be read back.
+    """
+
+    description = "Packed float vector"
+
+    def __init__(self, *args, dtype=None, **kwargs):
+        self.dtype = dtype
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        if self.dtype is not None:
+            kwargs['dtype'] = self.dtype
+        return name, path, args, kwargs
+
+    @property
+    def storage_dtype(self):
+        return self.dtype or getattr(settings, 'EMBEDDING_STORAGE_DTYPE', 'float32')
+
+    def from_db_value(self, value, expression, connection):
+        if value is None:
+            return None
+        return unpack_vector(value)
+
+    def to_python(self, value):
+        if value is None or isinstance(value, np.ndarray):
+            return value
+        if isinstance(value, str):
+            return unpack_vector(b64decode(value.encode('ascii')))
+        if isinstance(value, (bytes, bytearray, memoryview)):
+            return unpack_vector(value)
+        return np.asarray(value, dtype=np.float32)
+
+    def get_prep_value(self, value):
+        if value is None or isinstance(value, (bytes, bytearray, memoryview)):
+            return value
+        return pack_vector(value, self.storage_dtype)
+
+    def value_to_string(self, obj):
+        value = self.value_from_object(obj)
+        return None if value is None else np.asarray(value, dtype=np.float32).tolist()
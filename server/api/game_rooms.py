@@ -0,0 +1,666 @@
+"""
+Authoritative in-memory state for live classroom games.
+
+Players connect to GameSessionConsumer (ws/game/<session_id>/) instead of
+polling ``GameSessionViewSet.sync``. The first connection loads the session
+and its participants into a GameRoom; from then on joins, ready flags,
+answers, heartbeats and host state changes are applied to the room under a
+lock. Changes collect in the room and go to the session's channel group as
+one small diff per BROADCAST_INTERVAL, so clients never re-download the
+full state and a room of 100 answering players does not send 100 messages
+to each of them.
+
+Each room also keeps its players ordered by score (a sorted list updated
+with bisect whenever a score changes, like a Redis sorted set), so the
+leaderboard is read, not re-sorted, and answering is O(log n) plus the
+list shift rather than a query.
+
+Nothing is written to the database on the request path. A daemon thread
+writes dirty participants back with one ``bulk_update`` (and the session row
+with one UPDATE) every FLUSH_INTERVAL seconds, so a heartbeat costs no query
+and a burst of answers costs one write per room per interval. Rooms without
+connections are unloaded after ROOM_IDLE_TIMEOUT once flushed.
+
+Rooms live in the worker process that loaded them. With more than one ASGI
+worker, route ws/game/<session_id>/ to a worker by session id; the channel
+layer (settings.CHANNEL_LAYERS) only carries the broadcasts.
+
+Diff format (values are absolute; a participant entry with is_active false
+means the player left; clients apply diffs newer than their snapshot):
+    {"type": "diff", "v": 12, "participants": {"7": {"score": 180}},
+     "state": {"timer": 20}, "state_removed": [], "status": "active"}
+"""
+
+import atexit
+import bisect
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_GAME_ENGINE_CONFIG = {
+    'FLUSH_INTERVAL': 2.0,        # Seconds between write-backs of dirty rooms
+    'BROADCAST_INTERVAL': 0.05,   # Seconds changes are collected into one diff
+    'ROOM_IDLE_TIMEOUT': 300,     # Seconds a room without connections stays loaded
+}
+
+JOINABLE_STATUSES = ('waiting', 'active')
+
+# GameParticipant fields owned by the room while it is loaded
+PARTICIPANT_FIELDS = ('score', 'correct_answers', 'wrong_answers', 'avg_response_time', 'is_ready', 'is_active')
+PUBLIC_PLAYER_FIELDS = ('score', 'is_ready', 'is_active')
+
+
+def get_game_engine_config() -> Dict[str, Any]:
+    """Return GAME_ENGINE settings merged over the defaults."""
+    return {**DEFAULT_GAME_ENGINE_CONFIG, **getattr(settings, 'GAME_ENGINE', {})}
+
+
+def group_name(session_id: int) -> str:
+    """Channel group of a game session."""
+    return f"game_{session_id}"
+
+
+def answer_points(response_time: float) -> int:
+    """Points for a correct answer; faster answers score more."""
+    return max(10, 100 - int(response_time * 10))
+
+
+def leaderboard_entry(rank: int, user_id: int, player: Dict[str, Any]) -> Dict[str, Any]:
+    """One leaderboard row from a room player dict or GameParticipant values."""
+    return {
+        'rank': rank,
+        'user_id': user_id,
+        'username': player['username'],
+        'score': player['score'],
+        'correct': player['correct_answers'],
+        'avg_time': round(player['avg_response_time'], 2),
+    }
+
+
+class GameRoomError(Exception):
+    """Raised when a user may not open a room. ``code`` is the WebSocket close code."""
+
+    def __init__(self, message: str, code: int = 4403):
+        super().__init__(message)
+        self.code = code
+
+
+class GameRoom:
+    """
+    Live state of one GameSession.
+
+    All methods are safe to call from any thread. Mutators return whether
+    anything changed; the changes go out with the next take_diff().
+    """
+
+    def __init__(self, session_id: int, host_id: int, status: str, current_stage: int, state: Dict[str, Any]):
+        self.session_id = session_id
+        self.host_id = host_id
+        self.status = status
+        self.current_stage = current_stage
+        self.state = dict(state or {})
+        self.players: Dict[int, Dict[str, Any]] = {}
+        # (-score, participant_id, user_id) for every player, kept sorted
+        self._ranking: List[Tuple[int, int, int]] = []
+        self.version = 0
+        self.connections = 0
+        self.last_activity = time.monotonic()
+
+        self._lock = threading.Lock()
+        self._dirty_players: set = set()
+        self._heartbeats: Dict[int, Any] = {}
+        self._session_dirty = False
+
+        self._outbox_players: Dict[str, Dict[str, Any]] = {}
+        self._outbox_state: Dict[str, Any] = {}
+        self._outbox_removed: set = set()
+        self._outbox_session: Dict[str, Any] = {}
+        self._broadcast_pending = False
+
+    @property
+    def group_name(self) -> str:
+        return group_name(self.session_id)
+
+    def add_player(self, participant, username: str):
+        """Register a GameParticipant row (used while loading)."""
+        with self._lock:
+            self._add_player(participant, username, participant.is_active)
+
+    def _add_player(self, participant, username: str, is_active: bool):
+        self.players[participant.user_id] = player = {
+            'participant_id': participant.id,
+            'username': username,
+            **{field: getattr(participant, field) for field in PARTICIPANT_FIELDS},
+            'is_active': is_active,
+        }
+        bisect.insort(self._ranking, self._rank_key(participant.user_id, player))
+
+    @staticmethod
+    def _rank_key(user_id: int, player: Dict[str, Any]) -> Tuple[int, int, int]:
+        # Ties go to whoever joined first, as in the database fallback
+        return (-player['score'], player['participant_id'], user_id)
+
+    # =========================================================================
+    # READS
+    # =========================================================================
+
+    @staticmethod
+    def _public(user_id: int, player: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            'user_id': user_id,
+            'username': player['username'],
+            'score': player['score'],
+            'is_ready': player['is_ready'],
+        }
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Full state, in the shape of the polling ``sync`` response."""
+        with self._lock:
+            return {
+                'type': 'snapshot',
+                'v': self.version,
+                'status': self.status,
+                'current_stage': self.current_stage,
+                'state': dict(self.state),
+                'participants': [
+                    self._public(user_id, player)
+                    for user_id, player in self.players.items()
+                    if player['is_active']
+                ],
+            }
+
+    def player(self, user_id: int) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            player = self.players.get(user_id)
+            return dict(player) if player else None
+
+    def leaderboard(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Players by score, best first, in the shape of ``leaderboard_entry``."""
+        with self._lock:
+            ranking = self._ranking if limit is None else self._ranking[:limit]
+            return [
+                leaderboard_entry(rank, user_id, self.players[user_id])
+                for rank, (_, _, user_id) in enumerate(ranking, start=1)
+            ]
+
+    def rank(self, user_id: int) -> Optional[int]:
+        """1-based leaderboard position of a player."""
+        with self._lock:
+            player = self.players.get(user_id)
+            if player is None:
+                return None
+            return bisect.bisect_left(self._ranking, self._rank_key(user_id, player)) + 1
+
+    # =========================================================================
+    # CHANGES
+    # =========================================================================
+    # Mutations record what changed in an outbox; take_diff() turns the
+    # outbox into one versioned diff, so a burst of answers from a full room
+    # reaches each client as one message per BROADCAST_INTERVAL.
+
+    def _touch(self):
+        self.last_activity = time.monotonic()
+
+    def _set_player(self, user_id: int, **fields) -> bool:
+        """Apply fields to a player and queue the public ones; True if anything changed."""
+        player = self.players[user_id]
+        changed = {k: v for k, v in fields.items() if player.get(k) != v}
+        if not changed:
+            return False
+        if 'score' in changed:
+            del self._ranking[bisect.bisect_left(self._ranking, self._rank_key(user_id, player))]
+        player.update(changed)
+        if 'score' in changed:
+            bisect.insort(self._ranking, self._rank_key(user_id, player))
+        self._dirty_players.add(user_id)
+        self._touch()
+
+        public = {k: v for k, v in changed.items() if k in PUBLIC_PLAYER_FIELDS}
+        if public:
+            entry = self._outbox_players.setdefault(str(user_id), {})
+            if changed.get('is_active'):
+                # (Re)joined: send the whole public row
+                entry.clear()
+                entry.update(self._public(user_id, player))
+            else:
+                entry.update(public)
+        return True
+
+    def join(self, participant, username: str) -> bool:
+        """A participant connected (re-activating them if they had left)."""
+        with self._lock:
+            if participant.user_id not in self.players:
+                self._add_player(participant, username, is_active=False)
+            self._heartbeats[participant.user_id] = timezone.now()
+            return self._set_player(participant.user_id, is_active=True)
+
+    def leave(self, user_id: int) -> bool:
+        with self._lock:
+            if user_id not in self.players:
+                return False
+            return self._set_player(user_id, is_active=False)
+
+    def heartbeat(self, user_id: int):
+        """Record liveness; persisted with the next flush, never broadcast."""
+        with self._lock:
+            if user_id in self.players:
+                self._heartbeats[user_id] = timezone.now()
+                self._touch()
+
+    def set_ready(self, user_id: int, is_ready: bool = True) -> bool:
+        with self._lock:
+            if user_id not in self.players:
+                return False
+            return self._set_player(user_id, is_ready=is_ready)
+
+    def answer(self, user_id: int, is_correct: bool, response_time: float) -> Dict[str, Any]:
+        """
+        Score one answer and return the player's totals.
+
+        Raises:
+            GameRoomError: If the user is not a participant or the game is not running
+        """
+        with self._lock:
+            player = self.players.get(user_id)
+            if player is None:
+                raise GameRoomError("Not a participant in this game")
+            if self.status != 'active':
+                raise GameRoomError("Game is not active")
+
+            correct, wrong, score = player['correct_answers'], player['wrong_answers'], player['score']
+            if is_correct:
+                correct += 1
+                score += answer_points(response_time)
+            else:
+                wrong += 1
+            total = correct + wrong
+            avg = (player['avg_response_time'] * (total - 1) + response_time) / total
+
+            self._set_player(
+                user_id, score=score, correct_answers=correct, wrong_answers=wrong, avg_response_time=avg,
+            )
+            self._heartbeats[user_id] = timezone.now()
+            return {'score': score, 'correct': correct, 'wrong': wrong}
+
+    def update(self, state: Optional[Dict[str, Any]] = None, current_stage: Optional[int] = None,
+               status: Optional[str] = None, persist: bool = True) -> bool:
+        """
+        Host changes to the session. ``state`` replaces the whole state dict;
+        diffs carry only changed and removed top-level keys.
+
+        persist=False applies changes that are already in the database.
+        """
+        with self._lock:
+            changed_any = False
+            if state is not None:
+                for key in [k for k in self.state if k not in state]:
+                    self._outbox_state.pop(key, None)
+                    self._outbox_removed.add(key)
+                    changed_any = True
+                for key, value in state.items():
+                    if key not in self.state or self.state[key] != value:
+                        self._outbox_state[key] = value
+                        self._outbox_removed.discard(key)
+                        changed_any = True
+                self.state = dict(state)
+            if current_stage is not None and current_stage != self.current_stage:
+                self.current_stage = self._outbox_session['current_stage'] = current_stage
+                changed_any = True
+            if status is not None and status != self.status:
+                self.status = self._outbox_session['status'] = status
+                changed_any = True
+            if changed_any:
+                self._touch()
+                if persist:
+                    self._session_dirty = True
+            return changed_any
+
+    def claim_broadcast(self) -> bool:
+        """True for the one caller that should schedule the next take_diff()."""
+        with self._lock:
+            if self._broadcast_pending:
+                return False
+            self._broadcast_pending = True
+            return True
+
+    def take_diff(self) -> Optional[Dict[str, Any]]:
+        """Everything changed since the last diff, as one versioned diff (None if nothing)."""
+        with self._lock:
+            self._broadcast_pending = False
+            if not (self._outbox_players or self._outbox_state or self._outbox_removed or self._outbox_session):
+                return None
+            self.version += 1
+            diff = {'type': 'diff', 'v': self.version, **self._outbox_session}
+            if self._outbox_players:
+                diff['participants'] = self._outbox_players
+            if self._outbox_state or self._outbox_removed:
+                diff['state'] = self._outbox_state
+                diff['state_removed'] = sorted(self._outbox_removed)
+            self._outbox_players, self._outbox_state = {}, {}
+            self._outbox_removed, self._outbox_session = set(), {}
+            return diff
+
+    # =========================================================================
+    # WRITE-BACK
+    # =========================================================================
+
+    def take_dirty(self) -> Tuple[List[Dict[str, Any]], Dict[int, Any], Optional[Dict[str, Any]]]:
+        """Swap out pending changes: (player rows, heartbeats, session fields or None)."""
+        with self._lock:
+            players = [
+                {'user_id': user_id, **self.players[user_id]} for user_id in self._dirty_players
+            ]
+            heartbeats = {
+                self.players[user_id]['participant_id']: at for user_id, at in self._heartbeats.items()
+            }
+            session = {
+                'status': self.status, 'current_stage': self.current_stage, 'state': dict(self.state),
+            } if self._session_dirty else None
+            self._dirty_players = set()
+            self._heartbeats = {}
+            self._session_dirty = False
+            return players, heartbeats, session
+
+    def restore_dirty(self, players: List[Dict[str, Any]], heartbeats: Dict[int, Any], session: Optional[Dict[str, Any]]):
+        """Mark a batch whose write failed as pending again (newer values win)."""
+        with self._lock:
+            by_participant = {player['participant_id']: user_id for user_id, player in self.players.items()}
+            self._dirty_players.update(player['user_id'] for player in players)
+            for participant_id, at in heartbeats.items():
+                user_id = by_participant.get(participant_id)
+                if user_id is not None:
+                    self._heartbeats.setdefault(user_id, at)
+            if session is not None:
+                self._session_dirty = True
+
+    def has_pending(self) -> bool:
+        with self._lock:
+            return bool(self._dirty_players or self._heartbeats or self._session_dirty)
+
+
+class GameRoomRegistry:
+    """
+    Process-wide map of loaded GameRooms plus their write-back thread.
+
+    With flush_interval=0 no thread is started and callers flush explicitly.
+    """
+
+    _instance: Optional['GameRoomRegistry'] = None
+
+    def __init__(self, flush_interval: float = None, idle_timeout: float = None):
+        config = get_game_engine_config()
+        self.flush_interval = config['FLUSH_INTERVAL'] if flush_interval is None else flush_interval
+        self.idle_timeout = config['ROOM_IDLE_TIMEOUT'] if idle_timeout is None else idle_timeout
+
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._rooms: Dict[int, GameRoom] = {}
+        self._thread: Optional[threading.Thread] = None
+        self._pid: Optional[int] = None
+        self._stats = {
+            'rooms_loaded': 0,
+            'flushes': 0,
+            'flush_errors': 0,
+            'rows_written': 0,
+            'last_flush_ms': 0.0,
+        }
+
+    @classmethod
+    def get_instance(cls) -> 'GameRoomRegistry':
+        """Get singleton instance."""
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+    def get(self, session_id: int) -> Optional[GameRoom]:
+        """The loaded room for a session, if this process has one."""
+        with self._lock:
+            return self._rooms.get(session_id)
+
+    def open(self, session_id: int, user) -> Tuple[GameRoom, Optional[Any]]:
+        """
+        Load (if needed) and enter a room. Synchronous; touches the database.
+
+        Returns (room, participant); participant is None for the host.
+
+        Raises:
+            GameRoomError: Unknown session, or a non-host who may not join it
+        """
+        from .models import GameParticipant, GameSession
+
+        # Look up and count the connection in one step so _unload_idle cannot
+        # drop the room in between
+        with self._lock:
+            room = self._rooms.get(session_id)
+            if room is not None:
+                room.connections += 1
+        if room is None:
+            session = GameSession.objects.filter(pk=session_id).first()
+            if session is None:
+                raise GameRoomError("Game session not found", code=4404)
+            loaded = GameRoom(session.id, session.host_id, session.status, session.current_stage, session.state)
+            for participant in session.participant_records.select_related('user').only(
+                'id', 'user_id', 'user__username', *PARTICIPANT_FIELDS
+            ):
+                loaded.add_player(participant, participant.user.username)
+            with self._lock:
+                room = self._rooms.setdefault(session_id, loaded)
+                if room is loaded:
+                    self._stats['rooms_loaded'] += 1
+                room.connections += 1
+
+        participant = None
+        try:
+            if user.id != room.host_id:
+                if room.player(user.id) is None and room.status not in JOINABLE_STATUSES:
+                    raise GameRoomError("Cannot join this session")
+                participant, _ = GameParticipant.objects.get_or_create(
+                    session_id=session_id, user=user, defaults={'is_ready': False}
+                )
+        except BaseException:
+            self.close(room)
+            raise
+
+        self._ensure_flusher()
+        return room, participant
+
+    def close(self, room: GameRoom):
+        with self._lock:
+            room.connections = max(0, room.connections - 1)
+            room.last_activity = time.monotonic()
+
+    # =========================================================================
+    # FLUSHING
+    # =========================================================================
+
+    def _ensure_flusher(self) -> None:
+        if self.flush_interval <= 0:
+            return
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name="game-rooms", daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            time.sleep(self.flush_interval)
+            close_old_connections()
+            try:
+                self.flush()
+                self._unload_idle()
+            except Exception as e:
+                logger.error(f"Game room flush loop error: {e}")
+            finally:
+                close_old_connections()
+
+    def _unload_idle(self):
+        cutoff = time.monotonic() - self.idle_timeout
+        with self._lock:
+            for session_id, room in list(self._rooms.items()):
+                if room.connections == 0 and room.last_activity < cutoff and not room.has_pending():
+                    del self._rooms[session_id]
+
+    def flush(self) -> int:
+        """
+        Write every room's pending changes. Safe to call from any thread.
+
+        Returns:
+            Number of rows written
+        """
+        from .models import GameParticipant, GameSession
+
+        with self._flush_lock:
+            with self._lock:
+                rooms = list(self._rooms.values())
+
+            written = 0
+            started = time.perf_counter()
+            for room in rooms:
+                players, heartbeats, session = room.take_dirty()
+                if not (players or heartbeats or session):
+                    continue
+                rows = {}
+                for player in players:
+                    rows[player['participant_id']] = GameParticipant(
+                        id=player['participant_id'], **{field: player[field] for field in PARTICIPANT_FIELDS}
+                    )
+                try:
+                    with transaction.atomic():
+                        if rows:
+                            GameParticipant.objects.bulk_update(list(rows.values()), PARTICIPANT_FIELDS)
+                        # One UPDATE for all heartbeats of the interval, stamped with the latest
+                        if heartbeats:
+                            GameParticipant.objects.filter(pk__in=list(heartbeats)).update(
+                                last_heartbeat=max(heartbeats.values())
+                            )
+                        if session is not None:
+                            GameSession.objects.filter(pk=room.session_id).update(**session)
+                except Exception as e:
+                    logger.error(f"Game room {room.session_id} write-back failed, will retry: {e}")
+                    room.restore_dirty(players, heartbeats, session)
+                    with self._lock:
+                        self._stats['flush_errors'] += 1
+                    continue
+                written += len(rows) + len(set(heartbeats) - set(rows)) + (1 if session is not None else 0)
+
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            with self._lock:
+                self._stats['flushes'] += 1
+                self._stats['rows_written'] += written
+                self._stats['last_flush_ms'] = round(elapsed_ms, 2)
+            return written
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Loaded rooms, connections and write-back metrics for monitoring."""
+        with self._lock:
+            return {
+                **self._stats,
+                'rooms': len(self._rooms),
+                'connections': sum(room.connections for room in self._rooms.values()),
+            }
+
+
+def get_game_rooms() -> GameRoomRegistry:
+    """Get the game room registry singleton."""
+    return GameRoomRegistry.get_instance()
+
+
+def broadcast(session_id: int, diff: Optional[Dict[str, Any]]):
+    """Send a diff to a session's group from synchronous code."""
+    if not diff:
+        return
+    from asgiref.sync import async_to_sync
+    from channels.layers import get_channel_layer
+
+    layer = get_channel_layer()
+    if layer is not None:
+        async_to_sync(layer.group_send)(group_name(session_id), {'type': 'game.diff', 'diff': diff})
+
+
+def publish_session_update(session):
+    """
+    Apply a GameSession row saved by an HTTP view to its loaded room, if
+    any, and broadcast the change to connected players.
+    """
+    room = get_game_rooms().get(session.id)
+    if room is not None and room.update(
+        state=session.state, current_stage=session.current_stage, status=session.status, persist=False,
+    ):
+        broadcast(session.id, room.take_diff())
+
+
+def score_answer(session_id: int, user_id: int, is_correct: bool, response_time: float) -> Optional[Dict[str, Any]]:
+    """
+    Score one answer submitted over HTTP and return the player's totals
+    ({score, correct, wrong}), or None if the user is not a participant.
+
+    A room loaded in this process owns the participant's scores, so the
+    answer is applied there and broadcast. Otherwise the row is updated in
+    a single UPDATE of F() expressions; Postgres evaluates every SET
+    expression against the old row, so concurrent answers cannot lose
+    increments or skew the running average.
+
+    Raises:
+        GameRoomError: If the game is not active
+    """
+    from .models import GameParticipant
+
+    room = get_game_rooms().get(session_id)
+    if room is not None and room.player(user_id) is not None:
+        result = room.answer(user_id, is_correct, response_time)
+        broadcast(session_id, room.take_diff())
+        return result
+
+    answered = F('correct_answers') + F('wrong_answers')
+    participant = GameParticipant.objects.filter(session_id=session_id, user_id=user_id)
+    with transaction.atomic():
+        # The row stays locked until commit, so the read returns this answer's totals
+        updated = participant.filter(session__status='active').update(
+            score=F('score') + (answer_points(response_time) if is_correct else 0),
+            correct_answers=F('correct_answers') + (1 if is_correct else 0),
+            wrong_answers=F('wrong_answers') + (0 if is_correct else 1),
+            avg_response_time=(F('avg_response_time') * answered + response_time) / (answered + 1),
+        )
+        if not updated:
+            if participant.exists():
+                raise GameRoomError("Game is not active")
+            return None
+        score, correct, wrong = participant.values_list('score', 'correct_answers', 'wrong_answers').get()
+    return {'score': score, 'correct': correct, 'wrong': wrong}
+
+
+def get_leaderboard(session_id: int, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    Ranked participants of a session: from the loaded room's running
+    ranking when there is one, else ordered by the database.
+    """
+    from .models import GameParticipant
+
+    room = get_game_rooms().get(session_id)
+    if room is not None:
+        return room.leaderboard(limit)
+
+    rows = GameParticipant.objects.filter(session_id=session_id).order_by('-score', 'id').values(
+        'user_id', 'score', 'correct_answers', 'avg_response_time', username=F('user__username'),
+    )
+    if limit is not None:
+        rows = rows[:limit]
+    return [leaderboard_entry(rank, row['user_id'], row) for rank, row in enumerate(rows, start=1)]
+
+
+@atexit.register
+def _flush_game_rooms_on_exit():
+    if GameRoomRegistry._instance is not None:
+        GameRoomRegistry._instance.flush()
@@ -0,0 +1,335 @@
+"""
+Persistent checkpoints and node-output reuse for the agent graphs.
+
+- DjangoCheckpointSaver stores LangGraph checkpoints in GraphCheckpoint /
+  GraphCheckpointWrite rows, so a graph run is keyed by a job thread id
+  (e.g. "exam:42") and survives a worker restart.
+- run_checkpointed() resumes a thread from its last completed node when a
+  checkpoint exists, and starts fresh otherwise.
+- reuse_node_output() memoizes a node's output in the Django cache keyed
+  by the state fields it reads, so identical upstream work (e.g. the topic
+  analysis for the same topic and level) is shared across jobs.
+
+Usage:
+    from api.graph_checkpoint import run_checkpointed, clear_checkpoints
+
+    result = run_checkpointed(get_exam_graph(), f"exam:{exam.id}", initial_state, config)
+    clear_checkpoints(f"exam:{exam.id}")
+"""
+
+import functools
+import hashlib
+import json
+import logging
+import threading
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+)
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_AGENT_GRAPH_CONFIG = {
+    'CHECKPOINTS': True,     # Persist graph state per job so retries resume
+    'NODE_CACHE_TTL': 86400,  # Seconds to reuse memoized node outputs (0 disables)
+    'EXAM_SECTION_FAN_OUT': True,  # One LLM call per exam section instead of one for the whole exam
+    'EXAM_SECTION_CONCURRENCY': 3,  # Concurrent section calls per exam
+}
+
+
+def get_agent_graph_config() -> Dict[str, Any]:
+    """Effective settings (settings.AGENT_GRAPHS over defaults)."""
+    config = dict(DEFAULT_AGENT_GRAPH_CONFIG)
+    config.update(getattr(settings, 'AGENT_GRAPHS', {}))
+    return config
+
+
+def _releases_connection(method: Callable) -> Callable:
+    """
+    Close the thread's DB connection after a saver call.
+
+    LangGraph writes checkpoints from a short-lived executor per invoke;
+    without this every run would strand one connection per pool thread.
+    """
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        try:
+            return method(*args, **kwargs)
+        finally:
+            if threading.current_thread() is not threading.main_thread() and not connection.in_atomic_block:
+                connection.close()
+    return wrapper
+
+
+class DjangoCheckpointSaver(BaseCheckpointSaver):
+    """
+    LangGraph checkpointer backed by the default database.
+
+    Each checkpoint row holds the full serialized state; the graphs here
+    have a handful of steps, so per-channel blob deduplication is not
+    worth the extra table.
+    """
+
+    def _parent_config(self, row) -> Optional[Dict[str, Any]]:
+        if not row.parent_checkpoint_id:
+            return None
+        return {'configurable': {
+            'thread_id': row.thread_id,
+            'checkpoint_ns': row.checkpoint_ns,
+            'checkpoint_id': row.parent_checkpoint_id,
+        }}
+
+    def _to_tuple(self, row) -> CheckpointTuple:
+        from .models import GraphCheckpointWrite
+
+        writes = GraphCheckpointWrite.objects.filter(
+            thread_id=row.thread_id, checkpoint_ns=row.checkpoint_ns, checkpoint_id=row.checkpoint_id,
+        ).order_by('task_id', 'idx')
+        return CheckpointTuple(
+            config={'configurable': {
+                'thread_id': row.thread_id,
+                'checkpoint_ns': row.checkpoint_ns,
+                'checkpoint_id': row.checkpoint_id,
+            }},
+            checkpoint=self.serde.loads_typed((row.checkpoint_type, bytes(row.checkpoint))),
+            metadata=self.serde.loads_typed((row.metadata_type, bytes(row.metadata))),
+            parent_config=self._parent_config(row),
+            pending_writes=[
+                (w.task_id, w.channel, self.serde.loads_typed((w.value_type, bytes(w.value))))
+                for w in writes
+            ],
+        )
+
+    @_releases_connection
+    def get_tuple(self, config: Dict[str, Any]) -> Optional[CheckpointTuple]:
+        from .models import GraphCheckpoint
+
+        configurable = config['configurable']
+        rows = GraphCheckpoint.objects.filter(
+            thread_id=configurable['thread_id'],
+            checkpoint_ns=configurable.get('checkpoint_ns', ''),
+        )
+        checkpoint_id = get_checkpoint_id(config)
+        if checkpoint_id:
+            rows = rows.filter(checkpoint_id=checkpoint_id)
+        row = rows.order_by('-checkpoint_id').first()
+        return self._to_tuple(row) if row else None
+
+    def list(
+        self,
+        config: Optional[Dict[str, Any]],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[Dict[str, Any]] = None,
+        limit: Optional[int] = None,
+    ) -> Iterator[CheckpointTuple]:
+        from .models import GraphCheckpoint
+
+        rows = GraphCheckpoint.objects.all()
+        if config:
+            configurable = config['configurable']
+            rows = rows.filter(thread_id=configurable['thread_id'])
+            if configurable.get('checkpoint_ns') is not None:
+                rows = rows.filter(checkpoint_ns=configurable['checkpoint_ns'])
+            if get_checkpoint_id(config):
+                rows = rows.filter(checkpoint_id=get_checkpoint_id(config))
+        if before and get_checkpoint_id(before):
+            rows = rows.filter(checkpoint_id__lt=get_checkpoint_id(before))
+
+        yield from self._load_tuples(rows.order_by('-checkpoint_id'), filter, limit)
+
+    @_releases_connection
+    def _load_tuples(self, rows, filter, limit) -> List[CheckpointTuple]:
+        tuples = []
+        for row in rows:
+            if limit is not None and len(tuples) >= limit:
+                break
+            checkpoint_tuple = self._to_tuple(row)
+            if filter and not all(checkpoint_tuple.metadata.get(k) == v for k, v in filter.items()):
+                continue
+            tuples.append(checkpoint_tuple)
+        return tuples
+
+    @_releases_connection
+    def put(
+        self,
+        config: Dict[str, Any],
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> Dict[str, Any]:
+        from .models import GraphCheckpoint
+
+        configurable = config['configurable']
+        thread_id = configurable['thread_id']
+        checkpoint_ns = configurable.get('checkpoint_ns', '')
+        checkpoint_type, checkpoint_data = self.serde.dumps_typed(checkpoint)
+        metadata_type, metadata_data = self.serde.dumps_typed(get_checkpoint_metadata(config, metadata))
+
+        GraphCheckpoint.objects.update_or_create(
+            thread_id=thread_id,
+            checkpoint_ns=checkpoint_ns,
+            checkpoint_id=checkpoint['id'],
+            defaults={
+                'parent_checkpoint_id': configurable.get('checkpoint_id'),
+                'checkpoint_type': checkpoint_type,
+                'checkpoint': checkpoint_data,
+                'metadata_type': metadata_type,
+                'metadata': metadata_data,
+            },
+        )
+        return {'configurable': {
+            'thread_id': thread_id,
+            'checkpoint_ns': checkpoint_ns,
+            'checkpoint_id': checkpoint['id'],
+        }}
+
+    @_releases_connection
+    def put_writes(
+        self,
+        config: Dict[str, Any],
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = '',
+    ) -> None:
+        from .models import GraphCheckpointWrite
+
+        configurable = config['configurable']
+        keys = {
+            'thread_id': configurable['thread_id'],
+            'checkpoint_ns': configurable.get('checkpoint_ns', ''),
+            'checkpoint_id': configurable['checkpoint_id'],
+            'task_id': task_id,
+        }
+        with transaction.atomic():
+            for idx, (channel, value) in enumerate(writes):
+                write_idx = WRITES_IDX_MAP.get(channel, idx)
+                value_type, value_data = self.serde.dumps_typed(value)
+                fields = {
+                    'task_path': task_path,
+                    'channel': channel,
+                    'value_type': value_type,
+                    'value': value_data,
+                }
+                if write_idx >= 0:
+                    # Regular writes are immutable once recorded
+                    GraphCheckpointWrite.objects.get_or_create(idx=write_idx, defaults=fields, **keys)
+                else:
+                    # Special channels (errors, interrupts) keep the latest value
+                    GraphCheckpointWrite.objects.update_or_create(idx=write_idx, defaults=fields, **keys)
+
+    @_releases_connection
+    def delete_thread(self, thread_id: str) -> None:
+        from .models import GraphCheckpoint, GraphCheckpointWrite
+
+        GraphCheckpoint.objects.filter(thread_id=thread_id).delete()
+        GraphCheckpointWrite.objects.filter(thread_id=thread_id).delete()
+
+    async def aget_tuple(self, config):
+        return await sync_to_async(self.get_tuple)(config)
+
+    async def alist(self, config, *, filter=None, before=None, limit=None):
+        tuples = await sync_to_async(lambda: list(self.list(config, filter=filter, before=before, limit=limit)))()
+        for checkpoint_tuple in tuples:
+            yield checkpoint_tuple
+
+    async def aput(self, config, checkpoint, metadata, new_versions):
+        return await sync_to_async(self.put)(config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(self, config, writes, task_id, task_path=''):
+        return await sync_to_async(self.put_writes)(config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id):
+        return await sync_to_async(self.delete_thread)(thread_id)
+
+
+def get_checkpointer() -> Optional[DjangoCheckpointSaver]:
+    """Checkpointer for compiled agent graphs, or None when disabled."""
+    return DjangoCheckpointSaver() if get_agent_graph_config()['CHECKPOINTS'] else None
+
+
+def run_checkpointed(graph, thread_id: str, initial_state: Dict[str, Any],
+                     config: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Invoke ``graph`` on ``thread_id``, resuming from its last checkpoint.
+
+    - No checkpoint: start from ``initial_state``.
+    - Interrupted run: continue from the next pending node.
+    - Finished run (the job died after the graph completed): return the
+      final state without calling any node again.
+    """
+    config = dict(config or {})
+    config['configurable'] = {**config.get('configurable', {}), 'thread_id': thread_id}
+
+    if graph.checkpointer is None:
+        return graph.invoke(initial_state, config=config)
+
+    snapshot = graph.get_state(config)
+    if not snapshot.values:
+        return graph.invoke(initial_state, config=config)
+    if snapshot.next:
+        logger.info(f"Resuming graph {thread_id} at {', '.join(snapshot.next)}")
+        return graph.invoke(None, config=config)
+    logger.info(f"Graph {thread_id} already finished; reusing its final state")
+    return snapshot.values
+
+
+def clear_checkpoints(thread_id: str) -> None:
+    """Drop a finished job's checkpoints."""
+    try:
+        DjangoCheckpointSaver().delete_thread(thread_id)
+    except Exception as e:
+        logger.warning(f"Failed to clear checkpoints for {thread_id}: {e}")
+
+
+def reuse_node_output(namespace: str, key_fields: Sequence[str], required: str) -> Callable:
+    """
+    Memoize a graph node's output across jobs.
+
+    The cache key is ``namespace`` plus the JSON of ``key_fields`` read
+    from the state. Outputs without ``required`` (the node's failure path)
+    are not stored. Log lines the node appended are replayed on a hit.
+    """
+    def decorator(node: Callable) -> Callable:
+        @functools.wraps(node)
+        def wrapper(state, *args, **kwargs):
+            ttl = get_agent_graph_config()['NODE_CACHE_TTL']
+            if not ttl:
+                return node(state, *args, **kwargs)
+
+            payload = json.dumps([state.get(f) for f in key_fields], sort_keys=True, default=str)
+            key = f"graph_node:{namespace}:{hashlib.sha256(payload.encode()).hexdigest()}"
+            logs = state.get('logs', [])
+
+            try:
+                cached = cache.get(key)
+            except Exception:
+                cached = None
+            if cached is not None:
+                logger.info(f"Reusing cached '{namespace}' node output")
+                return {**cached['output'], 'logs': logs + cached['logs']}
+
+            result = node(state, *args, **kwargs)
+            if result.get(required) is not None:
+                output = {k: v for k, v in result.items() if k != 'logs'}
+                new_logs = result.get('logs', logs)[len(logs):]
+                try:
+                    cache.set(key, {'output': output, 'logs': new_logs}, ttl)
+                except Exception as e:
+                    logger.warning(f"Could not cache '{namespace}' node output: {e}")
+            return result
+        return wrapper
+    return decorator
@@ -1,6 +1,8 @@
 import math
 from datetime import datetime, timedelta
 
+import numpy as np
+
 class HLRScheduler:
     """
     Simplified Half-Life Regression (HLR) Scheduler.
@@ -28,6 +30,9 @@ class HLRScheduler:
     MAX_HALF_LIFE = 180.0 # days
     MIN_RECALL_PROB = 0.0001
     MAX_RECALL_PROB = 0.9999
+    
+    # Recall below this means the word is due for review
+    DUE_RECALL_THRESHOLD = 0.9
 
     @classmethod
     def estimate_half_life(cls, correct_count, wrong_count, total_count):
@@ -81,3 +86,72 @@ class HLRScheduler:
         # We can use 1 - p, or just return p and sort ascending.
         # Let's return 1 - p so higher is more urgent.
         return 1.0 - p
+
+    @classmethod
+    def schedule(cls, correct_count, wrong_count, total_count, last_practiced_at, threshold=None):
+        """
+        Materialized schedule for a word: (half_life, next_due_at).
+
+        next_due_at is the first moment the whole-days-since-practice used by
+        the views gives recall below the threshold, i.e.
+        floor(h * log2(1/threshold)) + 1 days after last practice.
+        Never-practiced words have no due date.
+        """
+        half_life = cls.estimate_half_life(correct_count, wrong_count, total_count)
+        if last_practiced_at is None:
+            return half_life, None
+        threshold = threshold or cls.DUE_RECALL_THRESHOLD
+        due_in_days = math.floor(half_life * math.log2(1 / threshold)) + 1
+        return half_life, last_practiced_at + timedelta(days=due_in_days)
+
+    # =========================================================================
+    # BATCH (VECTORIZED) API
+    # =========================================================================
+
+    @classmethod
+    def batch_estimate(cls, correct_counts, wrong_counts, total_counts, days_since_last_practice):
+        """
+        Vectorized half-life, recall probability and priority for many items.
+
+        Same formulas and clamping as the scalar methods, computed with NumPy
+        in one pass. Inputs are equal-length sequences or arrays.
+
+        Returns:
+            dict of float64 arrays: 'half_life', 'recall_probability', 'priority_score'
+        """
+        correct = np.asarray(correct_counts, dtype=np.float64)
+        wrong = np.asarray(wrong_counts, dtype=np.float64)
+        total = np.asarray(total_counts, dtype=np.float64)
+        days = np.maximum(np.asarray(days_since_last_practice, dtype=np.float64), 0)
+
+        theta_x = (
+            cls.WEIGHTS['correct'] * correct +
+            cls.WEIGHTS['wrong'] * wrong +
+            cls.WEIGHTS['sqrt_total'] * np.sqrt(np.maximum(total, 0)) +
+            cls.WEIGHTS['bias']
+        )
+        # Clamp the exponent first so huge counts don't overflow
+        max_exp = math.log2(cls.MAX_HALF_LIFE) + 1
+        half_life = np.clip(np.exp2(np.minimum(theta_x, max_exp)), cls.MIN_HALF_LIFE, cls.MAX_HALF_LIFE)
+
+        recall = np.clip(np.exp2(-days / half_life), cls.MIN_RECALL_PROB, cls.MAX_RECALL_PROB)
+
+        return {
+            'half_life': half_life,
+            'recall_probability': recall,
+            'priority_score': 1.0 - recall,
+        }
+
+    @classmethod
+    def batch_days_since(cls, timestamps, now):
+        """
+        Whole days elapsed since each timestamp (like timedelta.days).
+
+        None entries become NaN so callers can mask never-practiced items.
+        """
+        now_ts = now.timestamp()
+        seconds = np.array(
+            [now_ts - ts.timestamp() if ts is not None else np.nan for ts in timestamps],
+            dtype=np.float64,
+        )
+        return np.floor(seconds / 86400.0)
@@ -7,6 +7,7 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from .advanced_text_models import GeneratedContent
 from .image_generation_agent import ImageGenerationAgent
+from .services.generated_images import IMAGE_PROGRESS_FIELDS, apply_image_result
 import json
 import time
 import logging
@@ -35,13 +36,12 @@ def stream_image_generation_progress(request, pk):
         events = content.content_data.get('events', [])
         total_images = len(events)
         
-        # Get user's API keys
+        # Get user's API key (the Hugging Face token comes from HUGGINGFACE_API_TOKEN)
         horde_key = request.user.profile.stable_horde_api_key
-        hf_token = request.user.profile.huggingface_api_token
         
         # Initialize agent
         try:
-            agent = ImageGenerationAgent(horde_api_key=horde_key, hf_api_token=hf_token)
+            agent = ImageGenerationAgent(horde_api_key=horde_key)
         except Exception as e:
             yield f"data: {json.dumps({'type': 'error', 'message': f'Failed to initialize agent: {str(e)}'})}\n\n"
             return
@@ -61,7 +61,7 @@ def stream_image_generation_progress(request, pk):
             event['image_status'] = 'generating'
             content.content_data['events'][idx] = event
             content.image_generation_status = 'generating'
-            content.save()
+            content.save(update_fields=IMAGE_PROGRESS_FIELDS)
             
             # Generate image
             try:
@@ -80,10 +80,7 @@ def stream_image_generation_progress(request, pk):
                 result = agent.generate_image(prompt, negative_prompt)
                 
                 if result['success']:
-                    event['image_status'] = 'completed'
-                    event['image_base64'] = result.get('image_base64')
-                    event['image_url'] = result.get('image_url')
-                    event['image_provider'] = result.get('provider')
+                    apply_image_result(event, result)
                     
                     content.images_generated_count += 1
                     
@@ -105,7 +102,7 @@ def stream_image_generation_progress(request, pk):
             
             # Save progress
             content.content_data['events'][idx] = event
-            content.save()
+            content.save(update_fields=IMAGE_PROGRESS_FIELDS)
         
         # Finalize status
         events = content.content_data.get('events', [])
@@ -122,7 +119,7 @@ def stream_image_generation_progress(request, pk):
             content.image_generation_status = 'partial'
             final_status = 'partial'
         
-        content.save()
+        content.save(update_fields=IMAGE_PROGRESS_FIELDS)
         
         # Send final status
         yield f"data: {json.dumps({'type': 'complete', 'status': final_status, 'completed': len(completed), 'failed': len(failed), 'total': len(events)})}\n\n"
@@ -0,0 +1,126 @@
+"""
+Management command to load-test the live game WebSocket consumer
+Connects a host and N players (default 100) to one room over the in-process
+ASGI application, has every player answer concurrently, and reports answer
+round-trip latency, broadcast fan-out and the write-back cost. Benchmark
+users (and with them the session) are deleted afterwards
+"""
+import asyncio
+import statistics
+import time
+
+from asgiref.sync import sync_to_async
+from channels.auth import AuthMiddlewareStack
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authtoken.models import Token
+
+from api.game_rooms import GameRoomRegistry, answer_points, get_game_rooms
+from api.models import Classroom, GameSession, Teacher
+from api.routing import websocket_urlpatterns
+
+PREFIX = 'bench_game_'
+RESPONSE_TIME = 1.5
+
+
+class Command(BaseCommand):
+    help = 'Load-test ws/game/<id>/ with concurrent players in one room'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--players', type=int, default=100)
+        parser.add_argument('--answers', type=int, default=10, help='Answers sent by each player')
+
+    def handle(self, *args, **options):
+        User.objects.filter(username__startswith=PREFIX).delete()
+        GameRoomRegistry._instance = GameRoomRegistry(flush_interval=0)
+        try:
+            host = User.objects.create(username=f'{PREFIX}host')
+            classroom = Classroom.objects.create(teacher=Teacher.objects.create(user=host), name='Benchmark')
+            session = GameSession.objects.create(classroom=classroom, host=host, status='active')
+            users = User.objects.bulk_create([
+                User(username=f'{PREFIX}{i}') for i in range(options['players'])
+            ])
+            tokens = [Token.objects.create(user=user).key for user in users]
+
+            asyncio.run(self._run(session.id, tokens, options['answers']))
+        finally:
+            GameRoomRegistry._instance = None
+            User.objects.filter(username__startswith=PREFIX).delete()
+
+    def _flush(self):
+        with CaptureQueriesContext(connection) as queries:
+            rows = get_game_rooms().flush()
+        return rows, [q['sql'] for q in queries if q['sql'].startswith('UPDATE')]
+
+    async def _run(self, session_id, tokens, answers):
+        application = AuthMiddlewareStack(URLRouter(websocket_urlpatterns))
+        players = []
+        started = time.perf_counter()
+        for token in tokens:
+            communicator = WebsocketCommunicator(application, f'/ws/game/{session_id}/?token={token}')
+            connected, _ = await communicator.connect()
+            if not connected:
+                raise RuntimeError('Player could not connect')
+            players.append(communicator)
+        connect_s = time.perf_counter() - started
+
+        # Drain join traffic so every player starts from an idle queue
+        for communicator in players:
+            while not await communicator.receive_nothing(timeout=0.05):
+                await communicator.receive_output()
+
+        final_score = answers * answer_points(RESPONSE_TIME)
+        round_trips, diffs_delivered = [], [0]
+
+        async def play(communicator):
+            scores = {}
+
+            def apply(message):
+                diffs_delivered[0] += 1
+                for user_id, fields in message.get('participants', {}).items():
+                    if 'score' in fields:
+                        scores[user_id] = fields['score']
+
+            for _ in range(answers):
+                sent = time.perf_counter()
+                await communicator.send_json_to({'type': 'answer', 'is_correct': True, 'response_time': RESPONSE_TIME})
+                while True:
+                    message = await communicator.receive_json_from(timeout=30)
+                    if message['type'] == 'answer_result':
+                        round_trips.append((time.perf_counter() - sent) * 1000)
+                        break
+                    apply(message)
+            # Done once this player has seen everyone's final score
+            while len(scores) < len(players) or any(score != final_score for score in scores.values()):
+                apply(await communicator.receive_json_from(timeout=30))
+
+        started = time.perf_counter()
+        await asyncio.gather(*(play(communicator) for communicator in players))
+        elapsed = time.perf_counter() - started
+        total_answers = len(players) * answers
+
+        rows, updates = await sync_to_async(self._flush)()
+
+        for communicator in players:
+            await communicator.disconnect()
+
+        round_trips.sort()
+        self.stdout.write(f'{len(players)} players connected in {connect_s:.2f}s')
+        self.stdout.write(
+            f'{total_answers} answers, all players up to date after {elapsed:.2f}s '
+            f'({total_answers / elapsed:.0f} answers/s); answer round trip p50 '
+            f'{statistics.median(round_trips):.1f}ms, p95 {round_trips[int(len(round_trips) * 0.95) - 1]:.1f}ms'
+        )
+        self.stdout.write(
+            f'{diffs_delivered[0]} diffs delivered ({diffs_delivered[0] / len(players):.0f} per player, '
+            f'vs {total_answers} per player with one message per answer)'
+        )
+        self.stdout.write(
+            f'Write-back: {rows} rows in {len(updates)} UPDATEs '
+            f'(the HTTP endpoints issue one UPDATE per answer and per poll: {total_answers}+)'
+        )
+        self.stdout.write(self.style.SUCCESS('Benchmark finished; benchmark users deleted'))
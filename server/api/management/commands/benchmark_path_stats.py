@@ -0,0 +1,91 @@
+"""
+Management command to benchmark classroom learning-path statistics
+Builds throwaway classrooms of 30/300/3000 students inside a transaction,
+times the set-based computation (cold) and the cached read (warm), and
+rolls everything back
+"""
+import random
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from api.models import (
+    ClassMembership, Classroom, LearningPath, NodeProgress, PathEnrollment, PathNode, PathSubLevel, Teacher,
+)
+from api.services.classroom_path_stats import compute_path_stats, get_path_stats, invalidate_path_stats
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Time ClassroomViewSet.path_stats for 30/300/3000-student classrooms (no data is kept)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[30, 300, 3000])
+        parser.add_argument('--nodes', type=int, default=40, help='Nodes in the benchmark path')
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self._run(options)
+                raise Rollback()
+        except Rollback:
+            pass
+
+    def _run(self, options):
+        rng = random.Random(0)
+        teacher = Teacher.objects.create(user=User.objects.create(username='bench_path_stats_teacher'))
+        path = LearningPath.objects.create(title='Benchmark', speaking_language='xx', target_language='yy')
+        nodes = []
+        for s in range(max(1, options['nodes'] // 10)):
+            sublevel = PathSubLevel.objects.create(
+                path=path, title=f'S{s}', level_code='A1', sublevel_code=f'A1.{s + 1}', order=s
+            )
+            nodes += PathNode.objects.bulk_create([
+                PathNode(sublevel=sublevel, title=f'Node {s}.{i}', node_type='lesson', order=i) for i in range(10)
+            ])
+
+        for size in options['sizes']:
+            classroom = Classroom.objects.create(
+                teacher=teacher, name=f'Bench {size}', speaking_language='xx', target_language='yy',
+                invite_code=f'B{size}'[:8],
+            )
+            students = User.objects.bulk_create([User(username=f'bench_{size}_{i}') for i in range(size)])
+            ClassMembership.objects.bulk_create([
+                ClassMembership(classroom=classroom, student=s, status='active') for s in students
+            ])
+            enrollments = PathEnrollment.objects.bulk_create([PathEnrollment(path=path, student=s) for s in students])
+            progress = []
+            for enrollment in enrollments:
+                done = rng.randint(0, len(nodes) - 1)
+                progress += [NodeProgress(enrollment=enrollment, node=n, status='completed') for n in nodes[:done]]
+                progress.append(NodeProgress(enrollment=enrollment, node=nodes[done], status='available'))
+            NodeProgress.objects.bulk_create(progress, batch_size=5000)
+
+            cold_ms, queries = [], 0
+            for _ in range(options['repeat']):
+                with CaptureQueriesContext(connection) as captured:
+                    started = time.perf_counter()
+                    compute_path_stats(classroom, path)
+                    cold_ms.append((time.perf_counter() - started) * 1000)
+                queries = len(captured)
+
+            invalidate_path_stats(path_id=path.id)
+            get_path_stats(classroom, path)
+            started = time.perf_counter()
+            for _ in range(options['repeat']):
+                get_path_stats(classroom, path)
+            warm_ms = (time.perf_counter() - started) * 1000 / options['repeat']
+
+            self.stdout.write(
+                f'{size:>5} students: {queries} queries, '
+                f'cold {min(cold_ms):.1f}ms (best of {options["repeat"]}), cached {warm_ms:.2f}ms'
+            )
+
+        self.stdout.write(self.style.SUCCESS('Benchmark finished; all benchmark rows rolled back'))
@@ -0,0 +1,40 @@
+"""
+Management command to recompute dashboard statistics snapshots
+Run this periodically (e.g., hourly cron job) so HLR mastery buckets follow
+recall decay without the dashboard having to rebuild them on read
+"""
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from api.models import UserStatsSnapshot
+from api.services.user_stats import rebuild_user_stats
+
+
+class Command(BaseCommand):
+    help = 'Recompute UserStatsSnapshot rows older than the given age'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--older-than', type=int, default=3600,
+            help='Only refresh snapshots computed more than this many seconds ago',
+        )
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        cutoff = now - timedelta(seconds=options['older_than'])
+        user_ids = list(
+            UserStatsSnapshot.objects.filter(computed_at__lt=cutoff).values_list('user_id', flat=True)
+        )
+
+        refreshed = 0
+        for user_id in user_ids:
+            rebuild_user_stats(user_id, now)
+            refreshed += 1
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Successfully refreshed {refreshed} user stats snapshots'
+            )
+        )
@@ -1,12 +1,19 @@
 import json
+import random
 import time
 from django.utils import timezone
 from datetime import timedelta
-from .admin_models import APIUsageLog
+from .usage_log_buffer import get_api_usage_log_config, get_usage_log_buffer, summarize_payload
 
 class APIUsageMiddleware:
+    """
+    Logs AI requests to APIUsageLog without touching the database on the
+    request thread: rows go through the write-behind buffer in
+    api/usage_log_buffer.py.
+    """
     def __init__(self, get_response):
         self.get_response = get_response
+        self.config = get_api_usage_log_config()
         # Cost per 1k tokens or per request (approximate)
         self.COST_RATES = {
             'gemini': 0.0005, # Per request (simplified)
@@ -23,32 +30,17 @@ class APIUsageMiddleware:
         is_semantic_search = request.path.startswith('/api/vocab/semantic-search/')
         is_grammar_gen = request.path.startswith('/api/grammar/generate/')
         
-        # Debug logging
-        if request.path.startswith('/api/vocab/') and request.method == 'POST':
-            print(f"[MIDDLEWARE DEBUG] Vocab POST request:")
-            print(f"  Path: {request.path}")
-            print(f"  Has X-Gemini-Key: {bool(has_gemini_key)}")
-            print(f"  Has X-OpenRouter-Key: {bool(has_openrouter_key)}")
-            print(f"  All Headers: {dict(request.headers)}")
-        
         has_ai_key = has_gemini_key or has_openrouter_key or is_ai_endpoint or is_semantic_search or is_grammar_gen
         
         if not has_ai_key:
             return self.get_response(request)
 
         # IMPORTANT: Read body BEFORE processing request, as it can only be read once
-        req_data = {}
-        try:
-            if request.body:
-                body_unicode = request.body.decode('utf-8')
-                req_data = json.loads(body_unicode)
-        except (json.JSONDecodeError, UnicodeDecodeError, Exception):
-            # If body can't be parsed, just skip it
-            pass
+        req_data = self._sample_payload(request)
 
-        start_time = time.time()
+        start_time = time.perf_counter()
         response = self.get_response(request)
-        duration = int((time.time() - start_time) * 1000)
+        duration = int((time.perf_counter() - start_time) * 1000)
 
         # Determine provider (improved logic)
         provider = 'unknown'
@@ -62,28 +54,41 @@ class APIUsageMiddleware:
         # Calculate cost
         cost = self.COST_RATES.get(provider, 0.0)
 
-        # Log to DB
+        # Buffer the row; the flusher thread writes it
         if request.user.is_authenticated:
-            try:
-                # Determine success based on status code
-                success = 200 <= response.status_code < 300
-
-                APIUsageLog.objects.create(
-                    user=request.user,
-                    provider=provider,
-                    endpoint=request.path,
-                    request_data=req_data,
-                    response_status=response.status_code,
-                    response_time_ms=duration,
-                    success=success,
-                    estimated_cost=cost
-                )
-                print(f"[MIDDLEWARE] ✅ Logged: {request.path} - {provider} - Success: {success}")
-            except Exception as e:
-                print(f"Failed to log API usage: {e}")
+            get_usage_log_buffer().log(
+                user_id=request.user.id,
+                provider=provider,
+                endpoint=request.path[:200],
+                request_data=req_data,
+                response_status=response.status_code,
+                response_time_ms=duration,
+                success=200 <= response.status_code < 300,
+                estimated_cost=cost,
+            )
 
         return response
 
+    def _sample_payload(self, request):
+        """
+        Redacted, size-capped JSON body for a sample of requests; {} otherwise.
+        Uploads and large bodies are never read here.
+        """
+        if random.random() >= self.config['PAYLOAD_SAMPLE_RATE']:
+            return {}
+        if not request.content_type or 'json' not in request.content_type:
+            return {}
+        try:
+            if int(request.META.get('CONTENT_LENGTH') or 0) > self.config['MAX_BODY_BYTES']:
+                return {}
+            if not request.body:
+                return {}
+            data = json.loads(request.body.decode('utf-8'))
+        except Exception:
+            # If body can't be parsed, just skip it
+            return {}
+        return summarize_payload(data, self.config['MAX_PAYLOAD_CHARS'])
+
 
 class UpdateLastActivityMiddleware:
     """
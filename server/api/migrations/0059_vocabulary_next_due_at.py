@@ -0,0 +1,52 @@
+# Generated by Django 5.2.8 on 2026-10-17 00:29
+# Materialized HLR due date + backfill
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def populate_hlr_schedule(apps, schema_editor):
+    """Backfill predicted_half_life / next_due_at for words practiced before this migration."""
+    from api.hlr import HLRScheduler
+    Vocabulary = apps.get_model('api', 'Vocabulary')
+    
+    batch = []
+    queryset = Vocabulary.objects.filter(last_practiced_at__isnull=False).only(
+        'id', 'correct_count', 'wrong_count', 'total_practice_count', 'last_practiced_at'
+    )
+    for vocab in queryset.iterator(chunk_size=2000):
+        vocab.predicted_half_life, vocab.next_due_at = HLRScheduler.schedule(
+            vocab.correct_count, vocab.wrong_count, vocab.total_practice_count, vocab.last_practiced_at
+        )
+        batch.append(vocab)
+        if len(batch) >= 2000:
+            Vocabulary.objects.bulk_update(batch, ['predicted_half_life', 'next_due_at'])
+            batch = []
+    if batch:
+        Vocabulary.objects.bulk_update(batch, ['predicted_half_life', 'next_due_at'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0058_class_level_path_progress'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='vocabulary',
+            name='next_due_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='vocabulary',
+            name='predicted_half_life',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='vocabulary',
+            index=models.Index(fields=['created_by', 'language', 'native_language', 'next_due_at'], name='api_vocabul_created_a36bf4_idx'),
+        ),
+        migrations.RunPython(populate_hlr_schedule, reverse_code=migrations.RunPython.noop),
+    ]
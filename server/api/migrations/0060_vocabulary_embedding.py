@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-17 00:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0059_vocabulary_next_due_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='vocabulary',
+            name='embedding',
+            field=models.JSONField(blank=True, default=None, null=True),
+        ),
+    ]
@@ -0,0 +1,79 @@
+from django.db import migrations
+
+import api.fields
+from api.fields import pack_vector
+
+
+BATCH_SIZE = 500
+
+
+def pack_embeddings(apps, schema_editor):
+    """Copy JSON float lists into the packed binary column."""
+    for model_name in ('Vocabulary', 'SavedText'):
+        Model = apps.get_model('api', model_name)
+        batch = []
+        rows = Model.objects.filter(embedding_json__isnull=False).only('id', 'embedding_json')
+        for obj in rows.iterator(chunk_size=BATCH_SIZE):
+            if isinstance(obj.embedding_json, list):
+                obj.embedding = pack_vector(obj.embedding_json)
+                batch.append(obj)
+            if len(batch) >= BATCH_SIZE:
+                Model.objects.bulk_update(batch, ['embedding'])
+                batch = []
+        if batch:
+            Model.objects.bulk_update(batch, ['embedding'])
+
+
+def unpack_embeddings(apps, schema_editor):
+    """Restore JSON float lists from the packed column."""
+    for model_name in ('Vocabulary', 'SavedText'):
+        Model = apps.get_model('api', model_name)
+        batch = []
+        rows = Model.objects.filter(embedding__isnull=False).only('id', 'embedding')
+        for obj in rows.iterator(chunk_size=BATCH_SIZE):
+            obj.embedding_json = obj.embedding.tolist()
+            batch.append(obj)
+            if len(batch) >= BATCH_SIZE:
+                Model.objects.bulk_update(batch, ['embedding_json'])
+                batch = []
+        if batch:
+            Model.objects.bulk_update(batch, ['embedding_json'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0060_vocabulary_embedding'),
+    ]
+
+    operations = [
+        migrations.RenameField(
+            model_name='vocabulary',
+            old_name='embedding',
+            new_name='embedding_json',
+        ),
+        migrations.RenameField(
+            model_name='savedtext',
+            old_name='embedding',
+            new_name='embedding_json',
+        ),
+        migrations.AddField(
+            model_name='vocabulary',
+            name='embedding',
+            field=api.fields.PackedVectorField(blank=True, default=None, null=True),
+        ),
+        migrations.AddField(
+            model_name='savedtext',
+            name='embedding',
+            field=api.fields.PackedVectorField(blank=True, default=None, null=True),
+        ),
+        migrations.RunPython(pack_embeddings, unpack_embeddings),
+        migrations.RemoveField(
+            model_name='vocabulary',
+            name='embedding_json',
+        ),
+        migrations.RemoveField(
+            model_name='savedtext',
+            name='embedding_json',
+        ),
+    ]
@@ -0,0 +1,73 @@
+# Generated by Django 5.2.8 on 2026-10-17 00:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0061_packed_embeddings'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='exam',
+            name='job_attempts',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='exam',
+            name='job_enqueued_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='exam',
+            name='job_heartbeat_at',
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='exam',
+            name='job_lane',
+            field=models.CharField(choices=[('interactive', 'Interactive'), ('batch', 'Batch')], default='interactive', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='exam',
+            name='job_params',
+            field=models.JSONField(blank=True, default=dict, help_text='Arguments to re-run the job after a restart'),
+        ),
+        migrations.AddField(
+            model_name='exam',
+            name='job_started_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='podcast',
+            name='job_attempts',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='podcast',
+            name='job_enqueued_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='podcast',
+            name='job_heartbeat_at',
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='podcast',
+            name='job_lane',
+            field=models.CharField(choices=[('interactive', 'Interactive'), ('batch', 'Batch')], default='interactive', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='podcast',
+            name='job_params',
+            field=models.JSONField(blank=True, default=dict, help_text='Arguments to re-run the job after a restart'),
+        ),
+        migrations.AddField(
+            model_name='podcast',
+            name='job_started_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.8 on 2026-10-17 01:32
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0064_embedding_backfill'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserStatsSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total_words', models.IntegerField(default=0)),
+                ('srs_mastered', models.IntegerField(default=0, help_text='UserProgress rows at repetition stage 4+ (drives level)')),
+                ('hlr_mastered', models.IntegerField(default=0)),
+                ('hlr_learning', models.IntegerField(default=0)),
+                ('hlr_needs_review', models.IntegerField(default=0)),
+                ('streak', models.IntegerField(default=0, help_text='Consecutive practice days ending at last_active_date')),
+                ('last_active_date', models.DateField(blank=True, null=True)),
+                ('days_end', models.DateField(blank=True, null=True)),
+                ('activity_counts', models.JSONField(blank=True, default=list, help_text='Quizzes per day for the heatmap')),
+                ('words_added_counts', models.JSONField(blank=True, default=list, help_text='Words added per day for the weekly trend')),
+                ('computed_at', models.DateTimeField(blank=True, db_index=True, help_text='Last full recompute', null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='stats_snapshot', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+    ]
@@ -0,0 +1,85 @@
+import base64
+import binascii
+import hashlib
+import logging
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import migrations
+
+logger = logging.getLogger(__name__)
+
+
+# The storage logic is copied from api.services.generated_images as it stood
+# when this migration was written, so later changes there cannot alter it.
+BATCH_SIZE = 100
+
+IMAGE_SIGNATURES = (
+    (b'\x89PNG\r\n\x1a\n', 'png'),
+    (b'\xff\xd8\xff', 'jpg'),
+    (b'GIF8', 'gif'),
+    (b'RIFF', 'webp'),
+)
+
+
+def store_image(data):
+    """Save image bytes under their SHA-256 and return the storage key."""
+    digest = hashlib.sha256(data).hexdigest()
+    extension = next((ext for signature, ext in IMAGE_SIGNATURES if data.startswith(signature)), 'png')
+    name = f"generated_images/{digest[:2]}/{digest}.{extension}"
+    if not default_storage.exists(name):
+        name = default_storage.save(name, ContentFile(data))
+    return name
+
+
+def offload_event(event):
+    """Move one event's image_base64 out of the row; keep it if it cannot be stored."""
+    image_base64 = event.get('image_base64')
+    if not image_base64:
+        return False
+    if image_base64.startswith(('http://', 'https://')):
+        # Provider-hosted image (Stable Horde r2), not a payload
+        event['image_url'] = event.get('image_url') or image_base64
+    else:
+        if image_base64.startswith('data:'):
+            image_base64 = image_base64.split(',', 1)[-1]
+        try:
+            data = base64.b64decode(''.join(image_base64.split()), validate=True)
+            event['image_key'] = store_image(data)
+        except (binascii.Error, ValueError, OSError) as e:
+            logger.warning(f"Keeping inline image for event {event.get('event_number')}: {e}")
+            return False
+    event['image_base64'] = None
+    return True
+
+
+def offload_images(apps, schema_editor):
+    """Move inline base64 story images into storage, leaving image_key behind."""
+    GeneratedContent = apps.get_model('api', 'GeneratedContent')
+    batch = []
+    rows = GeneratedContent.objects.filter(has_images=True).only('id', 'content_data')
+    for content in rows.iterator(chunk_size=BATCH_SIZE):
+        events = content.content_data.get('events') if isinstance(content.content_data, dict) else None
+        moved = 0
+        for event in events or []:
+            if isinstance(event, dict):
+                moved += offload_event(event)
+        if moved:
+            batch.append(content)
+        if len(batch) >= BATCH_SIZE:
+            GeneratedContent.objects.bulk_update(batch, ['content_data'])
+            batch = []
+    if batch:
+        GeneratedContent.objects.bulk_update(batch, ['content_data'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0065_user_stats_snapshot'),
+    ]
+
+    operations = [
+        # Images stay reachable through image_key, so there is nothing to undo
+        migrations.RunPython(offload_images, migrations.RunPython.noop),
+    ]
@@ -1,5 +1,6 @@
 from django.db import models
 from django.contrib.auth.models import User
+from .fields import PackedVectorField
 
 class Tag(models.Model):
     name = models.CharField(max_length=50)
@@ -73,6 +74,12 @@ class UserRelationship(models.Model):
         return f"{self.follower.username} follows {self.following.username}"
 
 
+class VocabularyManager(models.Manager):
+    """Leaves the embedding column out of ordinary queries; it is loaded on access."""
+
+    def get_queryset(self):
+        return super().get_queryset().defer('embedding')
+
 class Vocabulary(models.Model):
     WORD_TYPES = [
         ('noun', 'Nomen (or Substantiv / Hauptwort)'),
@@ -118,6 +125,16 @@ class Vocabulary(models.Model):
     total_practice_count = models.IntegerField(default=0)
     last_practiced_at = models.DateTimeField(null=True, blank=True)
     
+    # Materialized HLR schedule (kept current by save) so due words come from an index range scan
+    predicted_half_life = models.FloatField(null=True, blank=True)
+    next_due_at = models.DateTimeField(null=True, blank=True)
+    
+    # Semantic Search - Vector Embedding of "word translation" (see api/vector_index.py)
+    embedding = PackedVectorField(null=True, blank=True, default=None)
+    embedding_text_hash = models.CharField(max_length=64, blank=True, default='', help_text='Hash of the model and text the embedding was computed from')
+    
+    objects = VocabularyManager()
+    
     class Meta:
         verbose_name_plural = "Vocabulary"
         ordering = ['-created_at']
@@ -127,8 +144,30 @@ class Vocabulary(models.Model):
             models.Index(fields=['created_by', '-created_at']),
             models.Index(fields=['created_by', 'type']),
             models.Index(fields=['created_by', 'last_practiced_at']),
+            models.Index(fields=['created_by', 'language', 'native_language', 'next_due_at']),
         ]
     
+    HLR_FIELDS = {'correct_count', 'wrong_count', 'total_practice_count', 'last_practiced_at'}
+    
+    def refresh_hlr_schedule(self):
+        """Recompute predicted_half_life and next_due_at from the HLR counters."""
+        from .hlr import HLRScheduler
+        self.predicted_half_life, self.next_due_at = HLRScheduler.schedule(
+            self.correct_count,
+            self.wrong_count,
+            self.total_practice_count,
+            self.last_practiced_at,
+        )
+    
+    def save(self, *args, **kwargs):
+        # Keep the materialized due date in step with every practice write
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or self.HLR_FIELDS.intersection(update_fields):
+            self.refresh_hlr_schedule()
+            if update_fields is not None:
+                kwargs['update_fields'] = set(update_fields) | {'predicted_half_life', 'next_due_at'}
+        super().save(*args, **kwargs)
+    
 
 class TeacherApplication(models.Model):
     """
@@ -173,10 +212,8 @@ class SavedText(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
-    # Semantic Search - Vector Embedding
-    # Using JSONField as a temporary solution until pgvector is properly installed
-    # This will store the embedding as a list of floats
-    embedding = models.JSONField(null=True, blank=True, default=None)
+    # Semantic Search - Vector Embedding, packed binary (reads as a float32 NumPy array)
+    embedding = PackedVectorField(null=True, blank=True, default=None)
 
     def __str__(self):
         return f"{self.title} ({self.user.username})"
@@ -204,7 +241,23 @@ class Quiz(models.Model):
     score = models.IntegerField()
     timestamp = models.DateTimeField(auto_now_add=True)
 
-class Exam(models.Model):
+class GenerationJobFields(models.Model):
+    """Durable job state for rows generated by api/services/job_queue.py."""
+    JOB_LANES = [
+        ('interactive', 'Interactive'),
+        ('batch', 'Batch'),
+    ]
+    job_lane = models.CharField(max_length=20, choices=JOB_LANES, default='interactive')
+    job_params = models.JSONField(default=dict, blank=True, help_text='Arguments to re-run the job after a restart')
+    job_attempts = models.PositiveSmallIntegerField(default=0)
+    job_enqueued_at = models.DateTimeField(null=True, blank=True)
+    job_started_at = models.DateTimeField(null=True, blank=True)
+    job_heartbeat_at = models.DateTimeField(null=True, blank=True, db_index=True)
+
+    class Meta:
+        abstract = True
+
+class Exam(GenerationJobFields):
     LANGUAGES = [
         ('en', 'English'),
         ('de', 'German'),
@@ -331,7 +384,7 @@ class PodcastCategory(models.Model):
     def __str__(self):
         return self.name
 
-class Podcast(models.Model):
+class Podcast(GenerationJobFields):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     category = models.ForeignKey(PodcastCategory, on_delete=models.SET_NULL, null=True, blank=True, related_name='episodes')
     title = models.CharField(max_length=200)
@@ -1358,3 +1411,122 @@ class GameParticipant(models.Model):
     
     def __str__(self):
         return f"{self.user.username} in {self.session.join_code}"
+
+
+# =============================================================================
+# AGENT GRAPH CHECKPOINTS (LangGraph persistence, see api/graph_checkpoint.py)
+# =============================================================================
+
+class GraphCheckpoint(models.Model):
+    """
+    One LangGraph checkpoint (full state after a super-step) for a job thread.
+    thread_id is e.g. "exam:42"; checkpoint ids sort chronologically.
+    """
+    thread_id = models.CharField(max_length=100)
+    checkpoint_ns = models.CharField(max_length=255, default='', blank=True)
+    checkpoint_id = models.CharField(max_length=64)
+    parent_checkpoint_id = models.CharField(max_length=64, null=True, blank=True)
+    checkpoint_type = models.CharField(max_length=32)
+    checkpoint = models.BinaryField()
+    metadata_type = models.CharField(max_length=32)
+    metadata = models.BinaryField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ['thread_id', 'checkpoint_ns', 'checkpoint_id']
+        indexes = [
+            models.Index(fields=['created_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.thread_id} @ {self.checkpoint_id}"
+
+
+class GraphCheckpointWrite(models.Model):
+    """Pending node writes recorded against a checkpoint (lets a resumed run skip finished tasks)."""
+    thread_id = models.CharField(max_length=100)
+    checkpoint_ns = models.CharField(max_length=255, default='', blank=True)
+    checkpoint_id = models.CharField(max_length=64)
+    task_id = models.CharField(max_length=64)
+    task_path = models.CharField(max_length=255, default='', blank=True)
+    idx = models.IntegerField()
+    channel = models.CharField(max_length=255)
+    value_type = models.CharField(max_length=32)
+    value = models.BinaryField()
+
+    class Meta:
+        unique_together = ['thread_id', 'checkpoint_ns', 'checkpoint_id', 'task_id', 'idx']
+
+
+# =============================================================================
+# EMBEDDING BACKFILL (see api/services/embedding_backfill.py)
+# =============================================================================
+
+class EmbeddingBackfillJob(models.Model):
+    """Progress of one embedding backfill for a user's vocabulary, polled by the client."""
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='embedding_backfills')
+    language = models.CharField(max_length=2, choices=Vocabulary.LANGUAGES, default='de')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued')
+    total = models.IntegerField(default=0, help_text='Words whose text changed since they were last embedded')
+    processed = models.IntegerField(default=0)
+    failed = models.IntegerField(default=0)
+    unchanged = models.IntegerField(default=0, help_text='Words skipped because their embedding is current')
+    error = models.TextField(blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', 'language', '-created_at']),
+        ]
+
+    def __str__(self):
+        return f"Embedding backfill {self.pk} for {self.user_id}/{self.language}: {self.status}"
+
+    @property
+    def progress(self) -> int:
+        """Percent of changed words handled (embedded or failed)."""
+        if not self.total:
+            return 100 if self.status == 'completed' else 0
+        return int(100 * (self.processed + self.failed) / self.total)
+
+
+# =============================================================================
+# DASHBOARD STATISTICS ROLLUP (see api/services/user_stats.py)
+# =============================================================================
+
+class UserStatsSnapshot(models.Model):
+    """
+    Precomputed dashboard statistics for one user, updated as they practice
+    and add words. Day arrays are oldest first and end at days_end.
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='stats_snapshot')
+    total_words = models.IntegerField(default=0)
+    srs_mastered = models.IntegerField(default=0, help_text='UserProgress rows at repetition stage 4+ (drives level)')
+
+    # HLR recall buckets; recall decays with time, so these are refreshed by recompute
+    hlr_mastered = models.IntegerField(default=0)
+    hlr_learning = models.IntegerField(default=0)
+    hlr_needs_review = models.IntegerField(default=0)
+
+    streak = models.IntegerField(default=0, help_text='Consecutive practice days ending at last_active_date')
+    last_active_date = models.DateField(null=True, blank=True)
+
+    days_end = models.DateField(null=True, blank=True)
+    activity_counts = models.JSONField(default=list, blank=True, help_text='Quizzes per day for the heatmap')
+    words_added_counts = models.JSONField(default=list, blank=True, help_text='Words added per day for the weekly trend')
+
+    computed_at = models.DateTimeField(null=True, blank=True, db_index=True, help_text='Last full recompute')
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Stats for {self.user_id} (computed {self.computed_at})"
@@ -3,4 +3,5 @@ from . import consumers
 
 websocket_urlpatterns = [
     re_path(r'ws/system/health/$', consumers.SystemHealthConsumer.as_asgi()),
+    re_path(r'ws/game/(?P<session_id>\d+)/$', consumers.GameSessionConsumer.as_asgi()),
 ]
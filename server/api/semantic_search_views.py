@@ -4,8 +4,8 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
-from .models import Vocabulary, UserProfile
-from .serializers import VocabularySerializer
+from .models import EmbeddingBackfillJob, Vocabulary, UserProfile
+from .serializers import EmbeddingBackfillJobSerializer, VocabularySerializer
 from django.views.decorators.csrf import csrf_exempt
 
 @csrf_exempt
@@ -17,7 +17,7 @@ def semantic_search(request):
     Expects: query (str), api_key (str), limit (int, optional)
     """
     from .embedding_service import EmbeddingService
-    import numpy as np
+    from .vector_index import get_vector_index
     
     query = request.data.get('query')
     api_key = request.data.get('api_key')
@@ -36,49 +36,37 @@ def semantic_search(request):
         except UserProfile.DoesNotExist:
             target_lang = 'de'
         
-        # Generate embedding for query
-        query_embedding = EmbeddingService.generate_embedding(query, api_key)
-        
-        # Get all vocabulary with embeddings
-        vocab_list = Vocabulary.objects.filter(
-            created_by=request.user,
-            language=target_lang,
-            embedding__isnull=False
-        )
-        
-        if not vocab_list.exists():
+        index = get_vector_index(request.user.id, target_lang)
+        index.ensure_fresh()
+        if not len(index):
             return Response({
                 'results': [],
                 'message': 'No vocabulary with embeddings found. Please generate embeddings first.'
             })
         
-        # Calculate cosine similarity for each vocabulary item
-        results = []
-        min_similarity = 0.20  # Optimized threshold based on debug analysis
+        # Generate embedding for query
+        query_embedding = EmbeddingService.generate_embedding(query, api_key)
         
-        for vocab in vocab_list:
-            if vocab.embedding:
-                # Calculate cosine similarity
-                vocab_emb = np.array(vocab.embedding)
-                query_emb = np.array(query_embedding)
-                
-                # Cosine similarity
-                similarity = np.dot(query_emb, vocab_emb) / (np.linalg.norm(query_emb) * np.linalg.norm(vocab_emb))
-                
-                # Only include if similarity is above threshold
-                if similarity >= min_similarity:
-                    results.append({
-                        'vocab': VocabularySerializer(vocab).data,
-                        'similarity': float(similarity)
-                    })
+        # Top-k cosine similarity in one pass over the normalized index
+        min_similarity = 0.20  # Optimized threshold based on debug analysis
+        hits, total = index.search(query_embedding, k=int(limit), min_similarity=min_similarity)
         
-        # Sort by similarity (descending)
-        results.sort(key=lambda x: x['similarity'], reverse=True)
+        # Serialize only the returned words; ids deleted since indexing drop out
+        vocab_by_id = Vocabulary.objects.filter(created_by=request.user).in_bulk(
+            [vocab_id for vocab_id, _ in hits]
+        )
+        results = [
+            {
+                'vocab': VocabularySerializer(vocab_by_id[vocab_id]).data,
+                'similarity': similarity
+            }
+            for vocab_id, similarity in hits
+            if vocab_id in vocab_by_id
+        ]
         
-        # Return top N results
         return Response({
-            'results': results[:limit],
-            'total': len(results)
+            'results': results,
+            'total': total
         })
         
     except Exception as e:
@@ -90,72 +78,42 @@ def semantic_search(request):
 @permission_classes([IsAuthenticated])
 def generate_embeddings(request):
     """
-    Generate embeddings for all vocabulary items that don't have them.
+    Start a background backfill of embeddings for words whose text changed.
     Expects: api_key (str)
+    Returns the job; poll GET /api/vocab/generate-embeddings/<job_id>/ for progress.
     """
-    from .embedding_service import EmbeddingService
+    from .services.embedding_backfill import start_embedding_backfill
+    from .services.job_queue import JobQueueFull
     
     api_key = request.data.get('api_key')
     
     if not api_key:
         return Response({'error': 'OpenRouter API key is required'}, status=status.HTTP_400_BAD_REQUEST)
     
+    # Get user's target language
     try:
-        # Get user's target language
-        try:
-            target_lang = request.user.profile.target_language
-        except UserProfile.DoesNotExist:
-            target_lang = 'de'
-            
-        print(f"DEBUG: User: {request.user.username}, Target Lang: {target_lang}")
-        
-        # Get vocabulary (update all to ensure consistent embedding quality)
-        vocab_list = Vocabulary.objects.filter(
-            created_by=request.user,
-            language=target_lang
-        )
-        
-        count = vocab_list.count()
-        print(f"DEBUG: Found {count} vocabulary items")
-        
-        if not vocab_list.exists():
-            print("DEBUG: No vocab found, returning early")
-            return Response({
-                'message': 'No vocabulary items found',
-                'count': 0
-            })
-        
-        # Generate embeddings in batches
-        batch_size = 100
-        total_count = vocab_list.count()
-        processed_count = 0
-        
-        for i in range(0, total_count, batch_size):
-            batch = list(vocab_list[i:i+batch_size])
-            
-            # Create text for embedding (Simplified: Word + Translation)
-            # This matches the optimized logic in VocabularyViewSet
-            texts = []
-            for vocab in batch:
-                text = f"{vocab.word} {vocab.translation}"
-                texts.append(text)
-            
-            # Generate embeddings
-            embeddings = EmbeddingService.generate_embeddings_batch(texts, api_key)
-            
-            # Update vocabulary items
-            for vocab, embedding in zip(batch, embeddings):
-                vocab.embedding = embedding
-                vocab.save(update_fields=['embedding'])
-                processed_count += 1
-        
-        return Response({
-            'message': f'Successfully generated embeddings for {processed_count} vocabulary items',
-            'count': processed_count
-        })
-        
-    except Exception as e:
-        return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        target_lang = request.user.profile.target_language
+    except UserProfile.DoesNotExist:
+        target_lang = 'de'
+    
+    try:
+        job, created = start_embedding_backfill(request.user, target_lang, api_key)
+    except JobQueueFull as e:
+        return Response({'error': str(e)}, status=status.HTTP_429_TOO_MANY_REQUESTS)
+    
+    data = EmbeddingBackfillJobSerializer(job).data
+    data['message'] = 'Embedding generation started' if created else 'Embedding generation is already running'
+    return Response(data, status=status.HTTP_202_ACCEPTED)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def embedding_backfill_status(request, job_id):
+    """Progress of one of the user's embedding backfills."""
+    job = EmbeddingBackfillJob.objects.filter(pk=job_id, user=request.user).first()
+    if job is None:
+        return Response({'error': 'Job not found'}, status=status.HTTP_404_NOT_FOUND)
+    return Response(EmbeddingBackfillJobSerializer(job).data)
 
 
 @api_view(['POST'])
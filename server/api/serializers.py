@@ -1,6 +1,6 @@
 from rest_framework import serializers
 from django.contrib.auth.models import User
-from .models import Vocabulary, UserProgress, Quiz, Tag, GrammarTopic, Podcast, PodcastCategory, UserProfile, Exam, ExamAttempt, UserRelationship, SavedText, Teacher, Classroom, ClassMembership, Assignment, AssignmentProgress, WritingExercise, WritingSubmission, LearningPath, PathSubLevel, PathNode, PathNodeMaterial, PathEnrollment, NodeProgress, ClassPathProgress, StudentRemediation
+from .models import Vocabulary, UserProgress, Quiz, Tag, GrammarTopic, Podcast, PodcastCategory, UserProfile, Exam, ExamAttempt, UserRelationship, SavedText, Teacher, Classroom, ClassMembership, Assignment, AssignmentProgress, WritingExercise, WritingSubmission, LearningPath, PathSubLevel, PathNode, PathNodeMaterial, PathEnrollment, NodeProgress, ClassPathProgress, StudentRemediation, EmbeddingBackfillJob
 
 class SavedTextSerializer(serializers.ModelSerializer):
     class Meta:
@@ -20,6 +20,10 @@ class UserSerializer(serializers.ModelSerializer):
 
 
 class VocabularySerializer(serializers.ModelSerializer):
+    """
+    GET requests may pass ?fields=id,word,translation to receive only those
+    fields (see projected_fields); writes always use the full field set.
+    """
     tags = serializers.ListField(child=serializers.CharField(), required=False, write_only=True)
 
     class Meta:
@@ -27,6 +31,24 @@ class VocabularySerializer(serializers.ModelSerializer):
         fields = ['id', 'word', 'translation', 'example', 'type', 'created_by', 'created_at', 'tags', 'synonyms', 'antonyms', 'related_words', 'related_concepts', 'is_public', 'total_practice_count', 'correct_count', 'wrong_count']
         read_only_fields = ['created_by', 'created_at', 'related_words', 'total_practice_count', 'correct_count', 'wrong_count']
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.projection = self.projected_fields(self.context.get('request'))
+        if self.projection is not None:
+            for name in set(self.fields) - self.projection:
+                self.fields.pop(name)
+
+    @classmethod
+    def projected_fields(cls, request):
+        """Field names requested with ?fields= on a GET, or None for all fields."""
+        if request is None or request.method != 'GET':
+            return None
+        requested = request.query_params.get('fields')
+        if not requested:
+            return None
+        names = {name.strip() for name in requested.split(',')} & set(cls.Meta.fields)
+        return names | {'id'}
+
     def validate_word(self, value):
         user = self.context['request'].user
         # Get user's current native language context
@@ -64,7 +86,9 @@ class VocabularySerializer(serializers.ModelSerializer):
     
     def to_representation(self, instance):
         representation = super().to_representation(instance)
-        representation['tags'] = [tag.name for tag in instance.tags.all()]
+        if self.projection is None or 'tags' in self.projection:
+            # Uses the prefetched tags when the view loaded them
+            representation['tags'] = [tag.name for tag in instance.tags.all()]
         return representation
 
 class UserProgressSerializer(serializers.ModelSerializer):
@@ -615,3 +639,14 @@ class StudentRemediationSerializer(serializers.ModelSerializer):
                   'node', 'node_title', 'reason', 'remediation_type', 'completed',
                   'completed_at', 'content_id', 'created_at']
         read_only_fields = ['id', 'created_at']
+
+
+class EmbeddingBackfillJobSerializer(serializers.ModelSerializer):
+    """Pollable status of an embedding backfill."""
+    progress = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = EmbeddingBackfillJob
+        fields = ['id', 'language', 'status', 'progress', 'total', 'processed', 'failed',
+                  'unchanged', 'error', 'created_at', 'updated_at', 'finished_at']
+        read_only_fields = fields
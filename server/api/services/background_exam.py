@@ -1,8 +1,9 @@
 
-import threading
 import logging
 from api.models import Exam, UserProfile
 from api.unified_ai import generate_ai_content
+from api.graph_checkpoint import clear_checkpoints, run_checkpointed
+from api.services.job_queue import RetryJob, can_retry_job
 from firebase_admin import messaging, credentials, initialize_app
 import json
 import time
@@ -84,12 +85,14 @@ except ValueError:
 except Exception as e:
     logger.warning(f"Firebase Admin init failed (Notifications won't work): {e}")
 
-class ExamGenerator(threading.Thread):
+class ExamGenerator:
+    """Runs the exam graph for one Exam row; executed by the generation job queue."""
+
     def __init__(self, exam_id, user_id, prompt_data):
         self.exam_id = exam_id
         self.user_id = user_id
         self.prompt_data = prompt_data
-        threading.Thread.__init__(self)
+        self.thread_id = f"exam:{exam_id}"
 
     def run(self):
         try:
@@ -104,7 +107,7 @@ class ExamGenerator(threading.Thread):
             # time.sleep(5) 
 
             # 2. Run AI Agent (LangGraph)
-            from api.agent_exam import build_exam_graph
+            from api.agent_exam import get_exam_graph
             
             # Reconstruct initial state from prompt_data
             initial_state = {
@@ -132,11 +135,10 @@ class ExamGenerator(threading.Thread):
                from django.contrib.auth.models import User
                user_obj = User.objects.get(id=self.user_id)
 
-            app = build_exam_graph()
             config = {"configurable": {"user": user_obj}}
             
-            # Invoke the graph
-            result = app.invoke(initial_state, config=config)
+            # Invoke the graph; a retried job resumes after its last finished node
+            result = run_checkpointed(get_exam_graph(), self.thread_id, initial_state, config)
             
             final_exam_data = result.get('final_exam')
             
@@ -151,16 +153,21 @@ class ExamGenerator(threading.Thread):
             exam.save()
             
             logger.info(f"Exam {self.exam_id} completed successfully.")
+            clear_checkpoints(self.thread_id)
             
             # 4. Notify User
             self.send_notification(exam)
 
         except Exception as e:
+            if can_retry_job('exam', self.exam_id):
+                # Keep the checkpoints: the retry resumes after the last finished node
+                raise RetryJob(str(e)) from e
             logger.error(f"Background Exam Generation Failed: {e}")
             try:
                 exam = Exam.objects.get(id=self.exam_id)
                 exam.status = 'failed'
                 exam.save()
+                clear_checkpoints(self.thread_id)
                 self.send_failure_notification(exam, str(e))
             except:
                 pass
@@ -279,11 +286,22 @@ class ExamGenerator(threading.Thread):
             else:
                 logger.error(f"Failed to send notification: {e}")
 
-def start_exam_generation(exam_id, user, prompt_data):
+def run_exam_job(exam_id, prompt_data):
+    """Job queue entry point (also used to resume an exam after a restart)."""
+    user_id = Exam.objects.filter(id=exam_id).values_list('user_id', flat=True).first()
+    if user_id is None:
+        return
+    ExamGenerator(exam_id, user_id, prompt_data).run()
+
+
+def start_exam_generation(exam, prompt_data):
     """
-    Helper to start the thread.
-    Pass user object inside prompt_data for unified_ai access.
+    Queue exam generation in the interactive lane.
+    prompt_data is stored on the Exam row so the job can be resumed;
+    the worker loads the user by id.
+
+    Raises:
+        JobQueueFull: When the queue or the user's share of it is full
     """
-    prompt_data['user_object'] = user 
-    task = ExamGenerator(exam_id, user.id, prompt_data)
-    task.start()
+    from api.services.job_queue import get_job_queue
+    get_job_queue().enqueue('exam', exam, params={'prompt_data': prompt_data})
@@ -3,6 +3,8 @@ import traceback
 from django.utils import timezone
 from api.models import Podcast, PodcastCategory, UserProfile
 from api.notification_models import NotificationLog
+from api.graph_checkpoint import clear_checkpoints, run_checkpointed
+from api.services.job_queue import RetryJob, can_retry_job
 from .podcast.showrunner_agent import ShowrunnerAgent
 from .podcast.journalist_agent import JournalistAgent
 from .podcast.writer_agent import WriterAgent
@@ -16,6 +18,7 @@ def generate_podcast_job(podcast_id: int, custom_topic: str = None, target_level
     Background task to generate a podcast episode.
     """
     logger.info(f"Starting podcast generation for ID: {podcast_id} with topic: {custom_topic}")
+    thread_id = f"podcast:{podcast_id}"
     try:
         podcast = Podcast.objects.get(id=podcast_id)
         user = podcast.user
@@ -25,8 +28,8 @@ def generate_podcast_job(podcast_id: int, custom_topic: str = None, target_level
         producer = ProducerAgent(user)
         
         # 1. Build Graph
-        from api.agent_podcast import build_podcast_graph
-        app = build_podcast_graph()
+        from api.agent_podcast import get_podcast_graph
+        app = get_podcast_graph()
         
         # 2. Initial State
         initial_state = {
@@ -54,7 +57,8 @@ def generate_podcast_job(podcast_id: int, custom_topic: str = None, target_level
         
         # 3. Invoke Graph
         logger.info("Initializing Podcast Agent Graph...")
-        result = app.invoke(initial_state)
+        # A retried job resumes after the last node that finished
+        result = run_checkpointed(app, thread_id, initial_state)
         
         import json
         import ast
@@ -129,12 +133,19 @@ def generate_podcast_job(podcast_id: int, custom_topic: str = None, target_level
         podcast.estimated_remaining = 0
         podcast.save(update_fields=['progress', 'processing_status', 'current_message', 'estimated_remaining'])
         
+        clear_checkpoints(thread_id)
         logger.info(f"Podcast {podcast_id} completed successfully.")
 
     except Exception as e:
+        if can_retry_job('podcast', podcast_id):
+            # Keep the checkpoints: the retry resumes after the last finished node
+            raise RetryJob(str(e)) from e
         logger.error(f"Podcast generation failed: {str(e)}")
         traceback.print_exc()
         
+        # Final attempt: nothing will resume this thread
+        clear_checkpoints(thread_id)
+
         # Mark as failed in DB
         try:
             Podcast.objects.filter(id=podcast_id).update(
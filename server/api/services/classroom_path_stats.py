@@ -0,0 +1,140 @@
+"""
+Learning-path statistics for a classroom.
+
+The teacher dashboard shows, per active student, how many nodes of a path
+they completed and which node they are on. It is computed with a fixed
+number of queries regardless of class size:
+
+1. active memberships with student and profile
+2. the students' enrollments with a conditional count of completed nodes
+3. each enrollment's current node (latest in_progress/available
+   NodeProgress), picked with a ROW_NUMBER() window
+
+Results are cached per (classroom, path). Cache keys embed a version token
+per path and per classroom; signals in api/signals.py replace the token
+when node progress, enrollments, path nodes or memberships change, so
+stale entries are simply never read again.
+
+Usage:
+    from api.services.classroom_path_stats import get_path_stats
+
+    payload = get_path_stats(classroom, path)
+"""
+
+import time
+from typing import Any, Dict, List
+
+from django.core.cache import cache
+from django.db.models import Count, F, Q, Window
+from django.db.models.functions import RowNumber
+
+from api.models import NodeProgress, PathEnrollment, PathNode
+
+CACHE_TIMEOUT = 300  # Also bounds staleness for changes without a signal (e.g. avatars)
+
+CURRENT_NODE_STATUSES = ('in_progress', 'available')
+
+
+def _version_key(scope: str, object_id: int) -> str:
+    return f"path_stats_version_{scope}_{object_id}"
+
+
+def _version(scope: str, object_id: int) -> str:
+    key = _version_key(scope, object_id)
+    version = cache.get(key)
+    if version is None:
+        version = str(time.time_ns())
+        cache.set(key, version, None)
+    return version
+
+
+def invalidate_path_stats(path_id: int = None, classroom_id: int = None):
+    """Make cached stats for a path (all classrooms) or a classroom stale."""
+    if path_id is not None:
+        cache.set(_version_key('path', path_id), str(time.time_ns()), None)
+    if classroom_id is not None:
+        cache.set(_version_key('classroom', classroom_id), str(time.time_ns()), None)
+
+
+def compute_path_stats(classroom, path) -> Dict[str, Any]:
+    """Build the path_stats payload from the database."""
+    total_nodes = PathNode.objects.filter(sublevel__path=path).count()
+    if total_nodes == 0:
+        return {
+            'has_path': True,
+            'path_title': path.title,
+            'total_nodes': 0,
+            'class_average': 0,
+            'students': []
+        }
+
+    memberships = list(classroom.memberships.filter(status='active').select_related('student__profile'))
+    student_ids = classroom.memberships.filter(status='active').values('student_id')
+
+    enrollments = PathEnrollment.objects.filter(path=path, student_id__in=student_ids)
+    completed_by_student = {}
+    enrollment_students = {}
+    for enrollment_id, student_id, completed in enrollments.annotate(
+        completed=Count('progress', filter=Q(progress__status='completed'))
+    ).values_list('id', 'student_id', 'completed'):
+        completed_by_student[student_id] = completed
+        enrollment_students[enrollment_id] = student_id
+
+    current_by_student = {}
+    current_rows = NodeProgress.objects.filter(
+        enrollment__in=enrollments, status__in=CURRENT_NODE_STATUSES,
+    ).annotate(
+        rank=Window(RowNumber(), partition_by=[F('enrollment_id')], order_by=F('id').desc())
+    ).filter(rank=1).values_list('enrollment_id', 'node__title', 'node__sublevel__sublevel_code')
+    for enrollment_id, title, sublevel_code in current_rows:
+        current_by_student[enrollment_students.get(enrollment_id)] = (title, sublevel_code or '-')
+
+    student_stats: List[Dict[str, Any]] = []
+    total_completion = 0
+    for membership in memberships:
+        student = membership.student
+        completed_count = completed_by_student.get(student.id, 0)
+
+        current_node_title, current_sublevel_code = "Not started", "-"
+        if student.id in current_by_student:
+            current_node_title, current_sublevel_code = current_by_student[student.id]
+        elif completed_count > 0:
+            current_node_title = "All caught up"
+
+        progress_percent = min(100, round((completed_count / total_nodes) * 100))
+        total_completion += progress_percent
+
+        profile = getattr(student, 'profile', None)
+        student_stats.append({
+            'student_id': student.id,
+            'name': student.username,
+            'avatar': profile.avatar.url if profile and profile.avatar else None,
+            'progress_percent': progress_percent,
+            'completed_nodes': completed_count,
+            'current_node': current_node_title,
+            'current_sublevel': current_sublevel_code
+        })
+
+    class_average = round(total_completion / len(memberships)) if memberships else 0
+
+    return {
+        'has_path': True,
+        'path_id': path.id,
+        'path_title': path.title,
+        'total_nodes': total_nodes,
+        'student_count': len(memberships),
+        'class_average': class_average,
+        'students': student_stats
+    }
+
+
+def get_path_stats(classroom, path) -> Dict[str, Any]:
+    """Cached compute_path_stats."""
+    cache_key = "path_stats_{}_{}_{}_{}".format(
+        classroom.id, path.id, _version('path', path.id), _version('classroom', classroom.id)
+    )
+    payload = cache.get(cache_key)
+    if payload is None:
+        payload = compute_path_stats(classroom, path)
+        cache.set(cache_key, payload, CACHE_TIMEOUT)
+    return payload
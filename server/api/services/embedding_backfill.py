@@ -0,0 +1,190 @@
+"""
+Incremental embedding backfill for a user's vocabulary.
+
+Each Vocabulary row stores a hash of the model and text its embedding was
+computed from (``embedding_text_hash``). A backfill reads only ids, words,
+translations and hashes, and embeds just the rows whose hash no longer
+matches. A second run over unchanged vocabulary makes no provider calls.
+
+Stale rows go to the provider in batches of BATCH_SIZE texts, with at most
+CONCURRENCY requests in flight. The job thread writes each finished batch
+with one ``bulk_update`` and rebuilds the vector index once at the end.
+Progress lives on an EmbeddingBackfillJob row, so any worker process can
+answer a status poll.
+
+The caller's API key is never persisted, so jobs run through
+``GenerationJobQueue.submit`` and are not resumed after a restart. Starting
+again is cheap because finished rows are skipped.
+
+Usage:
+    from api.services.embedding_backfill import start_embedding_backfill
+
+    job, created = start_embedding_backfill(user, 'de', api_key)
+    # poll EmbeddingBackfillJob.objects.get(pk=job.pk).progress
+"""
+
+import hashlib
+import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.utils import timezone
+
+from api.embedding_service import EmbeddingService
+from api.models import EmbeddingBackfillJob, Vocabulary
+from api.services.job_queue import get_job_queue
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_EMBEDDING_BACKFILL_CONFIG = {
+    'BATCH_SIZE': 256,          # Texts per provider request (OpenAI-compatible APIs accept up to 2048)
+    'CONCURRENCY': 4,           # Provider requests in flight per job
+    'MAX_FAILED_BATCHES': 3,    # Consecutive failed batches before the rest are abandoned
+    'STALE_AFTER': 300,         # Seconds without progress before an active job stops blocking a new one
+}
+
+ACTIVE_STATUSES = ('queued', 'running')
+
+
+def get_embedding_backfill_config() -> Dict[str, Any]:
+    """Return EMBEDDING_BACKFILL settings merged over the defaults."""
+    return {**DEFAULT_EMBEDDING_BACKFILL_CONFIG, **getattr(settings, 'EMBEDDING_BACKFILL', {})}
+
+
+def embedding_text(word: str, translation: str) -> str:
+    """Text embedded for a word ("Word Translation" searches best)."""
+    return f"{word} {translation}"
+
+
+def embedding_text_hash(text: str, model: Optional[str] = None) -> str:
+    """Hash stored next to an embedding; changes with the text or the model."""
+    model = model or EmbeddingService.DEFAULT_MODEL
+    return hashlib.sha256(f"{model}\x1f{text}".encode('utf-8')).hexdigest()
+
+
+def start_embedding_backfill(user, language: str, api_key: str) -> Tuple[EmbeddingBackfillJob, bool]:
+    """
+    Queue a backfill for the user's words in ``language``.
+
+    Returns (job, created). While a job for the same language is still
+    making progress, that job is returned instead of starting another.
+
+    Raises:
+        JobQueueFull: When the queue or the user's share of it is full
+    """
+    cutoff = timezone.now() - timedelta(seconds=get_embedding_backfill_config()['STALE_AFTER'])
+    active = EmbeddingBackfillJob.objects.filter(
+        user=user, language=language, status__in=ACTIVE_STATUSES, updated_at__gte=cutoff,
+    ).first()
+    if active:
+        return active, False
+
+    job = EmbeddingBackfillJob.objects.create(user=user, language=language)
+    try:
+        get_job_queue().submit(run_embedding_backfill, job.pk, api_key, user_id=user.id, kind='embedding')
+    except Exception:
+        job.delete()
+        raise
+    return job, True
+
+
+def _update_job(job_id: int, **fields):
+    fields['updated_at'] = timezone.now()
+    EmbeddingBackfillJob.objects.filter(pk=job_id).update(**fields)
+
+
+def _stale_rows(user_id: int, language: str, model: str) -> Tuple[List[Tuple[int, str, str]], int]:
+    """(id, text, new_hash) for rows needing an embedding, and the count of current rows."""
+    rows = Vocabulary.objects.filter(created_by_id=user_id, language=language).order_by('id').values_list(
+        'id', 'word', 'translation', 'embedding_text_hash'
+    )
+    stale, unchanged = [], 0
+    for vocab_id, word, translation, stored_hash in rows.iterator(chunk_size=2000):
+        text = embedding_text(word, translation)
+        text_hash = embedding_text_hash(text, model)
+        if text_hash == stored_hash:
+            unchanged += 1
+        else:
+            stale.append((vocab_id, text, text_hash))
+    return stale, unchanged
+
+
+def _save_batch(batch: List[Tuple[int, str, str]], embeddings: List[List[float]]):
+    Vocabulary.objects.bulk_update(
+        [
+            Vocabulary(id=vocab_id, embedding=embedding, embedding_text_hash=text_hash)
+            for (vocab_id, _, text_hash), embedding in zip(batch, embeddings)
+        ],
+        ['embedding', 'embedding_text_hash'],
+    )
+
+
+def run_embedding_backfill(job_id: int, api_key: str, config: Optional[Dict[str, Any]] = None):
+    """Job body: embed stale rows batch by batch, recording progress on the job row."""
+    config = config or get_embedding_backfill_config()
+    job = EmbeddingBackfillJob.objects.get(pk=job_id)
+    model = EmbeddingService.DEFAULT_MODEL
+
+    try:
+        stale, unchanged = _stale_rows(job.user_id, job.language, model)
+        _update_job(job_id, status='running', total=len(stale), unchanged=unchanged)
+
+        batch_size = max(1, config['BATCH_SIZE'])
+        batches = [stale[i:i + batch_size] for i in range(0, len(stale), batch_size)]
+        processed = failed = consecutive_failures = 0
+        last_error = ''
+
+        if batches:
+            with ThreadPoolExecutor(max_workers=min(config['CONCURRENCY'], len(batches))) as pool:
+                futures = {
+                    pool.submit(EmbeddingService.generate_embeddings_batch, [text for _, text, _ in batch], api_key, model): batch
+                    for batch in batches
+                }
+                for future in as_completed(futures):
+                    batch = futures[future]
+                    if future.cancelled():
+                        failed += len(batch)
+                        continue
+                    try:
+                        embeddings = future.result()
+                        if len(embeddings) != len(batch):
+                            raise ValueError(f"Expected {len(batch)} embeddings, got {len(embeddings)}")
+                        _save_batch(batch, embeddings)
+                    except Exception as e:
+                        failed += len(batch)
+                        consecutive_failures += 1
+                        last_error = str(e)
+                        logger.warning(f"Embedding backfill {job_id}: batch of {len(batch)} failed: {e}")
+                        if consecutive_failures >= config['MAX_FAILED_BATCHES']:
+                            # Likely a bad key or a provider outage; rerunning resumes from here
+                            for pending in futures:
+                                pending.cancel()
+                    else:
+                        processed += len(batch)
+                        consecutive_failures = 0
+                    _update_job(job_id, processed=processed, failed=failed)
+
+        if processed:
+            from api.vector_index import get_vector_index
+            try:
+                get_vector_index(job.user_id, job.language).rebuild()
+            except Exception as e:
+                logger.warning(f"Embedding backfill {job_id}: vector index rebuild failed: {e}")
+
+        _update_job(
+            job_id,
+            status='failed' if failed and not processed else 'completed',
+            processed=processed,
+            failed=failed,
+            error=last_error,
+            finished_at=timezone.now(),
+        )
+        logger.info(
+            f"Embedding backfill {job_id}: {processed} embedded, {failed} failed, {unchanged} unchanged"
+        )
+    except Exception as e:
+        _update_job(job_id, status='failed', error=str(e), finished_at=timezone.now())
+        raise
@@ -0,0 +1,152 @@
+"""
+Content-addressed storage for AI-generated story images.
+
+Image providers return base64 payloads. Keeping them inside
+GeneratedContent.content_data made every ``content.save()`` rewrite a
+multi-megabyte JSON document and every query that touched the row drag the
+images along. Instead, each image is decoded once and written to
+``default_storage`` (local MEDIA_ROOT, or S3 via django-storages) as
+``generated_images/<sha[:2]>/<sha>.<ext>``; the event keeps only that
+storage key in ``image_key``. Identical images share one file, and
+re-storing an image that already exists is a no-op.
+
+The key, not a URL, is persisted: with AWS_QUERYSTRING_AUTH the storage
+URL is pre-signed and expires. Responses resolve ``image_url`` from the
+key at serialization time (with_image_urls). Providers that host the
+image themselves (Stable Horde with r2) return a URL, which is kept as
+``image_url`` unchanged.
+
+Usage:
+    from api.services.generated_images import apply_image_result, with_image_urls
+
+    apply_image_result(event, agent.generate_image(prompt, negative_prompt))
+    return Response({'content_data': with_image_urls(content.content_data)})
+"""
+
+import base64
+import binascii
+import hashlib
+import logging
+from typing import Any, Dict, Optional
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+
+logger = logging.getLogger(__name__)
+
+
+STORAGE_PREFIX = 'generated_images'
+
+# GeneratedContent fields image generation changes; save(update_fields=...) with these
+IMAGE_PROGRESS_FIELDS = [
+    'content_data', 'image_generation_status', 'images_generated_count', 'image_providers_used', 'updated_at',
+]
+
+# Leading bytes of the formats image providers return
+IMAGE_SIGNATURES = (
+    (b'\x89PNG\r\n\x1a\n', 'png'),
+    (b'\xff\xd8\xff', 'jpg'),
+    (b'GIF8', 'gif'),
+    (b'RIFF', 'webp'),
+)
+
+
+def image_extension(data: bytes) -> str:
+    """File extension for image bytes, sniffed from the signature (png if unknown)."""
+    for signature, extension in IMAGE_SIGNATURES:
+        if data.startswith(signature):
+            return extension
+    return 'png'
+
+
+def store_image(data: bytes) -> str:
+    """Save image bytes under their SHA-256 and return the storage key."""
+    digest = hashlib.sha256(data).hexdigest()
+    name = f"{STORAGE_PREFIX}/{digest[:2]}/{digest}.{image_extension(data)}"
+    if not default_storage.exists(name):
+        name = default_storage.save(name, ContentFile(data))
+    return name
+
+
+def decode_image_base64(image_base64: str) -> bytes:
+    """
+    Decode a base64 payload, optionally a ``data:`` URI and wrapped over
+    several lines.
+
+    Raises:
+        ValueError: If the payload is not valid base64
+    """
+    if image_base64.startswith('data:'):
+        image_base64 = image_base64.split(',', 1)[-1]
+    try:
+        return base64.b64decode(''.join(image_base64.split()), validate=True)
+    except (binascii.Error, ValueError) as e:
+        raise ValueError(f"Invalid base64 image: {e}") from e
+
+
+def is_image_link(value: str) -> bool:
+    """True for provider-hosted images (e.g. Stable Horde r2 results)."""
+    return value.startswith(('http://', 'https://'))
+
+
+def offload_event_image(event: Dict[str, Any]) -> bool:
+    """
+    Move an event's ``image_base64`` into storage as ``image_key`` (or, for
+    a hosted image, into ``image_url``). Returns whether the event changed.
+
+    A payload that cannot be decoded or stored stays where it is.
+    """
+    image_base64 = event.get('image_base64')
+    if not image_base64:
+        return False
+    if is_image_link(image_base64):
+        event['image_url'] = event.get('image_url') or image_base64
+    else:
+        try:
+            event['image_key'] = store_image(decode_image_base64(image_base64))
+        except Exception as e:
+            logger.warning(f"Keeping inline image for event {event.get('event_number')}: {e}")
+            return False
+    event['image_base64'] = None
+    return True
+
+
+def offload_content_images(content_data: Optional[Dict[str, Any]]) -> int:
+    """
+    Prepare a content_data document for saving: offload every inline event
+    image and drop ``image_url`` values resolved from an ``image_key`` (a
+    client echoing a response back would otherwise persist a signed URL).
+    Returns how many images moved.
+    """
+    if not isinstance(content_data, dict):
+        return 0
+    moved = 0
+    for event in content_data.get('events') or []:
+        if not isinstance(event, dict):
+            continue
+        moved += offload_event_image(event)
+        if event.get('image_key'):
+            event['image_url'] = None
+    return moved
+
+
+def with_image_urls(content_data: Any) -> Any:
+    """Copy of content_data whose events carry a current ``image_url`` for their ``image_key``."""
+    if not isinstance(content_data, dict) or not content_data.get('events'):
+        return content_data
+    events = []
+    for event in content_data['events']:
+        if isinstance(event, dict) and event.get('image_key'):
+            event = {**event, 'image_url': default_storage.url(event['image_key'])}
+        events.append(event)
+    return {**content_data, 'events': events}
+
+
+def apply_image_result(event: Dict[str, Any], result: Dict[str, Any]):
+    """Record a successful ImageGenerationAgent result on a story event."""
+    event['image_status'] = 'completed'
+    event['image_key'] = None
+    event['image_base64'] = result.get('image_base64')
+    event['image_url'] = result.get('image_url')
+    event['image_provider'] = result.get('provider')
+    offload_event_image(event)
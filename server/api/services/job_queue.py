@@ -0,0 +1,463 @@
+"""
+Bounded Generation Job Queue.
+
+Replaces the ad-hoc ``threading.Thread`` per request used for exam,
+podcast and embedding generation with one bounded worker pool per process:
+
+- Priority lanes: ``interactive`` jobs (a user is waiting on the result)
+  always run before ``batch`` jobs, and batch jobs never occupy more than
+  MAX_BATCH_RUNNING workers.
+- Per-user limits: at most MAX_RUNNING_PER_USER[lane] running and
+  MAX_QUEUED_PER_USER queued jobs per user and lane; beyond MAX_QUEUED the queue
+  rejects work with JobQueueFull instead of spawning more threads.
+- Durability: exam and podcast jobs keep their parameters, lane, attempt
+  count and a heartbeat on their own row (GenerationJobFields). Every
+  process heartbeats the rows it owns; rows of a dead worker go stale and
+  are claimed and re-run by the next process that sweeps, up to
+  MAX_ATTEMPTS times. A runner that fails with attempts left raises
+  RetryJob (see can_retry_job) and is queued again; its graph resumes
+  from the last checkpoint.
+- Metrics: queue depth per lane, running jobs, wait/run latency
+  percentiles and per-kind counters via get_stats().
+
+Embedding jobs carry the caller's API key, which is never persisted, so
+they are queued in memory only (submit()).
+
+Usage:
+    from api.services.job_queue import get_job_queue, JobQueueFull
+
+    get_job_queue().enqueue('exam', exam, params={'prompt_data': data})
+    get_job_queue().submit(fn, user_id=user.id, kind='embedding')
+"""
+
+import heapq
+import itertools
+import logging
+import os
+import threading
+import time
+from collections import Counter, deque
+from dataclasses import dataclass, field
+from datetime import timedelta
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from django.apps import apps
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import F
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_JOB_QUEUE_CONFIG = {
+    'WORKERS': 4,
+    'MAX_QUEUED': 100,
+    'MAX_QUEUED_PER_USER': 5,
+    'MAX_RUNNING_PER_USER': {'interactive': 1, 'batch': 2},
+    'MAX_BATCH_RUNNING': 2,
+    'HEARTBEAT_INTERVAL': 30,  # Seconds between heartbeats / recovery sweeps
+    'STALE_AFTER': 120,        # Heartbeat age after which a row counts as orphaned
+    'MAX_ATTEMPTS': 3,
+}
+
+LANES = ('interactive', 'batch')
+
+
+def get_job_queue_config() -> Dict[str, Any]:
+    """Effective queue settings (settings.GENERATION_JOBS over defaults)."""
+    config = dict(DEFAULT_JOB_QUEUE_CONFIG)
+    config.update(getattr(settings, 'GENERATION_JOBS', {}))
+    return config
+
+
+class JobQueueFull(Exception):
+    """Raised when the queue (or the user's share of it) is at capacity."""
+
+
+class RetryJob(Exception):
+    """Raised by a durable job runner to have its row run again."""
+
+
+# The durable job (and its queue) running on this worker thread
+_current = threading.local()
+
+
+def can_retry_job(kind: str, row_id: int) -> bool:
+    """
+    True when ``kind:row_id`` is running on a queue worker and has attempts
+    left, i.e. the runner should raise RetryJob instead of failing the row.
+    """
+    job = getattr(_current, 'job', None)
+    if job is None or (job.kind, job.row_id) != (kind, row_id):
+        return False
+    attempts = JOB_KINDS[kind].get_model().objects.filter(pk=row_id).values_list('job_attempts', flat=True).first()
+    return attempts is not None and attempts < _current.queue.config['MAX_ATTEMPTS']
+
+
+@dataclass(frozen=True)
+class JobKind:
+    """A durable job type: which rows hold its state and what runs it."""
+    model: str
+    status_field: str
+    active_statuses: Tuple[str, ...]
+    failed_status: str
+    runner: str  # Dotted path, called as runner(pk, **row.job_params)
+
+    def get_model(self):
+        return apps.get_model(self.model)
+
+
+JOB_KINDS: Dict[str, JobKind] = {
+    'exam': JobKind(
+        model='api.Exam',
+        status_field='status',
+        active_statuses=('processing',),
+        failed_status='failed',
+        runner='api.services.background_exam.run_exam_job',
+    ),
+    'podcast': JobKind(
+        model='api.Podcast',
+        status_field='processing_status',
+        active_statuses=('pending', 'processing'),
+        failed_status='failed',
+        runner='api.services.background_podcast.generate_podcast_job',
+    ),
+}
+
+
+@dataclass(order=True)
+class _Job:
+    sort_key: Tuple[int, int]
+    kind: str = field(compare=False)
+    lane: str = field(compare=False)
+    user_id: Optional[int] = field(compare=False)
+    row_id: Optional[int] = field(compare=False, default=None)
+    func: Optional[Callable] = field(compare=False, default=None)
+    args: tuple = field(compare=False, default=())
+    kwargs: dict = field(compare=False, default_factory=dict)
+    enqueued_at: float = field(compare=False, default_factory=time.monotonic)
+
+
+def _percentile(samples, q: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))], 1)
+
+
+class GenerationJobQueue:
+    """
+    Process-wide bounded worker pool with lanes and per-user limits.
+
+    Workers and the heartbeat thread start lazily (first enqueue, or
+    start() from the WSGI/ASGI entry point so orphaned jobs resume after a
+    restart) and are restarted after a fork.
+    """
+
+    _instance: Optional['GenerationJobQueue'] = None
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        self.config = config or get_job_queue_config()
+
+        self._cond = threading.Condition()
+        self._pending: list = []
+        self._seq = itertools.count()
+        self._running: Dict[int, _Job] = {}
+        self._running_by_user: Counter = Counter()
+        self._running_by_lane: Counter = Counter()
+
+        self._threads: list = []
+        self._pid: Optional[int] = None
+        self._started = False
+        self._stop = threading.Event()
+
+        self._wait_ms = {lane: deque(maxlen=200) for lane in LANES}
+        self._run_ms = {lane: deque(maxlen=200) for lane in LANES}
+        self._counters: Counter = Counter()
+
+    @classmethod
+    def get_instance(cls) -> 'GenerationJobQueue':
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+    # =========================================================================
+    # ENQUEUE
+    # =========================================================================
+
+    def enqueue(self, kind: str, obj, params: Optional[Dict[str, Any]] = None, lane: str = 'interactive') -> None:
+        """
+        Queue a durable job for ``obj`` (an Exam or Podcast row).
+
+        The row stores params/lane and is heartbeated while queued or
+        running. Raises JobQueueFull without touching the row when the
+        queue is at capacity.
+        """
+        job_kind = JOB_KINDS[kind]
+        job = self._make_job(kind, lane, obj.user_id, row_id=obj.pk)
+        with self._cond:
+            self._check_capacity(job)
+            now = timezone.now()
+            job_kind.get_model().objects.filter(pk=obj.pk).update(
+                job_lane=lane,
+                job_params=params or {},
+                job_enqueued_at=now,
+                job_heartbeat_at=now,
+                job_started_at=None,
+            )
+            self._push(job)
+        self.start()
+
+    def submit(self, func: Callable, *args, user_id: Optional[int] = None,
+               kind: str = 'embedding', lane: str = 'batch', **kwargs) -> None:
+        """Queue an in-memory job (not resumed after a restart)."""
+        job = self._make_job(kind, lane, user_id, func=func, args=args, kwargs=kwargs)
+        with self._cond:
+            self._check_capacity(job)
+            self._push(job)
+        self.start()
+
+    def _make_job(self, kind, lane, user_id, **extra) -> _Job:
+        if lane not in LANES:
+            raise ValueError(f"Unknown lane '{lane}'. Choose from: {', '.join(LANES)}")
+        return _Job(sort_key=(LANES.index(lane), next(self._seq)), kind=kind, lane=lane, user_id=user_id, **extra)
+
+    def _check_capacity(self, job: _Job) -> None:
+        if len(self._pending) >= self.config['MAX_QUEUED']:
+            self._counters[f'{job.kind}.rejected'] += 1
+            raise JobQueueFull("The generation queue is full. Please try again in a minute.")
+        queued_for_user = sum(
+            1 for queued in self._pending if queued.user_id == job.user_id and queued.lane == job.lane
+        )
+        if job.user_id is not None and queued_for_user >= self.config['MAX_QUEUED_PER_USER']:
+            self._counters[f'{job.kind}.rejected'] += 1
+            raise JobQueueFull("You already have several generations queued. Please wait for them to finish.")
+
+    def _push(self, job: _Job) -> None:
+        heapq.heappush(self._pending, job)
+        self._counters[f'{job.kind}.enqueued'] += 1
+        self._cond.notify()
+
+    # =========================================================================
+    # WORKERS
+    # =========================================================================
+
+    def start(self) -> None:
+        """Start workers and the heartbeat thread in this process if needed (WORKERS=0 disables them)."""
+        if self.config['WORKERS'] <= 0:
+            return
+        # Checked and started under the lock, so concurrent callers cannot both spawn workers
+        with self._cond:
+            if self._started and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._started = True
+            self._stop.clear()
+            self._threads = [
+                threading.Thread(target=self._work, name=f"generation-worker-{i}", daemon=True)
+                for i in range(self.config['WORKERS'])
+            ]
+            self._threads.append(threading.Thread(target=self._heartbeat, name="generation-heartbeat", daemon=True))
+            for thread in self._threads:
+                thread.start()
+
+    def stop(self) -> None:
+        """Stop the threads after their current job (used by tests)."""
+        self._stop.set()
+        with self._cond:
+            self._started = False
+            self._cond.notify_all()
+        for thread in self._threads:
+            thread.join(timeout=5)
+
+    def _eligible(self, job: _Job) -> bool:
+        if job.lane == 'batch' and self._running_by_lane['batch'] >= self.config['MAX_BATCH_RUNNING']:
+            return False
+        if job.user_id is None:
+            return True
+        limit = self.config['MAX_RUNNING_PER_USER'].get(job.lane, 1)
+        return self._running_by_user[(job.user_id, job.lane)] < limit
+
+    def _next_job(self) -> Optional[_Job]:
+        """Pop the highest-priority runnable job, waiting for one if needed."""
+        with self._cond:
+            while not self._stop.is_set():
+                runnable = [job for job in self._pending if self._eligible(job)]
+                if runnable:
+                    job = min(runnable)
+                    self._pending.remove(job)
+                    heapq.heapify(self._pending)
+                    self._running[id(job)] = job
+                    self._running_by_user[(job.user_id, job.lane)] += 1
+                    self._running_by_lane[job.lane] += 1
+                    return job
+                self._cond.wait(timeout=1.0)
+        return None
+
+    def _work(self) -> None:
+        while True:
+            job = self._next_job()
+            if job is None:
+                return
+            started = time.monotonic()
+            self._wait_ms[job.lane].append((started - job.enqueued_at) * 1000)
+            close_old_connections()
+            retry = False
+            try:
+                self._execute(job)
+                self._counters[f'{job.kind}.completed'] += 1
+            except RetryJob as e:
+                retry = True
+                self._counters[f'{job.kind}.retried'] += 1
+                logger.warning(f"Generation job {job.kind}:{job.row_id} failed, retrying: {e}")
+            except Exception as e:
+                self._counters[f'{job.kind}.failed'] += 1
+                logger.error(f"Generation job {job.kind}:{job.row_id or '-'} failed: {e}")
+            finally:
+                close_old_connections()
+                self._run_ms[job.lane].append((time.monotonic() - started) * 1000)
+                with self._cond:
+                    self._running.pop(id(job), None)
+                    self._running_by_user[(job.user_id, job.lane)] -= 1
+                    self._running_by_lane[job.lane] -= 1
+                    if retry:
+                        self._push(self._make_job(job.kind, job.lane, job.user_id, row_id=job.row_id))
+                    self._cond.notify_all()
+
+    def _execute(self, job: _Job) -> None:
+        if job.func is not None:
+            job.func(*job.args, **job.kwargs)
+            return
+
+        job_kind = JOB_KINDS[job.kind]
+        model = job_kind.get_model()
+        active = {f'{job_kind.status_field}__in': job_kind.active_statuses}
+        row = model.objects.filter(pk=job.row_id, **active).only('pk', 'job_params').first()
+        if row is None:
+            logger.info(f"Generation job {job.kind}:{job.row_id} skipped (row deleted or finished)")
+            return
+
+        now = timezone.now()
+        model.objects.filter(pk=job.row_id).update(
+            job_attempts=F('job_attempts') + 1,
+            job_started_at=now,
+            job_heartbeat_at=now,
+        )
+        _current.job, _current.queue = job, self
+        try:
+            import_string(job_kind.runner)(job.row_id, **(row.job_params or {}))
+        finally:
+            _current.job = _current.queue = None
+
+    # =========================================================================
+    # HEARTBEAT & RECOVERY
+    # =========================================================================
+
+    def _owned_rows(self) -> Dict[str, list]:
+        with self._cond:
+            jobs = list(self._pending) + list(self._running.values())
+        owned: Dict[str, list] = {}
+        for job in jobs:
+            if job.row_id is not None:
+                owned.setdefault(job.kind, []).append(job.row_id)
+        return owned
+
+    def _heartbeat(self) -> None:
+        while not self._stop.is_set():
+            close_old_connections()
+            try:
+                self.beat()
+                self.recover()
+            except Exception as e:
+                logger.warning(f"Generation job heartbeat failed: {e}")
+            finally:
+                close_old_connections()
+            self._stop.wait(self.config['HEARTBEAT_INTERVAL'])
+
+    def beat(self) -> None:
+        """Refresh the heartbeat of every row queued or running here."""
+        now = timezone.now()
+        for kind, row_ids in self._owned_rows().items():
+            JOB_KINDS[kind].get_model().objects.filter(pk__in=row_ids).update(job_heartbeat_at=now)
+
+    def recover(self) -> int:
+        """
+        Claim rows whose owner stopped heartbeating and queue them again.
+
+        Claims are a compare-and-set on job_heartbeat_at, so concurrent
+        sweeps in several processes never run the same row twice. Rows past
+        MAX_ATTEMPTS are marked failed.
+
+        Returns:
+            Number of rows re-queued
+        """
+        cutoff = timezone.now() - timedelta(seconds=self.config['STALE_AFTER'])
+        owned = self._owned_rows()
+        recovered = 0
+
+        for kind, job_kind in JOB_KINDS.items():
+            model = job_kind.get_model()
+            stale = model.objects.filter(
+                **{f'{job_kind.status_field}__in': job_kind.active_statuses},
+                job_enqueued_at__isnull=False,
+                job_heartbeat_at__lt=cutoff,
+            ).exclude(pk__in=owned.get(kind, [])).only('pk', 'user_id', 'job_lane', 'job_attempts', 'job_heartbeat_at')
+
+            for row in stale[:self.config['MAX_QUEUED']]:
+                claimed = model.objects.filter(pk=row.pk, job_heartbeat_at=row.job_heartbeat_at).update(
+                    job_heartbeat_at=timezone.now()
+                )
+                if not claimed:
+                    continue
+                if row.job_attempts >= self.config['MAX_ATTEMPTS']:
+                    model.objects.filter(pk=row.pk).update(**{job_kind.status_field: job_kind.failed_status})
+                    from api.graph_checkpoint import clear_checkpoints
+                    clear_checkpoints(f"{kind}:{row.pk}")
+                    self._counters[f'{kind}.abandoned'] += 1
+                    logger.warning(f"Generation job {kind}:{row.pk} failed after {row.job_attempts} attempts")
+                    continue
+
+                job = self._make_job(kind, row.job_lane or 'interactive', row.user_id, row_id=row.pk)
+                with self._cond:
+                    if len(self._pending) >= self.config['MAX_QUEUED']:
+                        return recovered  # Still stale-looking after STALE_AFTER; next sweep retries
+                    self._push(job)
+                self._counters[f'{kind}.recovered'] += 1
+                recovered += 1
+                logger.info(f"Recovered orphaned generation job {kind}:{row.pk} (attempt {row.job_attempts + 1})")
+
+        return recovered
+
+    # =========================================================================
+    # METRICS
+    # =========================================================================
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Queue depth, running jobs, latency percentiles and counters."""
+        now = time.monotonic()
+        with self._cond:
+            pending = list(self._pending)
+            running = list(self._running.values())
+        oldest = min((job.enqueued_at for job in pending), default=None)
+        return {
+            'workers': self.config['WORKERS'],
+            'queued': {lane: sum(1 for job in pending if job.lane == lane) for lane in LANES},
+            'running': {lane: sum(1 for job in running if job.lane == lane) for lane in LANES},
+            'oldest_queued_seconds': round(now - oldest, 1) if oldest is not None else 0,
+            'wait_ms': {
+                lane: {'p50': _percentile(self._wait_ms[lane], 0.5), 'p95': _percentile(self._wait_ms[lane], 0.95)}
+                for lane in LANES
+            },
+            'run_ms': {
+                lane: {'p50': _percentile(self._run_ms[lane], 0.5), 'p95': _percentile(self._run_ms[lane], 0.95)}
+                for lane in LANES
+            },
+            'counters': dict(self._counters),
+        }
+
+
+def get_job_queue() -> GenerationJobQueue:
+    """Get the process-wide generation job queue."""
+    return GenerationJobQueue.get_instance()
@@ -1,11 +1,31 @@
 import os
 import requests
+import threading
+import time
 import uuid
 import json
 import base64
+from concurrent.futures import ThreadPoolExecutor
 from django.conf import settings
 from django.core.files.base import ContentFile
 from api.models import Podcast
+from api.tts_cache import get_tts_cache, tts_cache_key
+
+
+SPEECHIFY_MODEL = "simba-multilingual"
+
+DEFAULT_PRODUCER_CONFIG = {
+    'TTS_CONCURRENCY': 4,   # Segments synthesized at once
+    'SEGMENT_RETRIES': 2,   # Extra attempts for a failed segment
+    'RETRY_BACKOFF': 1.0,   # Seconds before the first retry, doubled after each
+}
+
+
+def get_producer_config():
+    """Effective producer settings (settings.PODCAST_PRODUCER over defaults)."""
+    config = dict(DEFAULT_PRODUCER_CONFIG)
+    config.update(getattr(settings, 'PODCAST_PRODUCER', {}))
+    return config
 
 
 class ProducerAgent:
@@ -19,18 +39,21 @@ class ProducerAgent:
             self.api_keys = [key] if key else []
             
         self.current_key_index = 0
+        self._key_lock = threading.Lock()  # Segments share the key rotation
+        self.language = 'en'
 
     def run(self, script_data: dict, podcast_instance: Podcast, audio_speed: float = 1.0):
         """
         Generates audio from script and saves to podcast instance.
         """
         script = script_data.get('script', [])
-        combined_audio = b""
+        audio_parts = []
         combined_marks = []
         current_time_offset_ms = 0
         
         # Language Lookup
         lang = getattr(self.user.profile, 'target_language', 'en').lower()
+        self.language = lang
         
         # Get Voice Map (Speechify)
         voice_map = self._get_voices_speechify(lang)
@@ -41,49 +64,52 @@ class ProducerAgent:
              print("Producer Error: No Speechify Keys found.")
              return False
 
+        segments = []
         for segment in script:
             speaker = segment.get('speaker', 'Host A')
-            text = segment.get('text', '')
             voice_id = voice_map.get(speaker, voice_map['Host A'])
+            segments.append((speaker, segment.get('text', ''), voice_id))
+        
+        # Synthesize concurrently; results come back in script order
+        results = self._synthesize_segments(segments)
+        if results is None:
+            # A segment still failed after its retries, so the podcast fails
+            print("Producer Error: Segment generation failed.")
+            return False
+
+        for (speaker, _, _), (audio_chunk, marks) in zip(segments, results):
+            audio_parts.append(audio_chunk)
             
-            # Call Speechify
-            audio_chunk, marks = self._generate_tts_speechify(text, voice_id)
+            # Process timestamps
+            if marks:
+                for mark in marks:
+                    # Normalize Speechify marks to standard format
+                    word = mark.get('value') or mark.get('word')
+                    start_time = mark.get('start_time') or mark.get('time') or mark.get('start', 0)
+                    
+                    if word:
+                         combined_marks.append({
+                             'word': word,
+                             'time': start_time + current_time_offset_ms,
+                             'speaker': speaker
+                         })
             
-            if audio_chunk:
-                combined_audio += audio_chunk
-                
-                # Process timestamps
-                if marks:
-                    for mark in marks:
-                        # Normalize Speechify marks to standard format
-                        word = mark.get('value') or mark.get('word')
-                        start_time = mark.get('start_time') or mark.get('time') or mark.get('start', 0)
-                        
-                        if word:
-                             combined_marks.append({
-                                 'word': word,
-                                 'time': start_time + current_time_offset_ms,
-                                 'speaker': speaker
-                             })
-                
-                # Update chunk duration
-                chunk_duration_ms = 0
-                if marks:
-                    last = marks[-1]
-                    end = last.get('end_time') or last.get('end')
-                    if end:
-                        chunk_duration_ms = end
-                
-                if chunk_duration_ms == 0:
-                    # Fallback: 128kbps = 16000 bytes/sec = 16 bytes/ms
-                    chunk_duration_ms = len(audio_chunk) / 16.0 
-                
-                current_time_offset_ms += chunk_duration_ms
-            else:
-                # If a segment fails completely after all retries, whole podcast fails
-                print("Producer Error: Segment generation failed.")
-                return False
+            # Update chunk duration
+            chunk_duration_ms = 0
+            if marks:
+                last = marks[-1]
+                end = last.get('end_time') or last.get('end')
+                if end:
+                    chunk_duration_ms = end
+            
+            if chunk_duration_ms == 0:
+                # Fallback: 128kbps = 16000 bytes/sec = 16 bytes/ms
+                chunk_duration_ms = len(audio_chunk) / 16.0 
+            
+            current_time_offset_ms += chunk_duration_ms
                 
+        # One copy for the whole episode instead of one per segment
+        combined_audio = b"".join(audio_parts)
         if not combined_audio:
             print("Producer Error: No audio generated.")
             return False
@@ -97,6 +123,60 @@ class ProducerAgent:
         
         return True
 
+    def _synthesize_segments(self, segments):
+        """
+        Synthesize (speaker, text, voice_id) segments, TTS_CONCURRENCY at a time.
+        
+        Returns [(audio, marks)] in segment order, or None as soon as one
+        segment fails all its retries (segments not yet started are cancelled).
+        """
+        config = get_producer_config()
+        workers = max(1, min(config['TTS_CONCURRENCY'], len(segments)))
+        
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='podcast-tts') as executor:
+            futures = [
+                executor.submit(self._synthesize_segment, text, voice_id, config)
+                for _, text, voice_id in segments
+            ]
+            results = []
+            for future in futures:
+                audio_chunk, marks = future.result()
+                if not audio_chunk:
+                    for pending in futures:
+                        pending.cancel()
+                    return None
+                results.append((audio_chunk, marks))
+        return results
+
+    def _synthesize_segment(self, text, voice_id, config):
+        """
+        One segment with its own retries, so a flaky call doesn't restart the episode.
+        Lines already synthesized with the same voice come from the shared TTS cache.
+        """
+        cache = get_tts_cache()
+        cache_key = tts_cache_key('speechify', f"{SPEECHIFY_MODEL}:{voice_id}", self.language, 1.0, 0.0, text)
+        entry = cache.get(cache_key)
+        if entry:
+            return entry.read(), entry.marks
+        
+        retries = config['SEGMENT_RETRIES']
+        for attempt in range(retries + 1):
+            audio_chunk, marks = self._generate_tts_speechify(text, voice_id)
+            if audio_chunk:
+                cache.put(cache_key, audio_chunk, marks or [])
+                return audio_chunk, marks
+            if attempt < retries:
+                delay = config['RETRY_BACKOFF'] * (2 ** attempt)
+                print(f"Producer: segment failed, retrying in {delay}s ({attempt + 1}/{retries})")
+                time.sleep(delay)
+        return None, None
+
+    def _rotate_key(self, failed_index):
+        """Move to the next key unless another segment already moved past this one."""
+        with self._key_lock:
+            if self.current_key_index == failed_index:
+                self.current_key_index = (failed_index + 1) % len(self.api_keys)
+
     def _generate_tts_speechify(self, text, voice_id):
         url = "https://api.sws.speechify.com/v1/audio/speech"
         
@@ -106,7 +186,9 @@ class ProducerAgent:
         
         while attempts < total_keys:
             # Get current key
-            current_key = self.api_keys[self.current_key_index]
+            with self._key_lock:
+                key_index = self.current_key_index
+            current_key = self.api_keys[key_index]
             
             headers = {
                 "Authorization": f"Bearer {current_key}",
@@ -117,7 +199,7 @@ class ProducerAgent:
                 "input": text,
                 "voice_id": voice_id,
                 "audio_format": "mp3",
-                "model": "simba-multilingual",
+                "model": SPEECHIFY_MODEL,
                 "options": {"speech_marks": True}
             }
             
@@ -144,8 +226,8 @@ class ProducerAgent:
                 
                 elif response.status_code in [401, 402, 429]:
                     # Auth error, Payment required, or Quota exceeded -> Try next key
-                    print(f"Speechify Key {self.current_key_index} failed ({response.status_code}). Trying next...")
-                    self.current_key_index = (self.current_key_index + 1) % total_keys
+                    print(f"Speechify Key {key_index} failed ({response.status_code}). Trying next...")
+                    self._rotate_key(key_index)
                     attempts += 1
                 else:
                     # Other error (e.g. 400 Bad Request, 500) -> Likely not key related, abort
@@ -156,7 +238,7 @@ class ProducerAgent:
                 print(f"TTS Exception (Speechify): {e}")
                 # Network error? Maybe try next key if it's a connection issue specific to key? Unlikely but safe to retry
                 attempts += 1
-                self.current_key_index = (self.current_key_index + 1) % total_keys
+                self._rotate_key(key_index)
         
         print("All Speechify keys failed.")
         return None, None
@@ -0,0 +1,378 @@
+"""
+Per-user dashboard statistics rollup.
+
+The dashboard reads one UserStatsSnapshot row instead of counting
+vocabulary, walking quiz dates and scoring every word's HLR recall. The
+snapshot is kept current as the underlying data changes:
+
+- record_practice_result / update_progress call ``record_practice``
+  (heatmap, streak, SRS mastery and the practiced word's HLR bucket)
+- Vocabulary create/delete signals and the CSV importer call
+  ``record_words_added`` / ``record_word_removed``
+
+Day-indexed counters are fixed-length lists ending at ``days_end``; moving
+to a new day shifts them left, so an update touches a single row.
+
+HLR recall decays with time, so a word drifts from mastered to learning to
+needs-review without any write. Each word is counted in the bucket its
+recall had at ``max(computed_at, last_practiced_at)``, which keeps the
+incremental updates exact, and ``rebuild_user_stats`` re-buckets all words
+with one vectorized pass. Reads rebuild once the snapshot is older than
+REFRESH_INTERVAL; ``manage.py refresh_user_stats`` does the same from cron.
+
+Usage:
+    from api.services.user_stats import get_user_stats
+
+    stats = get_user_stats(request.user)
+"""
+
+import logging
+from datetime import date, datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from api.hlr import HLRScheduler
+from api.models import Quiz, UserProgress, UserStatsSnapshot, Vocabulary
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_USER_STATS_CONFIG = {
+    'REFRESH_INTERVAL': 3600,   # Seconds before HLR buckets are recomputed on read
+}
+
+ACTIVITY_DAYS = 366     # Today and the 365 days before it
+TREND_DAYS = 7
+SRS_MASTERED_STAGE = 4
+
+BUCKET_FIELDS = {
+    'mastered': 'hlr_mastered',
+    'learning': 'hlr_learning',
+    'needs_review': 'hlr_needs_review',
+}
+
+# (correct_count, wrong_count, total_practice_count, last_practiced_at)
+HLRState = Tuple[int, int, int, Optional[datetime]]
+
+
+def get_user_stats_config() -> Dict[str, Any]:
+    """Return USER_STATS settings merged over the defaults."""
+    return {**DEFAULT_USER_STATS_CONFIG, **getattr(settings, 'USER_STATS', {})}
+
+
+def hlr_state(word: Vocabulary) -> HLRState:
+    return (word.correct_count, word.wrong_count, word.total_practice_count, word.last_practiced_at)
+
+
+def level_for(srs_mastered: int) -> str:
+    """CEFR-style level from the number of words at SRS stage 4+."""
+    if srs_mastered < 50:
+        return "Novice"
+    if srs_mastered < 150:
+        return "A1 - Beginner"
+    if srs_mastered < 300:
+        return "A2 - Elementary"
+    if srs_mastered < 600:
+        return "B1 - Intermediate"
+    if srs_mastered < 1200:
+        return "B2 - Upper Intermediate"
+    return "C1 - Advanced"
+
+
+# =============================================================================
+# HLR BUCKETS
+# =============================================================================
+
+def hlr_bucket(state: HLRState, at: datetime) -> Optional[str]:
+    """
+    Dashboard bucket of one word at time ``at``; None if never practiced.
+
+    Mastered: practiced 3+ times and recall > 90%. Needs review: recall < 50%.
+    """
+    correct, wrong, total, last_practiced_at = state
+    if last_practiced_at is None:
+        return None
+    days = (at - last_practiced_at).days
+    recall = HLRScheduler.predict_recall_probability(correct, wrong, total, days)
+    if total >= 3 and recall > 0.9:
+        return 'mastered'
+    if recall < 0.5:
+        return 'needs_review'
+    return 'learning'
+
+
+def _counted_bucket(snapshot: UserStatsSnapshot, state: HLRState) -> Optional[str]:
+    """The bucket a word is currently counted in by this snapshot."""
+    last_practiced_at = state[3]
+    if last_practiced_at is None:
+        return None
+    at = last_practiced_at
+    if snapshot.computed_at and snapshot.computed_at > at:
+        at = snapshot.computed_at
+    return hlr_bucket(state, at)
+
+
+def count_hlr_buckets(user_id: int, now: datetime) -> Dict[str, int]:
+    """Bucket all of a user's practiced words at ``now`` in one vectorized pass."""
+    rows = list(
+        Vocabulary.objects.filter(created_by_id=user_id, last_practiced_at__isnull=False).values_list(
+            'correct_count', 'wrong_count', 'total_practice_count', 'last_practiced_at'
+        )
+    )
+    if not rows:
+        return {bucket: 0 for bucket in BUCKET_FIELDS}
+
+    correct, wrong, total, practiced_at = zip(*rows)
+    recall = HLRScheduler.batch_estimate(
+        correct, wrong, total, HLRScheduler.batch_days_since(practiced_at, now)
+    )['recall_probability']
+    mastered = (np.asarray(total) >= 3) & (recall > 0.9)
+    needs_review = ~mastered & (recall < 0.5)
+    return {
+        'mastered': int(mastered.sum()),
+        'needs_review': int(needs_review.sum()),
+        'learning': int(len(rows) - mastered.sum() - needs_review.sum()),
+    }
+
+
+def _move_bucket(snapshot: UserStatsSnapshot, before: Optional[str], after: Optional[str]):
+    if before == after:
+        return
+    if before:
+        field = BUCKET_FIELDS[before]
+        setattr(snapshot, field, max(0, getattr(snapshot, field) - 1))
+    if after:
+        field = BUCKET_FIELDS[after]
+        setattr(snapshot, field, getattr(snapshot, field) + 1)
+
+
+# =============================================================================
+# DAY ARRAYS
+# =============================================================================
+
+def _shift(counts: List[int], size: int, days: int) -> List[int]:
+    """Counts moved ``days`` to the left (older days dropped), padded to ``size``."""
+    counts = ([0] * size + list(counts))[-size:]
+    if days <= 0:
+        return counts
+    if days >= size:
+        return [0] * size
+    return counts[days:] + [0] * days
+
+
+def _advance(snapshot: UserStatsSnapshot, today: date):
+    """Move the day arrays forward so they end at ``today``."""
+    days = (today - snapshot.days_end).days if snapshot.days_end else ACTIVITY_DAYS
+    if days < 0:
+        return
+    snapshot.activity_counts = _shift(snapshot.activity_counts, ACTIVITY_DAYS, days)
+    snapshot.words_added_counts = _shift(snapshot.words_added_counts, TREND_DAYS, days)
+    snapshot.days_end = today
+
+
+def _bump(counts: List[int], days_end: date, day: date, delta: int):
+    """Add ``delta`` to the slot for ``day``; days outside the window are ignored."""
+    index = len(counts) - 1 - (days_end - day).days
+    if 0 <= index < len(counts):
+        counts[index] = max(0, counts[index] + delta)
+
+
+# =============================================================================
+# INCREMENTAL UPDATES
+# =============================================================================
+
+def _update(user_id: int, apply: Callable[[UserStatsSnapshot], None]):
+    """
+    Apply ``apply`` to the user's locked snapshot and save it.
+
+    Users without a snapshot are skipped; their first read builds one.
+    """
+    with transaction.atomic():
+        snapshot = UserStatsSnapshot.objects.select_for_update().filter(user_id=user_id).first()
+        if snapshot is None:
+            return
+        _advance(snapshot, timezone.localdate())
+        apply(snapshot)
+        snapshot.save()
+
+
+def record_practice(
+    user_id: int,
+    when: datetime,
+    hlr_before: Optional[HLRState] = None,
+    hlr_after: Optional[HLRState] = None,
+    srs_stage_before: Optional[int] = None,
+    srs_stage_after: Optional[int] = None,
+):
+    """
+    Roll one practiced word into the snapshot.
+
+    Pass the word's HLR state before and after for HLR practice, or the
+    UserProgress stage before and after for SRS practice.
+    """
+    day = timezone.localdate(when)
+
+    def apply(snapshot):
+        _bump(snapshot.activity_counts, snapshot.days_end, day, 1)
+
+        if snapshot.last_active_date is None or day > snapshot.last_active_date:
+            if snapshot.last_active_date == day - timedelta(days=1):
+                snapshot.streak += 1
+            else:
+                snapshot.streak = 1
+            snapshot.last_active_date = day
+
+        if hlr_after is not None:
+            before = _counted_bucket(snapshot, hlr_before) if hlr_before else None
+            _move_bucket(snapshot, before, hlr_bucket(hlr_after, hlr_after[3] or when))
+
+        if srs_stage_after is not None:
+            was_mastered = (srs_stage_before or 0) >= SRS_MASTERED_STAGE
+            is_mastered = srs_stage_after >= SRS_MASTERED_STAGE
+            snapshot.srs_mastered = max(0, snapshot.srs_mastered + is_mastered - was_mastered)
+
+    _update(user_id, apply)
+
+
+def record_words_added(user_id: int, count: int, when: Optional[datetime] = None):
+    """Count ``count`` new words (never practiced, so in no HLR bucket)."""
+    if count <= 0:
+        return
+    day = timezone.localdate(when or timezone.now())
+
+    def apply(snapshot):
+        snapshot.total_words += count
+        _bump(snapshot.words_added_counts, snapshot.days_end, day, count)
+
+    _update(user_id, apply)
+
+
+def record_word_removed(word: Vocabulary):
+    """Take a deleted word out of the totals, the weekly trend and its HLR bucket."""
+    def apply(snapshot):
+        snapshot.total_words = max(0, snapshot.total_words - 1)
+        if word.created_at:
+            _bump(snapshot.words_added_counts, snapshot.days_end, timezone.localdate(word.created_at), -1)
+        _move_bucket(snapshot, _counted_bucket(snapshot, hlr_state(word)), None)
+
+    _update(word.created_by_id, apply)
+
+
+def record_progress_removed(progress: UserProgress):
+    """A deleted UserProgress row no longer counts towards SRS mastery."""
+    if progress.repetition_stage < SRS_MASTERED_STAGE:
+        return
+
+    def apply(snapshot):
+        snapshot.srs_mastered = max(0, snapshot.srs_mastered - 1)
+
+    _update(progress.user_id, apply)
+
+
+# =============================================================================
+# FULL RECOMPUTE
+# =============================================================================
+
+def _streak(user_id: int) -> Tuple[int, Optional[date]]:
+    """Consecutive practice days ending at the most recent one, and that day."""
+    streak, last_active, expected = 0, None, None
+    for day in Quiz.objects.filter(user_id=user_id).dates('timestamp', 'day', order='DESC').iterator():
+        if last_active is None:
+            last_active = day
+        elif day != expected:
+            break
+        streak += 1
+        expected = day - timedelta(days=1)
+    return streak, last_active
+
+
+def _daily_counts(queryset, field: str, days_end: date, size: int) -> List[int]:
+    start = days_end - timedelta(days=size - 1)
+    counts = [0] * size
+    rows = queryset.filter(**{f'{field}__date__gte': start}).annotate(
+        day=TruncDate(field)
+    ).values('day').annotate(count=Count('id')).values_list('day', 'count')
+    for day, count in rows:
+        _bump(counts, days_end, day, count)
+    return counts
+
+
+def rebuild_user_stats(user_id: int, now: Optional[datetime] = None) -> UserStatsSnapshot:
+    """Recompute a user's snapshot from the source tables."""
+    now = now or timezone.now()
+    today = timezone.localdate(now)
+
+    UserStatsSnapshot.objects.get_or_create(user_id=user_id)
+    with transaction.atomic():
+        snapshot = UserStatsSnapshot.objects.select_for_update().get(user_id=user_id)
+        words = Vocabulary.objects.filter(created_by_id=user_id)
+        buckets = count_hlr_buckets(user_id, now)
+
+        snapshot.total_words = words.count()
+        snapshot.srs_mastered = UserProgress.objects.filter(
+            user_id=user_id, repetition_stage__gte=SRS_MASTERED_STAGE
+        ).count()
+        for bucket, field in BUCKET_FIELDS.items():
+            setattr(snapshot, field, buckets[bucket])
+        snapshot.streak, snapshot.last_active_date = _streak(user_id)
+        snapshot.days_end = today
+        snapshot.activity_counts = _daily_counts(
+            Quiz.objects.filter(user_id=user_id), 'timestamp', today, ACTIVITY_DAYS
+        )
+        snapshot.words_added_counts = _daily_counts(words.order_by(), 'created_at', today, TREND_DAYS)
+        snapshot.computed_at = now
+        snapshot.save()
+    return snapshot
+
+
+# =============================================================================
+# READ
+# =============================================================================
+
+def serialize_user_stats(snapshot: UserStatsSnapshot, today: date) -> Dict[str, Any]:
+    """Dashboard payload as of ``today``, shifting the day arrays in memory."""
+    days = (today - snapshot.days_end).days if snapshot.days_end else ACTIVITY_DAYS
+    activity = _shift(snapshot.activity_counts, ACTIVITY_DAYS, days)
+    words_added = _shift(snapshot.words_added_counts, TREND_DAYS, days)
+
+    streak = snapshot.streak
+    if snapshot.last_active_date is None or snapshot.last_active_date < today - timedelta(days=1):
+        streak = 0
+
+    first_day = today - timedelta(days=ACTIVITY_DAYS - 1)
+    return {
+        'total_words': snapshot.total_words,
+        'mastered_words': snapshot.hlr_mastered,
+        'learning_words': snapshot.hlr_learning,
+        'needs_review': snapshot.hlr_needs_review,
+        'streak': streak,
+        'level': level_for(snapshot.srs_mastered),
+        'words_added_this_week': sum(words_added),
+        'quizzes_this_week': sum(activity[-TREND_DAYS:]),
+        'activity_log': {
+            (first_day + timedelta(days=i)).strftime('%Y-%m-%d'): count
+            for i, count in enumerate(activity)
+            if count
+        },
+    }
+
+
+def get_user_stats(user) -> Dict[str, Any]:
+    """
+    Dashboard statistics for ``user``.
+
+    One indexed read, unless the snapshot is missing or older than
+    REFRESH_INTERVAL, in which case it is rebuilt first.
+    """
+    now = timezone.now()
+    snapshot = UserStatsSnapshot.objects.filter(user=user).first()
+    max_age = timedelta(seconds=get_user_stats_config()['REFRESH_INTERVAL'])
+    if snapshot is None or snapshot.computed_at is None or now - snapshot.computed_at > max_age:
+        snapshot = rebuild_user_stats(user.id, now)
+    return serialize_user_stats(snapshot, timezone.localdate(now))
@@ -0,0 +1,211 @@
+"""
+Bulk CSV import and streaming CSV export for vocabulary.
+
+Import reads the upload through a text wrapper, so rows are decoded as they
+are parsed rather than after the whole file is loaded. Duplicates are checked
+against one prefetched set of the user's existing words. Words, new tags and
+the word-tag links are written with ``bulk_create`` every IMPORT_CHUNK_SIZE
+rows. Query count grows with chunks, not with rows.
+
+Export yields CSV lines from a chunked iterator with tags prefetched per
+chunk, for use with ``StreamingHttpResponse``.
+"""
+
+import csv
+import io
+import logging
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from django.db import transaction
+from django.db.models import Prefetch
+from django.db.models.functions import Lower
+
+from api.models import Tag, Vocabulary
+from api.services.user_stats import record_words_added
+
+logger = logging.getLogger(__name__)
+
+
+IMPORT_CHUNK_SIZE = 1000
+EXPORT_CHUNK_SIZE = 2000
+
+EXPORT_HEADER = ['Word', 'Translation', 'Type', 'Example', 'Tags', 'Synonyms', 'Antonyms', 'Created At']
+EXPORT_FIELDS = ('id', 'word', 'translation', 'type', 'example', 'synonyms', 'antonyms', 'created_at')
+
+WORD_MAX_LENGTH = Vocabulary._meta.get_field('word').max_length
+TRANSLATION_MAX_LENGTH = Vocabulary._meta.get_field('translation').max_length
+TYPE_MAX_LENGTH = Vocabulary._meta.get_field('type').max_length
+TAG_MAX_LENGTH = Tag._meta.get_field('name').max_length
+
+
+def _split_list(value: Optional[str]) -> List[str]:
+    """'a, b,,c' -> ['a', 'b', 'c']"""
+    return [item.strip() for item in (value or '').split(',') if item.strip()]
+
+
+def iter_csv_rows(file_obj) -> Iterator[Dict[str, str]]:
+    """
+    Yield rows of an uploaded CSV keyed by lower-cased header.
+
+    Decoding happens incrementally; utf-8-sig drops the BOM Excel writes.
+    The upload itself is left open.
+    """
+    text = io.TextIOWrapper(file_obj, encoding='utf-8-sig', newline='')
+    try:
+        reader = csv.DictReader(text)
+        if reader.fieldnames:
+            reader.fieldnames = [(name or '').strip().lower() for name in reader.fieldnames]
+        yield from reader
+    finally:
+        text.detach()
+
+
+class VocabularyCSVImporter:
+    """
+    Imports CSV rows into one user's vocabulary for a language pair.
+
+    Usage:
+        result = VocabularyCSVImporter(user, 'de', 'en').run(request.FILES['file'])
+        # {'created': 49873, 'skipped': 127, 'errors': [...]}
+    """
+
+    def __init__(self, user, language: str, native_language: str, chunk_size: int = IMPORT_CHUNK_SIZE):
+        self.user = user
+        self.language = language
+        self.native_language = native_language
+        self.chunk_size = chunk_size
+
+        self.created = 0
+        self.skipped = 0
+        self.errors: List[str] = []
+        self._existing_words: set = set()
+        self._tags: Dict[str, Tag] = {}
+
+    def run(self, file_obj) -> Dict[str, Any]:
+        self._existing_words = set(
+            Vocabulary.objects.filter(
+                created_by=self.user,
+                language=self.language,
+                native_language=self.native_language,
+            ).values_list(Lower('word'), flat=True)
+        )
+        self._tags = {}
+        for tag in Tag.objects.filter(user=self.user).only('id', 'name').order_by('id'):
+            self._tags.setdefault(tag.name, tag)
+
+        pending: List[Tuple[Vocabulary, List[str]]] = []
+        for row in iter_csv_rows(file_obj):
+            parsed = self._parse_row(row)
+            if parsed is None:
+                continue
+            pending.append(parsed)
+            if len(pending) >= self.chunk_size:
+                self._flush(pending)
+                pending = []
+        if pending:
+            self._flush(pending)
+
+        return {'created': self.created, 'skipped': self.skipped, 'errors': self.errors}
+
+    def _parse_row(self, row: Dict[str, str]) -> Optional[Tuple[Vocabulary, List[str]]]:
+        """Build an unsaved Vocabulary and its tag names, or None when the row is skipped."""
+        word = (row.get('word') or '').strip()
+        if not word:
+            self.skipped += 1
+            return None
+
+        key = word.lower()
+        if key in self._existing_words:
+            self.skipped += 1
+            return None
+
+        translation = (row.get('translation') or '').strip()
+        word_type = (row.get('type') or '').strip() or 'other'
+        tag_names = list(dict.fromkeys(_split_list(row.get('tags'))))
+
+        problem = None
+        if not translation:
+            problem = 'missing translation'
+        elif len(word) > WORD_MAX_LENGTH or len(translation) > TRANSLATION_MAX_LENGTH:
+            problem = f'word and translation are limited to {WORD_MAX_LENGTH} characters'
+        elif len(word_type) > TYPE_MAX_LENGTH:
+            problem = f'unknown type "{word_type}"'
+        elif any(len(name) > TAG_MAX_LENGTH for name in tag_names):
+            problem = f'tags are limited to {TAG_MAX_LENGTH} characters'
+        if problem:
+            self.errors.append(f"Error importing row {word}: {problem}")
+            return None
+
+        self._existing_words.add(key)  # Later rows with the same word are duplicates
+        vocab = Vocabulary(
+            word=word,
+            translation=translation,
+            type=word_type,
+            example=row.get('example') or '',
+            synonyms=_split_list(row.get('synonyms')),
+            antonyms=_split_list(row.get('antonyms')),
+            created_by=self.user,
+            language=self.language,
+            native_language=self.native_language,
+        )
+        return vocab, tag_names
+
+    def _flush(self, pending: List[Tuple[Vocabulary, List[str]]]):
+        """Write one chunk: words, then missing tags, then the M2M links."""
+        known_tags = dict(self._tags)
+        try:
+            with transaction.atomic():
+                words = [vocab for vocab, _ in pending]
+                for vocab in words:
+                    vocab.refresh_hlr_schedule()  # bulk_create bypasses save()
+                Vocabulary.objects.bulk_create(words)
+
+                new_names = {name for _, names in pending for name in names} - self._tags.keys()
+                if new_names:
+                    new_tags = Tag.objects.bulk_create([Tag(name=name, user=self.user) for name in new_names])
+                    self._tags.update((tag.name, tag) for tag in new_tags)
+
+                Through = Vocabulary.tags.through
+                Through.objects.bulk_create([
+                    Through(vocabulary_id=vocab.pk, tag_id=self._tags[name].pk)
+                    for vocab, names in pending
+                    for name in names
+                ])
+        except Exception as e:
+            logger.warning(f"Vocabulary CSV import chunk failed for user {self.user.id}: {e}")
+            self.errors.append(f"Error importing rows {pending[0][0].word} to {pending[-1][0].word}: {e}")
+            for vocab, _ in pending:
+                self._existing_words.discard(vocab.word.lower())
+            self._tags = known_tags  # Tags created in the rolled back chunk are gone
+            return
+
+        self.created += len(pending)
+        record_words_added(self.user.id, len(pending))  # bulk_create sends no post_save
+
+
+class _Echo:
+    """File-like object whose write() returns the value, for csv.writer streaming."""
+
+    def write(self, value):
+        return value
+
+
+def iter_vocabulary_csv(queryset, chunk_size: int = EXPORT_CHUNK_SIZE) -> Iterator[str]:
+    """Yield the export CSV line by line; tags are fetched once per chunk."""
+    writer = csv.writer(_Echo())
+    yield writer.writerow(EXPORT_HEADER)
+
+    queryset = queryset.only(*EXPORT_FIELDS).prefetch_related(
+        Prefetch('tags', queryset=Tag.objects.only('id', 'name'))
+    )
+    for vocab in queryset.iterator(chunk_size=chunk_size):
+        yield writer.writerow([
+            vocab.word,
+            vocab.translation,
+            vocab.type,
+            vocab.example,
+            ", ".join(t.name for t in vocab.tags.all()),
+            ", ".join(vocab.synonyms),
+            ", ".join(vocab.antonyms),
+            vocab.created_at,
+        ])
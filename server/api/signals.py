@@ -1,7 +1,9 @@
 import os
-from django.db.models.signals import post_delete
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
-from .models import Podcast
+from .models import ClassMembership, NodeProgress, PathEnrollment, PathNode, Podcast, UserProgress, Vocabulary
+from .services import user_stats
+from .services.classroom_path_stats import invalidate_path_stats
 
 @receiver(post_delete, sender=Podcast)
 def delete_podcast_file(sender, instance, **kwargs):
@@ -11,3 +13,46 @@ def delete_podcast_file(sender, instance, **kwargs):
     if instance.audio_file:
         if os.path.isfile(instance.audio_file.path):
             os.remove(instance.audio_file.path)
+
+
+@receiver(post_save, sender=Vocabulary)
+def count_added_vocabulary(sender, instance, created, raw=False, **kwargs):
+    """Keeps the dashboard stats rollup in step with new words."""
+    if created and not raw:
+        user_stats.record_words_added(instance.created_by_id, 1, instance.created_at)
+
+
+@receiver(post_delete, sender=Vocabulary)
+def uncount_deleted_vocabulary(sender, instance, **kwargs):
+    user_stats.record_word_removed(instance)
+
+
+@receiver(post_delete, sender=UserProgress)
+def uncount_deleted_progress(sender, instance, **kwargs):
+    user_stats.record_progress_removed(instance)
+
+
+@receiver([post_save, post_delete], sender=NodeProgress)
+def invalidate_path_stats_for_progress(sender, instance, **kwargs):
+    """Node started, unlocked or completed: cached classroom path stats are stale."""
+    if NodeProgress.enrollment.is_cached(instance):
+        path_id = instance.enrollment.path_id
+    else:
+        path_id = PathEnrollment.objects.filter(pk=instance.enrollment_id).values_list('path_id', flat=True).first()
+    if path_id is not None:
+        invalidate_path_stats(path_id=path_id)
+
+
+@receiver([post_save, post_delete], sender=PathEnrollment)
+def invalidate_path_stats_for_enrollment(sender, instance, **kwargs):
+    invalidate_path_stats(path_id=instance.path_id)
+
+
+@receiver([post_save, post_delete], sender=PathNode)
+def invalidate_path_stats_for_node(sender, instance, **kwargs):
+    invalidate_path_stats(path_id=instance.sublevel.path_id)
+
+
+@receiver([post_save, post_delete], sender=ClassMembership)
+def invalidate_path_stats_for_membership(sender, instance, **kwargs):
+    invalidate_path_stats(classroom_id=instance.classroom_id)
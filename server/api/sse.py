@@ -0,0 +1,45 @@
+"""
+Server-Sent Events helpers for streaming AI generation endpoints.
+
+Events are JSON objects with a 'type' key, the same framing as
+image_generation_sse.py:
+- {"type": "token", "text": "..."}: next piece of generated text
+- {"type": "done", ...}: final payload (same fields as the buffered endpoint)
+- {"type": "error", "error": "..."}: generation failed; no more events follow
+"""
+
+import json
+import logging
+from typing import Any, Callable, Dict, Iterable, Iterator
+
+from django.http import StreamingHttpResponse
+
+logger = logging.getLogger(__name__)
+
+
+def sse_event(payload: Dict[str, Any]) -> str:
+    """Format one SSE message."""
+    return f"data: {json.dumps(payload)}\n\n"
+
+
+def sse_response(events: Iterable[Dict[str, Any]]) -> StreamingHttpResponse:
+    """Stream event dicts as text/event-stream, unbuffered by proxies."""
+    response = StreamingHttpResponse((sse_event(e) for e in events), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # nginx / Render proxy
+    return response
+
+
+def generation_events(stream, on_done: Callable[[str], Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+    """
+    Token events for a GatewayStream, then the done event.
+
+    on_done(full_text) builds the final payload (parsing, saving, stats).
+    """
+    try:
+        for delta in stream:
+            yield {'type': 'token', 'text': delta}
+        yield {'type': 'done', **on_done(stream.text)}
+    except Exception as e:
+        logger.error(f"Streaming generation failed: {e}")
+        yield {'type': 'error', 'error': str(e)}
@@ -57,3 +57,31 @@ def system_metrics(request):
             'uptime': 0,
             'timestamp': datetime.now().isoformat()
         }, status=500)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def job_queue_metrics(request):
+    """
+    Get generation job queue metrics for this process
+    Returns queue depth and running jobs per lane, wait/run latency and counters
+    """
+    from .services.job_queue import get_job_queue
+    return Response({
+        **get_job_queue().get_stats(),
+        'timestamp': datetime.now().isoformat()
+    })
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def usage_log_metrics(request):
+    """
+    Get API usage log buffer metrics for this process
+    Returns buffered rows, drops and flush timings
+    """
+    from .usage_log_buffer import get_usage_log_buffer
+    return Response({
+        **get_usage_log_buffer().get_stats(),
+        'timestamp': datetime.now().isoformat()
+    })
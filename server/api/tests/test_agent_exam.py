@@ -0,0 +1,154 @@
+"""
+Tests for the exam agent's section fan-out mode.
+
+Run with: python manage.py test api.tests.test_agent_exam
+"""
+
+import json
+import threading
+import time
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+
+from api.agent_exam import build_exam_graph, section_generator_node, section_refiner_node
+
+
+PLAN = {'sections': [
+    {'type': 'reading', 'count': 3, 'focus': 'Travel'},
+    {'type': 'cloze', 'count': 4, 'focus': 'Past tense'},
+    {'type': 'matching', 'count': 4, 'focus': 'Airport words'},
+]}
+
+
+def initial_state():
+    return {
+        'topic': 'Travel', 'level': 'B1', 'question_types': ['reading', 'cloze', 'matching'],
+        'vocab_list': None, 'grammar_list': None, 'notes': None, 'target_language': 'de',
+        'revision_count': 0, 'logs': [], 'topic_analysis': None, 'exam_plan': None,
+        'draft_questions': None, 'critique': None, 'critique_passed': False, 'final_exam': None,
+    }
+
+
+class FakeAI:
+    """Answers exam agent prompts by kind and records them."""
+
+    def __init__(self, failing_type=None, delay=0.0):
+        self.failing_type = failing_type
+        self.delay = delay
+        self.prompts = []
+        self.active = 0
+        self.max_active = 0
+        self.lock = threading.Lock()
+
+    def __call__(self, user, prompt):
+        with self.lock:
+            self.prompts.append(prompt)
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        try:
+            time.sleep(self.delay)
+            return self.answer(prompt)
+        finally:
+            with self.lock:
+                self.active -= 1
+
+    def answer(self, prompt):
+        if 'Senior Curriculum Developer' in prompt:
+            return 'analysis'
+        if 'blueprint' in prompt:
+            return json.dumps(PLAN)
+        if 'Write ONE section' in prompt:
+            section_type = prompt.split('Section type: ')[1].split()[0]
+            return json.dumps({'type': section_type, 'instruction': 'draft'})
+        if 'Critique this exam section' in prompt:
+            failing = self.failing_type and f'"type": "{self.failing_type}", "instruction": "draft"' in prompt
+            return 'FAILED: too easy' if failing else 'PASSED'
+        if 'Fix the following exam section' in prompt:
+            return json.dumps({'type': self.failing_type, 'instruction': 'fixed'})
+        raise AssertionError(f"Unexpected prompt: {prompt[:80]}")
+
+    def count(self, marker):
+        return sum(marker in p for p in self.prompts)
+
+
+@override_settings(AGENT_GRAPHS={'NODE_CACHE_TTL': 0, 'EXAM_SECTION_CONCURRENCY': 3})
+class SectionFanOutTestCase(SimpleTestCase):
+    """Sections are generated, critiqued and refined independently."""
+
+    def setUp(self):
+        cache.clear()
+
+    def run_graph(self, ai):
+        with patch('api.agent_exam.call_ai', ai):
+            graph = build_exam_graph(fan_out=True)
+            return graph.invoke(initial_state(), config={'configurable': {'user': None}})
+
+    def test_one_call_per_section_in_plan_order(self):
+        """Each planned section gets its own call and keeps its position."""
+        ai = FakeAI()
+        result = self.run_graph(ai)
+
+        self.assertEqual(ai.count('Write ONE section'), 3)
+        self.assertEqual([s['type'] for s in result['final_exam']['sections']], ['reading', 'cloze', 'matching'])
+        self.assertTrue(result['critique_passed'])
+        self.assertEqual(ai.count('Fix the following exam section'), 0)
+
+    def test_only_failing_sections_are_refined(self):
+        """A failing section is refined and re-critiqued alone."""
+        ai = FakeAI(failing_type='cloze')
+        result = self.run_graph(ai)
+
+        self.assertEqual(ai.count('Fix the following exam section'), 1)
+        self.assertEqual(ai.count('Critique this exam section'), 4)  # 3 sections + 1 refined
+        sections = result['final_exam']['sections']
+        self.assertEqual([s['instruction'] for s in sections], ['draft', 'fixed', 'draft'])
+        self.assertTrue(result['critique_passed'])
+        self.assertEqual(result['revision_count'], 1)
+
+    @override_settings(AGENT_GRAPHS={'EXAM_SECTION_CONCURRENCY': 2})
+    def test_concurrency_is_bounded(self):
+        """No more than EXAM_SECTION_CONCURRENCY section calls run at once."""
+        ai = FakeAI(delay=0.05)
+        state = {**initial_state(), 'exam_plan': {'sections': PLAN['sections'] * 2}}
+        with patch('api.agent_exam.call_ai', ai):
+            result = section_generator_node(state, {'configurable': {'user': None}})
+
+        self.assertEqual(len(result['final_exam']['sections']), 6)
+        self.assertEqual(ai.max_active, 2)
+
+    def test_failed_sections_are_dropped(self):
+        """A section whose call fails is skipped; the rest of the exam survives."""
+        ai = FakeAI()
+        original = ai.answer
+
+        def answer(prompt):
+            if 'Section type: cloze' in prompt:
+                raise RuntimeError('provider down')
+            return original(prompt)
+
+        ai.answer = answer
+        state = {**initial_state(), 'exam_plan': PLAN}
+        with patch('api.agent_exam.call_ai', ai):
+            result = section_generator_node(state, {'configurable': {'user': None}})
+
+        self.assertEqual([s['type'] for s in result['final_exam']['sections']], ['reading', 'matching'])
+        self.assertEqual(result['pending_sections'], [0, 1])
+
+    def test_sections_that_fail_to_refine_stay_pending(self):
+        """A refine that errors leaves its section for the next critic pass."""
+        def ai(prompt):
+            raise RuntimeError('provider down')
+
+        state = {
+            **initial_state(),
+            'final_exam': {'sections': [{'type': 'reading'}, {'type': 'cloze'}]},
+            'section_critiques': [{'index': 1, 'critique': 'FAILED: too easy'}],
+        }
+        with patch('api.agent_exam.call_ai', ai):
+            result = section_refiner_node(state, {'configurable': {'user': None}})
+
+        self.assertEqual(result['pending_sections'], [1])
+        self.assertEqual(result['final_exam']['sections'][1], {'type': 'cloze'})
+        self.assertEqual(result['revision_count'], 1)
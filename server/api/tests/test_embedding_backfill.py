@@ -0,0 +1,131 @@
+"""
+Tests for the incremental embedding backfill job and its status endpoint.
+
+Run with: python manage.py test api.tests.test_embedding_backfill
+"""
+
+import shutil
+import tempfile
+import threading
+import time
+from unittest.mock import patch
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from api.models import EmbeddingBackfillJob, Vocabulary
+from api.services.embedding_backfill import get_embedding_backfill_config, run_embedding_backfill
+
+
+class FakeEmbedder:
+    """Stands in for EmbeddingService.generate_embeddings_batch."""
+
+    def __init__(self, fail_on=()):
+        self.fail_on = set(fail_on)
+        self.texts = []
+        self.active = 0
+        self.max_active = 0
+        self.lock = threading.Lock()
+
+    def __call__(self, texts, api_key, model=None):
+        with self.lock:
+            self.texts.extend(texts)
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        try:
+            time.sleep(0.02)
+            if self.fail_on.intersection(texts):
+                raise Exception("Failed to generate batch embeddings: 503")
+            return [[float(len(text)), 1.0] for text in texts]
+        finally:
+            with self.lock:
+                self.active -= 1
+
+
+class EmbeddingBackfillTestCase(TestCase):
+    """Only changed words are embedded, in bounded concurrent batches."""
+
+    def setUp(self):
+        self.index_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.index_dir, ignore_errors=True)
+        settings_override = override_settings(VECTOR_INDEX={'DIR': self.index_dir})
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.user = User.objects.create_user(username='backfill', password='TestPass123!')
+        for i in range(7):
+            Vocabulary.objects.create(
+                word=f'Wort{i}', translation=f'word {i}', type='noun', created_by=self.user, language='de'
+            )
+        self.config = {**get_embedding_backfill_config(), 'BATCH_SIZE': 2, 'CONCURRENCY': 2}
+
+    def run_backfill(self, embedder):
+        job = EmbeddingBackfillJob.objects.create(user=self.user, language='de')
+        with patch('api.services.embedding_backfill.EmbeddingService.generate_embeddings_batch', embedder):
+            run_embedding_backfill(job.pk, 'key', config=self.config)
+        job.refresh_from_db()
+        return job
+
+    def test_only_changed_words_are_embedded(self):
+        """A second run skips current rows; an edited word is re-embedded alone."""
+        first = FakeEmbedder()
+        job = self.run_backfill(first)
+
+        self.assertEqual((job.status, job.total, job.processed, job.progress), ('completed', 7, 7, 100))
+        self.assertEqual(len(first.texts), 7)
+        self.assertLessEqual(first.max_active, 2)
+        self.assertEqual(Vocabulary.objects.filter(embedding_text_hash='').count(), 0)
+        self.assertEqual(Vocabulary.objects.get(word='Wort3').embedding.tolist(), [len('Wort3 word 3'), 1.0])
+
+        Vocabulary.objects.filter(word='Wort3').update(translation='the word three')
+        second = FakeEmbedder()
+        job = self.run_backfill(second)
+
+        self.assertEqual(second.texts, ['Wort3 the word three'])
+        self.assertEqual((job.total, job.processed, job.unchanged), (1, 1, 6))
+
+    def test_failed_batches_are_retried_by_the_next_run(self):
+        """A failing batch is counted and reported; the rest are saved."""
+        job = self.run_backfill(FakeEmbedder(fail_on={'Wort0 word 0'}))
+
+        self.assertEqual((job.status, job.processed, job.failed), ('completed', 5, 2))
+        self.assertIn('503', job.error)
+
+        retry = FakeEmbedder()
+        job = self.run_backfill(retry)
+        self.assertEqual(sorted(retry.texts), ['Wort0 word 0', 'Wort1 word 1'])
+        self.assertEqual((job.status, job.failed), ('completed', 0))
+
+
+class EmbeddingBackfillEndpointTestCase(APITestCase):
+    """POST starts (or returns) a job; GET polls it."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='poller', password='TestPass123!')
+        self.client.force_authenticate(self.user)
+        patcher = patch('api.services.embedding_backfill.get_job_queue')
+        self.queue = patcher.start().return_value
+        self.addCleanup(patcher.stop)
+
+    def test_start_and_poll(self):
+        response = self.client.post('/api/vocab/generate-embeddings/', {'api_key': 'k'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response.data['status'], 'queued')
+        self.queue.submit.assert_called_once()
+
+        again = self.client.post('/api/vocab/generate-embeddings/', {'api_key': 'k'}, format='json')
+        self.assertEqual(again.data['id'], response.data['id'])
+        self.queue.submit.assert_called_once()
+
+        poll = self.client.get(f"/api/vocab/generate-embeddings/{response.data['id']}/")
+        self.assertEqual(poll.status_code, status.HTTP_200_OK)
+        self.assertEqual(poll.data['progress'], 0)
+
+        other = User.objects.create_user(username='other', password='TestPass123!')
+        self.client.force_authenticate(other)
+        self.assertEqual(
+            self.client.get(f"/api/vocab/generate-embeddings/{response.data['id']}/").status_code,
+            status.HTTP_404_NOT_FOUND,
+        )
@@ -0,0 +1,204 @@
+"""
+Tests for live game rooms and the game WebSocket consumer.
+
+Run with: python manage.py test api.tests.test_game_rooms
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from unittest import skipUnless
+
+from asgiref.sync import sync_to_async
+from channels.auth import AuthMiddlewareStack
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+from django.contrib.auth.models import User
+from django.db import connection, connections
+from django.test import TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from api.game_rooms import GameRoomError, GameRoomRegistry, get_game_rooms, get_leaderboard, score_answer
+from api.models import Classroom, GameParticipant, GameSession, Teacher
+from api.routing import websocket_urlpatterns
+
+application = AuthMiddlewareStack(URLRouter(websocket_urlpatterns))
+
+
+class GameRoomTestCase(TransactionTestCase):
+    """channels.db.database_sync_to_async closes connections, which TestCase transactions do not survive."""
+
+    def setUp(self):
+        GameRoomRegistry._instance = GameRoomRegistry(flush_interval=0)
+        self.addCleanup(setattr, GameRoomRegistry, '_instance', None)
+
+        self.host = User.objects.create_user(username='host', password='TestPass123!')
+        classroom = Classroom.objects.create(
+            teacher=Teacher.objects.create(user=self.host), name='Live', invite_code='LIVE01',
+        )
+        self.session = GameSession.objects.create(classroom=classroom, host=self.host, status='active')
+        self.players = [User.objects.create_user(username=f'p{i}', password='TestPass123!') for i in range(2)]
+
+    async def connect(self, user):
+        token = await sync_to_async(lambda: Token.objects.get_or_create(user=user)[0].key)()
+        communicator = WebsocketCommunicator(application, f'/ws/game/{self.session.id}/?token={token}')
+        connected, code = await communicator.connect()
+        return communicator, connected, code
+
+
+class GameSessionConsumerTestCase(GameRoomTestCase):
+    """Players get a snapshot, then diffs; answers are written back in batches."""
+
+    async def test_answers_are_broadcast_and_written_back_later(self):
+        host, connected, _ = await self.connect(self.host)
+        self.assertTrue(connected)
+        snapshot = await host.receive_json_from()
+        self.assertEqual((snapshot['type'], snapshot['participants']), ('snapshot', []))
+
+        alice, _, _ = await self.connect(self.players[0])
+        joined = await host.receive_json_from()
+        self.assertEqual(joined['participants'][str(self.players[0].id)]['username'], 'p0')
+        own_snapshot = await alice.receive_json_from()
+        self.assertEqual((len(own_snapshot['participants']), own_snapshot['v']), (1, joined['v'] - 1))
+        self.assertEqual(await alice.receive_json_from(), joined)  # Already applied via the snapshot
+
+        await alice.send_json_to({'type': 'answer', 'is_correct': True, 'response_time': 2})
+        self.assertEqual(await alice.receive_json_from(), {'type': 'answer_result', 'score': 80, 'correct': 1, 'wrong': 0})
+        diff = await host.receive_json_from()
+        self.assertEqual(diff['participants'], {str(self.players[0].id): {'score': 80}})
+        self.assertEqual(diff['v'], joined['v'] + 1)
+
+        participant = await sync_to_async(GameParticipant.objects.get)(user=self.players[0])
+        self.assertEqual(participant.score, 0)
+        await sync_to_async(get_game_rooms().flush)()
+        await sync_to_async(participant.refresh_from_db)()
+        self.assertEqual((participant.score, participant.correct_answers), (80, 1))
+
+        await alice.disconnect()
+        left = await host.receive_json_from()
+        self.assertEqual(left['participants'], {str(self.players[0].id): {'is_active': False}})
+        await host.disconnect()
+
+    async def test_only_the_host_updates_state(self):
+        host, _, _ = await self.connect(self.host)
+        bob, _, _ = await self.connect(self.players[1])
+        await host.receive_json_from()
+        await host.receive_json_from()
+        await bob.receive_json_from()
+        await bob.receive_json_from()
+
+        await bob.send_json_to({'type': 'update', 'status': 'completed'})
+        self.assertEqual((await bob.receive_json_from())['type'], 'error')
+
+        await host.send_json_to({'type': 'update', 'state': {'question': 3}, 'current_stage': 1})
+        diff = await bob.receive_json_from()
+        self.assertEqual((diff['state'], diff['current_stage']), ({'question': 3}, 1))
+        await host.disconnect()
+        await bob.disconnect()
+
+    async def test_rejects_unknown_users_and_sessions(self):
+        communicator = WebsocketCommunicator(application, f'/ws/game/{self.session.id}/?token=bad')
+        connected, code = await communicator.connect()
+        self.assertEqual((connected, code), (False, 4401))
+
+        await sync_to_async(GameSession.objects.filter(pk=self.session.pk).update)(status='completed')
+        _, connected, code = await self.connect(self.players[0])
+        self.assertEqual((connected, code), (False, 4403))
+
+
+class GameRoomSyncTestCase(GameRoomTestCase):
+    """While a room is loaded, polling reads it and heartbeats cost no query."""
+
+    def test_polling_uses_the_room(self):
+        room, participant = get_game_rooms().open(self.session.id, self.players[0])
+        room.join(participant, 'p0')
+        client = APIClient()
+        client.force_authenticate(self.players[0])
+        client.get(f'/api/game-sessions/{self.session.id}/sync/')
+
+        with CaptureQueriesContext(connection) as queries:
+            for _ in range(5):
+                response = client.get(f'/api/game-sessions/{self.session.id}/sync/')
+        self.assertEqual(response.data['participants'][0]['username'], 'p0')
+        self.assertFalse([q for q in queries if 'api_gameparticipant' in q['sql']])
+
+        with CaptureQueriesContext(connection) as queries:
+            get_game_rooms().flush()
+        self.assertEqual(sum(q['sql'].startswith('UPDATE') for q in queries), 2)
+
+    def test_open_counts_the_connection_before_unloading_can_run(self):
+        rooms = GameRoomRegistry(flush_interval=0, idle_timeout=0)
+        room, _ = rooms.open(self.session.id, self.players[0])
+        rooms.close(room)
+
+        reopened, _ = rooms.open(self.session.id, self.players[0])
+        rooms._unload_idle()
+        self.assertIs(rooms.get(self.session.id), reopened)
+        self.assertIs(reopened, room)
+
+        GameSession.objects.filter(pk=self.session.pk).update(status='completed')
+        rooms.get(self.session.id).status = 'completed'
+        with self.assertRaises(GameRoomError):
+            rooms.open(self.session.id, self.players[1])
+        self.assertEqual(reopened.connections, 1)
+
+
+class GameScoringTestCase(GameRoomTestCase):
+    """Answers are scored atomically; the leaderboard is kept ranked as scores change."""
+
+    # Needs row-locking UPDATEs whose SET expressions all read the old row (MySQL reads updated columns)
+    @skipUnless(connection.vendor == 'postgresql', "Concurrent F() scoring is only guaranteed on PostgreSQL")
+    def test_concurrent_http_answers_are_not_lost(self):
+        GameParticipant.objects.create(session=self.session, user=self.players[0])
+
+        def answer(i):
+            try:
+                return score_answer(self.session.id, self.players[0].id, i % 4 != 0, 1.0)
+            finally:
+                connections.close_all()
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            results = list(pool.map(answer, range(16)))
+
+        participant = GameParticipant.objects.get(user=self.players[0])
+        self.assertEqual((participant.correct_answers, participant.wrong_answers), (12, 4))
+        self.assertEqual(participant.score, 12 * 90)
+        self.assertAlmostEqual(participant.avg_response_time, 1.0)
+        self.assertEqual(sorted(r['correct'] + r['wrong'] for r in results), list(range(1, 17)))
+        self.assertIsNone(score_answer(self.session.id, self.players[1].id, True, 1.0))
+
+    def test_answers_after_the_game_ends_are_rejected(self):
+        GameParticipant.objects.create(session=self.session, user=self.players[0])
+        GameSession.objects.filter(pk=self.session.pk).update(status='completed')
+
+        with self.assertRaises(GameRoomError):
+            score_answer(self.session.id, self.players[0].id, True, 1.0)
+        self.assertEqual(GameParticipant.objects.get(user=self.players[0]).score, 0)
+
+    def test_room_leaderboard_follows_scores(self):
+        rooms = get_game_rooms()
+        for i, user in enumerate(self.players):
+            room, participant = rooms.open(self.session.id, user)
+            room.join(participant, f'p{i}')
+        self.assertEqual([e['username'] for e in room.leaderboard()], ['p0', 'p1'])
+
+        room.answer(self.players[1].id, True, 1.0)
+        self.assertEqual([(e['rank'], e['username'], e['score']) for e in room.leaderboard()], [(1, 'p1', 90), (2, 'p0', 0)])
+        room.answer(self.players[0].id, True, 0.0)
+        self.assertEqual((room.rank(self.players[0].id), room.leaderboard(limit=1)[0]['username']), (1, 'p0'))
+
+        client = APIClient()
+        client.force_authenticate(self.players[1])
+        with CaptureQueriesContext(connection) as queries:
+            response = client.post(f'/api/game-sessions/{self.session.id}/answer/', {'is_correct': True, 'response_time': 0})
+        self.assertEqual(response.data, {'score': 190, 'correct': 2, 'wrong': 0})
+        self.assertFalse([q for q in queries if 'api_gameparticipant' in q['sql']])
+
+        client.force_authenticate(self.host)
+        response = client.post(f'/api/game-sessions/{self.session.id}/end/')
+        self.assertEqual([(e['username'], e['score']) for e in response.data['leaderboard']], [('p1', 190), ('p0', 100)])
+
+        GameRoomRegistry._instance = GameRoomRegistry(flush_interval=0)  # Unloaded: ranked by the database
+        self.assertEqual(get_leaderboard(self.session.id), response.data['leaderboard'])
+        response = client.get(f'/api/game-sessions/{self.session.id}/leaderboard/?limit=1')
+        self.assertEqual([e['username'] for e in response.data['leaderboard']], ['p1'])
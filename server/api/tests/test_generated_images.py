@@ -0,0 +1,137 @@
+"""
+Tests for offloading generated story images out of GeneratedContent.
+
+Run with: python manage.py test api.tests.test_generated_images
+"""
+
+import base64
+import importlib
+import shutil
+import tempfile
+from unittest.mock import patch
+
+from django.apps import apps as django_apps
+from django.contrib.auth.models import User
+from django.core.files.storage import default_storage
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+
+from api.advanced_text_models import GeneratedContent
+from api.services.generated_images import offload_content_images, store_image, with_image_urls
+
+PNG = b'\x89PNG\r\n\x1a\n' + b'\x00' * 64
+JPEG = b'\xff\xd8\xff\xe0' + b'\x01' * 64
+
+
+class GeneratedImagesTestCase(APITestCase):
+    """Images live in storage under their hash; content_data keeps only storage keys."""
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        storage_settings = override_settings(STORAGES={
+            'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage', 'OPTIONS': {'location': media_root}},
+            'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+        })
+        storage_settings.enable()
+        self.addCleanup(storage_settings.disable)
+
+        self.user = User.objects.create_user(username='writer', password='TestPass123!')
+        self.client.force_authenticate(self.user)
+
+    def create_story(self, events):
+        return GeneratedContent.objects.create(
+            user=self.user, content_type='story', title='Story', topic='Topic', level='A1',
+            target_language='de', native_language='en', content_data={'events': events},
+            has_images=True, image_generation_status='pending', total_images_count=len(events),
+        )
+
+    def test_images_are_content_addressed(self):
+        key = store_image(PNG)
+        self.assertRegex(key, r'^generated_images/[0-9a-f]{2}/[0-9a-f]{64}\.png$')
+        self.assertEqual(store_image(PNG), key)
+        self.assertTrue(store_image(JPEG).endswith('.jpg'))
+
+    @patch('api.advanced_text_views.ImageGenerationAgent')
+    def test_status_poll_stores_the_image_file(self, agent_class):
+        agent_class.return_value.generate_image.return_value = {
+            'success': True, 'image_base64': base64.b64encode(PNG).decode(), 'provider': 'pollinations',
+        }
+        story = self.create_story([
+            {'event_number': 1, 'image_status': 'pending', 'image_prompt': {'positive_prompt': 'a dog'}},
+        ])
+
+        response = self.client.get(f'/api/ai/generated-content/{story.id}/images/status/')
+
+        event = response.data['events'][0]
+        self.assertEqual((response.data['status'], event['image_status']), ('completed', 'completed'))
+        self.assertIsNone(event['image_base64'])
+        name = event['image_url'].split('/generated_images/', 1)[1]
+        with default_storage.open(f'generated_images/{name}') as f:
+            self.assertEqual(f.read(), PNG)
+        story.refresh_from_db()
+        stored = story.content_data['events'][0]
+        self.assertEqual(event['image_url'], default_storage.url(stored['image_key']))
+        self.assertNotIn(base64.b64encode(PNG).decode(), str(story.content_data))
+
+    def test_saved_materials_are_offloaded(self):
+        events = [{'event_number': 1, 'content': 'Hallo', 'image_base64': base64.b64encode(PNG).decode()}]
+        response = self.client.post(
+            '/api/ai/save-material/', {'content_type': 'story', 'content_data': {'events': events}}, format='json',
+        )
+
+        event = GeneratedContent.objects.get(pk=response.data['id']).content_data['events'][0]
+        self.assertEqual((event['image_key'], event['image_base64']), (store_image(PNG), None))
+
+    def test_wrapped_payloads_are_decoded(self):
+        encoded = base64.b64encode(PNG).decode()
+        wrapped = '\n'.join(encoded[i:i + 20] for i in range(0, len(encoded), 20))
+        content_data = {'events': [{'event_number': 1, 'image_base64': wrapped}]}
+
+        self.assertEqual(offload_content_images(content_data), 1)
+        event = content_data['events'][0]
+        self.assertEqual(event['image_key'], store_image(PNG))
+        self.assertIsNone(event['image_base64'])
+
+    def test_hosted_images_keep_their_url(self):
+        link = 'https://r2.example.com/horde/image.webp'
+        content_data = {'events': [{'event_number': 1, 'image_base64': link}]}
+
+        with self.assertNoLogs('api.services.generated_images', level='WARNING'):
+            self.assertEqual(offload_content_images(content_data), 1)
+        event = content_data['events'][0]
+        self.assertEqual((event['image_url'], event['image_base64']), (link, None))
+        self.assertNotIn('image_key', event)
+        self.assertEqual(with_image_urls(content_data)['events'][0]['image_url'], link)
+
+    def test_undecodable_payloads_are_kept(self):
+        content_data = {'events': [{'event_number': 1, 'image_base64': 'not base64!'}]}
+
+        with self.assertLogs('api.services.generated_images', level='WARNING'):
+            self.assertEqual(offload_content_images(content_data), 0)
+        self.assertEqual(content_data['events'][0]['image_base64'], 'not base64!')
+
+    def test_migration_moves_existing_payloads(self):
+        story = self.create_story([
+            {'event_number': 1, 'image_status': 'completed', 'image_base64': base64.b64encode(JPEG).decode()},
+            {'event_number': 2, 'image_status': 'failed', 'image_base64': None},
+        ])
+        migration = importlib.import_module('api.migrations.0066_offload_generated_images')
+        migration.offload_images(django_apps, None)
+
+        story.refresh_from_db()
+        first, second = story.content_data['events']
+        self.assertEqual(first['image_key'], store_image(JPEG))
+        self.assertIsNone(first['image_base64'])
+        self.assertNotIn('image_key', second)
+        self.assertEqual(offload_content_images(story.content_data), 0)
+
+    def test_list_does_not_load_content_data(self):
+        self.create_story([])
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/ai/generated-content/')
+        self.assertEqual(len(response.data), 1)
+        sql = next(q['sql'] for q in queries if 'FROM "api_generatedcontent"' in q['sql'])
+        self.assertNotIn('content_data', sql)
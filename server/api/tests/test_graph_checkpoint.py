@@ -0,0 +1,148 @@
+"""
+Tests for agent graph checkpointing and node-output reuse.
+
+Run with: python manage.py test api.tests.test_graph_checkpoint
+"""
+
+from typing import List, TypedDict
+
+from django.core.cache import cache
+from django.test import TestCase, TransactionTestCase
+from langgraph.graph import END, StateGraph
+
+from api.graph_checkpoint import (
+    DjangoCheckpointSaver,
+    clear_checkpoints,
+    reuse_node_output,
+    run_checkpointed,
+)
+from api.models import GraphCheckpoint, GraphCheckpointWrite
+
+
+class StepState(TypedDict):
+    value: int
+    visited: List[str]
+
+
+def build_graph(calls, fail_on=None, nodes=(('first', 1), ('second', 10))):
+    """Linear graph recording node calls; ``fail_on`` raises once in that node."""
+    failures = {fail_on} if fail_on else set()
+
+    def node(name, increment):
+        def run(state):
+            calls.append(name)
+            if name in failures:
+                failures.discard(name)
+                raise RuntimeError(f"{name} crashed")
+            return {'value': state['value'] + increment, 'visited': state['visited'] + [name]}
+        return run
+
+    workflow = StateGraph(StepState)
+    for name, increment in nodes:
+        workflow.add_node(name, node(name, increment))
+    workflow.set_entry_point(nodes[0][0])
+    for (name, _), (next_name, _) in zip(nodes, nodes[1:]):
+        workflow.add_edge(name, next_name)
+    workflow.add_edge(nodes[-1][0], END)
+    return workflow.compile(checkpointer=DjangoCheckpointSaver())
+
+
+class CheckpointSaverTestCase(TransactionTestCase):
+    """
+    Checkpoints round-trip through the database and resume runs.
+
+    The saver writes from LangGraph's executor threads, which cannot see
+    TestCase's uncommitted transaction.
+    """
+
+    def test_run_persists_checkpoints(self):
+        """Each step is stored and the latest state reads back intact."""
+        graph = build_graph([])
+        result = run_checkpointed(graph, 'test:1', {'value': 0, 'visited': []})
+
+        self.assertEqual(result, {'value': 11, 'visited': ['first', 'second']})
+        self.assertGreater(GraphCheckpoint.objects.filter(thread_id='test:1').count(), 2)
+        snapshot = graph.get_state({'configurable': {'thread_id': 'test:1'}})
+        self.assertEqual(snapshot.values['value'], 11)
+        self.assertEqual(snapshot.next, ())
+
+        history = list(graph.get_state_history({'configurable': {'thread_id': 'test:1'}}))
+        self.assertEqual(history[0].values, snapshot.values)
+        self.assertEqual(len(list(DjangoCheckpointSaver().list(
+            {'configurable': {'thread_id': 'test:1'}}, limit=2,
+        ))), 2)
+
+    def test_resume_skips_finished_nodes(self):
+        """A crashed run restarts at the failed node, not from the beginning."""
+        calls = []
+        graph = build_graph(calls, fail_on='second')
+        with self.assertRaises(RuntimeError):
+            run_checkpointed(graph, 'test:2', {'value': 0, 'visited': []})
+
+        result = run_checkpointed(graph, 'test:2', {'value': 0, 'visited': []})
+        self.assertEqual(calls, ['first', 'second', 'second'])
+        self.assertEqual(result['visited'], ['first', 'second'])
+
+    def test_retry_resumes_at_the_failed_node(self):
+        """Rerunning a thread that failed at node N never repeats the nodes before N."""
+        nodes = (('analyze', 1), ('plan', 10), ('draft', 100), ('review', 1000))
+        calls = []
+        graph = build_graph(calls, fail_on='draft', nodes=nodes)
+        with self.assertRaises(RuntimeError):
+            run_checkpointed(graph, 'test:5', {'value': 0, 'visited': []})
+        self.assertEqual(calls, ['analyze', 'plan', 'draft'])
+
+        calls.clear()
+        result = run_checkpointed(graph, 'test:5', {'value': 0, 'visited': []})
+        self.assertEqual(calls, ['draft', 'review'])
+        self.assertEqual(result, {'value': 1111, 'visited': ['analyze', 'plan', 'draft', 'review']})
+
+    def test_finished_run_is_not_repeated(self):
+        """Re-running a completed thread returns its final state without calls."""
+        calls = []
+        graph = build_graph(calls)
+        run_checkpointed(graph, 'test:3', {'value': 0, 'visited': []})
+        result = run_checkpointed(graph, 'test:3', {'value': 0, 'visited': []})
+
+        self.assertEqual(calls, ['first', 'second'])
+        self.assertEqual(result['value'], 11)
+
+    def test_clear_checkpoints(self):
+        """Clearing a thread removes its checkpoints and writes."""
+        run_checkpointed(build_graph([]), 'test:4', {'value': 0, 'visited': []})
+        clear_checkpoints('test:4')
+        self.assertFalse(GraphCheckpoint.objects.filter(thread_id='test:4').exists())
+        self.assertFalse(GraphCheckpointWrite.objects.filter(thread_id='test:4').exists())
+
+
+class NodeOutputReuseTestCase(TestCase):
+    """reuse_node_output shares results between jobs with the same inputs."""
+
+    def setUp(self):
+        cache.clear()
+        self.calls = 0
+
+        @reuse_node_output('test_node', ['topic'], required='analysis')
+        def analyzer(state, config=None):
+            self.calls += 1
+            if state['topic'] == 'broken':
+                return {'logs': state['logs'] + ['failed']}
+            return {'analysis': f"about {state['topic']}", 'logs': state['logs'] + ['analyzed']}
+
+        self.analyzer = analyzer
+
+    def test_same_inputs_reuse_output(self):
+        """The second job gets the cached output and its log line."""
+        self.analyzer({'topic': 'travel', 'logs': []})
+        result = self.analyzer({'topic': 'travel', 'logs': ['other job']})
+
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(result, {'analysis': 'about travel', 'logs': ['other job', 'analyzed']})
+
+    def test_different_inputs_and_failures_are_not_reused(self):
+        """Other inputs miss the cache and failed outputs are never stored."""
+        self.analyzer({'topic': 'travel', 'logs': []})
+        self.analyzer({'topic': 'food', 'logs': []})
+        self.analyzer({'topic': 'broken', 'logs': []})
+        self.analyzer({'topic': 'broken', 'logs': []})
+        self.assertEqual(self.calls, 4)
@@ -0,0 +1,161 @@
+"""
+Tests for the HLR scheduler batch API and practice word selection.
+
+Run with: python manage.py test api.tests.test_hlr
+"""
+
+from datetime import timedelta
+
+import numpy as np
+from django.test import SimpleTestCase
+from django.contrib.auth.models import User
+from django.utils import timezone
+from rest_framework.test import APITestCase, APIClient
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+
+from api.hlr import HLRScheduler
+from api.models import Vocabulary
+
+
+class HLRBatchTestCase(SimpleTestCase):
+    """The vectorized API must agree with the scalar methods."""
+
+    CASES = [
+        # correct, wrong, total, days
+        (0, 0, 0, 0),
+        (1, 0, 1, 1),
+        (3, 1, 4, 2),
+        (0, 5, 5, 10),
+        (10, 2, 12, 30),
+        (2, 2, 4, -3),
+        (200, 0, 200, 400),
+    ]
+
+    def test_matches_scalar(self):
+        """Half-life, recall and priority match the per-word methods."""
+        correct, wrong, total, days = zip(*self.CASES)
+        batch = HLRScheduler.batch_estimate(correct, wrong, total, days)
+
+        for i, (c, w, t, d) in enumerate(self.CASES):
+            if c < 100:
+                self.assertAlmostEqual(batch['half_life'][i], HLRScheduler.estimate_half_life(c, w, t))
+                self.assertAlmostEqual(batch['recall_probability'][i], HLRScheduler.predict_recall_probability(c, w, t, d))
+                self.assertAlmostEqual(batch['priority_score'][i], HLRScheduler.get_priority_score(c, w, t, d))
+
+    def test_large_counts_do_not_overflow(self):
+        """Huge correct counts clamp to MAX_HALF_LIFE instead of overflowing."""
+        batch = HLRScheduler.batch_estimate([5000], [0], [5000], [1])
+        self.assertEqual(batch['half_life'][0], HLRScheduler.MAX_HALF_LIFE)
+
+    def test_days_since_matches_timedelta(self):
+        """batch_days_since floors like timedelta.days and maps None to NaN."""
+        now = timezone.now()
+        stamps = [now - timedelta(hours=47), now - timedelta(days=3, minutes=1), None]
+        days = HLRScheduler.batch_days_since(stamps, now)
+        self.assertEqual(days[0], 1)
+        self.assertEqual(days[1], 3)
+        self.assertTrue(np.isnan(days[2]))
+
+
+class PracticeWordsTestCase(APITestCase):
+    """Tests for GET /api/practice/words/."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='hlruser', password='TestPass123!')
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+        now = timezone.now()
+        self.due = Vocabulary.objects.create(
+            word='vergessen', translation='forget', type='verb', created_by=self.user,
+            language='de', correct_count=0, wrong_count=3, total_practice_count=3,
+            last_practiced_at=now - timedelta(days=5),
+        )
+        self.mastered = Vocabulary.objects.create(
+            word='Haus', translation='house', type='noun', created_by=self.user,
+            language='de', correct_count=12, wrong_count=0, total_practice_count=12,
+            last_practiced_at=now - timedelta(hours=1),
+        )
+        self.new = Vocabulary.objects.create(
+            word='neu', translation='new', type='adjective', created_by=self.user, language='de',
+        )
+
+    def test_session_contains_scored_words(self):
+        """Every word comes back once with HLR stats from the batch pass."""
+        response = self.client.get('/api/practice/words/?limit=5')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        by_word = {item['word']: item['hlr_stats'] for item in response.json()}
+        self.assertEqual(set(by_word), {'vergessen', 'Haus', 'neu'})
+        self.assertEqual(by_word['neu']['days_since_practice'], None)
+        self.assertEqual(by_word['vergessen']['days_since_practice'], 5)
+        self.assertAlmostEqual(
+            by_word['vergessen']['recall_probability'],
+            round(HLRScheduler.predict_recall_probability(0, 3, 3, 5), 4),
+        )
+        self.assertGreater(by_word['Haus']['recall_probability'], 0.9)
+
+    def test_due_words_fill_before_mastered(self):
+        """With one slot, the due word wins over the mastered one."""
+        response = self.client.get('/api/practice/words/?limit=1')
+        self.assertEqual([item['word'] for item in response.json()], ['vergessen'])
+
+
+class HLRScheduleTestCase(SimpleTestCase):
+    """The materialized due date must agree with the recall threshold."""
+
+    def test_due_date_is_first_day_below_threshold(self):
+        """Recall is >= 0.9 the day before next_due_at and < 0.9 on it."""
+        practiced_at = timezone.now()
+        for counts in [(0, 0, 0), (1, 0, 1), (4, 1, 5), (0, 3, 3), (12, 0, 12)]:
+            half_life, due_at = HLRScheduler.schedule(*counts, practiced_at)
+            due_days = (due_at - practiced_at).days
+            self.assertLess(HLRScheduler.predict_recall_probability(*counts, due_days), 0.9)
+            self.assertGreaterEqual(HLRScheduler.predict_recall_probability(*counts, due_days - 1), 0.9)
+
+    def test_never_practiced_has_no_due_date(self):
+        """Words that were never practiced are not scheduled."""
+        self.assertIsNone(HLRScheduler.schedule(0, 0, 0, None)[1])
+
+
+class VocabByStatusTestCase(APITestCase):
+    """Tests for GET /api/vocab/by-status/ on top of next_due_at."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='statususer', password='TestPass123!')
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+        now = timezone.now()
+        words = [
+            # word, correct, wrong, total, practiced days ago
+            ('neu', 0, 0, 0, None),
+            ('schwach', 0, 3, 3, 10),
+            ('lernend', 2, 0, 2, 0),
+            ('sicher', 12, 0, 12, 0),
+        ]
+        for word, correct, wrong, total, days_ago in words:
+            Vocabulary.objects.create(
+                word=word, translation=word, type='other', created_by=self.user, language='de',
+                correct_count=correct, wrong_count=wrong, total_practice_count=total,
+                last_practiced_at=None if days_ago is None else now - timedelta(days=days_ago, hours=1),
+            )
+
+    def statuses(self, status_param):
+        response = self.client.get(f'/api/vocab/by-status/?status={status_param}')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [item['word'] for item in response.json()]
+
+    def test_save_maintains_next_due_at(self):
+        """Practiced words get a due date on save; new words don't."""
+        self.assertIsNone(Vocabulary.objects.get(word='neu').next_due_at)
+        self.assertIsNotNone(Vocabulary.objects.get(word='sicher').next_due_at)
+
+    def test_words_grouped_by_status(self):
+        """Each word lands in exactly one status group."""
+        self.assertEqual(self.statuses('new'), ['neu', 'schwach'])
+        self.assertEqual(self.statuses('learning'), ['lernend'])
+        self.assertEqual(self.statuses('mastered'), ['sicher'])
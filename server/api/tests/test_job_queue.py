@@ -0,0 +1,180 @@
+"""
+Tests for the bounded generation job queue.
+
+Run with: python manage.py test api.tests.test_job_queue
+"""
+
+import threading
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.utils import timezone
+
+from api.models import Exam
+from api.services.job_queue import GenerationJobQueue, JobQueueFull, RetryJob, get_job_queue_config
+
+
+def make_queue(**overrides):
+    """A queue without threads unless WORKERS is overridden."""
+    return GenerationJobQueue(config={**get_job_queue_config(), 'WORKERS': 0, **overrides})
+
+
+class JobSchedulingTestCase(TestCase):
+    """Lanes, per-user limits and capacity (no worker threads)."""
+
+    def test_interactive_lane_runs_first(self):
+        """Interactive jobs jump ahead of batch jobs queued earlier."""
+        queue = make_queue()
+        queue.submit(print, 'batch', user_id=1, lane='batch')
+        queue.submit(print, 'interactive', user_id=2, lane='interactive')
+
+        self.assertEqual(queue._next_job().args, ('interactive',))
+        self.assertEqual(queue._next_job().args, ('batch',))
+
+    def test_per_user_running_limit(self):
+        """A user's second interactive job waits while other users' jobs run."""
+        queue = make_queue(MAX_RUNNING_PER_USER={'interactive': 1, 'batch': 2})
+        queue.submit(print, 'first', user_id=1, lane='interactive')
+        queue.submit(print, 'second', user_id=1, lane='interactive')
+        queue.submit(print, 'other', user_id=2, lane='interactive')
+
+        self.assertEqual(queue._next_job().args, ('first',))
+        self.assertEqual(queue._next_job().args, ('other',))
+        self.assertEqual(queue.get_stats()['queued']['interactive'], 1)
+
+    def test_batch_lane_cannot_take_every_worker(self):
+        """Batch jobs stop at MAX_BATCH_RUNNING even with free workers."""
+        queue = make_queue(MAX_BATCH_RUNNING=1)
+        queue.submit(print, 'a', user_id=1, lane='batch')
+        queue.submit(print, 'b', user_id=2, lane='batch')
+        queue.submit(print, 'c', user_id=3, lane='interactive')
+
+        self.assertEqual(queue._next_job().args, ('c',))
+        self.assertEqual(queue._next_job().args, ('a',))
+        self.assertEqual(queue.get_stats()['queued']['batch'], 1)
+
+    def test_capacity_limits(self):
+        """Full queues and per-user bursts are rejected instead of growing."""
+        queue = make_queue(MAX_QUEUED=3, MAX_QUEUED_PER_USER=2)
+        queue.submit(print, user_id=1, lane='interactive')
+        queue.submit(print, user_id=1, lane='interactive')
+        with self.assertRaises(JobQueueFull):
+            queue.submit(print, user_id=1, lane='interactive')
+
+        queue.submit(print, user_id=2, lane='interactive')
+        with self.assertRaises(JobQueueFull):
+            queue.submit(print, user_id=3, lane='interactive')
+        self.assertEqual(queue.get_stats()['counters']['embedding.rejected'], 2)
+
+    def test_workers_run_submitted_jobs(self):
+        """The worker pool executes jobs and records latency."""
+        queue = make_queue(WORKERS=1, HEARTBEAT_INTERVAL=3600)
+        done = threading.Event()
+        with patch.object(queue, 'beat'), patch.object(queue, 'recover'):
+            queue.submit(done.set, user_id=1)
+            self.assertTrue(done.wait(5))
+            queue.stop()
+
+        stats = queue.get_stats()
+        self.assertEqual(stats['counters']['embedding.completed'], 1)
+        self.assertEqual(stats['running']['batch'], 0)
+
+    def test_concurrent_start_spawns_one_pool(self):
+        """Racing start() calls create WORKERS threads once, not once per caller."""
+        queue = make_queue(WORKERS=2, HEARTBEAT_INTERVAL=3600)
+        existing = set(threading.enumerate())
+        with patch.object(queue, 'beat'), patch.object(queue, 'recover'):
+            callers = [threading.Thread(target=queue.start) for _ in range(8)]
+            for caller in callers:
+                caller.start()
+            for caller in callers:
+                caller.join(5)
+            workers = [t for t in threading.enumerate() if t.name.startswith('generation-') and t not in existing]
+            queue.stop()
+
+        self.assertEqual(len(workers), 3)
+
+
+class DurableJobTestCase(TestCase):
+    """Row-backed exam jobs: parameters, attempts and recovery."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='jobs', password='TestPass123!')
+        self.exam = Exam.objects.create(user=self.user, topic='Reisen', difficulty='B1', status='processing')
+        self.queue = make_queue(MAX_ATTEMPTS=2, STALE_AFTER=60)
+
+    def test_enqueue_persists_job_state(self):
+        """Parameters and heartbeat land on the Exam row."""
+        self.queue.enqueue('exam', self.exam, params={'prompt_data': {'topic': 'Reisen'}})
+
+        self.exam.refresh_from_db()
+        self.assertEqual(self.exam.job_params, {'prompt_data': {'topic': 'Reisen'}})
+        self.assertEqual(self.exam.job_lane, 'interactive')
+        self.assertIsNotNone(self.exam.job_heartbeat_at)
+
+    def test_execute_runs_with_stored_params(self):
+        """The runner gets the row id and stored params; attempts count up."""
+        self.queue.enqueue('exam', self.exam, params={'prompt_data': {'topic': 'Reisen'}})
+        with patch('api.services.background_exam.run_exam_job') as runner:
+            self.queue._execute(self.queue._next_job())
+
+        runner.assert_called_once_with(self.exam.id, prompt_data={'topic': 'Reisen'})
+        self.exam.refresh_from_db()
+        self.assertEqual(self.exam.job_attempts, 1)
+        self.assertIsNotNone(self.exam.job_started_at)
+
+    def test_failed_runner_keeps_checkpoints_until_last_attempt(self):
+        """A failure with attempts left is retried; only the last one fails the row."""
+        prompt_data = {'topic': 'Reisen', 'level': 'B1', 'question_types': [], 'target_language': 'de'}
+        self.queue.enqueue('exam', self.exam, params={'prompt_data': prompt_data})
+        job = self.queue._next_job()
+
+        with patch('api.services.background_exam.run_checkpointed', side_effect=RuntimeError('LLM down')), \
+                patch('api.services.background_exam.clear_checkpoints') as clear:
+            with self.assertRaises(RetryJob):
+                self.queue._execute(job)
+            clear.assert_not_called()
+            self.exam.refresh_from_db()
+            self.assertEqual(self.exam.status, 'processing')
+
+            self.queue._execute(job)  # Attempt 2 of MAX_ATTEMPTS=2
+            clear.assert_called_once_with(f'exam:{self.exam.pk}')
+        self.exam.refresh_from_db()
+        self.assertEqual(self.exam.status, 'failed')
+
+    def test_orphaned_job_is_recovered(self):
+        """A row whose owner stopped heartbeating is queued again."""
+        Exam.objects.filter(pk=self.exam.pk).update(
+            job_params={'prompt_data': {}},
+            job_enqueued_at=timezone.now() - timedelta(minutes=10),
+            job_heartbeat_at=timezone.now() - timedelta(minutes=5),
+            job_attempts=1,
+        )
+
+        self.assertEqual(self.queue.recover(), 1)
+        self.assertEqual(self.queue._next_job().row_id, self.exam.pk)
+        # Claimed rows look fresh, so a second sweep leaves them alone
+        self.assertEqual(self.queue.recover(), 0)
+
+    def test_exhausted_job_is_failed(self):
+        """Rows past MAX_ATTEMPTS are marked failed instead of retried."""
+        Exam.objects.filter(pk=self.exam.pk).update(
+            job_enqueued_at=timezone.now() - timedelta(minutes=10),
+            job_heartbeat_at=timezone.now() - timedelta(minutes=5),
+            job_attempts=2,
+        )
+
+        self.assertEqual(self.queue.recover(), 0)
+        self.exam.refresh_from_db()
+        self.assertEqual(self.exam.status, 'failed')
+
+    def test_finished_rows_are_not_recovered(self):
+        """Completed exams with stale heartbeats stay untouched."""
+        Exam.objects.filter(pk=self.exam.pk).update(
+            status='completed',
+            job_enqueued_at=timezone.now() - timedelta(minutes=10),
+            job_heartbeat_at=timezone.now() - timedelta(minutes=5),
+        )
+        self.assertEqual(self.queue.recover(), 0)
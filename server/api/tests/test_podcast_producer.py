@@ -0,0 +1,101 @@
+"""
+Tests for concurrent podcast audio production.
+
+Run with: python manage.py test api.tests.test_podcast_producer
+"""
+
+import threading
+import time
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+from django.test import SimpleTestCase, override_settings
+
+from api.services.podcast.producer_agent import ProducerAgent
+
+
+SCRIPT = {'script': [
+    {'speaker': 'Host A', 'text': 'eins'},
+    {'speaker': 'Host B', 'text': 'zwei'},
+    {'speaker': 'Host A', 'text': 'drei'},
+    {'speaker': 'Host B', 'text': 'vier'},
+]}
+
+
+class FakeSpeechify:
+    """Stands in for _generate_tts_speechify; later segments answer first."""
+
+    def __init__(self, failures=None):
+        self.failures = dict(failures or {})  # text -> failures before success
+        self.calls = []
+        self.active = 0
+        self.max_active = 0
+        self.lock = threading.Lock()
+
+    def __call__(self, text, voice_id):
+        with self.lock:
+            self.calls.append(text)
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        try:
+            time.sleep(0.05 if text == 'eins' else 0.01)
+            with self.lock:
+                if self.failures.get(text, 0) > 0:
+                    self.failures[text] -= 1
+                    return None, None
+            marks = [{'value': text, 'start_time': 0, 'end_time': 100}]
+            return text.encode(), marks
+        finally:
+            with self.lock:
+                self.active -= 1
+
+
+def make_podcast():
+    return SimpleNamespace(id=1, audio_file=MagicMock(), save=MagicMock())
+
+
+@override_settings(
+    PODCAST_PRODUCER={'TTS_CONCURRENCY': 2, 'SEGMENT_RETRIES': 1, 'RETRY_BACKOFF': 0},
+    TTS_CACHE={'ENABLED': False},
+)
+class ProducerAgentTestCase(SimpleTestCase):
+    """Segments are synthesized concurrently but assembled in script order."""
+
+    def run_producer(self, tts):
+        user = SimpleNamespace(profile=SimpleNamespace(target_language='de', speechify_api_key='key'))
+        producer = ProducerAgent(user)
+        podcast = make_podcast()
+        with patch.object(producer, '_generate_tts_speechify', tts):
+            return producer.run(SCRIPT, podcast), podcast
+
+    def test_audio_and_marks_keep_script_order(self):
+        """Offsets accumulate in script order even when segments finish out of order."""
+        tts = FakeSpeechify()
+        success, podcast = self.run_producer(tts)
+
+        self.assertTrue(success)
+        self.assertEqual(tts.max_active, 2)
+        _, content = podcast.audio_file.save.call_args.args
+        self.assertEqual(content.read(), b'einszweidreivier')
+        self.assertEqual(
+            [(m['word'], m['time'], m['speaker']) for m in podcast.speech_marks],
+            [('eins', 0, 'Host A'), ('zwei', 100, 'Host B'), ('drei', 200, 'Host A'), ('vier', 300, 'Host B')],
+        )
+
+    def test_failed_segment_is_retried_alone(self):
+        """A transient failure re-synthesizes that segment only."""
+        tts = FakeSpeechify(failures={'drei': 1})
+        success, _ = self.run_producer(tts)
+
+        self.assertTrue(success)
+        self.assertEqual(tts.calls.count('drei'), 2)
+        self.assertEqual(tts.calls.count('eins'), 1)
+
+    def test_segment_out_of_retries_fails_episode(self):
+        """A segment that keeps failing fails the podcast without saving audio."""
+        tts = FakeSpeechify(failures={'zwei': 5})
+        success, podcast = self.run_producer(tts)
+
+        self.assertFalse(success)
+        self.assertEqual(tts.calls.count('zwei'), 2)
+        podcast.audio_file.save.assert_not_called()
@@ -0,0 +1,169 @@
+"""
+Tests for the per-user vector index behind semantic vocabulary search.
+
+Run with: python manage.py test api.tests.test_semantic_search
+"""
+
+import shutil
+import tempfile
+from unittest.mock import patch
+
+import numpy as np
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase, TestCase, override_settings
+from rest_framework.test import APITestCase, APIClient
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+
+from api.fields import pack_vector, unpack_vector
+from api.models import Vocabulary
+from api.vector_index import VectorIndex, get_vector_index_config
+
+
+class PackedVectorTestCase(SimpleTestCase):
+    """Tests for the packed binary embedding format."""
+
+    def test_float32_round_trip_is_zero_copy(self):
+        """float32 payloads decode to a read-only view over the bytes."""
+        data = pack_vector([0.5, -1.25, 2.0])
+        vector = unpack_vector(data)
+
+        self.assertEqual(len(data), 4 + 3 * 4)
+        self.assertEqual(vector.dtype, np.float32)
+        self.assertEqual(vector.tolist(), [0.5, -1.25, 2.0])
+        self.assertFalse(vector.flags.writeable)
+
+    def test_quantized_formats(self):
+        """float16 and int8 trade a little precision for size."""
+        values = np.linspace(-1, 1, 1536, dtype=np.float32)
+        for dtype, size, tolerance in [('float16', 4 + 1536 * 2, 1e-3), ('int8', 8 + 1536, 1e-2)]:
+            data = pack_vector(values, dtype)
+            self.assertEqual(len(data), size)
+            np.testing.assert_allclose(unpack_vector(data), values, atol=tolerance)
+
+    def test_rejects_unknown_data(self):
+        """Non-packed bytes raise instead of decoding garbage."""
+        with self.assertRaises(ValueError):
+            unpack_vector(b'[0.1, 0.2]')
+
+
+class VectorIndexTestCase(TestCase):
+    """Tests for VectorIndex build, search, incremental updates and persistence."""
+
+    def setUp(self):
+        self.index_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.index_dir, ignore_errors=True)
+        self.config = {**get_vector_index_config(), 'DIR': self.index_dir}
+
+        self.user = User.objects.create_user(username='vectors', password='TestPass123!')
+        self.words = {}
+        for word, embedding in [
+            ('Zug', [1.0, 0.0, 0.0]),
+            ('Bahn', [0.9, 0.1, 0.0]),
+            ('Apfel', [0.0, 0.0, 2.0]),
+        ]:
+            self.words[word] = Vocabulary.objects.create(
+                word=word, translation=word, type='noun', created_by=self.user,
+                language='de', embedding=embedding,
+            )
+        Vocabulary.objects.create(word='ohne', translation='without', type='other', created_by=self.user, language='de')
+
+    def make_index(self):
+        return VectorIndex(self.user.id, 'de', config=self.config)
+
+    def test_embedding_round_trips_and_is_deferred(self):
+        """Embeddings come back as float32 arrays but stay out of default queries."""
+        vocab = Vocabulary.objects.get(pk=self.words['Apfel'].pk)
+        self.assertIn('embedding', vocab.get_deferred_fields())
+        self.assertEqual(vocab.embedding.tolist(), [0.0, 0.0, 2.0])
+
+    def test_search_ranks_by_cosine(self):
+        """Results are sorted by cosine similarity and cut at k."""
+        hits, total = self.make_index().search([2.0, 0.0, 0.0], k=2, min_similarity=0.2)
+
+        self.assertEqual([vocab_id for vocab_id, _ in hits], [self.words['Zug'].id, self.words['Bahn'].id])
+        self.assertAlmostEqual(hits[0][1], 1.0, places=5)
+        self.assertEqual(total, 2)
+
+    def test_upsert_and_remove(self):
+        """Saved embeddings are reflected without a rebuild."""
+        index = self.make_index()
+        index.ensure_fresh()
+        apfel = self.words['Apfel']
+        apfel.embedding = [1.0, 0.0, 0.0]
+        apfel.save(update_fields=['embedding'])
+
+        with patch.object(index, 'rebuild', side_effect=AssertionError("unexpected rebuild")):
+            index.upsert(apfel.id, apfel.embedding)
+            hits, _ = index.search([1.0, 0.0, 0.0], k=3, min_similarity=0.99)
+            self.assertIn(apfel.id, [vocab_id for vocab_id, _ in hits])
+
+        index.remove(self.words['Zug'].id)
+        self.assertNotIn(self.words['Zug'].id, index.ids)
+
+    def test_persisted_index_is_reused(self):
+        """A second process loads the file instead of rebuilding."""
+        self.make_index().ensure_fresh()
+
+        index = self.make_index()
+        with patch.object(index, 'rebuild', side_effect=AssertionError("unexpected rebuild")):
+            index.ensure_fresh()
+        self.assertEqual(len(index), 3)
+
+    def test_row_count_mismatch_rebuilds(self):
+        """Rows added behind the index's back trigger a rebuild."""
+        index = self.make_index()
+        index.ensure_fresh()
+        Vocabulary.objects.create(
+            word='Bus', translation='bus', type='noun', created_by=self.user,
+            language='de', embedding=[0.8, 0.2, 0.0],
+        )
+
+        hits, _ = index.search([1.0, 0.0, 0.0], k=10)
+        self.assertEqual(len(index), 4)
+        self.assertEqual(len(hits), 4)
+
+
+class SemanticSearchViewTestCase(APITestCase):
+    """Tests for POST /api/vocab/semantic-search/."""
+
+    def setUp(self):
+        self.index_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.index_dir, ignore_errors=True)
+        settings_override = override_settings(VECTOR_INDEX={'DIR': self.index_dir})
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.user = User.objects.create_user(username='searcher', password='TestPass123!')
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+        Vocabulary.objects.create(
+            word='Zug', translation='train', type='noun', created_by=self.user,
+            language='de', embedding=[1.0, 0.0],
+        )
+        Vocabulary.objects.create(
+            word='Apfel', translation='apple', type='noun', created_by=self.user,
+            language='de', embedding=[0.0, 1.0],
+        )
+
+    @patch('api.embedding_service.EmbeddingService.generate_embedding', return_value=[0.9, 0.1])
+    def test_returns_top_matches(self, _):
+        """Only words above the similarity threshold come back, best first."""
+        response = self.client.post(
+            '/api/vocab/semantic-search/', {'query': 'transport', 'api_key': 'k', 'limit': 5}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([r['vocab']['word'] for r in response.data['results']], ['Zug'])
+        self.assertEqual(response.data['total'], 1)
+
+    @patch('api.embedding_service.EmbeddingService.generate_embedding')
+    def test_no_embeddings(self, generate):
+        """Users without embedded vocabulary get a hint and no API call is made."""
+        Vocabulary.objects.filter(created_by=self.user).update(embedding=None)
+        response = self.client.post(
+            '/api/vocab/semantic-search/', {'query': 'transport', 'api_key': 'k'}, format='json'
+        )
+        self.assertEqual(response.data['results'], [])
+        generate.assert_not_called()
@@ -0,0 +1,138 @@
+"""
+Tests for the shared TTS audio cache and cached speech endpoints.
+
+Run with: python manage.py test api.tests.test_tts_cache
+"""
+
+import os
+import shutil
+import tempfile
+from unittest.mock import MagicMock, patch
+
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase
+from rest_framework.test import APITestCase
+
+from api.tts_cache import TTSAudioCache, tts_cache_key
+
+
+class TTSCacheKeyTestCase(SimpleTestCase):
+    """Keys identify everything that changes the audio."""
+
+    def test_whitespace_is_normalized(self):
+        self.assertEqual(
+            tts_cache_key('google', 'de-DE-A', 'de-DE', 1.0, 0.0, 'der  Hund\n'),
+            tts_cache_key('google', 'de-DE-A', 'DE-de', 1, 0, 'der Hund'),
+        )
+
+    def test_voice_settings_change_the_key(self):
+        base = tts_cache_key('google', 'de-DE-A', 'de-DE', 1.0, 0.0, 'der Hund')
+        self.assertNotEqual(base, tts_cache_key('google', 'de-DE-B', 'de-DE', 1.0, 0.0, 'der Hund'))
+        self.assertNotEqual(base, tts_cache_key('google', 'de-DE-A', 'de-DE', 0.8, 0.0, 'der Hund'))
+        self.assertNotEqual(base, tts_cache_key('deepgram', 'de-DE-A', 'de-DE', 1.0, 0.0, 'der Hund'))
+        self.assertNotEqual(base, tts_cache_key('google', 'de-DE-A', 'de-DE', 1.0, 0.0, 'Der Hund'))
+
+
+class TTSAudioCacheTestCase(SimpleTestCase):
+    """Storage, hit counting and LRU eviction."""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+
+    def key(self, text):
+        return tts_cache_key('google', 'v', 'de', 1.0, 0.0, text)
+
+    def test_round_trip_with_marks(self):
+        cache = TTSAudioCache(directory=self.directory, persist_to_storage=False)
+        marks = [{'value': 'Hund', 'start_time': 0, 'end_time': 300}]
+
+        self.assertIsNone(cache.get(self.key('Hund')))
+        cache.put(self.key('Hund'), b'audio', marks)
+        entry = cache.get(self.key('Hund'))
+
+        self.assertEqual(entry.read(), b'audio')
+        self.assertEqual(entry.marks, marks)
+        stats = cache.get_stats()
+        self.assertEqual((stats['hits'], stats['misses'], stats['stores']), (1, 1, 1))
+        self.assertEqual(stats['hit_rate'], 0.5)
+
+    def test_get_or_synthesize_calls_provider_once(self):
+        cache = TTSAudioCache(directory=self.directory, persist_to_storage=False)
+        synthesize = MagicMock(return_value=(b'audio', None))
+
+        first, first_hit = cache.get_or_synthesize(self.key('Katze'), synthesize)
+        second, second_hit = cache.get_or_synthesize(self.key('Katze'), synthesize)
+
+        self.assertEqual((first_hit, second_hit), (False, True))
+        self.assertEqual(first.path, second.path)
+        synthesize.assert_called_once()
+
+    def test_least_recently_used_files_are_evicted(self):
+        """Over the byte cap, files not read recently go first."""
+        cache = TTSAudioCache(directory=self.directory, max_bytes=250, persist_to_storage=False)
+        for index, word in enumerate(['eins', 'zwei']):
+            cache.put(self.key(word), b'x' * 100)
+            os.utime(cache.path_for(self.key(word)), (1000 + index, 1000 + index))
+        cache.get(self.key('eins'))  # Now the most recently used
+
+        cache.put(self.key('drei'), b'x' * 100)
+
+        self.assertIsNotNone(cache.get(self.key('eins')))
+        self.assertIsNone(cache.get(self.key('zwei')))
+        self.assertIsNotNone(cache.get(self.key('drei')))
+        self.assertEqual(cache.get_stats()['evictions'], 1)
+
+    def test_invalid_keys_miss(self):
+        cache = TTSAudioCache(directory=self.directory, persist_to_storage=False)
+        self.assertIsNone(cache.get('../../etc/passwd'))
+
+
+class CachedSpeechEndpointTestCase(APITestCase):
+    """generate_speech reuses cached audio; cached audio supports Range."""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+        self.cache = TTSAudioCache(directory=self.directory, persist_to_storage=False)
+        patcher = patch('api.tts_views.get_tts_cache', return_value=self.cache)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.user = User.objects.create_user(username='listener', password='TestPass123!')
+        self.user.profile.deepgram_api_key = 'dg-key'
+        self.user.profile.save()
+        self.client.force_authenticate(self.user)
+
+    def deepgram_response(self):
+        response = MagicMock(status_code=200)
+        response.iter_content.return_value = [b'0123', b'4567', b'89']
+        return response
+
+    def test_second_request_is_served_from_cache(self):
+        with patch('api.tts_views.requests.post', return_value=self.deepgram_response()) as post:
+            first = self.client.post('/api/tts/generate/', {'text': 'der Hund'}, format='json')
+            self.assertEqual(b''.join(first.streaming_content), b'0123456789')
+            second = self.client.post('/api/tts/generate/', {'text': 'der  Hund'}, format='json')
+
+        post.assert_called_once()
+        self.assertEqual(first['X-TTS-Cache'], 'miss')
+        self.assertEqual(second['X-TTS-Cache'], 'hit')
+        self.assertEqual(b''.join(second.streaming_content), b'0123456789')
+        self.assertEqual(second['X-TTS-Audio-Key'], first['X-TTS-Audio-Key'])
+
+    def test_range_requests(self):
+        key = tts_cache_key('deepgram', 'aura-asteria-en', '', 1.0, 0.0, 'der Hund')
+        self.cache.put(key, b'0123456789')
+        url = f'/api/tts/audio/{key}/'
+
+        partial = self.client.get(url, HTTP_RANGE='bytes=2-5')
+        self.assertEqual(partial.status_code, 206)
+        self.assertEqual(partial['Content-Range'], 'bytes 2-5/10')
+        self.assertEqual(b''.join(partial.streaming_content), b'2345')
+
+        suffix = self.client.get(url, HTTP_RANGE='bytes=-3')
+        self.assertEqual(b''.join(suffix.streaming_content), b'789')
+
+        self.assertEqual(self.client.get(url, HTTP_RANGE='bytes=20-').status_code, 416)
+        self.assertEqual(self.client.get(f'/api/tts/audio/{"0" * 64}/').status_code, 404)
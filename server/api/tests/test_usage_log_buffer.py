@@ -0,0 +1,102 @@
+"""
+Tests for buffered API usage logging.
+
+Run with: python manage.py test api.tests.test_usage_log_buffer
+"""
+
+from unittest.mock import MagicMock, patch
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import SimpleTestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+
+from api.admin_models import APIUsageLog
+from api.usage_log_buffer import APIUsageLogBuffer, summarize_payload
+
+
+class SummarizePayloadTestCase(SimpleTestCase):
+    """Stored payloads are redacted and size-capped."""
+
+    def test_secrets_are_redacted(self):
+        payload = summarize_payload({'prompt': 'hi', 'api_key': 'sk-1', 'nested': [{'token': 't'}]}, 2000)
+        self.assertEqual(payload, {'prompt': 'hi', 'api_key': '[redacted]', 'nested': [{'token': '[redacted]'}]})
+
+    def test_large_payloads_are_truncated(self):
+        payload = summarize_payload({'text': 'x' * 5000}, 100)
+        self.assertTrue(payload['truncated'])
+        self.assertEqual(len(payload['preview']), 100)
+        self.assertGreater(payload['size'], 5000)
+
+
+class RingBufferTestCase(SimpleTestCase):
+    """The buffer never grows past MAX_BUFFERED and counts what it drops."""
+
+    def test_oldest_records_are_dropped(self):
+        buffer = APIUsageLogBuffer(flush_interval=0, max_buffered=3, write_behind=True)
+        with patch.object(connection, 'in_atomic_block', False):
+            for status_code in range(5):
+                buffer.log(user_id=1, provider='gemini', endpoint='/api/ai/', response_status=status_code,
+                           response_time_ms=1)
+
+        stats = buffer.get_stats()
+        self.assertEqual((stats['pending'], stats['dropped'], stats['logged']), (3, 2, 5))
+        self.assertEqual([r.fields['response_status'] for r in buffer._records], [2, 3, 4])
+
+
+@override_settings(API_USAGE_LOG={'PAYLOAD_SAMPLE_RATE': 1.0})
+class APIUsageMiddlewareTestCase(APITestCase):
+    """The middleware hands rows to the buffer instead of inserting them."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='logged', password='TestPass123!')
+        self.client.force_login(self.user)
+
+    def test_request_thread_does_not_insert(self):
+        buffer = MagicMock()
+        with patch('api.middleware.get_usage_log_buffer', return_value=buffer), \
+             CaptureQueriesContext(connection) as queries:
+            self.client.post('/api/ai/unknown/', {'prompt': 'hi', 'api_key': 'sk-1'}, format='json')
+
+        self.assertFalse([q for q in queries if 'apiusagelog' in q['sql'].lower()])
+        fields = buffer.log.call_args.kwargs
+        self.assertEqual(fields['user_id'], self.user.id)
+        self.assertEqual(fields['request_data'], {'prompt': 'hi', 'api_key': '[redacted]'})
+        self.assertFalse(fields['success'])
+
+    def test_buffered_rows_are_bulk_written(self):
+        buffer = APIUsageLogBuffer(flush_interval=0, write_behind=True)
+        with patch('api.middleware.get_usage_log_buffer', return_value=buffer), \
+             patch.object(connection, 'in_atomic_block', False):
+            for _ in range(3):
+                self.client.post('/api/ai/unknown/', {'prompt': 'hi'}, format='json')
+        self.assertEqual(APIUsageLog.objects.count(), 0)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(buffer.flush(), 3)
+        self.assertEqual(sum('INSERT' in q['sql'] for q in queries), 1)
+        self.assertEqual(APIUsageLog.objects.filter(user=self.user, endpoint='/api/ai/unknown/').count(), 3)
+
+
+class FailedFlushTestCase(TransactionTestCase):
+    """A row the database rejects is retried alone and eventually dropped; its batch still lands."""
+
+    def test_bad_row_does_not_block_the_batch(self):
+        user = User.objects.create_user(username='kept', password='TestPass123!')
+        buffer = APIUsageLogBuffer(flush_interval=0, write_behind=True)
+        with patch.object(connection, 'in_atomic_block', False):
+            for user_id in (user.id, user.id + 1000, user.id):  # The middle user does not exist
+                buffer.log(user_id=user_id, provider='gemini', endpoint='/api/ai/', response_status=200,
+                           response_time_ms=1)
+
+        self.assertEqual(buffer.flush(), 2)
+        self.assertEqual(APIUsageLog.objects.filter(user=user).count(), 2)
+        self.assertEqual([entry.attempts for entry in buffer._records], [1])
+
+        buffer.log(user_id=user.id, provider='gemini', endpoint='/api/ai/', response_status=200, response_time_ms=1)
+        for _ in range(2):
+            buffer.flush()
+        stats = buffer.get_stats()
+        self.assertEqual((stats['pending'], stats['dead_lettered']), (0, 1))
+        self.assertEqual(APIUsageLog.objects.filter(user=user).count(), 3)
@@ -0,0 +1,124 @@
+"""
+Tests for the incrementally maintained dashboard statistics rollup.
+
+Run with: python manage.py test api.tests.test_user_stats
+"""
+
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, APITestCase, force_authenticate
+
+from api.models import Quiz, UserStatsSnapshot, Vocabulary
+from api.services.user_stats import (
+    ACTIVITY_DAYS, TREND_DAYS, get_user_stats, rebuild_user_stats, serialize_user_stats,
+)
+from api.views.practice_views import update_progress
+
+
+class UserStatsEndpointTestCase(APITestCase):
+    """Practice, additions and deletions keep the snapshot equal to a full recompute."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='stats', password='TestPass123!')
+        self.client.force_authenticate(self.user)
+        self.words = [
+            Vocabulary.objects.create(word=f'Wort{i}', translation=f'word {i}', type='noun',
+                                      created_by=self.user, language='de')
+            for i in range(6)
+        ]
+
+    def rebuilt(self):
+        snapshot = UserStatsSnapshot.objects.get(user=self.user)
+        expected = serialize_user_stats(rebuild_user_stats(self.user.id), timezone.localdate())
+        return snapshot, expected
+
+    def test_incremental_updates_match_rebuild(self):
+        self.assertEqual(self.client.get('/api/stats/').data['total_words'], 6)
+
+        for difficulty in ('good', 'easy', 'easy', 'again'):
+            self.client.post('/api/practice/result/', {'word_id': self.words[0].id, 'difficulty': difficulty},
+                             format='json')
+        self.client.post('/api/practice/result/', {'word_id': self.words[1].id, 'difficulty': 'again'},
+                         format='json')
+        for _ in range(5):
+            # The router's progress/<pk>/ route shadows progress/update/, so call the view directly
+            request = APIRequestFactory().post('/api/progress/update/', {'vocab_id': self.words[2].id, 'grade': 5},
+                                               format='json')
+            force_authenticate(request, self.user)
+            update_progress(request)
+        Vocabulary.objects.create(word='Neu', translation='new', type='noun', created_by=self.user, language='de')
+        self.words[5].delete()
+
+        data = self.client.get('/api/stats/').data
+        self.assertEqual(data['total_words'], 6)
+        self.assertEqual(data['quizzes_this_week'], 10)
+        self.assertEqual(data['streak'], 1)
+        self.assertEqual(data['activity_log'], {timezone.localdate().strftime('%Y-%m-%d'): 10})
+
+        snapshot, expected = self.rebuilt()
+        self.assertEqual(data, expected)
+        self.assertEqual(snapshot.srs_mastered, 1)
+
+    def test_read_is_a_single_query(self):
+        self.client.get('/api/stats/')
+        Vocabulary.objects.bulk_create([
+            Vocabulary(word=f'Extra{i}', translation='x', type='noun', created_by=self.user, language='de',
+                       last_practiced_at=timezone.now(), total_practice_count=1)
+            for i in range(50)
+        ])
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/stats/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(queries), 1)
+        self.assertIn('api_userstatssnapshot', queries[0]['sql'])
+
+
+class UserStatsRollupTestCase(TestCase):
+    """Day arrays, streaks and the periodic HLR recompute."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='rollup', password='TestPass123!')
+        self.word = Vocabulary.objects.create(word='Haus', translation='house', type='noun',
+                                              created_by=self.user, language='de')
+
+    def add_quiz(self, days_ago):
+        quiz = Quiz.objects.create(user=self.user, vocab=self.word, score=100)
+        Quiz.objects.filter(pk=quiz.pk).update(timestamp=timezone.now() - timedelta(days=days_ago))
+
+    def test_streak_and_heatmap_from_rebuild(self):
+        for days_ago in (1, 2, 3, 5, 400):
+            self.add_quiz(days_ago)
+        snapshot = rebuild_user_stats(self.user.id)
+
+        self.assertEqual(len(snapshot.activity_counts), ACTIVITY_DAYS)
+        self.assertEqual(len(snapshot.words_added_counts), TREND_DAYS)
+        self.assertEqual(snapshot.activity_counts[-6:], [1, 0, 1, 1, 1, 0])
+
+        today = timezone.localdate()
+        stats = serialize_user_stats(snapshot, today)
+        self.assertEqual((stats['streak'], stats['quizzes_this_week']), (3, 4))
+        self.assertEqual(len(stats['activity_log']), 4)
+
+        # Two days on, the streak has lapsed and the arrays shift without a write
+        later = serialize_user_stats(snapshot, today + timedelta(days=2))
+        self.assertEqual((later['streak'], later['quizzes_this_week']), (0, 3))
+        self.assertEqual(later['activity_log'], stats['activity_log'])
+
+    def test_stale_snapshot_is_recomputed(self):
+        self.word.total_practice_count = 3
+        self.word.correct_count = 3
+        self.word.last_practiced_at = timezone.now()
+        self.word.save()
+        self.assertEqual(get_user_stats(self.user)['mastered_words'], 1)
+
+        # Recall decays; the rollup only notices on recompute
+        Vocabulary.objects.filter(pk=self.word.pk).update(last_practiced_at=timezone.now() - timedelta(days=60))
+        UserStatsSnapshot.objects.filter(user=self.user).update(computed_at=timezone.now() - timedelta(days=1))
+        stats = get_user_stats(self.user)
+        self.assertEqual((stats['mastered_words'], stats['needs_review']), (0, 1))
@@ -4,12 +4,17 @@ Tests for vocabulary CRUD operations.
 Run with: python manage.py test api.tests.test_vocabulary
 """
 
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
 from django.test import TestCase, Client
+from django.test.utils import CaptureQueriesContext
 from django.contrib.auth.models import User
 from rest_framework.test import APITestCase, APIClient
 from rest_framework import status
 from rest_framework.authtoken.models import Token
-from api.models import Vocabulary, UserProfile
+from api.models import Tag, Vocabulary, UserProfile
+import csv
+import io
 import json
 
 
@@ -193,3 +198,168 @@ class VocabularyValidationTestCase(APITestCase):
             }
         )
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class VocabularyListPerformanceTestCase(APITestCase):
+    """Test cases for vocabulary list pagination, projection and query count."""
+    
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='biglist',
+            email='big@example.com',
+            password='TestPass123!'
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        self.vocab_url = '/api/vocab/'
+        self.tag = Tag.objects.create(name='animals', user=self.user)
+    
+    def add_words(self, count):
+        for i in range(count):
+            vocab = Vocabulary.objects.create(
+                word=f'Wort{i}',
+                translation=f'Word {i}',
+                type='noun',
+                created_by=self.user,
+                language='de'
+            )
+            vocab.tags.add(self.tag)
+            if i:
+                vocab.related_words.add(previous)
+            previous = vocab
+    
+    def count_list_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.vocab_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return len(queries)
+    
+    def test_query_count_does_not_grow_with_list(self):
+        """Tags and related words are prefetched, not queried per row."""
+        self.client.get(self.vocab_url)  # First request also records last_login
+        self.add_words(3)
+        small = self.count_list_queries()
+        self.add_words(10)
+        self.assertEqual(self.count_list_queries(), small)
+        
+        word = self.client.get(self.vocab_url).json()[0]
+        self.assertEqual(word['tags'], ['animals'])
+        self.assertEqual(len(word['related_words']), 1)
+    
+    def test_cursor_pagination_is_opt_in(self):
+        """Plain requests get the full list; page_size returns cursor pages."""
+        self.add_words(5)
+        self.assertEqual(len(self.client.get(self.vocab_url).json()), 5)
+        
+        first = self.client.get(self.vocab_url, {'page_size': 2}).json()
+        self.assertEqual([w['word'] for w in first['results']], ['Wort4', 'Wort3'])
+        self.assertIsNone(first['previous'])
+        
+        second = self.client.get(first['next']).json()
+        self.assertEqual([w['word'] for w in second['results']], ['Wort2', 'Wort1'])
+    
+    def test_cursor_pages_over_duplicate_sort_values(self):
+        """Rows sharing the requested ordering value are neither skipped nor repeated."""
+        ids = [
+            Vocabulary.objects.create(word='Bank', translation=f'Meaning {i}', created_by=self.user, language='de').id
+            for i in range(5)
+        ]
+        
+        seen = []
+        url, params = self.vocab_url, {'ordering': 'word', 'page_size': 2}
+        with CaptureQueriesContext(connection) as queries:
+            while url:
+                page = self.client.get(url, params).json()
+                seen += [w['id'] for w in page['results']]
+                url, params = page['next'], None
+        self.assertEqual(seen, sorted(ids))
+        sql = next(q['sql'] for q in queries if 'ORDER BY "api_vocabulary"."word"' in q['sql'])
+        self.assertIn('"api_vocabulary"."word" ASC, "api_vocabulary"."id" ASC', sql)
+    
+    def test_fields_projection(self):
+        """fields= limits the response to the requested fields (id always included)."""
+        self.add_words(2)
+        response = self.client.get(self.vocab_url, {'fields': 'word,translation'})
+        self.assertEqual(set(response.json()[0]), {'id', 'word', 'translation'})
+        
+        with_tags = self.client.get(self.vocab_url, {'fields': 'word,tags'}).json()[0]
+        self.assertEqual(with_tags['tags'], ['animals'])
+
+
+class VocabularyCSVTestCase(APITestCase):
+    """Test cases for bulk CSV import and streaming export."""
+    
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='csvuser',
+            email='csv@example.com',
+            password='TestPass123!'
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        Tag.objects.create(name='animals', user=self.user)
+        Vocabulary.objects.create(
+            word='Hund', translation='dog', type='noun',
+            created_by=self.user, language='de', native_language='en'
+        )
+    
+    def upload(self, rows, header='Word,Translation,Type,Example,Tags,Synonyms,Antonyms'):
+        body = '﻿' + '\n'.join([header] + rows) + '\n'
+        upload = SimpleUploadedFile('deck.csv', body.encode('utf-8'), content_type='text/csv')
+        return self.client.post('/api/vocab/import_csv/', {'file': upload}, format='multipart')
+    
+    def test_import_dedupes_and_links_tags(self):
+        """Existing and repeated words are skipped; tags are reused or created once."""
+        response = self.upload([
+            'hund,dog,noun,,animals,,',
+            'Katze,cat,noun,Die Katze schläft.,"animals, pets",Mieze,',
+            'katze,cat,noun,,,,',
+            ',missing word,noun,,,,',
+            'Laufen,,verb,,,,',
+            'Vogel,bird,,,pets,,',
+        ])
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['created'], 2)
+        self.assertEqual(response.data['skipped'], 3)
+        self.assertEqual(len(response.data['errors']), 1)
+        self.assertIn('Laufen', response.data['errors'][0])
+        
+        katze = Vocabulary.objects.get(word='Katze', created_by=self.user)
+        self.assertEqual(sorted(katze.tags.values_list('name', flat=True)), ['animals', 'pets'])
+        self.assertEqual(katze.synonyms, ['Mieze'])
+        self.assertIsNotNone(katze.predicted_half_life)
+        self.assertEqual(Vocabulary.objects.get(word='Vogel').type, 'other')
+        self.assertEqual(Tag.objects.filter(user=self.user).count(), 2)
+    
+    def test_import_query_count_does_not_grow_with_rows(self):
+        """Words, tags and links are bulk inserted rather than written per row."""
+        self.client.get('/api/vocab/')  # First request also records last_login
+        
+        def count(prefix, size):
+            rows = [f'{prefix}{i},t{i},noun,,"animals, {prefix}",,' for i in range(size)]
+            with CaptureQueriesContext(connection) as queries:
+                response = self.upload(rows)
+            self.assertEqual(response.data['created'], size)
+            return len(queries)
+        
+        count('warm', 1)  # Creates the shared 'animals' tag, so both runs below find it
+        rows = 20
+        self.assertLessEqual(count('gross', 2 * rows), count('klein', rows))
+    
+    def test_export_streams_words_with_tags(self):
+        """Export is a streamed CSV that round-trips through import."""
+        self.upload(['Katze,cat,noun,,"animals, pets",Mieze,'])
+        
+        response = self.client.get('/api/vocab/export_csv/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        rows = list(csv.reader(io.StringIO(b''.join(response.streaming_content).decode('utf-8'))))
+        
+        self.assertEqual(rows[0][:5], ['Word', 'Translation', 'Type', 'Example', 'Tags'])
+        exported = {row[0]: row for row in rows[1:]}
+        self.assertEqual(set(exported), {'Hund', 'Katze'})
+        self.assertEqual(exported['Katze'][4], 'animals, pets')
+        self.assertEqual(exported['Katze'][5], 'Mieze')
@@ -0,0 +1,339 @@
+"""
+Content-addressed cache for synthesized speech, shared by all users.
+
+Audio is keyed by everything that changes the output: provider, voice,
+language, rate, pitch and the normalized text. Every learner practicing
+"der Hund" with the same voice therefore gets the same file, and repeated
+podcast lines are synthesized once.
+
+Entries live in ``settings.TTS_CACHE['DIR']`` as ``<key[:2]>/<key>.mp3``,
+plus a ``.json`` sidecar for speech marks when the provider returns them.
+The directory is capped at MAX_BYTES. When it grows past the cap, the
+least recently used files are evicted (hits refresh the file mtime) until
+it is back under EVICT_TO of the cap.
+
+With PERSIST_TO_STORAGE, entries are also written to ``default_storage``
+(S3 in production) and read back on a local miss, so the cache survives
+redeploys on ephemeral disks.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+import unicodedata
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_TTS_CACHE_CONFIG = {
+    'ENABLED': True,
+    'DIR': os.path.join(settings.BASE_DIR, 'tts_cache'),
+    'MAX_BYTES': 512 * 1024 * 1024,
+    'EVICT_TO': 0.9,              # Fraction of MAX_BYTES kept after an eviction
+    'PERSIST_TO_STORAGE': False,  # Also keep entries in default_storage
+    'STORAGE_PREFIX': 'tts_cache',
+}
+
+KEY_RE = re.compile(r'^[0-9a-f]{64}$')
+
+
+def get_tts_cache_config() -> Dict[str, Any]:
+    """Return TTS_CACHE settings merged over the defaults."""
+    return {**DEFAULT_TTS_CACHE_CONFIG, **getattr(settings, 'TTS_CACHE', {})}
+
+
+def normalize_tts_text(text: str) -> str:
+    """Unicode-normalize and collapse whitespace; case and punctuation change speech, so they stay."""
+    return unicodedata.normalize('NFC', ' '.join((text or '').split()))
+
+
+def tts_cache_key(provider: str, voice: str, language: str, rate: float, pitch: float, text: str) -> str:
+    """Content address of one synthesis request."""
+    parts = [
+        provider,
+        voice or '',
+        (language or '').lower(),
+        f"{float(rate):.2f}",
+        f"{float(pitch):.2f}",
+        normalize_tts_text(text),
+    ]
+    return hashlib.sha256('\x1f'.join(parts).encode('utf-8')).hexdigest()
+
+
+@dataclass
+class CachedAudio:
+    """A cached audio file and its speech marks (None when not stored)."""
+    key: str
+    path: str
+    size: int
+    marks: Optional[List[Dict[str, Any]]] = None
+
+    def read(self) -> bytes:
+        with open(self.path, 'rb') as f:
+            return f.read()
+
+
+class TTSAudioCache:
+    """
+    Byte-bounded LRU cache of synthesized audio on local disk.
+
+    Usage:
+        cache = get_tts_cache()
+        key = tts_cache_key('google', voice, language, rate, pitch, text)
+        entry, hit = cache.get_or_synthesize(key, lambda: (audio_bytes, marks))
+
+    Counters are per process.
+    """
+
+    _instance: Optional['TTSAudioCache'] = None
+
+    def __init__(self, directory: Optional[str] = None, max_bytes: Optional[int] = None, persist_to_storage: Optional[bool] = None):
+        config = get_tts_cache_config()
+        self.directory = directory or config['DIR']
+        self.max_bytes = max_bytes if max_bytes is not None else config['MAX_BYTES']
+        self.evict_to = config['EVICT_TO']
+        self.persist_to_storage = config['PERSIST_TO_STORAGE'] if persist_to_storage is None else persist_to_storage
+        self.storage_prefix = config['STORAGE_PREFIX']
+
+        self._lock = threading.Lock()
+        self._evict_lock = threading.Lock()
+        self._total_bytes: Optional[int] = None  # Measured on first write
+        self._stats = {
+            'hits': 0,
+            'storage_hits': 0,
+            'misses': 0,
+            'stores': 0,
+            'evictions': 0,
+            'evicted_bytes': 0,
+        }
+
+    @classmethod
+    def get_instance(cls) -> 'TTSAudioCache':
+        """Get singleton instance."""
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+    @property
+    def enabled(self) -> bool:
+        return bool(get_tts_cache_config()['ENABLED'])
+
+    def path_for(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.mp3")
+
+    def _marks_path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.json")
+
+    def _count(self, name: str, amount: int = 1):
+        with self._lock:
+            self._stats[name] += amount
+
+    # ------------------------------------------------------------------
+    # Lookup and store
+    # ------------------------------------------------------------------
+
+    def get(self, key: str) -> Optional[CachedAudio]:
+        """Cached entry for key, or None. Hits count as a use for LRU."""
+        if not self.enabled or not KEY_RE.match(key or ''):
+            return None
+
+        path = self.path_for(key)
+        try:
+            size = os.path.getsize(path)
+            os.utime(path)
+        except OSError:
+            entry = self._fetch_from_storage(key) if self.persist_to_storage else None
+            self._count('storage_hits' if entry else 'misses')
+            return entry
+
+        self._count('hits')
+        return CachedAudio(key=key, path=path, size=size, marks=self._read_marks(key))
+
+    def put(self, key: str, audio: bytes, marks: Optional[List[Dict[str, Any]]] = None) -> Optional[CachedAudio]:
+        """Store audio (and marks) under key. Returns None when the cache is off."""
+        if not self.enabled or not audio:
+            return None
+
+        entry = self._write_local(key, audio, marks)
+        self._count('stores')
+        if self.persist_to_storage:
+            self._save_to_storage(key, audio, marks)
+        return entry
+
+    def get_or_synthesize(
+        self,
+        key: str,
+        synthesize: Callable[[], Tuple[Optional[bytes], Optional[List[Dict[str, Any]]]]],
+    ) -> Tuple[Optional[CachedAudio], bool]:
+        """
+        Return (entry, hit). On a miss, synthesize() -> (audio, marks) is
+        called and its result stored; failed synthesis returns (None, False).
+        """
+        entry = self.get(key)
+        if entry:
+            return entry, True
+        audio, marks = synthesize()
+        if not audio:
+            return None, False
+        return self.put(key, audio, marks), False
+
+    def _read_marks(self, key: str) -> Optional[List[Dict[str, Any]]]:
+        try:
+            with open(self._marks_path(key), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_local(self, key: str, audio: bytes, marks) -> CachedAudio:
+        path = self.path_for(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        if marks is not None:
+            _write_atomic(self._marks_path(key), json.dumps(marks).encode('utf-8'))
+        _write_atomic(path, audio)
+        self._add_bytes(len(audio))
+        return CachedAudio(key=key, path=path, size=len(audio), marks=marks)
+
+    # ------------------------------------------------------------------
+    # Object storage tier
+    # ------------------------------------------------------------------
+
+    def _storage_name(self, key: str, suffix: str) -> str:
+        return f"{self.storage_prefix}/{key[:2]}/{key}.{suffix}"
+
+    def _fetch_from_storage(self, key: str) -> Optional[CachedAudio]:
+        from django.core.files.storage import default_storage
+
+        try:
+            name = self._storage_name(key, 'mp3')
+            if not default_storage.exists(name):
+                return None
+            with default_storage.open(name, 'rb') as f:
+                audio = f.read()
+            marks = None
+            marks_name = self._storage_name(key, 'json')
+            if default_storage.exists(marks_name):
+                with default_storage.open(marks_name, 'rb') as f:
+                    marks = json.loads(f.read())
+        except Exception as e:
+            logger.warning(f"TTS cache storage read failed for {key}: {e}")
+            return None
+        return self._write_local(key, audio, marks)
+
+    def _save_to_storage(self, key: str, audio: bytes, marks):
+        from django.core.files.base import ContentFile
+        from django.core.files.storage import default_storage
+
+        try:
+            name = self._storage_name(key, 'mp3')
+            if default_storage.exists(name):
+                return
+            if marks is not None:
+                default_storage.save(self._storage_name(key, 'json'), ContentFile(json.dumps(marks).encode('utf-8')))
+            default_storage.save(name, ContentFile(audio))
+        except Exception as e:
+            logger.warning(f"TTS cache storage write failed for {key}: {e}")
+
+    # ------------------------------------------------------------------
+    # Eviction
+    # ------------------------------------------------------------------
+
+    def _scan(self) -> List[Tuple[float, int, str]]:
+        """(mtime, size, path) of every cached audio file."""
+        entries = []
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if not name.endswith('.mp3'):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def _add_bytes(self, size: int):
+        with self._lock:
+            if self._total_bytes is None:
+                self._total_bytes = sum(s for _, s, _ in self._scan())
+            else:
+                self._total_bytes += size
+            over = self._total_bytes > self.max_bytes
+        if over:
+            self.evict()
+
+    def evict(self) -> int:
+        """Remove least recently used files until under EVICT_TO of MAX_BYTES. Returns files removed."""
+        if not self._evict_lock.acquire(blocking=False):
+            return 0  # Another thread is already evicting
+        try:
+            # Rescan: other processes share the directory
+            entries = sorted(self._scan())
+            total = sum(size for _, size, _ in entries)
+            target = int(self.max_bytes * self.evict_to)
+            removed = removed_bytes = 0
+            for _, size, path in entries:
+                if total <= target:
+                    break
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+                try:
+                    os.remove(path[:-len('.mp3')] + '.json')
+                except OSError:
+                    pass
+                total -= size
+                removed += 1
+                removed_bytes += size
+            with self._lock:
+                self._total_bytes = total
+                self._stats['evictions'] += removed
+                self._stats['evicted_bytes'] += removed_bytes
+            if removed:
+                logger.info(f"TTS cache evicted {removed} files ({removed_bytes} bytes)")
+            return removed
+        finally:
+            self._evict_lock.release()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Hit rate and size metrics (this process)."""
+        with self._lock:
+            stats = dict(self._stats)
+            total_bytes = self._total_bytes
+        lookups = stats['hits'] + stats['storage_hits'] + stats['misses']
+        return {
+            'enabled': self.enabled,
+            **stats,
+            'hit_rate': round((stats['hits'] + stats['storage_hits']) / lookups, 4) if lookups else 0.0,
+            'bytes': total_bytes,
+            'max_bytes': self.max_bytes,
+        }
+
+
+def _write_atomic(path: str, data: bytes):
+    """Write via a temp file and rename, so readers never see partial audio."""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except Exception:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def get_tts_cache() -> TTSAudioCache:
+    """Get the TTS audio cache singleton."""
+    return TTSAudioCache.get_instance()
@@ -6,13 +6,18 @@ Uses user-specific API keys for authentication
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework import permissions, status
-from django.http import StreamingHttpResponse
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
 from google.cloud import texttospeech
 from google.oauth2 import service_account
 import json
 import os
+import re
 import requests
 from .models import UserProfile
+from .tts_cache import get_tts_cache, tts_cache_key
+
+DEEPGRAM_TTS_MODEL = 'aura-asteria-en'
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
 
 def get_tts_client(api_key):
     """
@@ -126,17 +131,24 @@ from django_ratelimit.decorators import ratelimit
 def generate_speech(request):
     """
     Generate speech from text using Deepgram (Priority) or Google Cloud TTS (Fallback)
-    Streams audio directly to client (no server storage)
+    Audio is served from the shared TTS cache when the same text was already
+    synthesized with the same voice settings (see tts_cache.py)
     """
     text = request.data.get('text')
     if not text:
         return Response({'error': 'Text is required'}, status=status.HTTP_400_BAD_REQUEST)
 
+    cache = get_tts_cache()
+
     # 1. Try Deepgram First
     deepgram_key = request.user.profile.deepgram_api_key
     if deepgram_key:
+        cache_key = tts_cache_key('deepgram', DEEPGRAM_TTS_MODEL, '', 1.0, 0.0, text)
+        entry = cache.get(cache_key)
+        if entry:
+            return _cached_audio_response(request, entry, 'hit')
         try:
-            url = "https://api.deepgram.com/v1/speak?model=aura-asteria-en" # Default to Asteria (English)
+            url = f"https://api.deepgram.com/v1/speak?model={DEEPGRAM_TTS_MODEL}" # Default to Asteria (English)
             
             # Simple mapping for other languages if needed, or let frontend pass model
             # For now, we'll default to English/German based on profile or request
@@ -157,16 +169,22 @@ def generate_speech(request):
             
             if response.status_code == 200:
                 def deepgram_stream():
+                    # Relay chunks as they arrive and cache the audio once complete
+                    chunks = []
                     for chunk in response.iter_content(chunk_size=1024):
                         if chunk:
+                            chunks.append(chunk)
                             yield chunk
+                    cache.put(cache_key, b"".join(chunks))
 
                 return StreamingHttpResponse(
                     deepgram_stream(),
                     content_type='audio/mpeg',
                     headers={
                         'Content-Disposition': 'inline; filename="speech.mp3"',
-                        'Cache-Control': 'no-cache'
+                        'Cache-Control': 'no-cache',
+                        'X-TTS-Cache': 'miss',
+                        'X-TTS-Audio-Key': cache_key,
                     }
                 )
             else:
@@ -191,6 +209,11 @@ def generate_speech(request):
         speaking_rate = float(request.data.get('speaking_rate', 1.0))
         pitch = float(request.data.get('pitch', 0.0))
         
+        cache_key = tts_cache_key('google', voice_name, language_code, speaking_rate, pitch, text)
+        entry = cache.get(cache_key)
+        if entry:
+            return _cached_audio_response(request, entry, 'hit')
+        
         # Initialize client with user's API key
         client = get_tts_client(api_key)
         
@@ -217,7 +240,11 @@ def generate_speech(request):
             audio_config=audio_config
         )
         
-        # Stream audio directly to client
+        entry = cache.put(cache_key, response.audio_content)
+        if entry:
+            return _cached_audio_response(request, entry, 'miss')
+        
+        # Cache disabled: stream audio directly to client
         def audio_stream():
             yield response.audio_content
         
@@ -238,6 +265,82 @@ def generate_speech(request):
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def get_cached_speech(request, key):
+    """
+    Serve previously generated speech by its X-TTS-Audio-Key.
+    Supports Range requests, so audio elements can seek without re-downloading
+    """
+    entry = get_tts_cache().get(key)
+    if not entry:
+        return Response({'error': 'Audio not found'}, status=status.HTTP_404_NOT_FOUND)
+    return _cached_audio_response(request, entry, 'hit')
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAdminUser])
+def tts_cache_stats(request):
+    """TTS audio cache hit rate and size (this process)"""
+    return Response(get_tts_cache().get_stats())
+
+
+def _cached_audio_response(request, entry, cache_status):
+    """
+    Serve a cached audio file, honoring a single-range Range header.
+    Content-addressed files never change, so clients may keep them.
+    """
+    size = entry.size
+    match = RANGE_RE.match(request.META.get('HTTP_RANGE', '').strip())
+
+    if match and any(match.groups()):
+        first, last = match.groups()
+        if first:
+            start = int(first)
+            end = min(int(last), size - 1) if last else size - 1
+        else:
+            # Suffix range: the last N bytes
+            start = max(size - int(last), 0)
+            end = size - 1
+        if start > end or start >= size:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+
+        audio_file = open(entry.path, 'rb')
+        audio_file.seek(start)
+        length = end - start + 1
+        response = StreamingHttpResponse(
+            _read_range(audio_file, length),
+            status=206,
+            content_type='audio/mpeg'
+        )
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+        response['Content-Length'] = str(length)
+    else:
+        response = FileResponse(open(entry.path, 'rb'), content_type='audio/mpeg')
+
+    response['Accept-Ranges'] = 'bytes'
+    response['Content-Disposition'] = 'inline; filename="speech.mp3"'
+    response['Cache-Control'] = 'private, max-age=86400'
+    response['X-TTS-Cache'] = cache_status
+    response['X-TTS-Audio-Key'] = entry.key
+    return response
+
+
+def _read_range(audio_file, length, chunk_size=64 * 1024):
+    """Yield length bytes from an open file, then close it"""
+    try:
+        while length > 0:
+            chunk = audio_file.read(min(chunk_size, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+    finally:
+        audio_file.close()
+
+
 @api_view(['POST'])
 @permission_classes([permissions.IsAuthenticated])
 def validate_google_tts_key(request):
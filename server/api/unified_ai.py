@@ -12,7 +12,11 @@ Usage:
 
 import asyncio
 import logging
-from typing import Optional
+import math
+import time
+import traceback
+from dataclasses import dataclass
+from typing import Optional, List
 from django.utils import timezone
 from django.db.models import F
 
@@ -26,21 +30,13 @@ class GatewayResponse:
         self.usage = usage or {}
 
 
-def run_async(coro):
-    """Run async coroutine from sync context."""
-    try:
-        loop = asyncio.get_event_loop()
-        if loop.is_running():
-            import concurrent.futures
-            with concurrent.futures.ThreadPoolExecutor() as executor:
-                future = executor.submit(asyncio.run, coro)
-                return future.result(timeout=120)
-        return loop.run_until_complete(coro)
-    except RuntimeError:
-        return asyncio.run(coro)
-
-
-def generate_ai_content(user, prompt: str, max_tokens: int = 2048, temperature: float = 0.7, required_capabilities: list = None, quality_tier: str = None, json_mode: bool = False, tools: list = None):
+def run_async(coro, timeout: Optional[float] = None):
+    """Run async coroutine from sync context on the shared background loop."""
+    from .ai_gateway.utils.async_runner import run_sync
+    return run_sync(coro, timeout=timeout)
+
+
+def generate_ai_content(user, prompt: str, max_tokens: int = 2048, temperature: float = 0.7, required_capabilities: list = None, quality_tier: str = None, json_mode: bool = False, tools: list = None, hedge: bool = None, cache_feature: str = None):
     """
     Generate AI content using the best available method.
     
@@ -57,6 +53,13 @@ def generate_ai_content(user, prompt: str, max_tokens: int = 2048, temperature:
         quality_tier: Minimum quality tier (low, medium, high, premium)
         json_mode: Whether to enforce JSON output
         tools: List of tools to pass to the model
+        hedge: Race slow calls against a second provider
+               (None = settings.AI_GATEWAY_HEDGING['ENABLED'])
+        cache_feature: Opt in to the shared response cache under this feature
+                       name (exact match + coalescing of identical in-flight
+                       prompts, plus the semantic tier if the feature is listed
+                       in AI_GATEWAY_CACHE['SEMANTIC_FEATURES']). Ignored when
+                       temperature > 0: a sampled answer must not be replayed.
         
     Returns:
         Object with .text attribute containing the response
@@ -74,7 +77,10 @@ def generate_ai_content(user, prompt: str, max_tokens: int = 2048, temperature:
             if 'json_mode' not in required_capabilities:
                 required_capabilities.append('json_mode')
 
-        gateway_result = _try_gateway(user, prompt, max_tokens, temperature, required_capabilities, quality_tier, json_mode, tools)
+        if cache_feature and not tools and not temperature:
+            gateway_result = _try_gateway_cached(user, prompt, max_tokens, temperature, required_capabilities, quality_tier, json_mode, hedge, cache_feature)
+        else:
+            gateway_result = _try_gateway(user, prompt, max_tokens, temperature, required_capabilities, quality_tier, json_mode, tools, hedge)
         if gateway_result:
             return gateway_result
     except Exception as e:
@@ -83,6 +89,15 @@ def generate_ai_content(user, prompt: str, max_tokens: int = 2048, temperature:
         pass
     
     # Fallback: Legacy Profile Gemini Key
+    legacy_result = _try_legacy(user, prompt, max_tokens, temperature, json_mode, tools)
+    if legacy_result:
+        return legacy_result
+
+    raise Exception("AI Gateway & Fallback failed. Please check your API keys.")
+
+
+def _try_legacy(user, prompt: str, max_tokens: int, temperature: float, json_mode: bool = False, tools: list = None) -> Optional[GatewayResponse]:
+    """Fallback to the legacy Gemini key on the user's profile, or None."""
     try:
         # Check if user is provided and has a profile
         if user and hasattr(user, 'profile'):
@@ -94,10 +109,6 @@ def generate_ai_content(user, prompt: str, max_tokens: int = 2048, temperature:
             # Use a default model for legacy fallback
             adapter = GeminiAdapter(api_key=profile_key, model="gemini-1.5-flash")
             
-            # Run async adapter synchronously
-            import asyncio
-            import concurrent.futures
-             
             messages = [{"role": "user", "content": prompt}]
             
             async def call_legacy():
@@ -109,9 +120,7 @@ def generate_ai_content(user, prompt: str, max_tokens: int = 2048, temperature:
                     tools=tools
                 )
                 
-            with concurrent.futures.ThreadPoolExecutor() as executor:
-                future = executor.submit(asyncio.run, call_legacy())
-                response = future.result(timeout=60)
+            response = run_async(call_legacy(), timeout=60)
                 
             if response.success:
                 return GatewayResponse(response.content)
@@ -120,11 +129,344 @@ def generate_ai_content(user, prompt: str, max_tokens: int = 2048, temperature:
                 
     except Exception as e:
         logger.error(f"[UnifiedAI] Legacy fallback error: {e}")
+    return None
 
-    raise Exception("AI Gateway & Fallback failed. Please check your API keys.")
 
+# =============================================================================
+# HEDGED REQUESTS
+# =============================================================================
+
+@dataclass
+class _GatewayAttempt:
+    """Outcome of one adapter call inside _try_gateway or a GatewayStream."""
+    instance: object
+    response: object = None
+    error: Optional[str] = None
+    latency_ms: int = 0
+    cancelled: bool = False
+    traceback: Optional[str] = None
+    ttft_ms: Optional[int] = None  # Time to first token (streamed attempts)
+
+    @property
+    def succeeded(self) -> bool:
+        return bool(
+            self.response is not None and self.response.success
+            and self.response.content and self.response.content.strip()
+        )
+
+
+def _get_hedging_config(hedge: bool = None) -> dict:
+    """Effective hedging settings; an explicit hedge flag overrides ENABLED."""
+    from django.conf import settings
+
+    config = {'ENABLED': False, 'PERCENTILE': 0.95, 'MIN_DELAY_MS': 2000, 'MAX_DELAY_MS': 30000}
+    config.update(getattr(settings, 'AI_GATEWAY_HEDGING', {}))
+    if hedge is not None:
+        config['ENABLED'] = hedge
+    return config
+
+
+def _hedge_delay_ms(instance, config: dict) -> int:
+    """
+    How long to wait on the primary before firing the backup.
+    
+    ModelInstance only tracks an average latency, so the tail is estimated
+    by treating latency as exponential: p-th percentile = -avg * ln(1 - p).
+    """
+    avg_latency = instance.avg_latency_ms or 0
+    if avg_latency <= 0:
+        return int(config['MAX_DELAY_MS'])
+    percentile = min(max(config['PERCENTILE'], 0.5), 0.999)
+    delay = -avg_latency * math.log(1 - percentile)
+    return int(min(max(delay, config['MIN_DELAY_MS']), config['MAX_DELAY_MS']))
+
+
+async def _attempt_complete(instance, messages: list, call_kwargs: dict) -> _GatewayAttempt:
+    """Call one model and capture the outcome instead of raising."""
+    from .ai_gateway.adapters import get_adapter
+    from .ai_gateway.utils.encryption import decrypt_api_key
+
+    start_time = time.time()
+    try:
+        decrypted_key = decrypt_api_key(instance.api_key.api_key_encrypted)
+        adapter = get_adapter(instance.model.provider, decrypted_key, model=instance.model.model_id)
+        response = await adapter.complete(messages=messages, model=instance.model.model_id, **call_kwargs)
+        return _GatewayAttempt(instance, response=response, latency_ms=int((time.time() - start_time) * 1000))
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        return _GatewayAttempt(
+            instance,
+            error=str(e),
+            latency_ms=int((time.time() - start_time) * 1000),
+            traceback=traceback.format_exc(),
+        )
+
+
+async def _hedged_complete(primary, partner, delay_ms: int, messages: list, call_kwargs: dict) -> List[_GatewayAttempt]:
+    """
+    Run primary, and fire partner if primary is still running after delay_ms.
+    
+    Returns every attempt that was made. The first successful one wins and
+    the other is cancelled (returned with cancelled=True). If primary fails
+    before the delay, partner is tried immediately.
+    """
+    start_time = time.time()
+    primary_task = asyncio.create_task(_attempt_complete(primary, messages, call_kwargs))
+    partner_task = None
+    try:
+        done, _ = await asyncio.wait({primary_task}, timeout=delay_ms / 1000)
+        if done:
+            first = primary_task.result()
+            if first.succeeded:
+                return [first]
+            return [first, await _attempt_complete(partner, messages, call_kwargs)]
+
+        partner_task = asyncio.create_task(_attempt_complete(partner, messages, call_kwargs))
+        partner_started = time.time()
+        pending = {primary_task, partner_task}
+        results = {}
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                results[task] = task.result()
+            if any(attempt.succeeded for attempt in results.values()):
+                break
+
+        for task in pending:
+            task.cancel()
+            started = start_time if task is primary_task else partner_started
+            instance = primary if task is primary_task else partner
+            results[task] = _GatewayAttempt(
+                instance, cancelled=True, latency_ms=int((time.time() - started) * 1000)
+            )
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+
+        # Winner first so the caller records it before the loser
+        return sorted(results.values(), key=lambda attempt: not attempt.succeeded)
+    finally:
+        for task in (primary_task, partner_task):
+            if task is not None and not task.done():
+                task.cancel()
+
+
+def _record_gateway_attempt(user, attempt: _GatewayAttempt, quota_blocked_providers: set, failed_providers: set) -> Optional[str]:
+    """
+    Feed one attempt back into LearningEngine, UsageLog and key stats.
+    
+    Successes, hedge losses and all UsageLog rows go through the
+    write-behind accounting buffer; failures still hit LearningEngine
+    synchronously so blocks take effect before the next candidate.
+    
+    Returns the error message for failed attempts, None otherwise.
+    """
+    from .ai_gateway.services.accounting import get_accounting_buffer
+    from .ai_gateway.services.learning_engine import learning_engine
+
+    accounting = get_accounting_buffer()
+    instance = attempt.instance
+    response = attempt.response
+    latency_ms = attempt.latency_ms
+
+    if attempt.succeeded:
+        # STEP 2: Record success (quota, health, latency, key usage stats)
+        tokens_used = response.tokens_input + response.tokens_output
+        accounting.record_success(
+            instance=instance,
+            latency_ms=latency_ms,
+            tokens_used=tokens_used,
+        )
+        
+        # Log for analytics
+        accounting.log_usage(
+            user=user,
+            key=instance.api_key,
+            provider=instance.model.provider,
+            model=instance.model.model_id,
+            status='success',
+            latency_ms=latency_ms,
+            time_to_first_token_ms=attempt.ttft_ms,
+            tokens_input=response.tokens_input,
+            tokens_output=response.tokens_output,
+        )
+
+        logger.info(
+            f"[UnifiedAI v2] SUCCESS: {instance.model.provider}/{instance.model.model_id} "
+            f"(conf: {instance.confidence_score:.2f}, latency: {latency_ms}ms)"
+        )
+        return None
+
+    if attempt.cancelled:
+        # Lost the hedge race: not a failure, but the quota was spent
+        accounting.record_hedge_loss(instance=instance, latency_ms=latency_ms)
+        accounting.log_usage(
+            user=user,
+            key=instance.api_key,
+            provider=instance.model.provider,
+            model=instance.model.model_id,
+            status='timeout',
+            error_message="Hedged request cancelled (lost race)",
+            latency_ms=latency_ms,
+        )
+        logger.debug(f"[UnifiedAI v2] HEDGE LOST: {instance.model.model_id} cancelled after {latency_ms}ms")
+        return None
+
+    # STEP 3: Record failure with LearningEngine
+    error_message = str(response.error) if response is not None else str(attempt.error)
+    learning_engine.record_failure(
+        instance=instance,
+        error_message=error_message,
+        latency_ms=latency_ms,
+        request_type='text',
+        retry_after_seconds=getattr(response, 'retry_after_seconds', None),
+    )
+    
+    accounting.log_usage(
+        user=user,
+        key=instance.api_key,
+        provider=instance.model.provider,
+        model=instance.model.model_id,
+        status='error',
+        error_message=error_message[:500],
+        latency_ms=latency_ms,
+        time_to_first_token_ms=attempt.ttft_ms,
+    )
+    
+    # SMART TRACKING: Check if this was a quota error
+    if '429' in error_message or 'Quota' in error_message or 'quota' in error_message:
+        logger.warning(f"[UnifiedAI v2] Provider {instance.model.provider} has quota issues. Skipping remaining models.")
+        quota_blocked_providers.add(instance.model.provider)
+    
+    failed_providers.add(instance.model.provider)
+    
+    if attempt.traceback:
+        logger.error(f"[UnifiedAI v2] Detailed Traceback for {instance.model.model_id}:\n{attempt.traceback}")
+    else:
+        logger.warning(f"[UnifiedAI v2] FAILED: {instance.model.model_id}: {error_message[:100]}")
+    return error_message
 
-def _try_gateway(user, prompt: str, max_tokens: int, temperature: float, required_capabilities: list = None, quality_tier: str = None, json_mode: bool = False, tools: list = None):
+
+# =============================================================================
+# RESPONSE CACHE
+# =============================================================================
+
+def _semantic_embedder(user, feature: str):
+    """
+    Embedding function for the semantic cache tier, or None.
+    
+    Uses the user's OpenRouter key (same embedding model as vocabulary search).
+    """
+    from .ai_gateway.services.cache_manager import get_cache_manager
+
+    if not user or get_cache_manager().semantic_threshold(feature) is None:
+        return None
+
+    from .ai_gateway.models import UserAPIKey
+    from .ai_gateway.utils.encryption import decrypt_api_key
+    from .embedding_service import EmbeddingService
+
+    key = UserAPIKey.objects.filter(user=user, provider='openrouter', is_active=True).first()
+    if not key:
+        return None
+    api_key = decrypt_api_key(key.api_key_encrypted)
+    return lambda text: EmbeddingService.generate_embedding(text, api_key)
+
+
+def _try_gateway_cached(user, prompt: str, max_tokens: int, temperature: float, required_capabilities: list, quality_tier: str, json_mode: bool, hedge: bool, feature: str):
+    """
+    _try_gateway behind CacheManager.get_or_compute_sync.
+    
+    Identical prompts (same user, feature and options) are served from the cache
+    or wait for the request already in flight. Cache-served calls are logged
+    as UsageLog(cached=True) so the dashboard hit rate includes them.
+    """
+    from .ai_gateway.services.cache_manager import get_cache_manager
+    from .ai_gateway.services.accounting import get_accounting_buffer
+
+    messages = [{"role": "user", "content": prompt}]
+    options = (
+        f"user={getattr(user, 'pk', '') or ''};temperature={temperature};"
+        f"json={int(bool(json_mode))};max_tokens={max_tokens};tier={quality_tier or ''};"
+        f"caps={','.join(sorted(required_capabilities or []))}"
+    )
+
+    def compute():
+        result = _try_gateway(user, prompt, max_tokens, temperature, required_capabilities, quality_tier, json_mode, None, hedge)
+        return {'text': result.text, 'usage': result.usage} if result else None
+
+    cached, source = get_cache_manager().get_or_compute_sync(
+        messages,
+        compute,
+        model=f"unified_ai:{feature}:{options}",
+        feature=feature,
+        embed=_semantic_embedder(user, feature),
+    )
+    if cached is None:
+        return None
+
+    usage = cached.get('usage') or {}
+    if source != 'miss':
+        logger.info(f"[UnifiedAI v2] CACHE {source.upper()}: {feature}")
+        get_accounting_buffer().log_usage(
+            user=user,
+            key=None,
+            provider=usage.get('provider', 'cache'),
+            model=usage.get('model', ''),
+            status='success',
+            cached=True,
+        )
+    return GatewayResponse(cached['text'], usage=usage)
+
+
+def _candidate_models(user, required_capabilities: list = None, quality_tier: str = None) -> list:
+    """
+    ModelInstances to try for a text request, in failover order:
+    selected model, then one per other provider, then one more from the
+    selected model's provider. Empty when nothing is available.
+    """
+    from .ai_gateway.services.model_selector import model_selector
+
+    selection_result = model_selector.find_best_model(
+        user=user,
+        request_type='text',
+        required_capabilities=required_capabilities,
+        quality_tier=quality_tier,
+    )
+    
+    if not selection_result.success:
+        logger.debug(f"[UnifiedAI v2] No models available: {selection_result.warning}")
+        return []
+    
+    # Try selected model + alternatives if needed
+    # CRITICAL: Ensure cross-provider failover by grouping alternatives by provider
+    
+    # Collect all models to try, prioritizing diversity across providers
+    primary_models = [selection_result.model]
+    alternatives = selection_result.alternatives[:4]  # Get more alternatives
+    
+    # Group alternatives by provider for cross-provider failover
+    seen_providers = {selection_result.model.model.provider} if selection_result.model else set()
+    cross_provider_fallbacks = []
+    same_provider_fallbacks = []
+    
+    for alt in alternatives:
+        if alt is None:
+            continue
+        if alt.model.provider in seen_providers:
+            same_provider_fallbacks.append(alt)
+        else:
+            cross_provider_fallbacks.append(alt)
+            seen_providers.add(alt.model.provider)
+    
+    # Order: primary → cross-provider fallbacks → same-provider fallbacks
+    models_to_try = primary_models + cross_provider_fallbacks + same_provider_fallbacks[:1]
+    
+    logger.debug(f"[UnifiedAI v2] Failover order: {[m.model.provider + '/' + m.model.model_id for m in models_to_try if m]}")
+    return [m for m in models_to_try if m is not None]
+
+
+def _try_gateway(user, prompt: str, max_tokens: int, temperature: float, required_capabilities: list = None, quality_tier: str = None, json_mode: bool = False, tools: list = None, hedge: bool = None):
     """
     Try to generate using AI Gateway with model-centric selection (v2.0).
     
@@ -135,201 +477,82 @@ def _try_gateway(user, prompt: str, max_tokens: int, temperature: float, require
     - Capability matching
     
     Then uses LearningEngine to update state after the call.
-    """
-    import asyncio
-    import concurrent.futures
-    import time
     
+    With hedging enabled, each candidate is paired with the next
+    cross-provider candidate, which is fired if the first one is still
+    running after its learned latency percentile (see _hedge_delay_ms).
+    """
     try:
-        from .ai_gateway.models import UserAPIKey, UsageLog, ModelInstance
-        from .ai_gateway.adapters import get_adapter
-        from .ai_gateway.utils.encryption import decrypt_api_key
-        from .ai_gateway.services.model_selector import model_selector
-        from .ai_gateway.services.learning_engine import learning_engine
-        
-        # STEP 1: Use ModelSelector to find best model
-        selection_result = model_selector.find_best_model(
-            user=user,
-            request_type='text',
-            required_capabilities=required_capabilities,
-            quality_tier=quality_tier,
-        )
-        
-        if not selection_result.success:
-            logger.debug(f"[UnifiedAI v2] No models available: {selection_result.warning}")
+        # STEP 1: Use ModelSelector to find best model, with cross-provider failover order
+        models_to_try = _candidate_models(user, required_capabilities, quality_tier)
+        if not models_to_try:
             return None
         
-        # Try selected model + alternatives if needed
-        # CRITICAL: Ensure cross-provider failover by grouping alternatives by provider
-        
-        # Collect all models to try, prioritizing diversity across providers
-        primary_models = [selection_result.model]
-        alternatives = selection_result.alternatives[:4]  # Get more alternatives
-        
-        # Group alternatives by provider for cross-provider failover
-        seen_providers = {selection_result.model.model.provider} if selection_result.model else set()
-        cross_provider_fallbacks = []
-        same_provider_fallbacks = []
-        
-        for alt in alternatives:
-            if alt is None:
-                continue
-            if alt.model.provider in seen_providers:
-                same_provider_fallbacks.append(alt)
-            else:
-                cross_provider_fallbacks.append(alt)
-                seen_providers.add(alt.model.provider)
-        
-        # Order: primary → cross-provider fallbacks → same-provider fallbacks
-        models_to_try = primary_models + cross_provider_fallbacks + same_provider_fallbacks[:1]
-        
-        logger.debug(f"[UnifiedAI v2] Failover order: {[m.model.provider + '/' + m.model.model_id for m in models_to_try if m]}")
-        
         last_error = None
         failed_providers = set()  # Track providers that failed completely
         quota_blocked_providers = set()  # Track providers with quota issues
         
-        for instance in models_to_try:
-            if instance is None:
-                continue
-            
+        messages = [{"role": "user", "content": prompt}]
+        call_kwargs = dict(max_tokens=max_tokens, temperature=temperature, json_mode=json_mode, tools=tools)
+        hedging = _get_hedging_config(hedge)
+        remaining = list(models_to_try)
+        
+        while remaining:
+            instance = remaining.pop(0)
             provider = instance.model.provider
             
             # SMART SKIP: If this provider has quota issues, skip all its models
             if provider in quota_blocked_providers:
                 logger.debug(f"[UnifiedAI v2] Skipping {instance.model.model_id} - provider {provider} has quota issues")
                 continue
-                
-            start_time = time.time()
             
+            # HEDGING: Race against the next cross-provider candidate if the primary is slow
+            partner = None
+            if hedging['ENABLED']:
+                partner = next(
+                    (m for m in remaining
+                     if m.model.provider != provider and m.model.provider not in quota_blocked_providers),
+                    None
+                )
+                if partner:
+                    remaining.remove(partner)
+            
+            start_time = time.time()
             try:
-                # Get decrypted API key
-                decrypted_key = decrypt_api_key(instance.api_key.api_key_encrypted)
-                
-                # Get adapter for this provider
-                adapter = get_adapter(instance.model.provider, decrypted_key, model=instance.model.model_id)
-                
-                # Prepare messages
-                messages = [{"role": "user", "content": prompt}]
-                
-                # Call adapter async
-                async def call_adapter():
-                    return await adapter.complete(
-                        messages=messages, 
-                        max_tokens=max_tokens, 
-                        temperature=temperature,
-                        model=instance.model.model_id,  # Specify exact model
-                        json_mode=json_mode,
-                        tools=tools
-                    )
-                
-                with concurrent.futures.ThreadPoolExecutor() as executor:
-                    future = executor.submit(asyncio.run, call_adapter())
-                    response = future.result(timeout=120)
-                
-                latency_ms = int((time.time() - start_time) * 1000)
-                
-                if response.success and response.content and response.content.strip():
-                    # STEP 2: Record success with LearningEngine
-                    tokens_used = response.tokens_input + response.tokens_output
-                    learning_engine.record_success(
-                        instance=instance,
-                        latency_ms=latency_ms,
-                        tokens_used=tokens_used,
+                if partner:
+                    delay_ms = _hedge_delay_ms(instance, hedging)
+                    logger.debug(
+                        f"[UnifiedAI v2] Hedging {instance.model.model_id} with "
+                        f"{partner.model.provider}/{partner.model.model_id} after {delay_ms}ms"
                     )
-                    
-                    # Log for analytics
-                    if user:
-                        UsageLog.objects.create(
-                            user=user,
-                            key=instance.api_key,
-                            provider=instance.model.provider,
-                            model=instance.model.model_id,
-                            status='success',
-                            latency_ms=latency_ms,
-                            tokens_input=response.tokens_input,
-                            tokens_output=response.tokens_output,
-                        )
-                    
-                    # Update Key Usage Stats (Missing Step Fix)
-                    instance.api_key.requests_today = (instance.api_key.requests_today or 0) + 1
-                    instance.api_key.requests_this_month = (instance.api_key.requests_this_month or 0) + 1
-                    instance.api_key.last_used_at = timezone.now()
-                    instance.api_key.save(update_fields=['requests_today', 'requests_this_month', 'last_used_at'])
-
-                    logger.info(
-                        f"[UnifiedAI v2] SUCCESS: {instance.model.provider}/{instance.model.model_id} "
-                        f"(conf: {instance.confidence_score:.2f}, latency: {latency_ms}ms)"
+                    attempts = run_async(
+                        _hedged_complete(instance, partner, delay_ms, messages, call_kwargs),
+                        timeout=120,
                     )
-                    
-                    return GatewayResponse(response.content)
-                
                 else:
-                    # STEP 3: Record failure with LearningEngine
-                    error_message = str(response.error)
-                    learning_engine.record_failure(
-                        instance=instance,
-                        error_message=error_message,
-                        latency_ms=latency_ms,
-                        request_type='text',
-                        retry_after_seconds=getattr(response, 'retry_after_seconds', None),
-                    )
-                    
-                    UsageLog.objects.create(
-                        user=user,
-                        key=instance.api_key,
-                        provider=instance.model.provider,
-                        model=instance.model.model_id,
-                        status='error',
-                        error_message=error_message[:500],
-                        latency_ms=latency_ms,
-                    )
-                    
-                    last_error = response.error
-                    error_message = str(response.error)
-                    
-                    # SMART TRACKING: Check if this was a quota error
-                    if '429' in error_message or 'Quota' in error_message or 'quota' in error_message:
-                        logger.warning(f"[UnifiedAI v2] Provider {instance.model.provider} has quota issues. Skipping remaining models.")
-                        quota_blocked_providers.add(instance.model.provider)
-                    
-                    failed_providers.add(instance.model.provider)
-                    
-                    logger.warning(
-                        f"[UnifiedAI v2] FAILED: {instance.model.model_id}: {error_message[:100]}"
-                    )
-                    
+                    attempts = [run_async(_attempt_complete(instance, messages, call_kwargs), timeout=120)]
             except Exception as e:
                 latency_ms = int((time.time() - start_time) * 1000)
-                error_message = str(e)
-                
-                # Record failure
-                learning_engine.record_failure(
-                    instance=instance,
-                    error_message=error_message,
-                    latency_ms=latency_ms,
-                    request_type='text',
-                )
-                
-                # SMART TRACKING for Exceptions
-                if '429' in error_message or 'Quota' in error_message:
-                     quota_blocked_providers.add(instance.model.provider)
-                failed_providers.add(instance.model.provider)
-                
-                UsageLog.objects.create(
-                    user=user,
-                    key=instance.api_key,
-                    provider=instance.model.provider,
-                    model=instance.model.model_id,
-                    status='error',
-                    error_message=error_message[:500],
-                )
-                
-                import traceback
-                logger.error(f"[UnifiedAI v2] Detailed Traceback for {instance.model.model_id}:\n{traceback.format_exc()}")
-                last_error = error_message
-                logger.warning(f"[UnifiedAI v2] Exception: {instance.model.model_id}: {e}")
-                continue
+                attempts = [
+                    _GatewayAttempt(m, error=str(e), latency_ms=latency_ms, traceback=traceback.format_exc())
+                    for m in ([instance, partner] if partner else [instance])
+                ]
+            
+            winner = None
+            for attempt in attempts:
+                error_message = _record_gateway_attempt(user, attempt, quota_blocked_providers, failed_providers)
+                if attempt.succeeded and winner is None:
+                    winner = attempt
+                elif error_message:
+                    last_error = error_message
+            
+            if winner:
+                return GatewayResponse(winner.response.content, usage={
+                    'provider': winner.instance.model.provider,
+                    'model': winner.instance.model.model_id,
+                    'tokens_input': winner.response.tokens_input,
+                    'tokens_output': winner.response.tokens_output,
+                })
         
         if last_error:
             raise Exception(f"All AI models failed. Last error: {last_error}")
@@ -341,6 +564,130 @@ def _try_gateway(user, prompt: str, max_tokens: int, temperature: float, require
 
 
 
+# =============================================================================
+# STREAMING
+# =============================================================================
+
+def stream_ai_content(user, prompt: str, max_tokens: int = 2048, temperature: float = 0.7, required_capabilities: list = None, quality_tier: str = None, json_mode: bool = False) -> 'GatewayStream':
+    """
+    Streaming counterpart of generate_ai_content.
+    
+    Usage:
+        stream = stream_ai_content(user, prompt)
+        for delta in stream:
+            ...  # push to the client
+        stream.text, stream.usage  # after iteration
+    """
+    if json_mode:
+        required_capabilities = list(required_capabilities or [])
+        if 'json_mode' not in required_capabilities:
+            required_capabilities.append('json_mode')
+    return GatewayStream(user, prompt, max_tokens, temperature, required_capabilities, quality_tier, json_mode)
+
+
+class GatewayStream:
+    """
+    Iterable of text deltas for one prompt.
+    
+    Candidates are tried in generate_ai_content's failover order, but only
+    until the first token: after that the stream is committed to that model
+    and a broken stream raises. If no gateway model produces a token, the
+    legacy profile key answers (buffered, yielded as one delta).
+    Streams are not hedged or cached.
+    """
+
+    def __init__(self, user, prompt: str, max_tokens: int = 2048, temperature: float = 0.7, required_capabilities: list = None, quality_tier: str = None, json_mode: bool = False):
+        self.user = user
+        self.prompt = prompt
+        self.max_tokens = max_tokens
+        self.temperature = temperature
+        self.required_capabilities = required_capabilities
+        self.quality_tier = quality_tier
+        self.json_mode = json_mode
+        
+        # Filled in while iterating
+        self.text = ""
+        self.usage = {}
+        self.time_to_first_token_ms: Optional[int] = None
+
+    def __iter__(self):
+        last_error = None
+        failed_providers = set()
+        quota_blocked_providers = set()
+        
+        try:
+            candidates = _candidate_models(self.user, self.required_capabilities, self.quality_tier)
+        except Exception as e:
+            logger.warning(f"[UnifiedAI] Gateway stream setup failed: {e}")
+            candidates = []
+        
+        for instance in candidates:
+            if instance.model.provider in quota_blocked_providers:
+                continue
+            
+            attempt = yield from self._stream_from(instance)
+            error_message = _record_gateway_attempt(self.user, attempt, quota_blocked_providers, failed_providers)
+            
+            if attempt.succeeded:
+                self.text = attempt.response.content
+                self.time_to_first_token_ms = attempt.ttft_ms
+                self.usage = {
+                    'provider': instance.model.provider,
+                    'model': instance.model.model_id,
+                    'tokens_input': attempt.response.tokens_input,
+                    'tokens_output': attempt.response.tokens_output,
+                }
+                return
+            if attempt.ttft_ms is not None:
+                # Tokens already reached the client; a retry would duplicate them
+                raise Exception(f"AI stream interrupted: {error_message}")
+            last_error = error_message
+        
+        legacy_result = _try_legacy(self.user, self.prompt, self.max_tokens, self.temperature, self.json_mode)
+        if legacy_result:
+            self.text = legacy_result.text
+            yield legacy_result.text
+            return
+        
+        if last_error:
+            raise Exception(f"All AI models failed. Last error: {last_error}")
+        raise Exception("AI Gateway & Fallback failed. Please check your API keys.")
+
+    def _stream_from(self, instance):
+        """Relay one model's deltas; returns its _GatewayAttempt."""
+        from .ai_gateway.adapters import get_adapter
+        from .ai_gateway.utils.async_runner import iterate_sync
+        from .ai_gateway.utils.encryption import decrypt_api_key
+
+        start_time = time.time()
+        attempt = _GatewayAttempt(instance)
+        events = None
+        try:
+            decrypted_key = decrypt_api_key(instance.api_key.api_key_encrypted)
+            adapter = get_adapter(instance.model.provider, decrypted_key, model=instance.model.model_id)
+            events = iterate_sync(adapter.stream(
+                messages=[{"role": "user", "content": self.prompt}],
+                max_tokens=self.max_tokens,
+                temperature=self.temperature,
+                json_mode=self.json_mode,
+            ), timeout=120)
+            for event in events:
+                if event.response is not None:
+                    attempt.response = event.response
+                    break
+                if attempt.ttft_ms is None:
+                    attempt.ttft_ms = int((time.time() - start_time) * 1000)
+                yield event.delta
+        except Exception as e:
+            attempt.error = str(e)
+            attempt.traceback = traceback.format_exc()
+        finally:
+            if events is not None:
+                events.close()
+        attempt.latency_ms = int((time.time() - start_time) * 1000)
+        return attempt
+
+
 def get_ai_status(user) -> dict:
     """
     Get status of AI capabilities for a user.
@@ -392,8 +739,6 @@ def generate_ai_image(user, prompt: str, size: str = "1024x1024", style: str = N
     Raises:
         Exception if all providers fail
     """
-    import concurrent.futures
-    
     # First, try Pollinations.AI - it's FREE and needs NO API key!
     try:
         from .ai_gateway.adapters import image_pollinations
@@ -403,9 +748,7 @@ def generate_ai_image(user, prompt: str, size: str = "1024x1024", style: str = N
         async def call_pollinations():
             return await image_pollinations.generate_image(prompt=prompt, size=size, style=style)
         
-        with concurrent.futures.ThreadPoolExecutor() as executor:
-            future = executor.submit(asyncio.run, call_pollinations())
-            result = future.result(timeout=120)
+        result = run_async(call_pollinations(), timeout=120)
         
         if result.get("success"):
             logger.info("[UnifiedAI Image] SUCCESS with Pollinations.AI!")
@@ -454,13 +797,11 @@ def generate_ai_image(user, prompt: str, size: str = "1024x1024", style: str = N
                     
                     logger.info(f"[UnifiedAI Image] Trying {provider_name} key {key.id}")
                     
-                    # Run async adapter in thread
+                    # Run async adapter on the shared background loop
                     async def call_adapter():
                         return await adapter.generate_image(api_key, prompt, size=size, style=style)
                     
-                    with concurrent.futures.ThreadPoolExecutor() as executor:
-                        future = executor.submit(asyncio.run, call_adapter())
-                        result = future.result(timeout=120)
+                    result = run_async(call_adapter(), timeout=120)
                     
                     if result.get("success"):
                         # Update usage stats
@@ -10,12 +10,13 @@ from .views import (
     get_random_words, get_matching_game_words,
     UserProfileViewSet, UserSearchView, follow_user, health_check, admin_activity_feed
 )
-from .ai_views import ai_assistant, validate_key, generate_exam, bulk_translate, generate_vocab_list, ai_gateway_status, ai_gateway_keys, ai_gateway_key_detail
+from .ai_views import ai_assistant, ai_assistant_stream, validate_key, generate_exam, bulk_translate, generate_vocab_list, ai_gateway_status, ai_gateway_keys, ai_gateway_key_detail
 from .feature_views import (
     GrammarTopicViewSet,
     PodcastViewSet,
     SavedTextViewSet,
     generate_text,
+    generate_text_stream,
     generate_podcast,
     user_profile,
     analyze_text
@@ -24,6 +25,8 @@ from .tts_views import (
     list_tts_voices,
     list_voices_for_language,
     generate_speech,
+    get_cached_speech,
+    tts_cache_stats,
     validate_google_tts_key,
     validate_deepgram_key,
     list_speechify_voices,
@@ -32,6 +35,7 @@ from .tts_views import (
 from .semantic_search_views import (
     semantic_search,
     generate_embeddings,
+    embedding_backfill_status,
     validate_openrouter_key
 )
 from .google_auth import (
@@ -47,6 +51,7 @@ from .password_views import (
 )
 from .advanced_text_views import (
     generate_advanced_text,
+    generate_advanced_text_stream,
     list_generated_content,
     get_generated_content,
     toggle_favorite,
@@ -173,6 +178,7 @@ urlpatterns = [
     # Semantic Search - MUST be before router.urls
     path('vocab/semantic-search/', semantic_search, name='semantic_search'),
     path('vocab/generate-embeddings/', generate_embeddings, name='generate_embeddings'),
+    path('vocab/generate-embeddings/<int:job_id>/', embedding_backfill_status, name='embedding_backfill_status'),
     path('vocab/validate-openrouter/', validate_openrouter_key, name='validate_openrouter_key'),
 
     # Classroom join/validate - MUST be before router.urls to avoid ViewSet interception
@@ -231,6 +237,7 @@ urlpatterns = [
 
     # AI
     path('ai/chat/', ai_assistant),
+    path('ai/chat/stream/', ai_assistant_stream, name='ai_assistant_stream'),
     path('ai/validate-key/', validate_key),
     path('ai/generate-exam/', generate_exam),
     path('ai/bulk-translate/', bulk_translate),
@@ -243,6 +250,7 @@ urlpatterns = [
     
     # Advanced Text Generator
     path('ai/generate-advanced-text/', generate_advanced_text, name='generate_advanced_text'),
+    path('ai/generate-advanced-text/stream/', generate_advanced_text_stream, name='generate_advanced_text_stream'),
     path('ai/generated-content/', list_generated_content, name='list_generated_content'),
     path('ai/generated-content/<int:pk>/', get_generated_content, name='get_generated_content'),
     path('ai/generated-content/<int:pk>/update/', update_generated_content, name='update_generated_content'),
@@ -255,6 +263,7 @@ urlpatterns = [
 
     # Text and Podcast generation
     path('generate-text/', generate_text),
+    path('generate-text/stream/', generate_text_stream, name='generate_text_stream'),
     path('generate-podcast/', generate_podcast),
     path('analyze-text/', analyze_text),
     
@@ -274,6 +283,8 @@ urlpatterns = [
     path('tts/voices/', list_tts_voices),
     path('tts/voices/<str:language_code>/', list_voices_for_language),
     path('tts/generate/', generate_speech),
+    path('tts/audio/<str:key>/', get_cached_speech, name='get_cached_speech'),
+    path('tts/cache/stats/', tts_cache_stats, name='tts_cache_stats'),
     path('tts/validate/', validate_google_tts_key),
     path('tts/validate-deepgram/', validate_deepgram_key),
     path('tts/validate-speechify/', validate_speechify_key),
@@ -0,0 +1,285 @@
+"""
+Write-behind buffer for APIUsageLog rows.
+
+APIUsageMiddleware records each AI request as a plain dict in a bounded
+in-memory ring buffer. A daemon thread writes them with ``bulk_create``
+every FLUSH_INTERVAL seconds, or sooner once FLUSH_AT records are waiting,
+so logging never adds a database round trip to the request. When the
+buffer is full the oldest record is dropped and counted, so a slow or
+unavailable database cannot back up into requests or grow memory.
+
+If a batch insert fails, the batch is retried row by row so one bad row
+(e.g. for a user deleted before the flush) cannot block the rows around
+it. A row rejected by the database (IntegrityError/DataError) counts an
+attempt and is dropped, logged in full, after MAX_ATTEMPTS; any other
+error means the database itself is unavailable, and the rows not yet
+written are re-queued as they are.
+
+request_data is kept for spot checks only. Payloads are sampled
+(PAYLOAD_SAMPLE_RATE), secrets are redacted and the result is capped at
+MAX_PAYLOAD_CHARS.
+
+APIUsageLog.timestamp is auto_now_add, so rows are stamped at flush time
+(at most FLUSH_INTERVAL late).
+
+Usage:
+    from api.usage_log_buffer import get_usage_log_buffer
+
+    get_usage_log_buffer().log(user_id=user.id, provider='gemini', endpoint=path,
+                               response_status=200, response_time_ms=120)
+"""
+
+import atexit
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from django.conf import settings
+from django.db import DataError, IntegrityError, close_old_connections, connection, transaction
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_API_USAGE_LOG_CONFIG = {
+    'WRITE_BEHIND': True,
+    'FLUSH_INTERVAL': 2.0,         # Seconds between background flushes
+    'FLUSH_AT': 500,               # Wake the flusher early past this many records
+    'MAX_BUFFERED': 5000,          # Ring buffer size; the oldest records are dropped past it
+    'PAYLOAD_SAMPLE_RATE': 0.1,    # Fraction of requests whose body is stored
+    'MAX_BODY_BYTES': 64 * 1024,   # Larger bodies are never read for logging
+    'MAX_PAYLOAD_CHARS': 2000,
+    'MAX_ATTEMPTS': 3,             # Inserts a row gets after the database rejected it
+}
+
+SECRET_KEY_RE = re.compile(r'key|token|secret|password|authorization', re.IGNORECASE)
+
+
+def get_api_usage_log_config() -> Dict[str, Any]:
+    """Effective settings (settings.API_USAGE_LOG over defaults)."""
+    config = dict(DEFAULT_API_USAGE_LOG_CONFIG)
+    config.update(getattr(settings, 'API_USAGE_LOG', {}))
+    return config
+
+
+def _redact(value):
+    if isinstance(value, dict):
+        return {
+            k: '[redacted]' if isinstance(k, str) and SECRET_KEY_RE.search(k) else _redact(v)
+            for k, v in value.items()
+        }
+    if isinstance(value, list):
+        return [_redact(item) for item in value]
+    return value
+
+
+def summarize_payload(data: Any, max_chars: int) -> Dict[str, Any]:
+    """Redacted copy of a request payload, replaced by a truncated preview when too large."""
+    data = _redact(data)
+    if not isinstance(data, dict):
+        data = {'body': data}
+    text = json.dumps(data, ensure_ascii=False, default=str)
+    if len(text) <= max_chars:
+        return data
+    return {'truncated': True, 'size': len(text), 'preview': text[:max_chars]}
+
+
+@dataclass
+class _Entry:
+    """One buffered row and how many of its inserts the database rejected."""
+    fields: Dict[str, Any]
+    attempts: int = 0
+
+
+class APIUsageLogBuffer:
+    """
+    In-process ring buffer of APIUsageLog records.
+
+    log() only appends under a lock. flush() swaps the buffer out and
+    bulk_creates it. A failed batch is retried row by row; rows the
+    database keeps rejecting are dropped after MAX_ATTEMPTS, the rest go
+    back into the buffer (oldest dropped past MAX_BUFFERED). With WRITE_BEHIND off, or when the caller is inside
+    a transaction, log() writes through; with flush_interval=0 no thread is
+    started and callers flush explicitly.
+    """
+
+    _instance: Optional['APIUsageLogBuffer'] = None
+
+    def __init__(self, flush_interval: float = None, max_buffered: int = None, write_behind: bool = None):
+        config = get_api_usage_log_config()
+        self.write_behind = config['WRITE_BEHIND'] if write_behind is None else write_behind
+        self.flush_interval = config['FLUSH_INTERVAL'] if flush_interval is None else flush_interval
+        self.max_buffered = config['MAX_BUFFERED'] if max_buffered is None else max_buffered
+        self.flush_at = min(config['FLUSH_AT'], self.max_buffered)
+        self.max_attempts = config['MAX_ATTEMPTS']
+
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._records: deque = deque()
+
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._pid: Optional[int] = None
+        self._stats = {
+            'logged': 0,
+            'dropped': 0,
+            'flushes': 0,
+            'flush_errors': 0,
+            'dead_lettered': 0,
+            'rows_written': 0,
+            'last_flush_ms': 0.0,
+        }
+
+    @classmethod
+    def get_instance(cls) -> 'APIUsageLogBuffer':
+        """Get singleton instance."""
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+    def log(self, **fields) -> None:
+        """Buffer one row (same kwargs as APIUsageLog.objects.create, with user_id)."""
+        with self._lock:
+            if len(self._records) >= self.max_buffered:
+                self._records.popleft()
+                self._stats['dropped'] += 1
+            self._records.append(_Entry(fields))
+            self._stats['logged'] += 1
+            pending = len(self._records)
+
+        if not self.write_behind or connection.in_atomic_block:
+            # Inside a transaction the flusher's connection could not see
+            # rows this one has not committed yet (e.g. the user), so write here
+            self.flush()
+            return
+        self._ensure_flusher()
+        if pending >= self.flush_at:
+            self._wake.set()
+
+    def pending_count(self) -> int:
+        with self._lock:
+            return len(self._records)
+
+    # =========================================================================
+    # FLUSHING
+    # =========================================================================
+
+    def _ensure_flusher(self) -> None:
+        if self.flush_interval <= 0:
+            return
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name="api-usage-log", daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            close_old_connections()
+            try:
+                self.flush()
+            finally:
+                close_old_connections()
+
+    def _requeue(self, records: List[_Entry]) -> None:
+        """Put back a batch whose flush failed, ahead of anything logged since."""
+        with self._lock:
+            merged = deque(records)
+            merged.extend(self._records)
+            overflow = len(merged) - self.max_buffered
+            for _ in range(max(0, overflow)):
+                merged.popleft()
+            self._stats['dropped'] += max(0, overflow)
+            self._records = merged
+
+    def flush(self) -> int:
+        """
+        Write everything buffered so far. Safe to call from any thread.
+
+        Returns:
+            Number of rows written
+        """
+        from .admin_models import APIUsageLog
+
+        with self._flush_lock:
+            with self._lock:
+                records, self._records = list(self._records), deque()
+            if not records:
+                return 0
+
+            started = time.perf_counter()
+            try:
+                with transaction.atomic():  # A failure must not break a caller's transaction
+                    rows = len(APIUsageLog.objects.bulk_create(
+                        [APIUsageLog(**entry.fields) for entry in records], batch_size=500
+                    ))
+            except Exception as e:
+                logger.warning(f"API usage log batch of {len(records)} rows failed, retrying row by row: {e}")
+                with self._lock:
+                    self._stats['flush_errors'] += 1
+                rows = self._flush_rows(records)
+
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            with self._lock:
+                self._stats['flushes'] += 1
+                self._stats['rows_written'] += rows
+                self._stats['last_flush_ms'] = round(elapsed_ms, 2)
+            logger.debug(f"API usage log flush: {rows} rows in {elapsed_ms:.1f}ms")
+            return rows
+
+    def _flush_rows(self, records: List[_Entry]) -> int:
+        """Insert rows one at a time after a failed batch; returns rows written."""
+        from .admin_models import APIUsageLog
+
+        rows, retry, dead = 0, [], 0
+        for index, entry in enumerate(records):
+            try:
+                with transaction.atomic():
+                    APIUsageLog.objects.create(**entry.fields)
+                rows += 1
+            except (IntegrityError, DataError) as e:
+                entry.attempts += 1
+                if entry.attempts >= self.max_attempts:
+                    dead += 1
+                    logger.error(f"Dropping API usage log row after {entry.attempts} attempts: {e}; row={entry.fields}")
+                else:
+                    retry.append(entry)
+            except Exception as e:
+                # Not this row's fault (database unavailable): keep the rest for the next flush
+                logger.error(f"API usage log flush failed, re-queued {len(records) - index} rows: {e}")
+                retry.extend(records[index:])
+                break
+
+        self._requeue(retry)
+        with self._lock:
+            self._stats['dead_lettered'] += dead
+        return rows
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Buffer depth, drops and flush metrics for monitoring."""
+        with self._lock:
+            return {
+                **self._stats,
+                'write_behind': self.write_behind,
+                'pending': len(self._records),
+                'max_buffered': self.max_buffered,
+            }
+
+
+def get_usage_log_buffer() -> APIUsageLogBuffer:
+    """Get the API usage log buffer singleton."""
+    return APIUsageLogBuffer.get_instance()
+
+
+@atexit.register
+def _flush_usage_log_on_exit():
+    if APIUsageLogBuffer._instance is not None:
+        APIUsageLogBuffer._instance.flush()
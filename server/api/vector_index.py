@@ -0,0 +1,323 @@
+"""
+Per-(user, language) vector index for semantic vocabulary search.
+
+Each index keeps the user's vocabulary embeddings as one L2-normalized
+float32 matrix, so a query is a single matrix-vector product followed by a
+partial sort. Indexes are:
+
+- built lazily from the database on first search,
+- updated in place when an embedding is saved (see ``index_embedding``),
+- persisted to ``settings.VECTOR_INDEX['DIR']`` as a warm-start cache that
+  other worker processes pick up by file mtime.
+
+The database stays the source of truth: a search compares the number of
+embedded rows with the index size and rebuilds on mismatch, which covers
+deletes and writes that bypassed the index.
+
+When ``hnswlib`` is installed and an index holds at least ``ANN_MIN_SIZE``
+vectors, queries go through an HNSW graph built from the same matrix.
+"""
+
+import logging
+import os
+import re
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from django.conf import settings
+
+try:
+    import hnswlib
+except ImportError:  # Optional: exact search is used without it
+    hnswlib = None
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_VECTOR_INDEX_CONFIG = {
+    'DIR': os.path.join(settings.BASE_DIR, 'vector_index'),
+    'ANN_MIN_SIZE': 20000,
+    'ANN_EF_SEARCH': 64,
+    'PERSIST_DELAY': 2.0,
+}
+
+
+def get_vector_index_config() -> Dict:
+    """Return VECTOR_INDEX settings merged over the defaults."""
+    return {**DEFAULT_VECTOR_INDEX_CONFIG, **getattr(settings, 'VECTOR_INDEX', {})}
+
+
+def normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    """L2-normalize rows as float32; all-zero rows stay zero."""
+    matrix = np.asarray(matrix, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    return np.divide(matrix, norms, out=np.zeros_like(matrix), where=norms > 0)
+
+
+class VectorIndex:
+    """Normalized embedding matrix for one user's vocabulary in one language."""
+
+    def __init__(self, user_id: int, language: str, config: Optional[Dict] = None):
+        self.user_id = user_id
+        self.language = language
+        self.config = config or get_vector_index_config()
+
+        self.ids = np.empty(0, dtype=np.int64)
+        self.matrix = np.empty((0, 0), dtype=np.float32)
+        self._positions: Dict[int, int] = {}
+        self._row_count = 0  # Embedded DB rows covered, including skipped ones
+        self._ann = None
+        self._loaded = False
+        self._stale = False
+        self._loaded_mtime_ns = 0
+        self._persist_timer: Optional[threading.Timer] = None
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self.ids)
+
+    @property
+    def path(self) -> str:
+        language = re.sub(r'[^A-Za-z0-9_-]', '_', self.language or '')
+        return os.path.join(self.config['DIR'], f"{self.user_id}_{language}.npz")
+
+    @property
+    def dimension(self) -> int:
+        return self.matrix.shape[1] if self.matrix.ndim == 2 else 0
+
+    # ------------------------------------------------------------------
+    # Loading and persistence
+    # ------------------------------------------------------------------
+
+    def _queryset(self):
+        from .models import Vocabulary
+        return Vocabulary.objects.filter(
+            created_by_id=self.user_id,
+            language=self.language,
+            embedding__isnull=False,
+        )
+
+    def _disk_mtime_ns(self) -> int:
+        try:
+            return os.stat(self.path).st_mtime_ns
+        except OSError:
+            return 0
+
+    def _set_data(self, ids: np.ndarray, matrix: np.ndarray, row_count: int):
+        self.ids = np.asarray(ids, dtype=np.int64)
+        self.matrix = matrix
+        self._positions = {int(vocab_id): row for row, vocab_id in enumerate(self.ids)}
+        self._ann = None
+        self._row_count = row_count
+        self._loaded = True
+        self._stale = False
+        self._build_ann()
+
+    def load(self) -> bool:
+        """Load the persisted index. Returns False when there is none."""
+        mtime_ns = self._disk_mtime_ns()
+        if not mtime_ns:
+            return False
+        try:
+            with np.load(self.path) as data:
+                ids, matrix, row_count = data['ids'], data['matrix'], int(data['row_count'])
+        except Exception as e:
+            logger.warning(f"Discarding unreadable vector index {self.path}: {e}")
+            return False
+        with self._lock:
+            self._set_data(ids, matrix.astype(np.float32, copy=False), row_count)
+            self._loaded_mtime_ns = mtime_ns
+        return True
+
+    def rebuild(self):
+        """Rebuild from the database, keeping the most common dimension."""
+        ids, vectors, row_count = [], [], 0
+        for vocab_id, embedding in self._queryset().values_list('id', 'embedding').iterator(chunk_size=2000):
+            row_count += 1
+            if embedding is not None and len(embedding):
+                ids.append(vocab_id)
+                vectors.append(embedding)
+
+        if vectors:
+            lengths = np.array([len(v) for v in vectors])
+            dimension = int(np.bincount(lengths).argmax())
+            keep = [i for i, v in enumerate(vectors) if len(v) == dimension]
+            if len(keep) < len(vectors):
+                logger.warning(
+                    f"Vector index {self.user_id}/{self.language}: skipped "
+                    f"{len(vectors) - len(keep)} embeddings with dimension != {dimension}"
+                )
+            matrix = normalize_rows(np.stack([vectors[i] for i in keep]))
+            ids = [ids[i] for i in keep]
+        else:
+            matrix = np.empty((0, 0), dtype=np.float32)
+
+        with self._lock:
+            self._set_data(np.array(ids, dtype=np.int64), matrix, row_count)
+        self.persist()
+
+    def persist(self):
+        """Write the index atomically so readers never see a partial file."""
+        with self._lock:
+            if self._persist_timer:
+                self._persist_timer.cancel()
+                self._persist_timer = None
+            ids, matrix, row_count = self.ids, self.matrix, self._row_count
+        try:
+            os.makedirs(self.config['DIR'], exist_ok=True)
+            tmp_path = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                np.savez(f, ids=ids, matrix=matrix, row_count=row_count)
+            os.replace(tmp_path, self.path)
+            with self._lock:
+                self._loaded_mtime_ns = self._disk_mtime_ns()
+        except OSError as e:
+            logger.warning(f"Could not persist vector index {self.path}: {e}")
+
+    def _schedule_persist(self):
+        """Debounce persistence so bulk embedding runs write the file once."""
+        with self._lock:
+            if self._persist_timer:
+                return
+            self._persist_timer = threading.Timer(self.config['PERSIST_DELAY'], self.persist)
+            self._persist_timer.daemon = True
+            self._persist_timer.start()
+
+    def ensure_fresh(self):
+        """Load from disk or the database if this copy is missing or stale."""
+        with self._lock:
+            loaded, loaded_mtime_ns = self._loaded, self._loaded_mtime_ns
+            pending = self._persist_timer is not None
+        disk_mtime_ns = self._disk_mtime_ns()
+        if not loaded or (not pending and disk_mtime_ns > loaded_mtime_ns):
+            self.load()
+
+        if not self._loaded or self._stale or self._queryset().count() != self._row_count:
+            self.rebuild()
+
+    # ------------------------------------------------------------------
+    # Incremental updates
+    # ------------------------------------------------------------------
+
+    def upsert(self, vocab_id: int, embedding: Sequence[float]):
+        """Add or replace one vector. A no-op until the index has been built."""
+        with self._lock:
+            if not self._loaded and not self.load():
+                return
+            vector = normalize_rows(np.asarray(embedding, dtype=np.float32)[None, :])
+            if len(self) and vector.shape[1] != self.dimension:
+                logger.warning(
+                    f"Vector index {self.user_id}/{self.language}: dimension changed "
+                    f"({self.dimension} -> {vector.shape[1]}), rebuilding on next search"
+                )
+                self._stale = True
+                return
+
+            row = self._positions.get(int(vocab_id))
+            if row is not None:
+                self.matrix[row] = vector[0]
+            else:
+                self._positions[int(vocab_id)] = len(self.ids)
+                self._row_count += 1
+                self.ids = np.append(self.ids, np.int64(vocab_id))
+                self.matrix = vector if not self.matrix.size else np.vstack([self.matrix, vector])
+
+            if self._ann is not None:
+                if self._ann.get_current_count() >= self._ann.get_max_elements():
+                    self._ann.resize_index(2 * self._ann.get_max_elements())
+                self._ann.add_items(vector, [int(vocab_id)])
+            else:
+                self._build_ann()
+        self._schedule_persist()
+
+    def remove(self, vocab_id: int):
+        """Drop one vector, if present."""
+        with self._lock:
+            row = self._positions.get(int(vocab_id))
+            if row is None:
+                return
+            keep = np.ones(len(self.ids), dtype=bool)
+            keep[row] = False
+            self.ids = self.ids[keep]
+            self.matrix = self.matrix[keep]
+            self._positions = {int(v): i for i, v in enumerate(self.ids)}
+            self._row_count -= 1
+            if self._ann is not None:
+                self._ann.mark_deleted(int(vocab_id))
+        self._schedule_persist()
+
+    # ------------------------------------------------------------------
+    # Search
+    # ------------------------------------------------------------------
+
+    def _build_ann(self):
+        if hnswlib is None or len(self) < self.config['ANN_MIN_SIZE']:
+            return
+        ann = hnswlib.Index(space='ip', dim=self.dimension)
+        ann.init_index(max_elements=2 * len(self), ef_construction=200, M=16)
+        ann.add_items(self.matrix, self.ids)
+        ann.set_ef(self.config['ANN_EF_SEARCH'])
+        self._ann = ann
+
+    def search(self, query: Sequence[float], k: int = 10,
+               min_similarity: float = 0.0) -> Tuple[List[Tuple[int, float]], int]:
+        """
+        Return the top-k ``(vocab_id, cosine_similarity)`` pairs at or above
+        ``min_similarity`` and the total number of vectors above it.
+
+        With an ANN graph the total is only counted among the k candidates.
+        """
+        self.ensure_fresh()
+        with self._lock:
+            if not len(self) or k <= 0:
+                return [], 0
+            q = normalize_rows(np.asarray(query, dtype=np.float32))
+            if q.shape[0] != self.dimension:
+                raise ValueError(
+                    f"Query dimension {q.shape[0]} does not match index dimension {self.dimension}"
+                )
+
+            if self._ann is not None:
+                k = min(k, self._ann.get_current_count())
+                self._ann.set_ef(max(self.config['ANN_EF_SEARCH'], k))
+                labels, distances = self._ann.knn_query(q, k=k)
+                hits = [
+                    (int(vocab_id), float(1.0 - distance))
+                    for vocab_id, distance in zip(labels[0], distances[0])
+                    if 1.0 - distance >= min_similarity
+                ]
+                return hits, len(hits)
+
+            scores = self.matrix @ q
+            total = int(np.count_nonzero(scores >= min_similarity))
+            k = min(k, total)
+            if not k:
+                return [], 0
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top], kind='stable')]
+            return [(int(self.ids[i]), float(scores[i])) for i in top], total
+
+
+_indexes: Dict[Tuple[int, str], VectorIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_vector_index(user_id: int, language: str) -> VectorIndex:
+    """Get the process-wide index for a (user, language) pair."""
+    key = (user_id, language)
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is None:
+            index = _indexes[key] = VectorIndex(user_id, language)
+        return index
+
+
+def index_embedding(vocab) -> None:
+    """Push a freshly saved Vocabulary embedding into its index."""
+    if vocab.embedding is None or not len(vocab.embedding):
+        return
+    try:
+        get_vector_index(vocab.created_by_id, vocab.language).upsert(vocab.id, vocab.embedding)
+    except Exception as e:
+        logger.warning(f"Vector index update failed for vocab {vocab.id}: {e}")
@@ -68,7 +68,7 @@ from .monitoring_views import (
 )
 
 # Pagination
-from .pagination import StandardResultsSetPagination
+from .pagination import StandardResultsSetPagination, VocabularyCursorPagination
 
 __all__ = [
     # Auth
@@ -106,4 +106,5 @@ __all__ = [
     'admin_activity_feed',
     # Utils
     'StandardResultsSetPagination',
+    'VocabularyCursorPagination',
 ]
@@ -14,6 +14,7 @@ from django.conf import settings
 from api.models import Classroom, ClassMembership
 from api.serializers import ClassroomSerializer, ClassroomDetailSerializer, ClassMembershipSerializer
 from api.permissions import IsTeacher
+from api.services.classroom_path_stats import get_path_stats
 
 
 class ClassroomViewSet(viewsets.ModelViewSet):
@@ -170,7 +171,7 @@ class ClassroomViewSet(viewsets.ModelViewSet):
         classroom = self.get_object()
         
         # 1. Identify the relevant path
-        from ..models import LearningPath, PathNode, PathEnrollment, NodeProgress
+        from ..models import LearningPath
         
         path_id = request.query_params.get('path_id')
         path = None
@@ -193,82 +194,8 @@ class ClassroomViewSet(viewsets.ModelViewSet):
                 'message': 'No learning path associated with this classroom.'
             })
             
-        # 2. Calculate Total Nodes
-        total_nodes = PathNode.objects.filter(sublevel__path=path).count()
-        if total_nodes == 0:
-             return Response({
-                'has_path': True,
-                'path_title': path.title,
-                'total_nodes': 0,
-                'class_average': 0,
-                'students': []
-            })
-
-        # 3. Get Active Students
-        memberships = classroom.memberships.filter(status='active').select_related('student')
-        
-        student_stats = []
-        total_completion = 0
-        
-        for membership in memberships:
-            student = membership.student
-            
-            # Get Enrollment
-            enrollment = PathEnrollment.objects.filter(path=path, student=student).first()
-            
-            completed_count = 0
-            current_node_title = "Not started"
-            current_sublevel_code = "-"
-            
-            if enrollment:
-                # Count completed nodes
-                completed_count = NodeProgress.objects.filter(
-                    enrollment=enrollment, 
-                    status='completed'
-                ).count()
-                
-                # Find current node (latest active or last completed)
-                # First check for in_progress
-                current = NodeProgress.objects.filter(
-                    enrollment=enrollment,
-                    status__in=['in_progress', 'available']
-                ).order_by('-id').first()
-                
-                if current and current.node:
-                     current_node_title = current.node.title
-                     if current.node.sublevel:
-                         current_sublevel_code = current.node.sublevel.sublevel_code
-                elif completed_count > 0:
-                     current_node_title = "All caught up" 
-                     # Or find the very last one?
-                
-            progress_percent = min(100, round((completed_count / total_nodes) * 100))
-            total_completion += progress_percent
-            
-            student_stats.append({
-                'student_id': student.id,
-                'name': student.username, # Or student.first_name
-                'avatar': student.profile.avatar.url if student.profile.avatar else None,
-                'progress_percent': progress_percent,
-                'completed_nodes': completed_count,
-                'current_node': current_node_title,
-                'current_sublevel': current_sublevel_code
-            })
-            
-        # 4. Aggregate
-        class_average = 0
-        if len(memberships) > 0:
-            class_average = round(total_completion / len(memberships))
-            
-        return Response({
-            'has_path': True,
-            'path_id': path.id,
-            'path_title': path.title,
-            'total_nodes': total_nodes,
-            'student_count': len(memberships),
-            'class_average': class_average,
-            'students': student_stats
-        })
+        # 2. Per-student progress (set-based, cached per classroom and path)
+        return Response(get_path_stats(classroom, path))
 
     @action(detail=True, methods=['get'])
     def class_path_progress(self, request, pk=None):
@@ -6,6 +6,7 @@ from django.shortcuts import get_object_or_404
 from django.utils import timezone
 from ..models import GameConfig, GameSession, GameParticipant, Classroom
 from ..permissions import IsTeacher
+from ..game_rooms import GameRoomError, get_game_rooms, get_leaderboard, publish_session_update, score_answer
 
 
 class GameConfigViewSet(viewsets.ModelViewSet):
@@ -217,6 +218,7 @@ class GameSessionViewSet(viewsets.ModelViewSet):
         session.status = 'active'
         session.started_at = timezone.now()
         session.save()
+        publish_session_update(session)
         
         return Response({'status': 'active', 'started_at': session.started_at, 'question_count': len(questions)})
     
@@ -225,7 +227,16 @@ class GameSessionViewSet(viewsets.ModelViewSet):
         """
         GET: Fetch current game state (polling endpoint).
         POST: Update game state (teacher or game engine).
+        
+        Prefer the ws/game/<id>/ channel; while a room is loaded in this
+        process, GET is answered from it without touching the database.
         """
+        room = get_game_rooms().get(int(pk)) if request.method == 'GET' and str(pk).isdigit() else None
+        if room is not None and (room.player(request.user.id) or room.host_id == request.user.id):
+            room.heartbeat(request.user.id)
+            snapshot = room.snapshot()
+            return Response({key: snapshot[key] for key in ('status', 'current_stage', 'state', 'participants')})
+        
         session = get_object_or_404(GameSession, pk=pk)
         
         if request.method == 'GET':
@@ -259,39 +270,45 @@ class GameSessionViewSet(viewsets.ModelViewSet):
         if 'status' in data:
             session.status = data['status']
         session.save()
+        publish_session_update(session)
         
         return Response({'updated': True})
     
     @action(detail=True, methods=['post'])
     def answer(self, request, pk=None):
-        """Player submits an answer."""
+        """
+        Player submits an answer.
+        
+        Scored atomically (in the loaded room, or with one F() UPDATE), so
+        concurrent answers from the same player are never lost.
+        """
         session = get_object_or_404(GameSession, pk=pk)
-        participant = get_object_or_404(GameParticipant, session=session, user=request.user)
         
         data = request.data
-        is_correct = data.get('is_correct', False)
-        response_time = data.get('response_time', 0)
-        
-        if is_correct:
-            participant.correct_answers += 1
-            # Score based on speed (faster = more points)
-            points = max(10, 100 - int(response_time * 10))
-            participant.score += points
-        else:
-            participant.wrong_answers += 1
-        
-        # Update average response time
-        total_answers = participant.correct_answers + participant.wrong_answers
-        participant.avg_response_time = (
-            (participant.avg_response_time * (total_answers - 1) + response_time) / total_answers
-        ) if total_answers > 0 else response_time
+        try:
+            result = score_answer(
+                session.id, request.user.id,
+                bool(data.get('is_correct', False)), float(data.get('response_time') or 0),
+            )
+        except GameRoomError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        if result is None:
+            return Response({'error': 'Not a participant in this game'}, status=status.HTTP_404_NOT_FOUND)
+        
+        return Response(result)
+    
+    @action(detail=True, methods=['get'])
+    def leaderboard(self, request, pk=None):
+        """Ranked participants (host or participants only)."""
+        session = get_object_or_404(GameSession, pk=pk)
         
-        participant.save()
+        if session.host_id != request.user.id and not session.participant_records.filter(user=request.user).exists():
+            return Response({'error': 'Not in this game'}, status=status.HTTP_403_FORBIDDEN)
         
+        limit = request.query_params.get('limit')
         return Response({
-            'score': participant.score,
-            'correct': participant.correct_answers,
-            'wrong': participant.wrong_answers,
+            'status': session.status,
+            'leaderboard': get_leaderboard(session.id, int(limit) if limit and limit.isdigit() else None),
         })
     
     @action(detail=False, methods=['post'])
@@ -356,6 +373,9 @@ class GameSessionViewSet(viewsets.ModelViewSet):
         session.status = 'completed'
         session.ended_at = timezone.now()
         session.save()
+        publish_session_update(session)
+        get_game_rooms().flush()  # Scores below must include answers still buffered in the room
+        leaderboard = get_leaderboard(session.id)
         
         # --- THE SUPER LINK: Sync to Assignment Progress ---
         if session.config and session.config.content_id:
@@ -370,7 +390,8 @@ class GameSessionViewSet(viewsets.ModelViewSet):
              if assignment:
                  try:
                      total_q = len(session.state.get('questions', []))
-                     for p in session.participant_records.all():
+                     ranks = {entry['user_id']: entry['rank'] for entry in leaderboard}
+                     for p in session.participant_records.select_related('user'):
                          # Calculate score percentage
                          score_percent = 0
                          if total_q > 0:
@@ -384,22 +405,12 @@ class GameSessionViewSet(viewsets.ModelViewSet):
                                  'status': 'completed',
                                  'score': score_percent,
                                  'submitted_at': timezone.now(),
-                                 'feedback': f'Completed via Live Game Mode (Rank: #0)' # Rank logic could be improved
+                                 'feedback': f'Completed via Live Game Mode (Rank: #{ranks.get(p.user_id, 0)})'
                              }
                          )
                  except Exception as e:
                      print(f"Error syncing grades: {e}")
         
-        # Get final leaderboard
-        participants = session.participant_records.order_by('-score')
-        leaderboard = [{
-            'rank': i + 1,
-            'username': p.user.username,
-            'score': p.score,
-            'correct': p.correct_answers,
-            'avg_time': round(p.avg_response_time, 2),
-        } for i, p in enumerate(participants)]
-        
         return Response({
             'status': 'completed',
             'leaderboard': leaderboard,
@@ -9,3 +9,32 @@ class StandardResultsSetPagination(pagination.PageNumberPagination):
     page_size = 20
     page_size_query_param = 'page_size'
     max_page_size = 100
+
+
+class VocabularyCursorPagination(pagination.CursorPagination):
+    """
+    Cursor pagination for vocabulary lists, stable while words are added.
+
+    Opt-in: it only applies when the request has ?cursor= or ?page_size=,
+    so clients that expect the plain list keep working.
+    """
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+    ordering = ('-created_at', '-id')
+
+    def get_ordering(self, request, queryset, view):
+        """
+        The requested ordering (?ordering=word) plus id as a final tiebreaker,
+        so rows sharing the sort value are neither skipped nor repeated.
+        """
+        ordering = tuple(super().get_ordering(request, queryset, view))
+        if not {'id', '-id', 'pk', '-pk'} & set(ordering):
+            ordering += ('-id' if ordering[0].startswith('-') else 'id',)
+        return ordering
+
+    def paginate_queryset(self, queryset, request, view=None):
+        params = request.query_params
+        if self.cursor_query_param not in params and self.page_size_query_param not in params:
+            return None
+        return super().paginate_queryset(queryset, request, view)
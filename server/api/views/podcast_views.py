@@ -3,8 +3,7 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from ..models import Podcast, PodcastCategory
 from ..serializers import PodcastSerializer, PodcastCategorySerializer
-from ..services.background_podcast import generate_podcast_job
-import threading
+from ..services.job_queue import get_job_queue, JobQueueFull
 
 class PodcastCategoryViewSet(viewsets.ModelViewSet):
     permission_classes = [permissions.IsAuthenticated]
@@ -60,17 +59,16 @@ class PodcastViewSet(viewsets.ModelViewSet):
             episode_number=next_ep_num
         )
         
-        # Start Background Job
-        thread = threading.Thread(
-            target=generate_podcast_job, 
-            args=(podcast.id,), 
-            kwargs={
+        # Queue Background Job (bounded pool, resumable from the Podcast row)
+        try:
+            get_job_queue().enqueue('podcast', podcast, params={
                 'custom_topic': custom_topic,
                 'target_level': target_level,
                 'audio_speed': audio_speed
-            }
-        )
-        thread.start()
+            })
+        except JobQueueFull as e:
+            podcast.delete()
+            return Response({"error": str(e)}, status=status.HTTP_429_TOO_MANY_REQUESTS)
         
         return Response(PodcastSerializer(podcast).data, status=status.HTTP_201_CREATED)
 
@@ -6,9 +6,11 @@ from ..serializers import UserProgressSerializer, QuizSerializer, VocabularySeri
 from ..srs import calculate_srs
 from ..hlr import HLRScheduler
 from datetime import timedelta
+import numpy as np
 from django.utils import timezone
 from django.db import transaction
 from ..services.learning_events import log_word_practice
+from ..services.user_stats import hlr_state, record_practice
 
 class UserProgressViewSet(viewsets.ModelViewSet):
     serializer_class = UserProgressSerializer
@@ -35,6 +37,7 @@ def update_progress(request):
         grade = 5 if correct else 0
     
     srs_data = calculate_srs(grade, progress.repetition_stage, progress.easiness_factor, progress.interval)
+    stage_before = progress.repetition_stage
     
     progress.repetition_stage = srs_data['repetitions']
     progress.easiness_factor = srs_data['easiness_factor']
@@ -47,7 +50,11 @@ def update_progress(request):
     progress.save()
     
     # Save Quiz Result
-    Quiz.objects.create(user=request.user, vocab=vocab, score=grade * 2)
+    quiz = Quiz.objects.create(user=request.user, vocab=vocab, score=grade * 2)
+    record_practice(
+        request.user.id, quiz.timestamp,
+        srs_stage_before=stage_before, srs_stage_after=progress.repetition_stage,
+    )
     
     return Response(UserProgressSerializer(progress).data)
 
@@ -58,6 +65,10 @@ class QuizViewSet(viewsets.ReadOnlyModelViewSet):
     def get_queryset(self):
         return Quiz.objects.filter(user=self.request.user).order_by('-timestamp')
 
+# Due candidates fetched per session slot before ranking by recall
+DUE_CANDIDATE_FACTOR = 10
+
+
 @api_view(['GET'])
 @permission_classes([permissions.IsAuthenticated])
 def get_words_for_practice(request):
@@ -83,48 +94,55 @@ def get_words_for_practice(request):
         native_language=native_lang
     )
     
-    # Calculate priority for each word
-    # Note: For large datasets, this should be done in DB or cached.
-    # Given the constraints, we'll do it in Python for now as requested "simple integration".
-    
     # --- SMART SESSION MIX ALGORITHM ---
     # Goal: 20% New Words, 80% Due Reviews (Recall < 90%)
     # This prevents "New Word Starvation" and ensures steady progress.
-    
-    due_words = []      # Recall < 0.9
-    new_words = []      # Never practiced
-    mastered_words = [] # Recall >= 0.9 (Review Ahead)
+    #
+    # Candidates come from range scans on the (created_by, language,
+    # native_language, next_due_at) index; only the HLR columns are read and
+    # full Vocabulary rows are loaded for the selected session only.
     
     now = timezone.now()
+    hlr_columns = ('id', 'correct_count', 'wrong_count', 'total_practice_count', 'last_practiced_at')
     
-    for word in queryset:
-        if not word.last_practiced_at:
-            new_words.append(word)
-        else:
-            days_since = (now - word.last_practiced_at).days
-            recall_prob = HLRScheduler.predict_recall_probability(
-                word.correct_count,
-                word.wrong_count,
-                word.total_practice_count,
-                days_since
-            )
-            
-            # Store tuple: (recall_prob, word, days_since)
-            if recall_prob < 0.9:
-                due_words.append((recall_prob, word, days_since))
-            else:
-                mastered_words.append((recall_prob, word, days_since))
-                
-    # Sort lists
-    # Due: Lowest recall first (Urgent)
-    due_words.sort(key=lambda x: x[0])
+    # Due: Recall < 0.9 (next_due_at passed). Most overdue window, ranked by recall below
+    due_window = max(limit * DUE_CANDIDATE_FACTOR, 200)
+    rows = list(
+        queryset.filter(next_due_at__lte=now).order_by('next_due_at').values_list(*hlr_columns)[:due_window]
+    )
+    due_count = len(rows)
     
-    # Mastered: Lowest recall first (Closest to being due)
-    mastered_words.sort(key=lambda x: x[0])
+    # Mastered: Recall >= 0.9, closest to being due first (only needed for backfill)
+    rows += list(
+        queryset.filter(next_due_at__gt=now).order_by('next_due_at').values_list(*hlr_columns)[:limit]
+    )
     
-    # New: Oldest created first (FIFO) or Random? Let's do Random for variety
+    # New: Never practiced. Random for variety
     import random
-    random.shuffle(new_words)
+    new_ids = list(queryset.filter(last_practiced_at__isnull=True).values_list('id', flat=True))
+    new_words = random.sample(new_ids, min(len(new_ids), limit))
+    
+    if rows:
+        ids, correct, wrong, total, last_practiced = zip(*rows)
+    else:
+        ids, correct, wrong, total, last_practiced = (), (), (), (), ()
+    days_since = HLRScheduler.batch_days_since(last_practiced, now)
+    hlr = HLRScheduler.batch_estimate(correct, wrong, total, days_since)
+    recall = hlr['recall_probability']
+    
+    # Due: Lowest recall first (Urgent)
+    due_idx = np.argsort(recall[:due_count], kind='stable')
+    due_words = [ids[i] for i in due_idx]
+    mastered_words = list(ids[due_count:])
+    hlr_by_id = {
+        ids[i]: {
+            'recall_probability': float(recall[i]),
+            'half_life': float(hlr['half_life'][i]),
+            'days_since_practice': int(days_since[i]),
+            'priority_score': float(hlr['priority_score'][i]),
+        }
+        for i in range(len(ids))
+    }
     
     # Allocations
     target_new = int(limit * 0.2) # 20% = 4 words
@@ -137,7 +155,7 @@ def get_words_for_practice(request):
     final_selection.extend(selected_new)
     
     # 2. Select Due Words (up to target)
-    selected_due = [w for p, w, d in due_words[:target_due]]
+    selected_due = due_words[:target_due]
     final_selection.extend(selected_due)
     
     # 3. Backfill if we have space (didn't meet targets)
@@ -145,7 +163,7 @@ def get_words_for_practice(request):
     
     if remaining_slots > 0:
         # Try to fill with more Due words
-        remaining_due = [w for p, w, d in due_words[target_due:]]
+        remaining_due = due_words[target_due:]
         fill_due = remaining_due[:remaining_slots]
         final_selection.extend(fill_due)
         remaining_slots -= len(fill_due)
@@ -159,45 +177,30 @@ def get_words_for_practice(request):
         
     if remaining_slots > 0:
         # Finally, fill with Mastered (Review Ahead)
-        fill_mastered = [w for p, w, d in mastered_words[:remaining_slots]]
+        fill_mastered = mastered_words[:remaining_slots]
         final_selection.extend(fill_mastered)
         
     # Shuffle the final session so user gets a mix
     random.shuffle(final_selection)
     
-    practice_words = final_selection
+    words_by_id = Vocabulary.objects.in_bulk(final_selection)
     
     # Enhance response with HLR statistics
     response_data = []
-    for word in practice_words:
+    for word_id in final_selection:
+        word = words_by_id.get(word_id)
+        if word is None:
+            continue
         word_data = VocabularySerializer(word).data
         
         # Add HLR statistics
-        if word.last_practiced_at:
-            days_since = (now - word.last_practiced_at).days
-            half_life = HLRScheduler.estimate_half_life(
-                word.correct_count,
-                word.wrong_count,
-                word.total_practice_count
-            )
-            recall_prob = HLRScheduler.predict_recall_probability(
-                word.correct_count,
-                word.wrong_count,
-                word.total_practice_count,
-                days_since
-            )
-            priority = HLRScheduler.get_priority_score(
-                word.correct_count,
-                word.wrong_count,
-                word.total_practice_count,
-                days_since
-            )
-            
+        stats = hlr_by_id.get(word_id)
+        if stats:
             word_data['hlr_stats'] = {
-                'recall_probability': round(recall_prob, 4),
-                'half_life': round(half_life, 2),
-                'days_since_practice': days_since,
-                'priority_score': round(priority, 4),
+                'recall_probability': round(stats['recall_probability'], 4),
+                'half_life': round(stats['half_life'], 2),
+                'days_since_practice': stats['days_since_practice'],
+                'priority_score': round(stats['priority_score'], 4),
                 'correct_count': word.correct_count,
                 'wrong_count': word.wrong_count,
                 'total_practice_count': word.total_practice_count
@@ -244,6 +247,8 @@ def record_practice_result(request):
                 created_by=request.user
             )
             
+            hlr_before = hlr_state(word)
+
             # Map difficulty to HLR weights
             # HLR uses correct_count and wrong_count to estimate half-life.
             # We can tweak these to simulate "Ease" and "Difficulty".
@@ -287,6 +292,7 @@ def record_practice_result(request):
             
             # Log activity for Heatmap (create Quiz entry)
             Quiz.objects.create(user=request.user, vocab=word, score=score)
+            record_practice(request.user.id, word.last_practiced_at, hlr_before, hlr_state(word))
 
             # Log granular Learning Event
             is_correct = False
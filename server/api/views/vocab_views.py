@@ -4,15 +4,17 @@ from rest_framework.response import Response
 from rest_framework.parsers import MultiPartParser, FormParser
 from ..models import Vocabulary, Tag, UserProfile
 from ..serializers import VocabularySerializer
+from .pagination import VocabularyCursorPagination
 from ..hlr import HLRScheduler
+from ..services.vocabulary_csv import VocabularyCSVImporter, iter_vocabulary_csv
 from ..prompts import ContextEngineer
 from ..unified_ai import generate_ai_content
-from django.db.models import Q
-from django.http import HttpResponse
+from django.db.models import Prefetch, Q
+from django.http import StreamingHttpResponse
 from django.utils import timezone
 import csv
-import io
 import json
+import numpy as np
 
 def enrich_vocabulary_with_ai(vocab, user):
     """Enrich vocabulary using AI Gateway."""
@@ -78,13 +80,34 @@ def enrich_vocabulary_with_ai(vocab, user):
         print(f"AI Enrichment Failed: {e}")
         # Graceful degradation - do nothing
 
+def optimize_vocabulary_for_read(queryset, request):
+    """
+    Prefetch tags and related word ids in one query each, and with a
+    ?fields= projection load only the requested columns (plus the ones the
+    list can be ordered by).
+    """
+    requested = VocabularySerializer.projected_fields(request)
+    prefetches = []
+    if requested is None or 'tags' in requested:
+        prefetches.append(Prefetch('tags', queryset=Tag.objects.only('id', 'name')))
+    if requested is None or 'related_words' in requested:
+        prefetches.append(Prefetch('related_words', queryset=Vocabulary.objects.only('id')))
+    queryset = queryset.prefetch_related(*prefetches)
+
+    if requested is not None:
+        concrete = {field.name for field in Vocabulary._meta.concrete_fields}
+        load = (requested | set(VocabularyViewSet.ordering_fields)) & concrete
+        queryset = queryset.only('id', *load)
+    return queryset
+
+
 class VocabularyViewSet(viewsets.ModelViewSet):
     serializer_class = VocabularySerializer
     permission_classes = [permissions.IsAuthenticated]
-    # pagination_class = StandardResultsSetPagination
+    pagination_class = VocabularyCursorPagination  # Opt-in with ?page_size= / ?cursor=
     filter_backends = [filters.OrderingFilter]
     ordering_fields = ['word', 'created_at', 'type', 'last_seen']
-    ordering = ['-created_at']  # Default ordering
+    ordering = ['-created_at', '-id']  # Default ordering (id breaks ties for cursors)
 
     def get_queryset(self):
         # Filter by user's language pair (target + native)
@@ -116,6 +139,9 @@ class VocabularyViewSet(viewsets.ModelViewSet):
         type_filter = self.request.query_params.get('type')
         if type_filter:
             queryset = queryset.filter(type=type_filter)
+        
+        if self.action in ('list', 'retrieve'):
+            queryset = optimize_vocabulary_for_read(queryset, self.request)
             
         return queryset
 
@@ -127,23 +153,26 @@ class VocabularyViewSet(viewsets.ModelViewSet):
             
         try:
             from ..embedding_service import EmbeddingService
-            import threading
+            from ..vector_index import index_embedding
+            from ..services.embedding_backfill import embedding_text, embedding_text_hash
+            from ..services.job_queue import get_job_queue
             
             def generate_and_save():
                 try:
                     # Simplified format: "Word Translation"
                     # This proved to be much more effective for semantic search than including examples/synonyms
-                    text = f"{vocab.word} {vocab.translation}"
+                    text = embedding_text(vocab.word, vocab.translation)
                         
                     embedding = EmbeddingService.generate_embedding(text, api_key)
                     vocab.embedding = embedding
-                    vocab.save(update_fields=['embedding'])
+                    vocab.embedding_text_hash = embedding_text_hash(text)  # Lets backfills skip this word
+                    vocab.save(update_fields=['embedding', 'embedding_text_hash'])
+                    index_embedding(vocab)
                 except Exception as e:
                     print(f"Failed to auto-generate embedding for {vocab.word}: {e}")
             
-            # Run in background thread
-            thread = threading.Thread(target=generate_and_save)
-            thread.start()
+            # Run on the shared generation pool (batch lane)
+            get_job_queue().submit(generate_and_save, user_id=vocab.created_by_id, kind='embedding')
         except Exception as e:
             print(f"Error initiating embedding generation: {e}")
 
@@ -178,19 +207,9 @@ class VocabularyViewSet(viewsets.ModelViewSet):
 
     @action(detail=False, methods=['get'])
     def export_csv(self, request):
-        response = HttpResponse(content_type='text/csv')
+        queryset = self.filter_queryset(self.get_queryset())
+        response = StreamingHttpResponse(iter_vocabulary_csv(queryset), content_type='text/csv')
         response['Content-Disposition'] = f'attachment; filename="vocabulary_export_{timezone.now().date()}.csv"'
-
-        writer = csv.writer(response)
-        writer.writerow(['Word', 'Translation', 'Type', 'Example', 'Tags', 'Synonyms', 'Antonyms', 'Created At'])
-
-        vocab_list = self.get_queryset()
-        for vocab in vocab_list:
-            tags = ", ".join([t.name for t in vocab.tags.all()])
-            synonyms = ", ".join(vocab.synonyms)
-            antonyms = ", ".join(vocab.antonyms)
-            writer.writerow([vocab.word, vocab.translation, vocab.type, vocab.example, tags, synonyms, antonyms, vocab.created_at])
-
         return response
 
     @action(detail=False, methods=['post'], parser_classes=[MultiPartParser, FormParser])
@@ -203,86 +222,31 @@ class VocabularyViewSet(viewsets.ModelViewSet):
         if not file_obj:
             return Response({'error': 'No file provided'}, status=status.HTTP_400_BAD_REQUEST)
         
+        # Get user's language pair for import
         try:
-            # Use utf-8-sig to handle BOM from Excel
-            decoded_file = file_obj.read().decode('utf-8-sig')
-            io_string = io.StringIO(decoded_file)
-            
-            # Read CSV and normalize headers
-            reader = csv.DictReader(io_string)
-            
-            # Normalize headers (strip whitespace, lowercase)
-            # This is a bit tricky with DictReader as it reads headers immediately.
-            # Instead, we'll handle key lookups robustly.
-            
-            created_count = 0
-            errors = []
-            
-            # Get user's language pair for import
-            try:
-                profile = request.user.profile
-                target_lang = profile.target_language
-                native_lang = profile.native_language
-            except UserProfile.DoesNotExist:
-                target_lang = 'de'
-                native_lang = 'en'
-            
-            for row in reader:
-                try:
-                    # Parse tags
-                    tags_str = row.get('tags', '') or row.get('Tags', '')
-                    tag_names = [t.strip() for t in tags_str.split(',') if t.strip()]
-                    
-                    # Parse synonyms and antonyms
-                    synonyms_str = row.get('synonyms', '') or row.get('Synonyms', '')
-                    synonyms = [s.strip() for s in synonyms_str.split(',') if s.strip()]
-                    
-                    antonyms_str = row.get('antonyms', '') or row.get('Antonyms', '')
-                    antonyms = [a.strip() for a in antonyms_str.split(',') if a.strip()]
+            profile = request.user.profile
+            target_lang = profile.target_language
+            native_lang = profile.native_language
+        except UserProfile.DoesNotExist:
+            target_lang = 'de'
+            native_lang = 'en'
 
-                    # Check for duplicates
-                    word_text = row.get('word') or row.get('Word')
-                    if not word_text:
-                        continue
-                        
-                    # Skip if word already exists for this language pair
-                    if Vocabulary.objects.filter(
-                        word__iexact=word_text, 
-                        created_by=request.user, 
-                        language=target_lang,
-                        native_language=native_lang
-                    ).exists():
-                        continue
-                    
-                    # Create vocabulary with language pair
-                    vocab = Vocabulary.objects.create(
-                        word=word_text,
-                        translation=row.get('translation') or row.get('Translation'),
-                        type=row.get('type') or row.get('Type', 'other'),
-                        example=row.get('example', '') or row.get('Example', ''),
-                        synonyms=synonyms,
-                        antonyms=antonyms,
-                        created_by=request.user,
-                        language=target_lang,
-                        native_language=native_lang
-                    )
-                    
-                    # Add tags
-                    for tag_name in tag_names:
-                        tag, _ = Tag.objects.get_or_create(name=tag_name, user=request.user)
-                        vocab.tags.add(tag)
-                    
-                    created_count += 1
-                except Exception as e:
-                    errors.append(f"Error importing row {row.get('word', 'unknown')}: {str(e)}")
-            
+        importer = VocabularyCSVImporter(request.user, target_lang, native_lang)
+        try:
+            result = importer.run(file_obj)
+        except (UnicodeDecodeError, csv.Error) as e:
+            # Chunks before the bad line are already saved
             return Response({
-                'message': f'Successfully imported {created_count} words',
-                'errors': errors
-            })
-            
-        except Exception as e:
-            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+                'error': str(e),
+                'created': importer.created,
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({
+            'message': f"Successfully imported {result['created']} words",
+            'created': result['created'],
+            'skipped': result['skipped'],
+            'errors': result['errors'],
+        })
 
 class PublicVocabularyViewSet(viewsets.ReadOnlyModelViewSet):
     serializer_class = VocabularySerializer
@@ -294,7 +258,8 @@ class PublicVocabularyViewSet(viewsets.ReadOnlyModelViewSet):
         except UserProfile.DoesNotExist:
             target_lang = 'de'
             
-        return Vocabulary.objects.filter(is_public=True, language=target_lang).order_by('-created_at')
+        queryset = Vocabulary.objects.filter(is_public=True, language=target_lang).order_by('-created_at')
+        return optimize_vocabulary_for_read(queryset, self.request)
 
     @action(detail=True, methods=['post'])
     def copy(self, request, pk=None):
@@ -343,46 +308,57 @@ def get_vocab_by_status(request):
         native_language=native_lang
     )
     
-    filtered_vocab = []
     now = timezone.now()
     
-    for word in queryset:
-        # Determine status
-        if not word.last_practiced_at:
-            status = 'new'
-            recall_prob = 0.0
-        else:
-            days_since = (now - word.last_practiced_at).days
-            recall_prob = HLRScheduler.predict_recall_probability(
-                word.correct_count,
-                word.wrong_count,
-                word.total_practice_count,
-                days_since
-            )
-            
-            # Mastery Definition:
-            # 1. Practiced at least 3 times
-            # 2. Recall Probability > 90%
-            is_mastered = word.total_practice_count >= 3 and recall_prob > 0.9
-            
-            if is_mastered:
-                status = 'mastered'
-            elif recall_prob < 0.5:
-                status = 'new' # "Needs Review" is grouped with New/Weak
-            else:
-                status = 'learning'
-        
-        # Filter
-        if status == status_param:
-            # Add recall_prob to the serialized data for the frontend WiFi signal
-            data = VocabularySerializer(word).data
-            data['recall_probability'] = recall_prob
-            filtered_vocab.append(data)
-            
-    # Sort by recall probability (ascending for new/learning, descending for mastered)
+    # Narrow with the next_due_at index before computing recall:
+    # mastered words are never due, weak (recall < 0.5) words always are.
     if status_param == 'mastered':
-        filtered_vocab.sort(key=lambda x: x['recall_probability'], reverse=True)
+        candidates = queryset.filter(next_due_at__gt=now, total_practice_count__gte=3)
+    elif status_param == 'learning':
+        candidates = queryset.filter(last_practiced_at__isnull=False).filter(
+            Q(next_due_at__lte=now) | Q(total_practice_count__lt=3)
+        )
+    else:
+        candidates = queryset.filter(Q(last_practiced_at__isnull=True) | Q(next_due_at__lte=now))
+    
+    rows = list(candidates.values_list(
+        'id', 'correct_count', 'wrong_count', 'total_practice_count', 'last_practiced_at'
+    ))
+    if rows:
+        ids, correct, wrong, total, last_practiced = zip(*rows)
     else:
-        filtered_vocab.sort(key=lambda x: x['recall_probability'])
+        ids, correct, wrong, total, last_practiced = (), (), (), (), ()
+    days_since = HLRScheduler.batch_days_since(last_practiced, now)
+    practiced = ~np.isnan(days_since)
+    total = np.asarray(total)
+    recall = np.where(
+        practiced,
+        HLRScheduler.batch_estimate(correct, wrong, total, np.nan_to_num(days_since))['recall_probability'],
+        0.0,
+    )
+    
+    # Mastery Definition:
+    # 1. Practiced at least 3 times
+    # 2. Recall Probability > 90%
+    is_mastered = practiced & (total >= 3) & (recall > 0.9)
+    if status_param == 'mastered':
+        matched = is_mastered
+    elif status_param == 'learning':
+        matched = practiced & ~is_mastered & (recall >= 0.5)
+    else:
+        # "Needs Review" (recall < 0.5) is grouped with New/Weak
+        matched = ~practiced | (recall < 0.5)
+    
+    # Sort by recall probability (ascending for new/learning, descending for mastered)
+    order = np.flatnonzero(matched)
+    order = order[np.argsort(-recall[order] if status_param == 'mastered' else recall[order], kind='stable')]
+    
+    words_by_id = Vocabulary.objects.in_bulk([ids[i] for i in order])
+    filtered_vocab = []
+    for i in order:
+        # Add recall_prob to the serialized data for the frontend WiFi signal
+        data = VocabularySerializer(words_by_id[ids[i]]).data
+        data['recall_probability'] = float(recall[i])
+        filtered_vocab.append(data)
         
     return Response(filtered_vocab)
@@ -1,8 +1,12 @@
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
 from api.models import Classroom, ClassMembership, Teacher, LearningPath, PathSubLevel, PathNode, PathEnrollment, NodeProgress, UserProfile
 from rest_framework.test import APIClient
 from rest_framework import status
+from api.services.classroom_path_stats import invalidate_path_stats
 
 class PathStatsTest(TestCase):
     def setUp(self):
@@ -84,3 +88,59 @@ class PathStatsTest(TestCase):
                 f.write(str(e) + "\n")
                 traceback.print_exc(file=f)
             raise e
+
+
+class PathStatsQueryCountTest(PathStatsTest):
+    """path_stats is set-based and cached."""
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.url = f'/api/classrooms/{self.classroom.id}/path_stats/'
+
+    def add_students(self, prefix, count):
+        students = User.objects.bulk_create([User(username=f'{prefix}{i}') for i in range(count)])
+        ClassMembership.objects.bulk_create([
+            ClassMembership(classroom=self.classroom, student=s, status='active') for s in students
+        ])
+        enrollments = PathEnrollment.objects.bulk_create([PathEnrollment(path=self.path, student=s) for s in students])
+        NodeProgress.objects.bulk_create(
+            [NodeProgress(enrollment=e, node=self.node1, status='completed') for e in enrollments]
+            + [NodeProgress(enrollment=e, node=self.node2, status='in_progress') for e in enrollments]
+        )
+        invalidate_path_stats(path_id=self.path.id, classroom_id=self.classroom.id)
+
+    def count_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return len(queries), response.data
+
+    def test_query_count_does_not_grow_with_class_size(self):
+        self.client.get(self.url)  # Warm up auth bookkeeping
+        self.add_students('small', 5)
+        small, data = self.count_queries()
+        self.assertEqual(data['student_count'], 6)
+
+        self.add_students('large', 50)
+        large, data = self.count_queries()
+        self.assertEqual(data['student_count'], 56)
+        self.assertEqual(small, large)
+        self.assertEqual(data['class_average'], 50)
+        self.assertEqual({s['current_node'] for s in data['students']}, {'Node 2'})
+
+    def test_cached_until_node_completed(self):
+        self.client.get(self.url)
+        cached, data = self.count_queries()
+        self.assertEqual(data['class_average'], 50)
+
+        progress = NodeProgress.objects.get(enrollment=self.path_enrollment, node=self.node2)
+        progress.status = 'completed'
+        progress.save()
+        _, data = self.count_queries()
+        self.assertEqual(data['class_average'], 100)
+        self.assertEqual(data['students'][0]['current_node'], 'All caught up')
+
+        warm, _ = self.count_queries()
+        self.assertEqual(warm, cached)
+        self.assertLess(cached, 6)
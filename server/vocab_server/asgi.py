@@ -14,3 +14,7 @@ application = ProtocolTypeRouter({
         )
     ),
 })
+
+# Start the generation pool so jobs orphaned by a previous worker are resumed
+from api.services.job_queue import get_job_queue
+get_job_queue().start()
@@ -12,6 +12,7 @@ Usage:
 
 import os
 from celery import Celery
+from celery.signals import worker_process_shutdown
 
 # Set the default Django settings module
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'vocab_server.settings')
@@ -30,3 +31,11 @@ app.autodiscover_tasks()
 def debug_task(self):
     """Debug task to test Celery is working."""
     print(f'Request: {self.request!r}')
+
+
+@worker_process_shutdown.connect
+def flush_ai_gateway_accounting(**kwargs):
+    """Prefork children exit without running atexit; flush buffered gateway accounting."""
+    from api.ai_gateway.services.accounting import AccountingBuffer
+    if AccountingBuffer._instance is not None:
+        AccountingBuffer._instance.flush()
@@ -81,6 +81,19 @@ TEMPLATES = [
 WSGI_APPLICATION = 'vocab_server.wsgi.application'
 ASGI_APPLICATION = 'vocab_server.asgi.application'
 
+# Channel layer for WebSocket group broadcasts (live games). In-memory works
+# for a single ASGI worker; set CHANNEL_REDIS_URL (requires channels-redis)
+# when several workers share broadcasts.
+if os.environ.get('CHANNEL_REDIS_URL'):
+    CHANNEL_LAYERS = {
+        'default': {
+            'BACKEND': 'channels_redis.core.RedisChannelLayer',
+            'CONFIG': {'hosts': [os.environ['CHANNEL_REDIS_URL']]},
+        },
+    }
+else:
+    CHANNEL_LAYERS = {'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}}
+
 # Database Configuration
 # Support both DATABASE_URL (Render) and individual env vars (local)
 import dj_database_url
@@ -486,3 +499,178 @@ CELERY_BEAT_SCHEDULE = {
     },
 }
 
+
+# ==========================================
+# AI GATEWAY HEDGED REQUESTS
+# ==========================================
+# When enabled, a gateway call still running after its model's estimated
+# latency percentile is raced against the next cross-provider candidate.
+# Callers can force it per request with generate_ai_content(..., hedge=True).
+AI_GATEWAY_HEDGING = {
+    'ENABLED': os.environ.get('AI_GATEWAY_HEDGING', 'False') == 'True',
+    'PERCENTILE': float(os.environ.get('AI_GATEWAY_HEDGE_PERCENTILE', '0.95')),
+    'MIN_DELAY_MS': 2000,   # Never hedge sooner than this
+    'MAX_DELAY_MS': 30000,  # Hedge by this point even for slow models
+}
+
+# ==========================================
+# AI GATEWAY WRITE-BEHIND ACCOUNTING
+# ==========================================
+# Success counters and UsageLog rows are buffered per process and flushed
+# in bulk (see api/ai_gateway/services/accounting.py). Failures that block
+# models are still written immediately.
+AI_GATEWAY_ACCOUNTING = {
+    'WRITE_BEHIND': os.environ.get('AI_GATEWAY_WRITE_BEHIND', 'True') == 'True',
+    'FLUSH_INTERVAL': float(os.environ.get('AI_GATEWAY_ACCOUNTING_FLUSH_INTERVAL', '2.0')),
+    'MAX_PENDING': 500,
+}
+
+# ==========================================
+# AI GATEWAY RESPONSE CACHE
+# ==========================================
+# Exact-match cache with single-flight coalescing of identical in-flight
+# requests. The semantic (embedding similarity) tier is opt-in per feature,
+# e.g. AI_GATEWAY_SEMANTIC_CACHE_FEATURES=exam
+AI_GATEWAY_CACHE = {
+    'TTL': int(os.environ.get('AI_GATEWAY_CACHE_TTL', '3600')),
+    'COALESCE_TIMEOUT': 180,
+    'SEMANTIC_THRESHOLD': float(os.environ.get('AI_GATEWAY_SEMANTIC_CACHE_THRESHOLD', '0.95')),
+    'SEMANTIC_FEATURES': [
+        f.strip() for f in os.environ.get('AI_GATEWAY_SEMANTIC_CACHE_FEATURES', '').split(',') if f.strip()
+    ],
+    'SEMANTIC_FEATURE_THRESHOLDS': {},  # e.g. {'exam': 0.97}
+    'SEMANTIC_MAX_ENTRIES': 1000,
+}
+
+# ==========================================
+# SEMANTIC SEARCH VECTOR INDEX
+# ==========================================
+# Per-(user, language) normalized embedding matrices used by
+# /api/vocab/semantic-search/ (see api/vector_index.py). Files in DIR are a
+# rebuildable cache. HNSW is used above ANN_MIN_SIZE when hnswlib is installed.
+VECTOR_INDEX = {
+    'DIR': os.environ.get('VECTOR_INDEX_DIR', os.path.join(BASE_DIR, 'vector_index')),
+    'ANN_MIN_SIZE': int(os.environ.get('VECTOR_INDEX_ANN_MIN_SIZE', '20000')),
+    'ANN_EF_SEARCH': 64,
+    'PERSIST_DELAY': 2.0,
+}
+
+# Storage format for Vocabulary/SavedText embeddings (api/fields.py):
+# float32 (exact, zero-copy reads), float16 or int8 (quantized, smaller rows)
+EMBEDDING_STORAGE_DTYPE = os.environ.get('EMBEDDING_STORAGE_DTYPE', 'float32')
+
+# ==========================================
+# GENERATION JOB QUEUE
+# ==========================================
+# Bounded per-process pool for exam/podcast/embedding generation
+# (see api/services/job_queue.py). Exam and podcast jobs are resumed from
+# their rows when the worker that owned them stops heartbeating.
+GENERATION_JOBS = {
+    'WORKERS': int(os.environ.get('GENERATION_JOB_WORKERS', '4')),
+    'MAX_QUEUED': int(os.environ.get('GENERATION_JOB_MAX_QUEUED', '100')),
+    'MAX_QUEUED_PER_USER': 5,
+    'MAX_RUNNING_PER_USER': {'interactive': 1, 'batch': 2},
+    'MAX_BATCH_RUNNING': 2,
+    'HEARTBEAT_INTERVAL': 30,
+    'STALE_AFTER': 120,
+    'MAX_ATTEMPTS': 3,
+}
+
+# ==========================================
+# AGENT GRAPHS
+# ==========================================
+# Exam/podcast LangGraph runs checkpoint after every node (api/graph_checkpoint.py)
+# so a resumed job skips finished nodes. Topic analysis and exam plans are
+# reused across jobs with identical inputs for NODE_CACHE_TTL seconds.
+# With EXAM_SECTION_FAN_OUT each exam section is generated, critiqued and
+# refined by its own call, EXAM_SECTION_CONCURRENCY at a time.
+AGENT_GRAPHS = {
+    'CHECKPOINTS': os.environ.get('AGENT_GRAPH_CHECKPOINTS', 'True') == 'True',
+    'NODE_CACHE_TTL': int(os.environ.get('AGENT_NODE_CACHE_TTL', '86400')),
+    'EXAM_SECTION_FAN_OUT': os.environ.get('EXAM_SECTION_FAN_OUT', 'True') == 'True',
+    'EXAM_SECTION_CONCURRENCY': int(os.environ.get('EXAM_SECTION_CONCURRENCY', '3')),
+}
+
+# ==========================================
+# PODCAST AUDIO PRODUCTION
+# ==========================================
+# ProducerAgent synthesizes script segments with Speechify TTS_CONCURRENCY
+# at a time (see api/services/podcast/producer_agent.py). A failed segment
+# is retried SEGMENT_RETRIES times with exponential backoff before the
+# episode fails.
+PODCAST_PRODUCER = {
+    'TTS_CONCURRENCY': int(os.environ.get('PODCAST_TTS_CONCURRENCY', '4')),
+    'SEGMENT_RETRIES': int(os.environ.get('PODCAST_TTS_SEGMENT_RETRIES', '2')),
+    'RETRY_BACKOFF': float(os.environ.get('PODCAST_TTS_RETRY_BACKOFF', '1.0')),
+}
+
+# ==========================================
+# TTS AUDIO CACHE
+# ==========================================
+# Synthesized speech is cached by (provider, voice, language, rate, pitch,
+# normalized text) and shared across users (see api/tts_cache.py). The
+# directory is capped at MAX_BYTES with least-recently-used eviction; set
+# PERSIST_TO_STORAGE to also keep entries in default_storage (S3).
+TTS_CACHE = {
+    'ENABLED': os.environ.get('TTS_CACHE_ENABLED', 'True') == 'True',
+    'DIR': os.environ.get('TTS_CACHE_DIR', os.path.join(BASE_DIR, 'tts_cache')),
+    'MAX_BYTES': int(os.environ.get('TTS_CACHE_MAX_BYTES', str(512 * 1024 * 1024))),
+    'EVICT_TO': 0.9,
+    'PERSIST_TO_STORAGE': os.environ.get('TTS_CACHE_PERSIST_TO_STORAGE', 'False') == 'True',
+    'STORAGE_PREFIX': 'tts_cache',
+}
+
+# ==========================================
+# EMBEDDING BACKFILL
+# ==========================================
+# Background embedding of words whose text changed since they were last
+# embedded (see api/services/embedding_backfill.py). BATCH_SIZE texts go in
+# each provider request, with at most CONCURRENCY requests in flight.
+EMBEDDING_BACKFILL = {
+    'BATCH_SIZE': int(os.environ.get('EMBEDDING_BACKFILL_BATCH_SIZE', '256')),
+    'CONCURRENCY': int(os.environ.get('EMBEDDING_BACKFILL_CONCURRENCY', '4')),
+    'MAX_FAILED_BATCHES': 3,
+    'STALE_AFTER': 300,
+}
+
+# ==========================================
+# API USAGE LOG
+# ==========================================
+# APIUsageMiddleware buffers APIUsageLog rows in a bounded ring buffer that
+# a background thread bulk-inserts (see api/usage_log_buffer.py). Only a
+# sample of request bodies is stored, redacted and truncated. Rows the
+# database rejects MAX_ATTEMPTS times are logged and dropped.
+API_USAGE_LOG = {
+    'WRITE_BEHIND': os.environ.get('API_USAGE_LOG_WRITE_BEHIND', 'True') == 'True',
+    'FLUSH_INTERVAL': float(os.environ.get('API_USAGE_LOG_FLUSH_INTERVAL', '2.0')),
+    'FLUSH_AT': 500,
+    'MAX_BUFFERED': int(os.environ.get('API_USAGE_LOG_MAX_BUFFERED', '5000')),
+    'PAYLOAD_SAMPLE_RATE': float(os.environ.get('API_USAGE_LOG_PAYLOAD_SAMPLE_RATE', '0.1')),
+    'MAX_BODY_BYTES': 64 * 1024,
+    'MAX_PAYLOAD_CHARS': 2000,
+    'MAX_ATTEMPTS': 3,
+}
+
+# ==========================================
+# USER STATS
+# ==========================================
+# The dashboard reads a per-user UserStatsSnapshot kept up to date as words
+# are practiced, added and deleted (see api/services/user_stats.py). HLR
+# mastery buckets decay with time and are recomputed on read once older than
+# REFRESH_INTERVAL seconds, or by `manage.py refresh_user_stats`.
+USER_STATS = {
+    'REFRESH_INTERVAL': int(os.environ.get('USER_STATS_REFRESH_INTERVAL', '3600')),
+}
+
+# ==========================================
+# LIVE GAMES
+# ==========================================
+# Game rooms hold live GameSession state in memory and broadcast diffs over
+# ws/game/<id>/ (see api/game_rooms.py). Participant scores, flags and
+# heartbeats are written back every FLUSH_INTERVAL seconds; changes within
+# BROADCAST_INTERVAL seconds go out as one diff.
+GAME_ENGINE = {
+    'FLUSH_INTERVAL': float(os.environ.get('GAME_ENGINE_FLUSH_INTERVAL', '2.0')),
+    'BROADCAST_INTERVAL': 0.05,
+    'ROOM_IDLE_TIMEOUT': 300,
+}
@@ -25,3 +25,7 @@ except Exception as e:
     # This allows the app to start and show more detailed errors
 
 application = get_wsgi_application()
+
+# Start the generation pool so jobs orphaned by a previous worker are resumed
+from api.services.job_queue import get_job_queue
+get_job_queue().start()